@@ -0,0 +1,89 @@
+"""
+Benchmarks of the ticker service.
+
+They are plain modules run from the project directory, e.g.
+`python -m benchmarks.rendering`, and are not collected by pytest.
+"""
+
+import json
+import os
+import time
+from typing import Callable, Dict, List
+
+import django
+
+
+def setup_django() -> None:
+    """
+    Configure Django with the test settings unless other settings are
+    given, so benchmarks can import the views and serializers.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "etermax_api_service.settings.test")
+    django.setup()
+
+
+def measure(function: Callable[[], object], repeat: int = 5) -> float:
+    """
+    Measure the best wall time of `repeat` calls of a function.
+
+    Returns:
+        float: The seconds taken by the fastest call.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def report(name: str, rows: int, timings: Dict[str, float]) -> None:
+    """
+    Print the total and per-row time of each variant of a benchmark.
+    """
+    print(f"{name} ({rows} rows)")
+    for variant, seconds in timings.items():
+        print(f"  {variant:<24} {seconds * 1000:10.2f} ms {seconds / rows * 1e6:10.3f} us/row")
+
+
+def save_report(path: str, meta: Dict, timings: Dict[str, float]) -> None:
+    """
+    Save the timings of a run as JSON, to be compared with later runs.
+
+    Args:
+        path (str): The path of the report.
+        meta (Dict): What the run measured, e.g. the number of samples.
+        timings (Dict[str, float]): The seconds taken by each benchmark.
+    """
+    with open(path, "w") as file:
+        json.dump({"meta": meta, "timings": timings}, file, indent=2, sort_keys=True)
+
+
+def compare(timings: Dict[str, float], baseline_path: str, threshold: float) -> List[str]:
+    """
+    Compare the timings of a run with a saved report, printing the ratio
+    of each benchmark to its baseline.
+
+    Args:
+        timings (Dict[str, float]): The seconds taken by each benchmark.
+        baseline_path (str): The path of the report to compare with.
+        threshold (float): The tolerated slowdown, 0.2 for 20%.
+
+    Returns:
+        List[str]: The benchmarks slower than their baseline by more than
+        the threshold.
+    """
+    with open(baseline_path) as file:
+        baseline = json.load(file)["timings"]
+
+    regressions = []
+    for name, seconds in timings.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name] if baseline[name] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"  {name:<40} {ratio:6.2f}x{flag}")
+    return regressions
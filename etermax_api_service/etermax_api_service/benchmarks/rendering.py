@@ -0,0 +1,58 @@
+"""
+Benchmark of the rendering of ticker list pages.
+
+Compares validating the rows with TickerSerializer and rendering them
+with DRF's JSON renderer, as the ticker list used to, against rendering
+the pre-shaped rows with orjson.
+
+    python -m benchmarks.rendering [--rows 1000 10000]
+"""
+
+import argparse
+
+from benchmarks import measure, report, setup_django
+
+
+def make_page(rows: int) -> dict:
+    """
+    Build a ticker list page of `rows` rows shaped as the ticker reads them.
+    """
+    return {
+        "count": rows,
+        "next": None,
+        "previous": None,
+        "results": [
+            {"timestamp": 1717135270 + index, "price": 80000000.0 + index * 0.5}
+            for index in range(rows)
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+
+    from ticker.renderers import ORJSONRenderer
+    from ticker.serializers import TickerSerializer
+
+    def serialized(page: dict) -> bytes:
+        serializer = TickerSerializer(data=page["results"], many=True)
+        serializer.is_valid()
+        return JSONRenderer().render({**page, "results": serializer.data})
+
+    for rows in args.rows:
+        page = make_page(rows)
+        report("ticker list page", rows, {
+            "serializer + json": measure(lambda: serialized(page), args.repeat),
+            "json": measure(lambda: JSONRenderer().render(page), args.repeat),
+            "orjson": measure(lambda: ORJSONRenderer().render(page), args.repeat),
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Benchmark of the ticker reads and endpoints over a large series.
+
+Seeds a ticker series of `--samples` unevenly spaced samples, with its
+rollup buckets, into the storage backend of `--backend`, using fakeredis
+or the Redis of `--redis-url` and a temporary SQLite database, then
+measures the ticker methods and the views over windows of several sizes
+ending at the latest sample. The response cache is cleared before every
+call, so each one computes its answer.
+
+    python -m benchmarks.tickers --samples 1000000 --output report.json
+    python -m benchmarks.tickers --compare report.json
+    python -m benchmarks.tickers --backend sqlite
+
+With `--compare`, the run exits with status 1 when a benchmark is slower
+than in the given report by more than `--threshold`.
+
+`--redis-url` must point to a scratch database: the keys of the series
+are deleted before seeding.
+"""
+
+import argparse
+import os
+import platform
+import sys
+import tempfile
+from typing import Dict
+
+import numpy as np
+
+from benchmarks import compare, measure, save_report, setup_django
+
+WINDOWS = {
+    "1m": 60,
+    "1h": 3600,
+    "1d": 86400,
+    "7d": 7 * 86400,
+}
+
+# First sample of the seeded series, a day start
+SEED_SINCE = 1704067200
+
+
+def make_samples(count: int, seed: int = 0):
+    """
+    Generate `count` samples of a random walk, spaced by bursts of a few
+    milliseconds up to pauses of a minute, two seconds apart on average.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The timestamps and the prices.
+    """
+    generator = np.random.default_rng(seed)
+    gaps = np.round(generator.exponential(2.0, count), 3).clip(0.001, 60)
+    timestamps = np.round(SEED_SINCE + np.cumsum(gaps) - gaps[0], 3)
+    prices = np.round(80000000.0 + np.cumsum(generator.normal(0, 500, count)), 2)
+    return timestamps, prices
+
+
+def make_buckets(timestamps: np.ndarray, prices: np.ndarray, resolution: int) -> Dict:
+    """
+    Fold sorted samples into the rollup buckets of a resolution, as the
+    rollup script would have built them sample by sample.
+
+    Returns:
+        Dict: The `ROLLUP_FIELDS` values of each bucket, by bucket start.
+    """
+    from redis_cache_manager import fold_rollup_buckets
+
+    return fold_rollup_buckets(
+        np.column_stack((
+            prices, np.ones(len(prices)), prices, prices, prices,
+            timestamps, prices, timestamps, np.zeros(len(prices))
+        )),
+        resolution
+    )
+
+
+def seed(manager, key: str, count: int, chunk_size: int = 50000) -> float:
+    """
+    Store a generated series and its rollups under `key` of an empty
+    storage backend.
+
+    Sending the samples through the rollup script takes about a
+    millisecond per sample on fakeredis, so the raw samples are added in
+    bulk and their buckets folded with numpy.
+
+    Returns:
+        float: The timestamp of the latest sample.
+    """
+    from common import encode_member
+    from ticker.rollups import ROLLUP_RESOLUTIONS
+
+    timestamps, prices = make_samples(count)
+    for start in range(0, count, chunk_size):
+        chunk = slice(start, start + chunk_size)
+        manager.set_data(key=key, value={
+            encode_member(timestamp, price): timestamp
+            for timestamp, price in zip(timestamps[chunk].tolist(), prices[chunk].tolist())
+        })
+
+    for resolution in ROLLUP_RESOLUTIONS:
+        manager.set_rollup_buckets(
+            key=key,
+            resolution=resolution,
+            buckets=make_buckets(timestamps, prices, resolution)
+        )
+    manager.set_rollup_since(key=key, since=SEED_SINCE)
+    return float(timestamps[-1])
+
+
+def run(latest: float, key: str, repeat: int) -> Dict[str, float]:
+    """
+    Measure the ticker methods and the views over each window.
+
+    Returns:
+        Dict[str, float]: The seconds taken by each benchmark.
+    """
+    from rest_framework.test import APIRequestFactory
+
+    from ticker.views import (
+        TickerAveragePriceView,
+        TickerBaseView,
+        TickerListView,
+        TickerPriceView,
+    )
+
+    ticker = TickerBaseView.ticker
+    factory = APIRequestFactory()
+    views = {
+        "average-price view": TickerAveragePriceView.as_view(),
+        "ticker-list view": TickerListView.as_view(),
+        "ticker-price view": TickerPriceView.as_view(),
+    }
+
+    def call_view(name: str, params: Dict) -> None:
+        TickerBaseView.response_cache.clear()
+        response = views[name](factory.get("/", params))
+        if response.status_code != 200:
+            raise RuntimeError(f"{name} answered {response.status_code}: {response.data}")
+        response.render()
+
+    timings = {}
+    for window, seconds in WINDOWS.items():
+        since, until = latest - seconds, latest
+        middle = str(latest - seconds / 2)
+        benchmarks = {
+            "get_average_price": lambda: ticker.get_average_price(
+                since_timestamp=since, until_timestamp=until, key=key
+            ),
+            "get_average_price twap": lambda: ticker.get_average_price(
+                since_timestamp=since, until_timestamp=until, key=key, mode="twap"
+            ),
+            "get_tickers_list": lambda: ticker.get_tickers_list(
+                since_timestamp=since, until_timestamp=until, key=key
+            ),
+            "get_price": lambda: ticker.get_price(timestamp=middle, key=key),
+            "average-price view": lambda: call_view(
+                "average-price view", {"since": since, "until": until}
+            ),
+            "ticker-list view": lambda: call_view(
+                "ticker-list view", {"since": since, "until": until, "page_size": 1000}
+            ),
+            "ticker-price view": lambda: call_view(
+                "ticker-price view", {"timestamp": middle}
+            ),
+        }
+        for name, function in benchmarks.items():
+            seconds_taken = measure(function, repeat)
+            timings[f"{name} [{window}]"] = seconds_taken
+            print(f"  {name + ' [' + window + ']':<40} {seconds_taken * 1000:10.2f} ms")
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=1000000)
+    parser.add_argument("--backend", default="redis", choices=("redis", "compact", "sqlite"))
+    parser.add_argument("--redis-url", help="Redis to seed, fakeredis if missing.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Save the timings as JSON to this path.")
+    parser.add_argument("--compare", help="Compare the timings with this report.")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    directory = tempfile.TemporaryDirectory()
+    os.environ["TICKER_STORAGE_BACKEND"] = args.backend
+    os.environ["TICKER_SQLITE_PATH"] = os.path.join(directory.name, "tickers.sqlite3")
+    setup_django()
+    import redis
+    import redis_cache_manager
+    from django.conf import settings
+    from storage_backends import get_storage_backend
+    from ticker.ticker import BuenbitTicker
+
+    if args.redis_url:
+        client = redis.Redis.from_url(args.redis_url)
+    else:
+        import fakeredis
+        client = fakeredis.FakeRedis()
+    redis_cache_manager.redis_client = client
+
+    key = BuenbitTicker.market_key(settings.TICKER_DEFAULT_MARKET)
+    client.delete(key, *client.scan_iter(match=f"{key}:*"))
+    print(f"Seeding {args.samples} samples into {args.backend}")
+    latest = seed(get_storage_backend(), key, args.samples)
+
+    print("Timings (best of %d)" % args.repeat)
+    timings = run(latest, key, args.repeat)
+
+    if args.output:
+        save_report(args.output, {
+            "samples": args.samples,
+            "backend": args.backend,
+            "redis": args.redis_url or "fakeredis",
+            "python": platform.python_version(),
+        }, timings)
+    if args.compare:
+        print(f"Ratio to {args.compare}")
+        if compare(timings, args.compare, args.threshold):
+            sys.exit(1)
+    directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
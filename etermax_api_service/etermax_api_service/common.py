@@ -17,3 +17,56 @@ def convert_to_float(value):
     except ValueError:
         raise Exception("Value must be valid 'numeric strings'.")
     return value
+
+
+def encode_member(identity, value) -> str:
+    """
+    Encode a sorted set member as `<identity>:<value>`.
+
+    Prefixing the value with an identity (e.g. the timestamp of a price)
+    keeps equal values stored under different identities from overwriting
+    each other in the sorted set.
+
+    Args:
+        identity (int | float): The identity of the value.
+        value (float): The value to be stored.
+
+    Returns:
+        str: The encoded member.
+    """
+    if isinstance(identity, float) and identity.is_integer():
+        identity = int(identity)
+    return f"{identity}:{value}"
+
+
+def decode_member(member) -> float:
+    """
+    Decode the value stored in a sorted set member.
+
+    Args:
+        member (bytes | str | float): The member, either encoded with
+        `encode_member` or a plain numeric value.
+
+    Returns:
+        float: The value of the member.
+    """
+    if isinstance(member, bytes):
+        member = member.decode()
+    return float(str(member).rsplit(":", 1)[-1])
+
+
+def format_timestamp(timestamp):
+    """
+    Format the timestamp of a sample for a response.
+
+    Whole seconds are returned as an int, as they always were, and
+    sub-second timestamps as a float, so they can be looked up exactly.
+
+    Args:
+        timestamp (int | float): The timestamp of the sample.
+
+    Returns:
+        int | float: The formatted timestamp.
+    """
+    timestamp = float(timestamp)
+    return int(timestamp) if timestamp.is_integer() else timestamp
@@ -0,0 +1,646 @@
+"""
+Compact storage of the `<timestamp>:<value>` sorted sets in Redis.
+
+The members of each hour of a sorted set are packed into a single string
+of fixed-width binary records: the millisecond offset of the timestamp
+from the start of the hour as a uint32, and the value scaled to an int64.
+That is 12 bytes per member, instead of the member string, the double
+score and the skiplist and dict entries of a sorted set member. Range
+reads only fetch the chunks overlapping the range and decode them with
+`numpy.frombuffer`.
+
+Rollup buckets, watermarks, retention horizons, plain values and pub/sub
+are stored as RedisCacheManager stores them.
+"""
+
+import math
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import redis_cache_manager
+from common import decode_member, encode_member
+from redis_cache_manager import (
+    ROLLUP_FIELDS,
+    RedisCacheManager,
+    RedisCacheManagerBase,
+    _fold_stats,
+    _parse_bound,
+    _rollup_keys,
+    _rollup_mapping,
+    _rollup_since_key,
+    fold_rollup_buckets,
+)
+
+# Width of the chunks in seconds, the offsets of an hour in milliseconds
+# fit in a uint32
+CHUNK_WIDTH = 3600
+
+RECORD_DTYPE = np.dtype([("offset", "<u4"), ("value", "<i8")])
+
+
+def _chunk_key(key: str, chunk: int) -> str:
+    """
+    Build the key holding the members of a sorted set within a chunk.
+    """
+    return f"{key}:chunk:{chunk}"
+
+
+def _chunk_index_key(key: str) -> str:
+    """
+    Build the key of the sorted set indexing the chunk starts.
+    """
+    return f"{key}:chunks"
+
+
+def _slice_range(timestamps: np.ndarray, start, end) -> slice:
+    """
+    Find the positions of the sorted timestamps within a score range.
+    """
+    low, low_exclusive = _parse_bound(start)
+    high, high_exclusive = _parse_bound(end)
+    first = np.searchsorted(timestamps, low, side="right" if low_exclusive else "left")
+    last = np.searchsorted(timestamps, high, side="left" if high_exclusive else "right")
+    return slice(int(first), int(max(first, last)))
+
+
+def _to_members(timestamps: np.ndarray, values: np.ndarray) -> List[Tuple[bytes, float]]:
+    """
+    Encode decoded records as the `(member, score)` pairs of a sorted set.
+    """
+    timestamps = timestamps.tolist()
+    return [
+        (encode_member(timestamp, value).encode(), timestamp)
+        for timestamp, value in zip(timestamps, values.tolist())
+    ]
+
+
+class CompactRedisCacheManager(RedisCacheManager):
+    """
+    RedisCacheManager storing the members of the sorted sets in hourly
+    chunks of binary records.
+
+    Timestamps are kept to the millisecond and values to `decimals`
+    decimal places. Writing a member rewrites its chunk, so writes cost
+    more than with sorted sets: this backend trades write throughput for
+    memory. Reads are served by a fresh read replica when replicas are
+    configured, writes by the primary.
+    """
+
+    def __init__(self, decimals: int = 6):
+        """
+        Initialize the CompactRedisCacheManager.
+
+        Args:
+            decimals (int, optional): The decimal places of the values
+            kept. Defaults to 6.
+        """
+        self.scale = 10 ** decimals
+
+    def encode(self, value: Dict) -> Dict[int, np.ndarray]:
+        """
+        Encode `{member: score}` pairs as the records of their chunks.
+
+        Returns:
+            Dict[int, np.ndarray]: The sorted records of each chunk, by
+            chunk start.
+        """
+        members = list(value)
+        milliseconds = np.round(
+            np.fromiter(map(float, value.values()), dtype=np.float64, count=len(members)) * 1000
+        ).astype(np.int64)
+        values = np.round(
+            np.fromiter(map(decode_member, members), dtype=np.float64, count=len(members))
+            * self.scale
+        ).astype(np.int64)
+
+        chunks = milliseconds // (CHUNK_WIDTH * 1000) * CHUNK_WIDTH
+        records = {}
+        for chunk in np.unique(chunks).tolist():
+            selected = chunks == chunk
+            chunk_records = np.empty(int(selected.sum()), dtype=RECORD_DTYPE)
+            chunk_records["offset"] = milliseconds[selected] - chunk * 1000
+            chunk_records["value"] = values[selected]
+            records[chunk] = np.unique(chunk_records)
+        return records
+
+    def decode(self, chunk: int, blob: Optional[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Decode the records of a chunk.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The timestamps and the values,
+            in score order.
+        """
+        records = np.frombuffer(blob or b"", dtype=RECORD_DTYPE)
+        timestamps = (chunk * 1000 + records["offset"].astype(np.int64)) / 1000
+        return timestamps, records["value"] / self.scale
+
+    def get_chunks(self, key: str, start, end, client=None) -> List[int]:
+        """
+        Retrieve the starts of the chunks of a sorted set overlapping a
+        score range, from `client`, defaulting to the read client.
+        """
+        low, _ = _parse_bound(start)
+        high, high_exclusive = _parse_bound(end)
+        client = client or redis_cache_manager._read_client()
+        try:
+            chunks = client.zrangebyscore(
+                _chunk_index_key(key),
+                "-inf" if math.isinf(low) else f"({low - CHUNK_WIDTH}",
+                f"({high}" if high_exclusive else high
+            )
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+        return [int(chunk) for chunk in chunks]
+
+    def read_chunks(
+        self,
+        key: str,
+        chunks: Sequence[int],
+        client=None
+    ) -> Iterator[Tuple[int, bytes]]:
+        """
+        Read chunks of a sorted set from `client`, defaulting to the read
+        client, fetching up to a day of chunks per round-trip.
+
+        Yields:
+            Tuple[int, bytes]: The start and the records of each chunk.
+        """
+        client = client or redis_cache_manager._read_client()
+        for offset in range(0, len(chunks), 24):
+            batch = chunks[offset:offset + 24]
+            try:
+                blobs = client.mget(
+                    [_chunk_key(key, chunk) for chunk in batch]
+                )
+            except Exception as e:
+                raise RuntimeError(f"Error getting data from Redis cache: {e}")
+            yield from zip(batch, blobs)
+
+    def count_chunks(self, key: str, chunks: Sequence[int], client=None) -> List[int]:
+        """
+        Count the records of chunks of a sorted set from the length of
+        their strings, without reading them.
+
+        Returns:
+            List[int]: The number of records of each chunk.
+        """
+        client = client or redis_cache_manager._read_client()
+        try:
+            pipeline = client.pipeline(transaction=False)
+            for chunk in chunks:
+                pipeline.strlen(_chunk_key(key, chunk))
+            lengths = pipeline.execute() if chunks else []
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+        return [length // RECORD_DTYPE.itemsize for length in lengths]
+
+    def get_z_arrays_by_score(self, key: str, start, end) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retrieve a score range of a sorted set as arrays, without encoding
+        its members.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The timestamps and the values
+            within the range, in score order.
+        """
+        # Chunks are listed and read from the same replica
+        client = redis_cache_manager._read_client()
+        timestamps, values = [np.empty(0)], [np.empty(0)]
+        chunks = self.get_chunks(key, start, end, client=client)
+        for chunk, blob in self.read_chunks(key, chunks, client=client):
+            chunk_timestamps, chunk_values = self.decode(chunk, blob)
+            selected = _slice_range(chunk_timestamps, start, end)
+            timestamps.append(chunk_timestamps[selected])
+            values.append(chunk_values[selected])
+        return np.concatenate(timestamps), np.concatenate(values)
+
+    def set_data(self, key: str, value: Dict) -> None:
+        """
+        Add members to a sorted set.
+
+        Args:
+            key (str): The key of the sorted set.
+            value (Dict): The members to be added, with their scores.
+        """
+        self.set_data_with_rollups(key=key, value=value, resolutions=())
+
+    def set_data_with_rollups(
+        self,
+        key: str,
+        value: Dict,
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Add members to a sorted set and rebuild the rollup buckets of the
+        chunks they land in.
+
+        Each chunk is rewritten in a WATCH/MULTI transaction, retried if
+        the chunk is written concurrently. Buckets narrower than a chunk
+        are folded from its members, wider buckets from the buckets of
+        the chunk width, which must then be one of the resolutions.
+
+        Args:
+            key (str): The key of the sorted set.
+            value (Dict): The members to be added, with their scores.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+
+        Raises:
+            ValueError: If a resolution doesn't divide the chunk width and
+            isn't a multiple of a chunk width resolution.
+        """
+        narrow = [resolution for resolution in resolutions if resolution <= CHUNK_WIDTH]
+        wide = [resolution for resolution in resolutions if resolution > CHUNK_WIDTH]
+        if (
+            any(CHUNK_WIDTH % resolution for resolution in narrow)
+            or any(resolution % CHUNK_WIDTH for resolution in wide)
+            or (wide and CHUNK_WIDTH not in narrow)
+        ):
+            raise ValueError(
+                f"Resolutions must divide {CHUNK_WIDTH} seconds, or be multiples "
+                f"of it along with {CHUNK_WIDTH} itself."
+            )
+        if not value:
+            return
+
+        hour_hash, _ = _rollup_keys(key, CHUNK_WIDTH)
+        for chunk, records in self.encode(value).items():
+            chunk_key = _chunk_key(key, chunk)
+
+            def update(pipeline, chunk=chunk, records=records, chunk_key=chunk_key):
+                stored = np.frombuffer(pipeline.get(chunk_key) or b"", dtype=RECORD_DTYPE)
+                merged = np.unique(np.concatenate((stored, records)))
+                if len(merged) == len(stored):
+                    return
+
+                # Wide buckets are folded from the chunk buckets read before
+                # the transaction, but for the chunk being rewritten
+                wide_pieces = {}
+                for resolution in wide:
+                    bucket = chunk // resolution * resolution
+                    hours = list(range(bucket, bucket + resolution, CHUNK_WIDTH))
+                    fields = pipeline.hmget(hour_hash, [
+                        f"{hour}:{name}" for hour in hours for name in ROLLUP_FIELDS
+                    ])
+                    wide_pieces[resolution] = {
+                        hour: [float(field) for field in fields[index:index + len(ROLLUP_FIELDS)]]
+                        for hour, index in zip(hours, range(0, len(fields), len(ROLLUP_FIELDS)))
+                        if None not in fields[index:index + len(ROLLUP_FIELDS)]
+                    }
+
+                timestamps, values = self.decode(chunk, merged.tobytes())
+                pieces = np.column_stack((
+                    values, np.ones(len(values)), values, values, values,
+                    timestamps, values, timestamps, np.zeros(len(values))
+                ))
+                pipeline.multi()
+                pipeline.set(chunk_key, merged.tobytes())
+                pipeline.zadd(_chunk_index_key(key), {chunk: chunk})
+                buckets = {}
+                for resolution in narrow:
+                    buckets[resolution] = fold_rollup_buckets(pieces, resolution)
+                for resolution in wide:
+                    hour_pieces = {**wide_pieces[resolution], **buckets[CHUNK_WIDTH]}
+                    buckets[resolution] = fold_rollup_buckets(
+                        [hour_pieces[hour] for hour in sorted(hour_pieces)],
+                        resolution
+                    )
+                for resolution, resolution_buckets in buckets.items():
+                    hash_key, index_key = _rollup_keys(key, resolution)
+                    pipeline.hset(hash_key, mapping=_rollup_mapping(resolution_buckets))
+                    pipeline.zadd(index_key, {bucket: bucket for bucket in resolution_buckets})
+                if resolutions:
+                    pipeline.set(_rollup_since_key(key), float(timestamps[0]), nx=True)
+
+            try:
+                redis_cache_manager.redis_client.transaction(
+                    update,
+                    chunk_key,
+                    *([hour_hash] if wide else [])
+                )
+            except Exception as e:
+                raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+    # Each sorted set is written chunk by chunk, with no scripts to batch
+    set_many_data_with_rollups = RedisCacheManagerBase.set_many_data_with_rollups
+    write_many = RedisCacheManagerBase.write_many
+    get_z_latest = RedisCacheManagerBase.get_z_latest
+    get_z_ranges_by_score = RedisCacheManagerBase.get_z_ranges_by_score
+
+    def get_z_range_by_score(self, key: str, start: str, end: str) -> List[Tuple[bytes, float]]:
+        """
+        Retrieve a score range of a sorted set.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            List[Tuple[bytes, float]]: The elements within the range, with
+            their scores.
+        """
+        return _to_members(*self.get_z_arrays_by_score(key=key, start=start, end=end))
+
+    def get_z_range_by_score_page(
+        self,
+        key: str,
+        start: str,
+        end: str,
+        offset: int,
+        count: int
+    ) -> Tuple[int, List[Tuple[bytes, float]]]:
+        """
+        Retrieve a page of a score range of a sorted set, along with the
+        total number of elements in the range.
+
+        The chunks are counted from their length, only the chunks at the
+        edges of the range being decoded to count the members within it,
+        and only the chunks overlapping the page are read.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            offset (int): The number of elements to skip.
+            count (int): The maximum number of elements to return, 0 to
+            only count the range.
+
+        Returns:
+            Tuple[int, List[Tuple[bytes, float]]]: The number of elements
+            in the range and the elements of the page, with their scores.
+        """
+        client = redis_cache_manager._read_client()
+        chunks = self.get_chunks(key, start, end, client=client)
+        sizes = self.count_chunks(key, chunks, client=client)
+
+        # Chunks in between the edges are entirely within the range
+        decoded = {}
+        edges = sorted({chunks[0], chunks[-1]}) if chunks else []
+        for chunk, blob in self.read_chunks(key, edges, client=client):
+            timestamps, values = self.decode(chunk, blob)
+            selected = _slice_range(timestamps, start, end)
+            decoded[chunk] = timestamps[selected], values[selected]
+            sizes[chunks.index(chunk)] = len(decoded[chunk][0])
+
+        page_chunks, skipped, first = [], 0, 0
+        for chunk, size in zip(chunks, sizes):
+            if first + size > offset and first < offset + count:
+                if not page_chunks:
+                    skipped = first
+                page_chunks.append(chunk)
+            first += size
+
+        timestamps, values = [np.empty(0)], [np.empty(0)]
+        missing = [chunk for chunk in page_chunks if chunk not in decoded]
+        for chunk, blob in self.read_chunks(key, missing, client=client):
+            decoded[chunk] = self.decode(chunk, blob)
+        for chunk in page_chunks:
+            timestamps.append(decoded[chunk][0])
+            values.append(decoded[chunk][1])
+        page = slice(offset - skipped, offset - skipped + count)
+        return sum(sizes), _to_members(
+            np.concatenate(timestamps)[page],
+            np.concatenate(values)[page]
+        )
+
+    def iter_z_range_by_score(
+        self,
+        key: str,
+        start: str,
+        end: str,
+        batch_size: int
+    ) -> Iterator[List[Tuple[bytes, float]]]:
+        """
+        Iterate over a score range of a sorted set in batches, reading
+        its chunks as they are needed.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            batch_size (int): The maximum number of elements per batch.
+
+        Yields:
+            List[Tuple[bytes, float]]: Batches of elements in score order,
+            with their scores.
+        """
+        client = redis_cache_manager._read_client()
+        pending = []
+        chunks = self.get_chunks(key, start, end, client=client)
+        for chunk, blob in self.read_chunks(key, chunks, client=client):
+            timestamps, values = self.decode(chunk, blob)
+            selected = _slice_range(timestamps, start, end)
+            pending.extend(_to_members(timestamps[selected], values[selected]))
+            while len(pending) >= batch_size:
+                yield pending[:batch_size]
+                pending = pending[batch_size:]
+        if pending:
+            yield pending
+
+    def get_z_last_range(
+        self,
+        key: str,
+        count: int,
+        start: str = "-inf",
+        end: str = "+inf"
+    ) -> List[Tuple[bytes, float]]:
+        """
+        Retrieve the elements with the highest scores of a sorted set,
+        optionally within a score range, reading its chunks from the
+        last one backwards.
+
+        Args:
+            key (str): The key of the sorted set.
+            count (int): The maximum number of elements to return.
+            start (str, optional): The minimum score of the range.
+            end (str, optional): The maximum score of the range.
+
+        Returns:
+            List[Tuple[bytes, float]]: The elements in score order, with
+            their scores.
+        """
+        timestamps, values = [], []
+        found = 0
+        client = redis_cache_manager._read_client()
+        chunks = self.get_chunks(key, start, end, client=client)[::-1]
+        for chunk, blob in self.read_chunks(key, chunks, client=client):
+            if found >= count:
+                break
+            chunk_timestamps, chunk_values = self.decode(chunk, blob)
+            selected = _slice_range(chunk_timestamps, start, end)
+            timestamps.insert(0, chunk_timestamps[selected])
+            values.insert(0, chunk_values[selected])
+            found += len(timestamps[0])
+        if not count or not found:
+            return []
+        return _to_members(np.concatenate(timestamps)[-count:], np.concatenate(values)[-count:])
+
+    def get_z_last_score(self, key: str) -> Optional[float]:
+        """
+        Retrieve the highest score of a sorted set.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The highest score, None if the set is empty.
+        """
+        range_data = self.get_z_last_range(key=key, count=1)
+        return range_data[0][1] if range_data else None
+
+    def replace_data(self, key: str, removed: List, value: Dict) -> None:
+        """
+        Remove members from a sorted set and add new ones, rewriting each
+        chunk involved in a WATCH/MULTI transaction.
+
+        Members are located by the timestamp they are encoded with.
+        Members without one, as in the legacy `{price: timestamp}` layout,
+        can't be stored in the chunks and are ignored.
+
+        Args:
+            key (str): The key of the sorted set.
+            removed (List): The members to be removed.
+            value (Dict): The members to be added, with their scores.
+        """
+        removed = [
+            member.decode() if isinstance(member, bytes) else str(member)
+            for member in removed
+        ]
+        removed_records = self.encode({
+            member: float(member.rsplit(":", 1)[0])
+            for member in removed if ":" in member
+        })
+        added_records = self.encode(value)
+
+        for chunk in sorted({*removed_records, *added_records}):
+            chunk_key = _chunk_key(key, chunk)
+            dropped = set(removed_records.get(chunk, np.empty(0, RECORD_DTYPE)).tolist())
+            added = added_records.get(chunk, np.empty(0, RECORD_DTYPE))
+
+            def replace(pipeline, chunk=chunk, chunk_key=chunk_key, dropped=dropped, added=added):
+                stored = np.frombuffer(pipeline.get(chunk_key) or b"", dtype=RECORD_DTYPE)
+                kept = stored[[record not in dropped for record in stored.tolist()]]
+                merged = np.unique(np.concatenate((kept, added)))
+                pipeline.multi()
+                if len(merged):
+                    pipeline.set(chunk_key, merged.tobytes())
+                    pipeline.zadd(_chunk_index_key(key), {chunk: chunk})
+                else:
+                    pipeline.delete(chunk_key)
+                    pipeline.zrem(_chunk_index_key(key), chunk)
+
+            try:
+                redis_cache_manager.redis_client.transaction(replace, chunk_key)
+            except Exception as e:
+                raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+    def scan_z_members(
+        self,
+        key: str,
+        batch_size: int
+    ) -> Iterator[List[Tuple[bytes, float]]]:
+        """
+        Iterate over all the members of a sorted set in batches.
+
+        Args:
+            key (str): The key of the sorted set.
+            batch_size (int): The maximum number of members per batch.
+
+        Yields:
+            List[Tuple[bytes, float]]: Batches of members with their scores.
+        """
+        return self.iter_z_range_by_score(
+            key=key,
+            start="-inf",
+            end="+inf",
+            batch_size=batch_size
+        )
+
+    def remove_z_range_by_score(self, key: str, start: str, end: str) -> int:
+        """
+        Remove the members of a sorted set within a score range, deleting
+        the chunks left empty.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            int: The number of members removed.
+        """
+        removed = 0
+        chunks = self.get_chunks(key, start, end, client=redis_cache_manager.redis_client)
+        for chunk in chunks:
+            chunk_key = _chunk_key(key, chunk)
+
+            def remove(pipeline, chunk=chunk, chunk_key=chunk_key):
+                records = np.frombuffer(pipeline.get(chunk_key) or b"", dtype=RECORD_DTYPE)
+                timestamps, _ = self.decode(chunk, records.tobytes())
+                selected = _slice_range(timestamps, start, end)
+                kept = np.concatenate((records[:selected.start], records[selected.stop:]))
+                pipeline.multi()
+                if len(kept):
+                    pipeline.set(chunk_key, kept.tobytes())
+                else:
+                    pipeline.delete(chunk_key)
+                    pipeline.zrem(_chunk_index_key(key), chunk)
+                return len(records) - len(kept)
+
+            try:
+                removed += redis_cache_manager.redis_client.transaction(
+                    remove,
+                    chunk_key,
+                    value_from_callable=True
+                )
+            except Exception as e:
+                raise RuntimeError(f"Error setting data in Redis cache: {e}")
+        return removed
+
+    def get_z_stats_by_segments(
+        self,
+        key: str,
+        segments: Sequence[Tuple[int, str, str]]
+    ) -> Dict:
+        """
+        Aggregate the members of a sorted set over a list of segments,
+        folding the raw segments from their decoded chunks.
+
+        Args:
+            key (str): The key of the sorted set.
+            segments (Sequence[Tuple[int, str, str]]): The segments to
+            aggregate.
+
+        Returns:
+            Dict: The sum, count, min and max of the values found. Min and
+            max are None when nothing was found.
+        """
+        stats = {"sum": 0.0, "count": 0, "min": None, "max": None}
+        for resolution, start, end in segments:
+            if resolution:
+                buckets = self.get_rollup_buckets(
+                    key=key,
+                    resolution=resolution,
+                    start=start,
+                    end=end
+                )
+                for bucket in buckets:
+                    _fold_stats(stats, *bucket)
+            else:
+                _, values = self.get_z_arrays_by_score(key=key, start=start, end=end)
+                if values.size:
+                    _fold_stats(
+                        stats,
+                        float(values.sum()),
+                        int(values.size),
+                        float(values.min()),
+                        float(values.max())
+                    )
+        return stats
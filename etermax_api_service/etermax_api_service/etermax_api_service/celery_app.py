@@ -24,4 +24,12 @@ app.conf.beat_schedule = {
         'task': 'ticker.tasks.fetch_and_set_buenbit_data',
         'schedule': 10.0,  # Every 10 seconds
     },
+    'apply-retention-every-hour': {
+        'task': 'ticker.tasks.apply_retention_policy',
+        'schedule': 3600.0,  # Every hour
+    },
+    'archive-every-hour': {
+        'task': 'ticker.tasks.archive_tickers',
+        'schedule': 3600.0,  # Every hour
+    },
 }
@@ -12,6 +12,9 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 import os
 from pathlib import Path
 
+from redis.backoff import ExponentialWithJitterBackoff
+from redis.retry import Retry
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -122,3 +125,105 @@ STATIC_URL = '/static/'
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Read-through cache of the ticker endpoints for closed time windows
+TICKER_RESPONSE_CACHE = {
+    'MAX_SIZE': int(os.environ.get('TICKER_RESPONSE_CACHE_MAX_SIZE', 1024)),
+    'TTL': float(os.environ.get('TICKER_RESPONSE_CACHE_TTL', 3600)),
+}
+
+# Number of latest tickers kept in memory by each web worker, 0 disables it
+TICKER_HOT_WINDOW_CAPACITY = int(os.environ.get('TICKER_HOT_WINDOW_CAPACITY', 360))
+
+# Storage backend of the tickers, one of `storage_backends.STORAGE_BACKENDS`:
+# `redis` sorted sets, `compact` hourly binary chunks in Redis, `sqlite` on
+# disk or `tiered`, recent tickers in the `hot` backend and older ones
+# archived to the `cold` one. The options of each backend are passed to its
+# class
+TICKER_STORAGE_BACKEND = os.environ.get('TICKER_STORAGE_BACKEND', 'redis')
+TICKER_STORAGE_OPTIONS = {
+    'compact': {
+        'decimals': int(os.environ.get('TICKER_COMPACT_DECIMALS', 6)),
+    },
+    'sqlite': {
+        'path': os.environ.get('TICKER_SQLITE_PATH', str(BASE_DIR / 'tickers.sqlite3')),
+    },
+    'tiered': {
+        'hot': os.environ.get('TICKER_TIERED_HOT', 'redis'),
+        'cold': os.environ.get('TICKER_TIERED_COLD', 'sqlite'),
+    },
+}
+
+# Days of raw tickers kept in the hot tier of the `tiered` backend, older
+# ones are moved to the archive by the archival task. 0 disables it
+TICKER_ARCHIVE_AFTER_DAYS = int(os.environ.get('TICKER_ARCHIVE_AFTER_DAYS', 0))
+
+# Size of the connection pool of the async redis client of each event loop
+REDIS_ASYNC_MAX_CONNECTIONS = int(os.environ.get('REDIS_ASYNC_MAX_CONNECTIONS', 50))
+
+# Connection pools of the redis clients. A worker waits at most
+# POOL_TIMEOUT seconds for a free connection and SOCKET_TIMEOUT seconds for
+# a reply before failing, instead of piling up blocked behind a burst.
+# Connection errors and timeouts are retried RETRIES times with an
+# exponential backoff, and idle connections are pinged before reuse every
+# HEALTH_CHECK_INTERVAL seconds
+REDIS_POOL = {
+    'MAX_CONNECTIONS': int(os.environ.get('REDIS_MAX_CONNECTIONS', 50)),
+    'POOL_TIMEOUT': float(os.environ.get('REDIS_POOL_TIMEOUT', 1)),
+    'SOCKET_TIMEOUT': float(os.environ.get('REDIS_SOCKET_TIMEOUT', 2)),
+    'SOCKET_CONNECT_TIMEOUT': float(os.environ.get('REDIS_SOCKET_CONNECT_TIMEOUT', 1)),
+    'HEALTH_CHECK_INTERVAL': int(os.environ.get('REDIS_HEALTH_CHECK_INTERVAL', 30)),
+    'RETRIES': int(os.environ.get('REDIS_RETRIES', 3)),
+    'RETRY_BACKOFF_BASE': float(os.environ.get('REDIS_RETRY_BACKOFF_BASE', 0.05)),
+    'RETRY_BACKOFF_CAP': float(os.environ.get('REDIS_RETRY_BACKOFF_CAP', 1)),
+}
+
+# Read replicas of the ticker store, given as URLs or discovered through
+# Sentinel. Ticker reads are spread over the replicas missing no write
+# older than REDIS_REPLICA_MAX_LAG seconds, comparing their replication
+# offset to the primary's every REDIS_REPLICA_CHECK_INTERVAL seconds, and
+# go to the primary while none is. The interval must be under the lag
+REDIS_REPLICA_URLS = [url for url in os.environ.get('REDIS_REPLICA_URLS', '').split(',') if url]
+REDIS_SENTINELS = [
+    (host, int(port))
+    for host, port in (
+        sentinel.rsplit(':', 1)
+        for sentinel in os.environ.get('REDIS_SENTINELS', '').split(',')
+        if sentinel
+    )
+]
+REDIS_SENTINEL_SERVICE = os.environ.get('REDIS_SENTINEL_SERVICE', 'mymaster')
+REDIS_REPLICA_MAX_LAG = float(os.environ.get('REDIS_REPLICA_MAX_LAG', 10))
+REDIS_REPLICA_CHECK_INTERVAL = float(os.environ.get('REDIS_REPLICA_CHECK_INTERVAL', 2))
+
+# Options of the django-redis caches, building their pool from REDIS_POOL
+REDIS_CACHE_OPTIONS = {
+    'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+    'CONNECTION_POOL_CLASS': 'redis.BlockingConnectionPool',
+    'CONNECTION_POOL_KWARGS': {
+        'max_connections': REDIS_POOL['MAX_CONNECTIONS'],
+        'timeout': REDIS_POOL['POOL_TIMEOUT'],
+        'health_check_interval': REDIS_POOL['HEALTH_CHECK_INTERVAL'],
+        'retry': Retry(
+            ExponentialWithJitterBackoff(
+                cap=REDIS_POOL['RETRY_BACKOFF_CAP'],
+                base=REDIS_POOL['RETRY_BACKOFF_BASE']
+            ),
+            REDIS_POOL['RETRIES']
+        ),
+    },
+    'SOCKET_TIMEOUT': REDIS_POOL['SOCKET_TIMEOUT'],
+    'SOCKET_CONNECT_TIMEOUT': REDIS_POOL['SOCKET_CONNECT_TIMEOUT'],
+}
+
+# Markets ingested from each Buenbit API response. The default market is
+# stored under the `prices` key, the rest under `prices:<market>`
+TICKER_MARKETS = os.environ.get('TICKER_MARKETS', 'btcars,ethars,usdtars,btcusdt').split(',')
+TICKER_DEFAULT_MARKET = os.environ.get('TICKER_DEFAULT_MARKET', 'btcars')
+
+# Days of tickers kept by the retention task, raw (0) and per minute rollups
+# (60). Older days are read from the coarser rollups, 0 keeps them forever
+TICKER_RETENTION_DAYS = {
+    0: int(os.environ.get('TICKER_RAW_RETENTION_DAYS', 30)),
+    60: int(os.environ.get('TICKER_MINUTE_RETENTION_DAYS', 365)),
+}
@@ -22,19 +22,39 @@ DATABASES = {
 
 REDIS_LOCATION = f"redis://{os.environ.get('REDIS_HOST', '')}:{os.environ.get('REDIS_PORT', '')}/0"
 
+# Only the primary: sessions and cached values must be read back as they
+# were written, the ticker reads are routed to REDIS_REPLICA_URLS apart
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": REDIS_LOCATION,
-        "OPTIONS": {
-            "CLIENT_CLASS": "django_redis.client.DefaultClient",
-        }
+        "OPTIONS": REDIS_CACHE_OPTIONS,
     }
 }
 
+# With Sentinel, the primary and the replicas of the service are discovered
+if REDIS_SENTINELS:
+    DJANGO_REDIS_CONNECTION_FACTORY = "django_redis.pool.SentinelConnectionFactory"
+    CACHES["default"]["LOCATION"] = f"redis://{REDIS_SENTINEL_SERVICE}/0"
+    CACHES["default"]["OPTIONS"] = {
+        **REDIS_CACHE_OPTIONS,
+        "CLIENT_CLASS": "django_redis.client.SentinelClient",
+        "CONNECTION_POOL_CLASS": "redis.sentinel.SentinelConnectionPool",
+        "CONNECTION_POOL_KWARGS": {
+            name: value
+            for name, value in REDIS_CACHE_OPTIONS["CONNECTION_POOL_KWARGS"].items()
+            if name != "timeout"
+        },
+        "SENTINELS": REDIS_SENTINELS,
+    }
+
 # Additional Sessions Config
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
 
-# Redis configuration for Celery
+# Redis configuration for Celery, the broker being the primary of the
+# service with Sentinel
 CELERY_BROKER_URL = REDIS_LOCATION
+if REDIS_SENTINELS:
+    CELERY_BROKER_URL = ";".join(f"sentinel://{host}:{port}/0" for host, port in REDIS_SENTINELS)
+    CELERY_BROKER_TRANSPORT_OPTIONS = {"master_name": REDIS_SENTINEL_SERVICE}
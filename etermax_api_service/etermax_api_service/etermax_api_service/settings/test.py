@@ -14,8 +14,9 @@ CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": REDIS_LOCATION,
-        "OPTIONS": {
-            "CLIENT_CLASS": "django_redis.client.DefaultClient",
-        }
+        "OPTIONS": REDIS_CACHE_OPTIONS,
     }
 }
+
+# Tests read from redis, no background subscriptions
+TICKER_HOT_WINDOW_CAPACITY = 0
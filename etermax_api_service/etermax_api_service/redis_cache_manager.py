@@ -1,9 +1,937 @@
+import asyncio
+import collections
+import functools
+import logging
+import random
+import threading
+import time
+import urllib.parse
+import weakref
 from abc import ABC, abstractmethod
-from typing import Dict, List, Tuple
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
+import redis.asyncio
+import redis.asyncio.sentinel
+from django.conf import settings
 from django_redis import get_redis_connection
+from django_redis.pool import ConnectionFactory
+from redis.asyncio.retry import Retry as AsyncRetry
+from redis.backoff import ExponentialWithJitterBackoff
+from redis.exceptions import NoScriptError, ResponseError
+from redis.sentinel import Sentinel
 
-redis_client = get_redis_connection()
+from common import decode_member
+
+logger = logging.getLogger(__name__)
+
+
+class LazyRedisClient:
+    """
+    Proxy of the django-redis client, resolved on first use.
+
+    Importing this module doesn't touch the cache configuration nor open
+    a connection pool, so Django and Celery start even while Redis is
+    unreachable. Attributes are looked up on the client, and the module
+    level `redis_client` can still be replaced as a whole.
+    """
+
+    def __init__(self, factory: Callable[[], redis.Redis]):
+        """
+        Initialize the LazyRedisClient.
+
+        Args:
+            factory (Callable[[], redis.Redis]): Builds the client.
+        """
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> redis.Redis:
+        """
+        The proxied client, built on first access.
+        """
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+
+def discover_replicas() -> List[str]:
+    """
+    List the URLs of the read replicas: the configured ones, or those of
+    the service discovered through Sentinel.
+
+    Returns:
+        List[str]: The URLs of the replicas.
+    """
+    if not settings.REDIS_SENTINELS:
+        return list(settings.REDIS_REPLICA_URLS)
+
+    replicas = _get_sentinel().discover_slaves(settings.REDIS_SENTINEL_SERVICE)
+    return [f"redis://{host}:{port}/0" for host, port in replicas]
+
+
+@functools.lru_cache(maxsize=None)
+def _get_sentinel() -> Sentinel:
+    return Sentinel(
+        settings.REDIS_SENTINELS,
+        socket_timeout=settings.REDIS_POOL["SOCKET_TIMEOUT"],
+        socket_connect_timeout=settings.REDIS_POOL["SOCKET_CONNECT_TIMEOUT"]
+    )
+
+
+def connect_replica(url: str) -> redis.Redis:
+    """
+    Build the client of a read replica, with the pool options of the
+    django-redis client. Configured replicas share its pools.
+
+    Args:
+        url (str): The URL of the replica.
+
+    Returns:
+        redis.Redis: The client of the replica.
+    """
+    return ConnectionFactory(settings.REDIS_CACHE_OPTIONS).connect(url)
+
+
+class ReplicaRouter:
+    """
+    Routes reads to the read replicas whose data is fresh enough, falling
+    back to the primary while none is.
+
+    Every replica is tracked on its own, with its own client. Replicas
+    are listed and checked at most every `REDIS_REPLICA_CHECK_INTERVAL`
+    seconds, and reads are spread at random over the fresh ones.
+
+    Staleness is measured on the replication stream: each check samples
+    the offset of the primary, and a replica is fresh while its link is
+    up, not resyncing, and it processed the stream up to an offset the
+    primary reached at most `REDIS_REPLICA_MAX_LAG` seconds before any
+    read it answers. A replica stays fresh until the next check, so the
+    offset is one sampled at most the lag minus the check interval ago.
+    """
+
+    def __init__(
+        self,
+        discover: Callable[[], List[str]] = discover_replicas,
+        connect: Callable[[str], redis.Redis] = connect_replica,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the ReplicaRouter.
+
+        Args:
+            discover (Callable[[], List[str]], optional): Lists the URLs
+            of the replicas. Defaults to `discover_replicas`.
+            connect (Callable[[str], redis.Redis], optional): Builds the
+            client of a replica. Defaults to `connect_replica`.
+            clock (Callable[[], float], optional): The clock timing the
+            checks. Defaults to `time.monotonic`.
+        """
+        self.discover = discover
+        self.connect = connect
+        self.clock = clock
+        self._clients = {}
+        self._fresh = {}
+        self._offsets = collections.deque()
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def replicas(self) -> Dict[str, redis.Redis]:
+        """
+        The client of each replica tracked, by URL.
+        """
+        return dict(self._clients)
+
+    def is_fresh(self, replica, offset: int) -> bool:
+        """
+        Whether a replica is fresh, reading its replication state.
+
+        Args:
+            replica: The client of the replica.
+            offset (int): The offset of the replication stream the
+            replica must have processed.
+
+        Returns:
+            bool: True if reads may be sent to the replica.
+        """
+        try:
+            replication = replica.info("replication")
+        except Exception:
+            logger.warning("Redis replica unreachable, not reading from it", exc_info=True)
+            return False
+
+        return (
+            replication.get("role") == "slave"
+            and replication.get("master_link_status") == "up"
+            and not replication.get("master_sync_in_progress")
+            and replication.get("slave_repl_offset", -1) >= offset
+        )
+
+    def get_required_offset(self, primary) -> Optional[int]:
+        """
+        Sample the replication offset of the primary, and return the one
+        it had as long ago as tolerated.
+
+        Args:
+            primary: The client of the primary.
+
+        Returns:
+            Optional[int]: The offset replicas must have processed, None
+            if the primary can't be sampled.
+        """
+        now = self.clock()
+        try:
+            offset = primary.info("replication")["master_repl_offset"]
+        except Exception:
+            logger.warning("Redis primary offset unavailable, reading from it", exc_info=True)
+            return None
+
+        # The offsets of a new primary are not comparable to older ones
+        if self._offsets and offset < self._offsets[-1][1]:
+            self._offsets.clear()
+        self._offsets.append((now, offset))
+
+        horizon = settings.REDIS_REPLICA_MAX_LAG - settings.REDIS_REPLICA_CHECK_INTERVAL
+        while now - self._offsets[0][0] > horizon and len(self._offsets) > 1:
+            self._offsets.popleft()
+        if now - self._offsets[0][0] > horizon:
+            return None
+        return self._offsets[0][1]
+
+    def check(self, primary) -> None:
+        """
+        List the replicas and check the freshness of each one.
+
+        Args:
+            primary: The client of the primary.
+        """
+        try:
+            urls = self.discover()
+        except Exception:
+            logger.warning("Redis replicas discovery failed, reading from the primary", exc_info=True)
+            urls = []
+
+        clients = {url: self._clients.get(url) or self.connect(url) for url in urls}
+        offset = self.get_required_offset(primary) if clients else None
+        fresh = {
+            url: offset is not None and self.is_fresh(client, offset=offset)
+            for url, client in clients.items()
+        }
+        self._clients, self._fresh = clients, fresh
+
+    def is_due(self) -> bool:
+        """
+        Whether the replicas must be checked again.
+        """
+        return (
+            self._checked_at is None
+            or self.clock() - self._checked_at >= settings.REDIS_REPLICA_CHECK_INTERVAL
+        )
+
+    def get_fresh_urls(self) -> List[str]:
+        """
+        Return the URLs of the replicas fresh at the last check.
+        """
+        return [url for url, fresh in self._fresh.items() if fresh]
+
+    def get_fresh_replicas(self, primary) -> List[redis.Redis]:
+        """
+        Return the clients of the fresh replicas, checking them if the
+        last check is older than the check interval.
+
+        Args:
+            primary: The client of the primary.
+        """
+        now = self.clock()
+        with self._lock:
+            due = (
+                self._checked_at is None
+                or now - self._checked_at >= settings.REDIS_REPLICA_CHECK_INTERVAL
+            )
+            if due:
+                self._checked_at = now
+        if due:
+            self.check(primary)
+
+        clients, fresh = self._clients, self._fresh
+        return [client for url, client in clients.items() if fresh.get(url)]
+
+    def get_client(self, primary):
+        """
+        Return a fresh replica at random, the primary if none is fresh.
+        """
+        replicas = self.get_fresh_replicas(primary)
+        return random.choice(replicas) if replicas else primary
+
+
+redis_client = LazyRedisClient(get_redis_connection)
+
+replica_router = ReplicaRouter()
+
+# Client serving the reads of the current thread within `pinned_reads`
+_pinned_reads = threading.local()
+
+
+def _read_client():
+    """
+    Return the client of read only commands: a fresh read replica when
+    replicas are configured, the primary otherwise.
+    """
+    client = getattr(_pinned_reads, "client", None)
+    if client is not None:
+        return client
+    if not (settings.REDIS_REPLICA_URLS or settings.REDIS_SENTINELS):
+        return redis_client
+    return replica_router.get_client(primary=redis_client)
+
+
+@contextmanager
+def pinned_reads():
+    """
+    Serve the reads of the current thread within the block from a single
+    client, so results read together come from the same replica.
+    """
+    if getattr(_pinned_reads, "client", None) is not None:
+        yield
+        return
+
+    _pinned_reads.client = _read_client()
+    try:
+        yield
+    finally:
+        _pinned_reads.client = None
+
+
+# Async clients are bound to the event loop their connections were
+# opened on, so each loop gets its own clients and connection pools
+_async_redis_clients = weakref.WeakKeyDictionary()
+_async_replica_clients = weakref.WeakKeyDictionary()
+
+# Fields of each rollup bucket, open and close being the values of the
+# members with the lowest and highest score of the bucket, and twsum the
+# sum of the value of each member times the score delta to the next member
+# of the bucket, the integral of the values over the bucket
+ROLLUP_FIELDS = (
+    "sum", "count", "min", "max", "open", "open_at", "close", "close_at", "twsum"
+)
+
+# Adds a member to a sorted set and, only when it was not stored yet,
+# folds its value into the sum/count/min/max/open/close/twsum buckets of
+# every rollup resolution. The first member ever added records the rollup
+# watermark: buckets starting at or after it are known to be complete.
+#
+# KEYS: sorted set, watermark, then (hash, index) for each resolution.
+# ARGV: member, score, then one resolution (in seconds) per (hash, index).
+SET_DATA_WITH_ROLLUPS_SCRIPT = """
+if redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'NX')
+local score = tonumber(ARGV[2])
+local value = tonumber(string.match(ARGV[1], '[^:]+$'))
+
+-- The members before and after the new one, as {value, score}
+local rank = redis.call('ZRANK', KEYS[1], ARGV[1])
+local neighbours = {}
+for position, offset in ipairs({-1, 1}) do
+    if rank + offset >= 0 then
+        local found = redis.call('ZRANGE', KEYS[1], rank + offset, rank + offset, 'WITHSCORES')
+        if found[1] then
+            neighbours[position] = {
+                tonumber(string.match(found[1], '[^:]+$')), tonumber(found[2])
+            }
+        end
+    end
+end
+local previous, following = neighbours[1], neighbours[2]
+
+for i = 3, #ARGV do
+    local resolution = tonumber(ARGV[i])
+    local bucket_start = math.floor(score / resolution) * resolution
+    local bucket = string.format('%d', bucket_start)
+    local hash = KEYS[(i - 3) * 2 + 3]
+    local index = KEYS[(i - 3) * 2 + 4]
+    redis.call('HINCRBYFLOAT', hash, bucket .. ':sum', value)
+    if redis.call('HINCRBY', hash, bucket .. ':count', 1) == 1 then
+        redis.call(
+            'HSET', hash,
+            bucket .. ':min', value, bucket .. ':max', value,
+            bucket .. ':open', value, bucket .. ':open_at', score,
+            bucket .. ':close', value, bucket .. ':close_at', score,
+            bucket .. ':twsum', 0
+        )
+        redis.call('ZADD', index, bucket, bucket)
+    else
+        local bounds = redis.call(
+            'HMGET', hash,
+            bucket .. ':min', bucket .. ':max',
+            bucket .. ':open_at', bucket .. ':close_at', bucket .. ':twsum'
+        )
+        -- The new member splits the step between its neighbours in the bucket
+        local after = previous and previous[2] >= bucket_start
+        local before = following and following[2] < bucket_start + resolution
+        local weighted = 0
+        if after then
+            weighted = weighted + previous[1] * (score - previous[2])
+        end
+        if before then
+            weighted = weighted + value * (following[2] - score)
+        end
+        if after and before then
+            weighted = weighted - previous[1] * (following[2] - previous[2])
+        end
+        if bounds[5] then
+            redis.call('HINCRBYFLOAT', hash, bucket .. ':twsum', weighted)
+        end
+        if value < tonumber(bounds[1]) then
+            redis.call('HSET', hash, bucket .. ':min', value)
+        end
+        if value > tonumber(bounds[2]) then
+            redis.call('HSET', hash, bucket .. ':max', value)
+        end
+        -- Buckets written before open/close/twsum were tracked are left
+        -- without them
+        if bounds[3] and score < tonumber(bounds[3]) then
+            redis.call('HSET', hash, bucket .. ':open', value, bucket .. ':open_at', score)
+        end
+        if bounds[4] and score >= tonumber(bounds[4]) then
+            redis.call('HSET', hash, bucket .. ':close', value, bucket .. ':close_at', score)
+        end
+    end
+end
+return 1
+"""
+
+# Records a member as the latest one of a sorted set, unless a member with
+# a higher score was already recorded.
+#
+# KEYS: the latest hash.
+# ARGV: member, score.
+SET_LATEST_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'score')
+if current and tonumber(current) > tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'member', ARGV[1], 'score', ARGV[2])
+return 1
+"""
+
+# Aggregates sum/count/min/max over a list of segments, each one either a
+# score range of raw members or a range of rollup buckets, so only the
+# aggregate leaves the server.
+#
+# KEYS: sorted set, then (hash, index) for each resolution used.
+# ARGV: (slot, min, max) per segment, slot 0 being the raw sorted set and
+# slot N the N-th (hash, index) pair.
+GET_Z_STATS_BY_SEGMENTS_SCRIPT = """
+local total, count, low, high = 0, 0, nil, nil
+local function fold(value_sum, value_count, value_min, value_max)
+    total = total + value_sum
+    count = count + value_count
+    if low == nil or value_min < low then low = value_min end
+    if high == nil or value_max > high then high = value_max end
+end
+for i = 1, #ARGV, 3 do
+    local slot = tonumber(ARGV[i])
+    if slot == 0 then
+        local members = redis.call('ZRANGEBYSCORE', KEYS[1], ARGV[i + 1], ARGV[i + 2])
+        for _, member in ipairs(members) do
+            local value = tonumber(string.match(member, '[^:]+$'))
+            fold(value, 1, value, value)
+        end
+    else
+        local hash = KEYS[slot * 2]
+        local buckets = redis.call('ZRANGEBYSCORE', KEYS[slot * 2 + 1], ARGV[i + 1], ARGV[i + 2])
+        for _, bucket in ipairs(buckets) do
+            local values = redis.call(
+                'HMGET', hash,
+                bucket .. ':sum', bucket .. ':count', bucket .. ':min', bucket .. ':max'
+            )
+            fold(tonumber(values[1]), tonumber(values[2]), tonumber(values[3]), tonumber(values[4]))
+        end
+    end
+end
+local function format(value)
+    if value == nil then return false end
+    return string.format('%.17g', value)
+end
+return {format(total), count, format(low), format(high)}
+"""
+
+
+# Scripts registered with each client, by source
+_scripts = weakref.WeakKeyDictionary()
+
+
+def _get_script(client, script: str):
+    """
+    Return a Lua script registered with a sync or async client,
+    registering it on first use, so its digest is only computed once.
+    """
+    scripts = _scripts.get(client)
+    if scripts is None:
+        scripts = _scripts[client] = {}
+    if script not in scripts:
+        scripts[script] = client.register_script(script)
+    return scripts[script]
+
+
+def _run_script(script: str, keys: List, args: List, client=None):
+    """
+    Run a Lua script in Redis through EVALSHA, loading it on first use.
+
+    Args:
+        script (str): The Lua source of the script.
+        keys (List): The keys the script operates on.
+        args (List): The arguments passed to the script.
+        client (optional): The client or pipeline to run the script
+        with. Defaults to the shared redis client.
+
+    Returns:
+        The raw reply of the script.
+    """
+    client = client or redis_client
+    return _get_script(redis_client, script)(
+        keys=keys,
+        args=args,
+        client=client
+    )
+
+
+def _is_scripting_unavailable(error: ResponseError) -> bool:
+    """
+    Check whether a redis error means the server can't run the scripts,
+    rather than the scripts or commands failing.
+
+    Args:
+        error (ResponseError): The error replied by redis.
+
+    Returns:
+        bool: True for NOSCRIPT and unknown command errors.
+    """
+    return (
+        isinstance(error, NoScriptError)
+        or "unknown command" in str(error).lower()
+    )
+
+
+def _async_pool_kwargs() -> Dict:
+    """
+    Build the options of the connection pools of the async clients from
+    REDIS_POOL.
+    """
+    return {
+        "max_connections": settings.REDIS_ASYNC_MAX_CONNECTIONS,
+        "socket_timeout": settings.REDIS_POOL["SOCKET_TIMEOUT"],
+        "socket_connect_timeout": settings.REDIS_POOL["SOCKET_CONNECT_TIMEOUT"],
+        "health_check_interval": settings.REDIS_POOL["HEALTH_CHECK_INTERVAL"],
+        "retry": AsyncRetry(
+            ExponentialWithJitterBackoff(
+                cap=settings.REDIS_POOL["RETRY_BACKOFF_CAP"],
+                base=settings.REDIS_POOL["RETRY_BACKOFF_BASE"]
+            ),
+            settings.REDIS_POOL["RETRIES"]
+        ),
+    }
+
+
+def connect_async(url: str) -> redis.asyncio.Redis:
+    """
+    Build an async client with its own blocking connection pool.
+
+    Args:
+        url (str): The URL of the server.
+
+    Returns:
+        redis.asyncio.Redis: The client.
+    """
+    pool = redis.asyncio.BlockingConnectionPool.from_url(
+        url,
+        timeout=settings.REDIS_POOL["POOL_TIMEOUT"],
+        **_async_pool_kwargs()
+    )
+    return redis.asyncio.Redis.from_pool(pool)
+
+
+def connect_async_primary() -> redis.asyncio.Redis:
+    """
+    Build the async client of the primary: the one at REDIS_LOCATION, or
+    with Sentinel the primary of the service, resolved again on failover.
+
+    Returns:
+        redis.asyncio.Redis: The client of the primary.
+    """
+    if not settings.REDIS_SENTINELS:
+        return connect_async(settings.REDIS_LOCATION)
+
+    sentinel = redis.asyncio.sentinel.Sentinel(
+        settings.REDIS_SENTINELS,
+        socket_timeout=settings.REDIS_POOL["SOCKET_TIMEOUT"],
+        socket_connect_timeout=settings.REDIS_POOL["SOCKET_CONNECT_TIMEOUT"]
+    )
+    return sentinel.master_for(settings.REDIS_SENTINEL_SERVICE, **_async_pool_kwargs())
+
+
+def get_async_redis_client() -> redis.asyncio.Redis:
+    """
+    Return the async redis client of the primary for the running event
+    loop, creating it with its own connection pool on first use.
+
+    Returns:
+        redis.asyncio.Redis: The client of the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_redis_clients.get(loop)
+    if client is None:
+        client = _async_redis_clients[loop] = connect_async_primary()
+    return client
+
+
+async def get_async_read_client() -> redis.asyncio.Redis:
+    """
+    Return the async client of read only commands for the running event
+    loop: one of a fresh read replica when replicas are configured, the
+    primary's otherwise.
+
+    Freshness is tracked by `replica_router`, whose checks run in a worker
+    thread, so they don't block the event loop.
+
+    Returns:
+        redis.asyncio.Redis: The client of the running event loop.
+    """
+    if not (settings.REDIS_REPLICA_URLS or settings.REDIS_SENTINELS):
+        return get_async_redis_client()
+
+    if replica_router.is_due():
+        await asyncio.to_thread(replica_router.get_fresh_replicas, redis_client)
+    urls = replica_router.get_fresh_urls()
+    if not urls:
+        return get_async_redis_client()
+
+    url = random.choice(urls)
+    clients = _async_replica_clients.setdefault(asyncio.get_running_loop(), {})
+    if url not in clients:
+        clients[url] = connect_async(url)
+    return clients[url]
+
+
+def _pool_stats(pool) -> Dict:
+    """
+    Read the utilization of a connection pool.
+
+    The counts come from attributes private to redis-py, so any of them
+    missing from another version is reported as None instead.
+
+    Args:
+        pool: A sync or async redis connection pool.
+
+    Returns:
+        Dict: The maximum, created, in use and available connections of
+        the pool, and the share of the maximum in use.
+    """
+    max_connections = getattr(pool, "max_connections", None)
+    try:
+        if isinstance(pool, redis.BlockingConnectionPool):
+            created = len(pool._connections)
+            available = sum(1 for connection in list(pool.pool.queue) if connection is not None)
+        else:
+            available = len(pool._available_connections)
+            created = available + len(pool._in_use_connections)
+    except (AttributeError, TypeError):
+        logger.warning("Unknown redis connection pool internals of %r", pool, exc_info=True)
+        created = available = None
+    in_use = created - available if created is not None else None
+
+    utilization = None
+    if in_use is not None and max_connections is not None:
+        utilization = in_use / max_connections if max_connections else 0.0
+    return {
+        "max_connections": max_connections,
+        "created": created,
+        "in_use": in_use,
+        "available": available,
+        "utilization": utilization,
+    }
+
+
+def _redact_url(url: str) -> str:
+    """
+    Remove the password of a redis URL.
+    """
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.password is None:
+        return url
+    netloc = parsed.netloc.rsplit("@", 1)[1]
+    if parsed.username:
+        netloc = f"{parsed.username}@{netloc}"
+    return urllib.parse.urlunsplit(parsed._replace(netloc=netloc))
+
+
+def get_redis_pool_stats() -> Dict:
+    """
+    Read the utilization of the connection pools of this process: the
+    pool of the sync client, once it was used, every other pool opened
+    by django-redis, such as the pools of the read replicas, and the
+    pool of the async client of each event loop.
+
+    Returns:
+        Dict: The `sync` pool stats, None if the pool was not created,
+        the `replicas` pool stats by URL, and the list of `async` pool
+        stats.
+    """
+    client = redis_client
+    if isinstance(client, LazyRedisClient):
+        client = client._client
+    primary_pool = client.connection_pool if client is not None else None
+
+    # django-redis keeps its pools by URL, for the whole process
+    pools = dict(getattr(ConnectionFactory, "_pools", {}))
+    for url, replica in replica_router.replicas.items():
+        pools.setdefault(url, replica.connection_pool)
+    return {
+        "sync": _pool_stats(primary_pool) if primary_pool is not None else None,
+        "replicas": {
+            _redact_url(url): _pool_stats(pool)
+            for url, pool in pools.items()
+            if pool is not primary_pool
+        },
+        "async": [
+            _pool_stats(async_client.connection_pool)
+            for async_client in list(_async_redis_clients.values())
+        ],
+    }
+
+
+def _rollup_keys(key: str, resolution: int) -> Tuple[str, str]:
+    """
+    Build the keys holding the rollup buckets of a sorted set.
+
+    Args:
+        key (str): The key of the sorted set.
+        resolution (int): The bucket width in seconds.
+
+    Returns:
+        Tuple[str, str]: The hash with the bucket aggregates and the
+        sorted set indexing the bucket starts.
+    """
+    return f"{key}:rollup:{resolution}", f"{key}:rollup:{resolution}:buckets"
+
+
+def _rollup_since_key(key: str) -> str:
+    """
+    Build the key holding the rollup watermark of a sorted set.
+    """
+    return f"{key}:rollup:since"
+
+
+def _retention_key(key: str) -> str:
+    """
+    Build the key holding the retention horizons of a sorted set.
+    """
+    return f"{key}:retention"
+
+
+def _latest_key(key: str) -> str:
+    """
+    Build the key holding the latest member of a sorted set.
+    """
+    return f"{key}:latest"
+
+
+def _fold_stats(stats: Dict, total: float, count: int, low, high) -> None:
+    """
+    Fold an aggregate into a stats dictionary in place.
+
+    Args:
+        stats (Dict): The accumulated sum, count, min and max.
+        total (float): The sum to add.
+        count (int): The number of values summed.
+        low (float): The minimum of the values.
+        high (float): The maximum of the values.
+    """
+    if not count:
+        return
+    stats["sum"] += total
+    stats["count"] += count
+    if stats["min"] is None or low < stats["min"]:
+        stats["min"] = low
+    if stats["max"] is None or high > stats["max"]:
+        stats["max"] = high
+
+
+def _parse_bound(bound) -> Tuple[float, bool]:
+    """
+    Parse a sorted set score bound, e.g. "(10", "-inf" or 10.
+
+    Returns:
+        Tuple[float, bool]: The score and whether it is exclusive.
+    """
+    if isinstance(bound, bytes):
+        bound = bound.decode()
+    if isinstance(bound, str) and bound.startswith("("):
+        return float(bound[1:]), True
+    return float(bound), False
+
+
+def fold_rollup_buckets(pieces, resolution: int) -> Dict[int, Tuple]:
+    """
+    Fold pieces of a sorted set into the rollup buckets of a resolution.
+
+    A member is a piece of count 1 opening and closing at its score, with
+    its value as sum, min, max, open and close and a twsum of 0. A bucket
+    of a narrower resolution is a piece as well.
+
+    Args:
+        pieces: The `ROLLUP_FIELDS` values of each piece, in score order.
+        resolution (int): The bucket width in seconds, a multiple of the
+        width of the pieces.
+
+    Returns:
+        Dict[int, Tuple]: The `ROLLUP_FIELDS` values of each bucket with
+        pieces, by bucket start.
+    """
+    pieces = np.asarray(pieces, dtype=np.float64).reshape(-1, len(ROLLUP_FIELDS))
+    if not len(pieces):
+        return {}
+
+    total, count, low, high, opened, open_at, close, close_at, twsum = pieces.T
+    starts = np.floor(open_at / resolution) * resolution
+    bucket_starts, first = np.unique(starts, return_index=True)
+    last = np.append(first[1:], len(starts)) - 1
+
+    # The close of each piece holds until the open of the next piece of
+    # its bucket
+    steps = np.append(close[:-1] * (open_at[1:] - close_at[:-1]), 0.0)
+    steps[last] = 0.0
+
+    columns = (
+        np.add.reduceat(total, first),
+        np.add.reduceat(count, first).astype(np.int64),
+        np.minimum.reduceat(low, first),
+        np.maximum.reduceat(high, first),
+        opened[first],
+        open_at[first],
+        close[last],
+        close_at[last],
+        np.add.reduceat(twsum + steps, first),
+    )
+    return dict(zip(
+        bucket_starts.astype(np.int64).tolist(),
+        zip(*(column.tolist() for column in columns))
+    ))
+
+
+def _rollup_mapping(buckets: Dict[float, Tuple]) -> Dict[str, float]:
+    """
+    Build the hash fields of rollup buckets.
+
+    Args:
+        buckets (Dict[float, Tuple]): The values of the `ROLLUP_FIELDS`
+        of each bucket, by bucket start.
+
+    Returns:
+        Dict[str, float]: The value of each `<bucket>:<field>` field.
+    """
+    mapping = {}
+    for bucket, values in buckets.items():
+        bucket = int(bucket)
+        for name, value in zip(ROLLUP_FIELDS, values):
+            mapping[f"{bucket}:{name}"] = value
+    return mapping
+
+
+class WriteBuffer:
+    """
+    Collects writes to send them to the cache together.
+
+    Members are stored with their rollups and latest member updated,
+    sorted sets are trimmed and messages published, all when the buffer
+    is flushed or its `with` block exits without errors.
+    """
+
+    def __init__(
+        self,
+        manager: "RedisCacheManagerBase",
+        resolutions: Sequence[int],
+        on_flush: Optional[Callable[[Dict[str, Dict]], None]] = None
+    ):
+        """
+        Initialize the WriteBuffer.
+
+        Args:
+            manager (RedisCacheManagerBase): The manager writing the
+            buffered data.
+            resolutions (Sequence[int]): The rollup bucket widths, in
+            seconds, updated with the members.
+            on_flush (Optional[Callable[[Dict[str, Dict]], None]],
+            optional): Called with the members of each sorted set once
+            they are written.
+        """
+        self.manager = manager
+        self.resolutions = resolutions
+        self.on_flush = on_flush
+        self.values = {}
+        self.trims = {}
+        self.messages = []
+
+    def add(self, key: str, value: Dict) -> None:
+        """
+        Buffer members of a sorted set, with their scores.
+        """
+        if value:
+            self.values.setdefault(key, {}).update(value)
+
+    def trim(self, key: str, before: float) -> None:
+        """
+        Buffer the removal of the members of a sorted set scored before
+        `before`.
+        """
+        self.trims[key] = max(before, self.trims.get(key, before))
+
+    def publish(self, channel: str, message: str) -> None:
+        """
+        Buffer a message to publish to a channel.
+        """
+        self.messages.append((channel, message))
+
+    def __len__(self) -> int:
+        return (
+            sum(len(value) for value in self.values.values())
+            + len(self.trims)
+            + len(self.messages)
+        )
+
+    def flush(self) -> None:
+        """
+        Send the buffered writes and empty the buffer.
+        """
+        values, trims, messages = self.values, self.trims, self.messages
+        self.values, self.trims, self.messages = {}, {}, []
+        if values or trims or messages:
+            self.manager.write_many(
+                values=values,
+                trims=trims,
+                messages=messages,
+                resolutions=self.resolutions
+            )
+        if values and self.on_flush is not None:
+            self.on_flush(values)
+
+    def __enter__(self) -> "WriteBuffer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.flush()
 
 
 class RedisCacheManagerBase(ABC):
@@ -11,53 +939,1583 @@ class RedisCacheManagerBase(ABC):
     Abstract base class for managing Redis cache operations.
     """
 
-    @staticmethod
-    @abstractmethod
-    def set_data(key: str, value: Dict) -> None:
+    # Whether `subscribe` yields the messages published through `publish`
+    supports_pubsub = False
+
+    @staticmethod
+    @abstractmethod
+    def set_data(key: str, value: Dict) -> None:
+        """
+        Set a key-value pair in the Redis cache.
+
+        Args:
+            key (str): The key under which the value should be stored.
+            value (Dict): The value to be stored.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    @abstractmethod
+    def get_z_range_by_score(
+        key: str,
+        start: str,
+        end: str
+    ) -> List[Tuple[bytes, str]]:
+        """
+        Retrieve a range of elements from a sorted set in the Redis cache by score.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            Dict: The elements within the specified score range.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    def get_z_range_by_score_page(
+        self,
+        key: str,
+        start: str,
+        end: str,
+        offset: int,
+        count: int
+    ) -> Tuple[int, List[Tuple[bytes, float]]]:
+        """
+        Retrieve a page of a score range of a sorted set, along with the
+        total number of elements in the range.
+
+        The default implementation slices the whole range on the client
+        side. Backends able to limit the range on the server should
+        override it.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            offset (int): The number of elements to skip.
+            count (int): The maximum number of elements to return.
+
+        Returns:
+            Tuple[int, List[Tuple[bytes, float]]]: The number of elements
+            in the range and the elements of the page, with their scores.
+        """
+        range_data = self.get_z_range_by_score(key=key, start=start, end=end)
+        return len(range_data), list(range_data[offset:offset + count])
+
+    def iter_z_range_by_score(
+        self,
+        key: str,
+        start: str,
+        end: str,
+        batch_size: int
+    ) -> Iterator[List[Tuple[bytes, float]]]:
+        """
+        Iterate over a score range of a sorted set in batches, so the
+        range is never loaded at once.
+
+        The default implementation reads consecutive pages with
+        `get_z_range_by_score_page`.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            batch_size (int): The maximum number of elements per batch.
+
+        Yields:
+            List[Tuple[bytes, float]]: Batches of elements in score order,
+            with their scores.
+        """
+        offset = 0
+        while True:
+            _, range_data = self.get_z_range_by_score_page(
+                key=key,
+                start=start,
+                end=end,
+                offset=offset,
+                count=batch_size
+            )
+            if range_data:
+                yield range_data
+            if len(range_data) < batch_size:
+                return
+            offset += len(range_data)
+
+    def get_z_last_score(self, key: str) -> Optional[float]:
+        """
+        Retrieve the highest score of a sorted set.
+
+        The default implementation reads the whole set. Backends able to
+        read the last element directly should override it.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The highest score, None if the set is empty.
+        """
+        range_data = self.get_z_range_by_score(key=key, start="-inf", end="+inf")
+        return float(range_data[-1][1]) if range_data else None
+
+    def get_z_last_range(
+        self,
+        key: str,
+        count: int,
+        start: str = "-inf",
+        end: str = "+inf"
+    ) -> List[Tuple[bytes, float]]:
+        """
+        Retrieve the elements with the highest scores of a sorted set,
+        optionally within a score range.
+
+        The default implementation reads the whole range.
+
+        Args:
+            key (str): The key of the sorted set.
+            count (int): The maximum number of elements to return.
+            start (str, optional): The minimum score of the range.
+            end (str, optional): The maximum score of the range.
+
+        Returns:
+            List[Tuple[bytes, float]]: The elements in score order, with
+            their scores.
+        """
+        range_data = self.get_z_range_by_score(key=key, start=start, end=end)
+        return list(range_data[-count:]) if count else []
+
+    def get_z_ranges_by_score(
+        self,
+        key: str,
+        ranges: Sequence[Tuple[str, str]]
+    ) -> List[List[Tuple[bytes, float]]]:
+        """
+        Retrieve several score ranges of a sorted set.
+
+        The default implementation reads each range with
+        `get_z_range_by_score`.
+
+        Args:
+            key (str): The key of the sorted set.
+            ranges (Sequence[Tuple[str, str]]): The `(start, end)` score
+            ranges to read.
+
+        Returns:
+            List[List[Tuple[bytes, float]]]: The elements of each range,
+            with their scores, in the order of `ranges`.
+        """
+        return [
+            self.get_z_range_by_score(key=key, start=start, end=end)
+            for start, end in ranges
+        ]
+
+    def publish(self, channel: str, message: str) -> None:
+        """
+        Publish a message to the subscribers of a channel.
+
+        The default implementation does nothing, for backends without
+        publish/subscribe support.
+
+        Args:
+            channel (str): The channel to publish to.
+            message (str): The message to publish.
+        """
+
+    def publish_many(self, messages: Sequence[Tuple[str, str]]) -> None:
+        """
+        Publish several messages, each to its own channel.
+
+        The default implementation publishes each message in turn.
+
+        Args:
+            messages (Sequence[Tuple[str, str]]): The `(channel, message)`
+            pairs to publish, in order.
+        """
+        for channel, message in messages:
+            self.publish(channel=channel, message=message)
+
+    def set_value(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        """
+        Set a plain value, optionally expiring after some seconds.
+
+        Args:
+            key (str): The key under which the value should be stored.
+            value (str): The value to be stored.
+            expire (Optional[int], optional): Seconds until the value
+            expires. Defaults to None, never.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    def get_value(self, key: str) -> Optional[bytes]:
+        """
+        Retrieve a plain value.
+
+        Args:
+            key (str): The key of the value.
+
+        Returns:
+            Optional[bytes]: The value, None if missing or expired.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    def subscribe(
+        self,
+        channel: str,
+        on_subscribed: Callable[[], None]
+    ) -> Iterator[bytes]:
+        """
+        Subscribe to a channel and yield its messages as they arrive.
+
+        Args:
+            channel (str): The channel to subscribe to.
+            on_subscribed (Callable[[], None]): Called once the
+            subscription is active, before yielding any message.
+
+        Yields:
+            bytes: The messages published to the channel.
+
+        Raises:
+            NotImplementedError: If the backend does not support it, see
+            `supports_pubsub`.
+        """
+        raise NotImplementedError
+
+    def replace_data(self, key: str, removed: List, value: Dict) -> None:
+        """
+        Atomically remove members from a sorted set and add new ones.
+
+        Args:
+            key (str): The key of the sorted set.
+            removed (List): The members to be removed.
+            value (Dict): The members to be added, with their scores.
+
+        Raises:
+            NotImplementedError: If the backend does not support it.
+        """
+        raise NotImplementedError
+
+    def scan_z_members(
+        self,
+        key: str,
+        batch_size: int
+    ) -> Iterator[List[Tuple[bytes, float]]]:
+        """
+        Iterate over all the members of a sorted set in batches, without
+        loading the whole set at once.
+
+        Args:
+            key (str): The key of the sorted set.
+            batch_size (int): The approximate number of members per batch.
+
+        Yields:
+            List[Tuple[bytes, float]]: Batches of members with their scores.
+
+        Raises:
+            NotImplementedError: If the backend does not support it.
+        """
+        raise NotImplementedError
+
+    def set_data_with_rollups(
+        self,
+        key: str,
+        value: Dict,
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Set members in a sorted set and keep its rollup buckets updated.
+
+        The default implementation only stores the members. As it never
+        records a rollup watermark, readers keep using the raw ranges.
+
+        Args:
+            key (str): The key of the sorted set.
+            value (Dict): The members to be stored, with their scores.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+        """
+        self.set_data(key=key, value=value)
+
+    def set_many_data_with_rollups(
+        self,
+        values: Dict[str, Dict],
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Set members in several sorted sets and keep their rollup buckets
+        updated.
+
+        The default implementation stores each sorted set in turn.
+
+        Args:
+            values (Dict[str, Dict]): The members to be stored in each
+            sorted set, with their scores, by key.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+        """
+        for key, value in values.items():
+            self.set_data_with_rollups(
+                key=key,
+                value=value,
+                resolutions=resolutions
+            )
+
+    def write_buffer(
+        self,
+        resolutions: Sequence[int] = (),
+        on_flush: Optional[Callable[[Dict[str, Dict]], None]] = None
+    ) -> WriteBuffer:
+        """
+        Return a buffer collecting writes to send them together.
+
+        Args:
+            resolutions (Sequence[int], optional): The rollup bucket
+            widths, in seconds, updated with the buffered members.
+            on_flush (Optional[Callable[[Dict[str, Dict]], None]],
+            optional): Called with the members of each sorted set once
+            they are written.
+
+        Returns:
+            WriteBuffer: The buffer, to be used as a context manager.
+        """
+        return WriteBuffer(manager=self, resolutions=resolutions, on_flush=on_flush)
+
+    def write_many(
+        self,
+        values: Dict[str, Dict],
+        trims: Dict[str, float],
+        messages: Sequence[Tuple[str, str]],
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Store members of several sorted sets with their rollups, trim
+        sorted sets and publish messages.
+
+        The default implementation sends each kind of write in turn.
+
+        Args:
+            values (Dict[str, Dict]): The members to be stored in each
+            sorted set, with their scores, by key.
+            trims (Dict[str, float]): The score before which members are
+            removed, by key.
+            messages (Sequence[Tuple[str, str]]): The `(channel, message)`
+            pairs to publish.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+        """
+        if values:
+            self.set_many_data_with_rollups(values=values, resolutions=resolutions)
+        for key, before in trims.items():
+            self.remove_z_range_by_score(key=key, start="-inf", end=f"({before}")
+        if messages:
+            self.publish_many(messages=messages)
+
+    def remove_z_range_by_score(self, key: str, start: str, end: str) -> int:
+        """
+        Remove the members of a sorted set within a score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            int: The number of members removed.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    def archive_z_range(self, key: str, before: float, batch_size: int = 1000) -> int:
+        """
+        Move the members of a sorted set scored before a score to a cold
+        archive, where they are still read from.
+
+        Args:
+            key (str): The key of the sorted set.
+            before (float): The score before which members are archived.
+            batch_size (int, optional): The number of members copied per
+            round-trip. Defaults to 1000.
+
+        Returns:
+            int: The number of members moved.
+
+        Raises:
+            NotImplementedError: If the backend has no archive.
+        """
+        raise NotImplementedError
+
+    def get_z_latest(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """
+        Retrieve the member with the highest score of a sorted set.
+
+        The default implementation reads it with `get_z_last_range`.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[Tuple[bytes, float]]: The member and its score, None
+            if the set is empty.
+        """
+        range_data = self.get_z_last_range(key=key, count=1)
+        return tuple(range_data[-1]) if range_data else None
+
+    def get_rollup_since(self, key: str) -> Optional[float]:
+        """
+        Retrieve the score from which the rollup buckets are complete.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The watermark, or None if the sorted set has
+            no rollups.
+        """
+        return None
+
+    def set_rollup_since(self, key: str, since: float) -> None:
+        """
+        Set the score from which the rollup buckets are complete.
+
+        Args:
+            key (str): The key of the sorted set.
+            since (float): The watermark.
+
+        Raises:
+            NotImplementedError: If the backend does not support rollups.
+        """
+        raise NotImplementedError
+
+    def set_rollup_buckets(
+        self,
+        key: str,
+        resolution: int,
+        buckets: Dict[float, Tuple]
+    ) -> None:
+        """
+        Overwrite rollup buckets of a sorted set.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            buckets (Dict[float, Tuple]): The values of the
+            `ROLLUP_FIELDS` of each bucket, by bucket start.
+
+        Raises:
+            NotImplementedError: If the backend does not support rollups.
+        """
+        raise NotImplementedError
+
+    def remove_rollup_buckets(self, key: str, resolution: int, before: float) -> int:
+        """
+        Remove the rollup buckets of a sorted set starting before a score.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            before (float): The bucket start before which they are removed.
+
+        Returns:
+            int: The number of buckets removed.
+
+        Raises:
+            NotImplementedError: If the backend does not support rollups.
+        """
+        raise NotImplementedError
+
+    def get_rollup_series(
+        self,
+        key: str,
+        resolution: int,
+        start: str,
+        end: str,
+        offset: int = 0,
+        count: int = -1
+    ) -> Tuple[int, List[Tuple]]:
+        """
+        Retrieve a page of the rollup buckets starting within a score
+        range, along with their start.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            start (str): The minimum bucket start.
+            end (str): The maximum bucket start.
+            offset (int, optional): The number of buckets to skip.
+            count (int, optional): The maximum number of buckets to
+            return, -1 for all of them and 0 to only count the range.
+
+        Returns:
+            Tuple[int, List[Tuple]]: The number of buckets in the range
+            and the start, sum, count, min, max, open, close, open_at,
+            close_at and twsum of the buckets of the page. The last five
+            are None for buckets written before they were tracked.
+
+        Raises:
+            NotImplementedError: If the backend does not support rollups.
+        """
+        raise NotImplementedError
+
+    def get_retention(self, key: str) -> Dict[int, float]:
+        """
+        Retrieve the score from which the data of each resolution of a
+        sorted set is kept, 0 being its raw members.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Dict[int, float]: The horizon of each resolution trimmed so
+            far, empty if nothing was trimmed.
+        """
+        return {}
+
+    def set_retention(self, key: str, resolution: int, since: float) -> None:
+        """
+        Set the score from which the data of a resolution of a sorted set
+        is kept.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds, 0 for the raw
+            members.
+            since (float): The horizon.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    def get_rollup_buckets(
+        self,
+        key: str,
+        resolution: int,
+        start: str,
+        end: str
+    ) -> List[Tuple[float, int, float, float]]:
+        """
+        Retrieve the rollup buckets starting within a score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            start (str): The minimum bucket start.
+            end (str): The maximum bucket start.
+
+        Returns:
+            List[Tuple[float, int, float, float]]: The sum, count, min
+            and max of every bucket.
+
+        Raises:
+            NotImplementedError: If the backend does not support rollups.
+        """
+        raise NotImplementedError
+
+    def get_z_stats_by_segments(
+        self,
+        key: str,
+        segments: Sequence[Tuple[int, str, str]]
+    ) -> Dict:
+        """
+        Aggregate the members of a sorted set over a list of segments.
+
+        Each segment is a `(resolution, start, end)` tuple. A resolution of
+        0 reads the raw members scored within the range, any other value
+        reads the rollup buckets of that width starting within the range.
+
+        Args:
+            key (str): The key of the sorted set.
+            segments (Sequence[Tuple[int, str, str]]): The segments to
+            aggregate.
+
+        Returns:
+            Dict: The sum, count, min and max of the values found. Min and
+            max are None when nothing was found.
+        """
+        stats = {"sum": 0.0, "count": 0, "min": None, "max": None}
+        for resolution, start, end in segments:
+            if resolution:
+                buckets = self.get_rollup_buckets(
+                    key=key,
+                    resolution=resolution,
+                    start=start,
+                    end=end
+                )
+                for bucket in buckets:
+                    _fold_stats(stats, *bucket)
+            else:
+                range_data = self.get_z_range_by_score(
+                    key=key,
+                    start=start,
+                    end=end
+                )
+                for member, _ in range_data:
+                    value = decode_member(member)
+                    _fold_stats(stats, value, 1, value, value)
+        return stats
+
+
+class RedisCacheManager(RedisCacheManagerBase):
+    """
+    Concrete implementation of RedisCacheManagerBase
+    for managing Redis cache operations.
+    """
+
+    supports_pubsub = True
+
+    @staticmethod
+    def set_data(key: str, value: Dict) -> None:
+        """
+        Set a key-value pair in the Redis cache.
+
+        Args:
+            key (str): The key under which the value should be stored.
+            value (Dict): The value to be stored.
+        """
+        try:
+            redis_client.zadd(key, value)
+        except Exception as e:
+            raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+    @staticmethod
+    def get_z_range_by_score(
+        key: str,
+        start: str,
+        end: str
+    ) -> List[Tuple[bytes, str]]:
+        """
+        Retrieve a range of elements from a sorted set in the Redis cache by score.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            List[Tuple[bytes, str]]: A list of elements within the specified score range, with their scores.
+        """
+        try:
+            range_data = _read_client().zrangebyscore(key, start, end, withscores=True)
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return range_data
+
+    @staticmethod
+    def get_z_range_by_score_page(
+        key: str,
+        start: str,
+        end: str,
+        offset: int,
+        count: int
+    ) -> Tuple[int, List[Tuple[bytes, float]]]:
+        """
+        Retrieve a page of a score range of a sorted set, along with the
+        total number of elements in the range.
+
+        ZCOUNT and ZRANGEBYSCORE ... LIMIT are sent in a single pipelined
+        round-trip, so the cost depends on the page and not on the size
+        of the range.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            offset (int): The number of elements to skip.
+            count (int): The maximum number of elements to return, 0 to
+            only count the range.
+
+        Returns:
+            Tuple[int, List[Tuple[bytes, float]]]: The number of elements
+            in the range and the elements of the page, with their scores.
+        """
+        try:
+            pipeline = _read_client().pipeline(transaction=False)
+            pipeline.zcount(key, start, end)
+            if count:
+                pipeline.zrangebyscore(
+                    key,
+                    start,
+                    end,
+                    start=offset,
+                    num=count,
+                    withscores=True
+                )
+            total, *range_data = pipeline.execute()
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return total, range_data[0] if range_data else []
+
+    @staticmethod
+    def iter_z_range_by_score(
+        key: str,
+        start: str,
+        end: str,
+        batch_size: int
+    ) -> Iterator[List[Tuple[bytes, float]]]:
+        """
+        Iterate over a score range of a sorted set in batches with
+        ZRANGEBYSCORE ... LIMIT.
+
+        Each batch starts at the score of the last element read, skipping
+        the elements already read with that score, so reading a batch
+        costs the same at the beginning and at the end of the range.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            batch_size (int): The maximum number of elements per batch.
+
+        Yields:
+            List[Tuple[bytes, float]]: Batches of elements in score order,
+            with their scores.
+        """
+        last_score = None
+        skip = 0
+        while True:
+            try:
+                range_data = _read_client().zrangebyscore(
+                    key,
+                    start if last_score is None else last_score,
+                    end,
+                    start=skip,
+                    num=batch_size,
+                    withscores=True
+                )
+            except Exception as e:
+                raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+            if range_data:
+                yield range_data
+            if len(range_data) < batch_size:
+                return
+
+            # Elements sharing the last score are read again by the next
+            # batch, skip the ones already yielded
+            batch_last_score = range_data[-1][1]
+            tied = 0
+            for _, score in reversed(range_data):
+                if score != batch_last_score:
+                    break
+                tied += 1
+            skip = skip + tied if batch_last_score == last_score else tied
+            last_score = batch_last_score
+
+    @staticmethod
+    def get_z_last_score(key: str) -> Optional[float]:
+        """
+        Retrieve the highest score of a sorted set in O(log n).
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The highest score, None if the set is empty.
+        """
+        try:
+            range_data = _read_client().zrange(key, -1, -1, withscores=True)
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return range_data[0][1] if range_data else None
+
+    @staticmethod
+    def get_z_last_range(
+        key: str,
+        count: int,
+        start: str = "-inf",
+        end: str = "+inf"
+    ) -> List[Tuple[bytes, float]]:
+        """
+        Retrieve the elements with the highest scores of a sorted set,
+        optionally within a score range, with ZREVRANGEBYSCORE ... LIMIT
+        in O(log n + count).
+
+        Args:
+            key (str): The key of the sorted set.
+            count (int): The maximum number of elements to return.
+            start (str, optional): The minimum score of the range.
+            end (str, optional): The maximum score of the range.
+
+        Returns:
+            List[Tuple[bytes, float]]: The elements in score order, with
+            their scores.
+        """
+        try:
+            range_data = _read_client().zrevrangebyscore(
+                key,
+                end,
+                start,
+                start=0,
+                num=count,
+                withscores=True
+            )
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return list(reversed(range_data))
+
+    @staticmethod
+    def get_z_ranges_by_score(
+        key: str,
+        ranges: Sequence[Tuple[str, str]]
+    ) -> List[List[Tuple[bytes, float]]]:
+        """
+        Retrieve several score ranges of a sorted set in a single
+        pipelined round-trip.
+
+        Args:
+            key (str): The key of the sorted set.
+            ranges (Sequence[Tuple[str, str]]): The `(start, end)` score
+            ranges to read.
+
+        Returns:
+            List[List[Tuple[bytes, float]]]: The elements of each range,
+            with their scores, in the order of `ranges`.
+        """
+        try:
+            pipeline = _read_client().pipeline(transaction=False)
+            for start, end in ranges:
+                pipeline.zrangebyscore(key, start, end, withscores=True)
+            return pipeline.execute()
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+    @staticmethod
+    def publish(channel: str, message: str) -> None:
+        """
+        Publish a message to the subscribers of a channel.
+
+        Args:
+            channel (str): The channel to publish to.
+            message (str): The message to publish.
+        """
+        try:
+            redis_client.publish(channel, message)
+        except Exception as e:
+            raise RuntimeError(f"Error publishing to Redis channel: {e}")
+
+    @staticmethod
+    def publish_many(messages: Sequence[Tuple[str, str]]) -> None:
+        """
+        Publish several messages in a single pipelined round-trip.
+
+        Args:
+            messages (Sequence[Tuple[str, str]]): The `(channel, message)`
+            pairs to publish, in order.
+        """
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            for channel, message in messages:
+                pipeline.publish(channel, message)
+            pipeline.execute()
+        except Exception as e:
+            raise RuntimeError(f"Error publishing to Redis channel: {e}")
+
+    @staticmethod
+    def set_value(key: str, value: str, expire: Optional[int] = None) -> None:
+        """
+        Set a plain value, optionally expiring after some seconds.
+
+        Args:
+            key (str): The key under which the value should be stored.
+            value (str): The value to be stored.
+            expire (Optional[int], optional): Seconds until the value
+            expires. Defaults to None, never.
+        """
+        try:
+            redis_client.set(key, value, ex=expire)
+        except Exception as e:
+            raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+    @staticmethod
+    def get_value(key: str) -> Optional[bytes]:
+        """
+        Retrieve a plain value.
+
+        Args:
+            key (str): The key of the value.
+
+        Returns:
+            Optional[bytes]: The value, None if missing or expired.
+        """
+        try:
+            return redis_client.get(key)
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+    @staticmethod
+    def subscribe(
+        channel: str,
+        on_subscribed: Callable[[], None]
+    ) -> Iterator[bytes]:
+        """
+        Subscribe to a channel and yield its messages as they arrive.
+
+        Blocks waiting for messages until the connection is lost.
+
+        Args:
+            channel (str): The channel to subscribe to.
+            on_subscribed (Callable[[], None]): Called once the
+            subscription is confirmed, before yielding any message.
+
+        Yields:
+            bytes: The messages published to the channel.
+        """
+        pubsub = redis_client.pubsub()
+        try:
+            pubsub.subscribe(channel)
+            for message in pubsub.listen():
+                if message["type"] == "subscribe":
+                    on_subscribed()
+                elif message["type"] == "message":
+                    yield message["data"]
+        except Exception as e:
+            raise RuntimeError(f"Error listening to Redis channel: {e}")
+        finally:
+            pubsub.close()
+
+    @staticmethod
+    def replace_data(key: str, removed: List, value: Dict) -> None:
+        """
+        Atomically remove members from a sorted set and add new ones in a
+        single MULTI/EXEC round-trip.
+
+        Args:
+            key (str): The key of the sorted set.
+            removed (List): The members to be removed.
+            value (Dict): The members to be added, with their scores.
+        """
+        try:
+            pipeline = redis_client.pipeline(transaction=True)
+            if removed:
+                pipeline.zrem(key, *removed)
+            if value:
+                pipeline.zadd(key, value)
+            pipeline.execute()
+        except Exception as e:
+            raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+    @staticmethod
+    def scan_z_members(
+        key: str,
+        batch_size: int
+    ) -> Iterator[List[Tuple[bytes, float]]]:
+        """
+        Iterate over all the members of a sorted set in batches with ZSCAN.
+
+        Members added or removed during the iteration may or may not be
+        returned, members present during the whole iteration are returned
+        at least once.
+
+        Args:
+            key (str): The key of the sorted set.
+            batch_size (int): The approximate number of members per batch.
+
+        Yields:
+            List[Tuple[bytes, float]]: Batches of members with their scores.
+        """
+        cursor = None
+        while cursor != 0:
+            try:
+                cursor, members = redis_client.zscan(
+                    key,
+                    cursor=cursor or 0,
+                    count=batch_size
+                )
+            except Exception as e:
+                raise RuntimeError(f"Error getting data from Redis cache: {e}")
+            if members:
+                yield members
+
+    def set_data_with_rollups(
+        self,
+        key: str,
+        value: Dict,
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Set members in a sorted set and update its rollup buckets in the
+        same round-trip.
+
+        Each member is added by a Lua script that only updates the rollup
+        buckets when the member is new, so writing a sample twice does not
+        count it twice. Falls back to client side updates if scripting is
+        unavailable on the server.
+
+        Args:
+            key (str): The key of the sorted set.
+            value (Dict): The members to be stored, with their scores.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+        """
+        self.set_many_data_with_rollups(
+            values={key: value},
+            resolutions=resolutions
+        )
+
+    def set_many_data_with_rollups(
+        self,
+        values: Dict[str, Dict],
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Set members in several sorted sets and update their rollup buckets,
+        all in a single pipelined round-trip.
+
+        Args:
+            values (Dict[str, Dict]): The members to be stored in each
+            sorted set, with their scores, by key.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+        """
+        self.write_many(
+            values=values,
+            trims={},
+            messages=[],
+            resolutions=resolutions
+        )
+
+    def write_many(
+        self,
+        values: Dict[str, Dict],
+        trims: Dict[str, float],
+        messages: Sequence[Tuple[str, str]],
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Store members of several sorted sets, updating their rollup
+        buckets and latest member, trim sorted sets and publish messages,
+        all in a single MULTI/EXEC round-trip.
+
+        Members are added by Lua scripts, falling back to client side
+        updates if the server rejects the scripts before EXEC, as when
+        scripting is unavailable. Any other error is raised.
+
+        Args:
+            values (Dict[str, Dict]): The members to be stored in each
+            sorted set, with their scores, by key.
+            trims (Dict[str, float]): The score before which members are
+            removed, by key.
+            messages (Sequence[Tuple[str, str]]): The `(channel, message)`
+            pairs to publish.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+
+        Raises:
+            RuntimeError: If there is an error setting data in Redis.
+        """
+        try:
+            pipeline = redis_client.pipeline()
+            for key, value in values.items():
+                keys = [key, _rollup_since_key(key)]
+                for resolution in resolutions:
+                    keys.extend(_rollup_keys(key, resolution))
+
+                for member, score in value.items():
+                    _run_script(
+                        SET_DATA_WITH_ROLLUPS_SCRIPT,
+                        keys=keys,
+                        args=[member, score, *resolutions],
+                        client=pipeline
+                    )
+                if value:
+                    latest = max(value.items(), key=lambda item: float(item[1]))
+                    _run_script(
+                        SET_LATEST_SCRIPT,
+                        keys=[_latest_key(key)],
+                        args=list(latest),
+                        client=pipeline
+                    )
+            self._trim_and_publish(pipeline=pipeline, trims=trims, messages=messages)
+            results = pipeline.execute(raise_on_error=False)
+        except ResponseError as e:
+            # Errors raised before EXEC discard the whole transaction, so
+            # only then the writes can be sent again without scripting
+            if not _is_scripting_unavailable(e):
+                raise RuntimeError(f"Error setting data in Redis cache: {e}")
+            self._write_many_without_scripting(
+                values=values,
+                trims=trims,
+                messages=messages,
+                resolutions=resolutions
+            )
+            return
+        except Exception as e:
+            raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+        # Errors replied by EXEC come after the other writes were applied,
+        # sending them again would duplicate the notifications
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            raise RuntimeError(f"Error setting data in Redis cache: {errors[0]}")
+
+    @staticmethod
+    def _trim_and_publish(
+        pipeline,
+        trims: Dict[str, float],
+        messages: Sequence[Tuple[str, str]]
+    ) -> None:
+        for key, before in trims.items():
+            pipeline.zremrangebyscore(key, "-inf", f"({before}")
+        for channel, message in messages:
+            pipeline.publish(channel, message)
+
+    def _write_many_without_scripting(
+        self,
+        values: Dict[str, Dict],
+        trims: Dict[str, float],
+        messages: Sequence[Tuple[str, str]],
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Client side counterpart of `write_many`, for servers without
+        scripting. It is not atomic, which is acceptable for a single
+        writer.
+        """
+        for key, value in values.items():
+            self._set_data_with_rollups_without_scripting(
+                key=key,
+                value=value,
+                resolutions=resolutions
+            )
+        try:
+            for key, value in values.items():
+                if not value:
+                    continue
+                member, score = max(value.items(), key=lambda item: float(item[1]))
+                current = redis_client.hget(_latest_key(key), "score")
+                if current is None or float(current) <= float(score):
+                    redis_client.hset(
+                        _latest_key(key),
+                        mapping={"member": member, "score": score}
+                    )
+
+            pipeline = redis_client.pipeline()
+            self._trim_and_publish(pipeline=pipeline, trims=trims, messages=messages)
+            pipeline.execute()
+        except Exception as e:
+            raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+    @staticmethod
+    def remove_z_range_by_score(key: str, start: str, end: str) -> int:
+        """
+        Remove the members of a sorted set within a score range with
+        ZREMRANGEBYSCORE.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            int: The number of members removed.
+        """
+        try:
+            return redis_client.zremrangebyscore(key, start, end)
+        except Exception as e:
+            raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+    def get_z_latest(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """
+        Retrieve the member with the highest score of a sorted set in
+        O(1), from the latest member recorded when writing it.
+
+        Sorted sets written without it fall back to reading the set.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[Tuple[bytes, float]]: The member and its score, None
+            if the set is empty.
         """
-        Set a key-value pair in the Redis cache.
+        client = _read_client()
+        try:
+            member, score = client.hmget(_latest_key(key), "member", "score")
+            if member is not None:
+                return member, float(score)
+
+            range_data = client.zrange(key, -1, -1, withscores=True)
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return tuple(range_data[0]) if range_data else None
+
+    def _set_data_with_rollups_without_scripting(
+        self,
+        key: str,
+        value: Dict,
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Client side counterpart of `SET_DATA_WITH_ROLLUPS_SCRIPT`.
+
+        It is not atomic, which is acceptable for a single writer.
+        """
+        try:
+            for member, score in value.items():
+                if not redis_client.zadd(key, {member: score}):
+                    continue
+
+                redis_client.set(_rollup_since_key(key), score, nx=True)
+                member_value = decode_member(member)
+                rank = redis_client.zrank(key, member)
+                previous = redis_client.zrange(
+                    key, rank - 1, rank - 1, withscores=True
+                ) if rank else []
+                following = redis_client.zrange(key, rank + 1, rank + 1, withscores=True)
+                for resolution in resolutions:
+                    hash_key, index_key = _rollup_keys(key, resolution)
+                    bucket = int(score // resolution * resolution)
+                    count, low, high, open_at, close_at, twsum = redis_client.hmget(
+                        hash_key,
+                        f"{bucket}:count",
+                        f"{bucket}:min",
+                        f"{bucket}:max",
+                        f"{bucket}:open_at",
+                        f"{bucket}:close_at",
+                        f"{bucket}:twsum"
+                    )
+
+                    # The new member splits the step between its
+                    # neighbours in the bucket
+                    after = [
+                        (decode_member(neighbour), neighbour_score)
+                        for neighbour, neighbour_score in previous
+                        if neighbour_score >= bucket
+                    ]
+                    before = [
+                        (decode_member(neighbour), neighbour_score)
+                        for neighbour, neighbour_score in following
+                        if neighbour_score < bucket + resolution
+                    ]
+                    weighted = 0.0
+                    if after:
+                        weighted += after[0][0] * (score - after[0][1])
+                    if before:
+                        weighted += member_value * (before[0][1] - score)
+                    if after and before:
+                        weighted -= after[0][0] * (before[0][1] - after[0][1])
+
+                    pipeline = redis_client.pipeline()
+                    pipeline.hincrbyfloat(hash_key, f"{bucket}:sum", member_value)
+                    pipeline.hincrby(hash_key, f"{bucket}:count", 1)
+                    if low is None or member_value < float(low):
+                        pipeline.hset(hash_key, f"{bucket}:min", member_value)
+                    if high is None or member_value > float(high):
+                        pipeline.hset(hash_key, f"{bucket}:max", member_value)
+                    if count is None or (open_at is not None and score < float(open_at)):
+                        pipeline.hset(hash_key, mapping={
+                            f"{bucket}:open": member_value,
+                            f"{bucket}:open_at": score,
+                        })
+                    if count is None or (close_at is not None and score >= float(close_at)):
+                        pipeline.hset(hash_key, mapping={
+                            f"{bucket}:close": member_value,
+                            f"{bucket}:close_at": score,
+                        })
+                    if count is None:
+                        pipeline.hset(hash_key, f"{bucket}:twsum", 0)
+                    elif twsum is not None:
+                        pipeline.hincrbyfloat(hash_key, f"{bucket}:twsum", weighted)
+                    pipeline.zadd(index_key, {bucket: bucket})
+                    pipeline.execute()
+        except Exception as e:
+            raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+    def get_rollup_since(self, key: str) -> Optional[float]:
+        """
+        Retrieve the score from which the rollup buckets are complete.
 
         Args:
-            key (str): The key under which the value should be stored.
-            value (Dict): The value to be stored.
+            key (str): The key of the sorted set.
 
-        Raises:
-            NotImplementedError: If the method is not implemented.
+        Returns:
+            Optional[float]: The watermark, or None if the sorted set has
+            no rollups yet.
         """
-        raise NotImplementedError
+        try:
+            rollup_since = _read_client().get(_rollup_since_key(key))
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
 
-    @staticmethod
-    @abstractmethod
-    def get_z_range_by_score(
+        return float(rollup_since) if rollup_since is not None else None
+
+    def get_rollup_buckets(
+        self,
         key: str,
+        resolution: int,
         start: str,
         end: str
-    ) -> List[Tuple[bytes, str]]:
+    ) -> List[Tuple[float, int, float, float]]:
         """
-        Retrieve a range of elements from a sorted set in the Redis cache by score.
+        Retrieve the rollup buckets starting within a score range.
 
         Args:
             key (str): The key of the sorted set.
-            start (str): The minimum score of the range.
-            end (str): The maximum score of the range.
+            resolution (int): The bucket width in seconds.
+            start (str): The minimum bucket start.
+            end (str): The maximum bucket start.
 
         Returns:
-            Dict: The elements within the specified score range.
+            List[Tuple[float, int, float, float]]: The sum, count, min
+            and max of every bucket.
+        """
+        _, buckets = self.get_rollup_series(
+            key=key,
+            resolution=resolution,
+            start=start,
+            end=end
+        )
+        return [bucket[1:5] for bucket in buckets]
 
-        Raises:
-            NotImplementedError: If the method is not implemented.
+    @staticmethod
+    def get_rollup_series(
+        key: str,
+        resolution: int,
+        start: str,
+        end: str,
+        offset: int = 0,
+        count: int = -1
+    ) -> Tuple[int, List[Tuple]]:
         """
-        raise NotImplementedError
+        Retrieve a page of the rollup buckets starting within a score
+        range, along with their start and the number of buckets in the
+        range.
 
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            start (str): The minimum bucket start.
+            end (str): The maximum bucket start.
+            offset (int, optional): The number of buckets to skip.
+            count (int, optional): The maximum number of buckets to
+            return, -1 for all of them and 0 to only count the range.
 
-class RedisCacheManager(RedisCacheManagerBase):
+        Returns:
+            Tuple[int, List[Tuple]]: The number of buckets in the range
+            and the start, sum, count, min, max, open, close, open_at,
+            close_at and twsum of the buckets of the page. The last five
+            are None for buckets written before they were tracked.
+        """
+        hash_key, index_key = _rollup_keys(key, resolution)
+        client = _read_client()
+        try:
+            pipeline = client.pipeline(transaction=False)
+            pipeline.zcount(index_key, start, end)
+            if count:
+                pipeline.zrangebyscore(index_key, start, end, start=offset, num=count)
+            total, *buckets = pipeline.execute()
+            buckets = buckets[0] if buckets else []
+            names = (
+                "sum", "count", "min", "max", "open", "close", "open_at", "close_at", "twsum"
+            )
+            fields = []
+            for bucket in buckets:
+                bucket = bucket.decode()
+                fields.extend(f"{bucket}:{name}" for name in names)
+            values = client.hmget(hash_key, fields) if fields else []
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return total, [
+            (
+                float(bucket),
+                float(bucket_sum),
+                int(bucket_count),
+                float(low),
+                float(high),
+                *[float(value) if value is not None else None for value in tracked]
+            )
+            for bucket, (bucket_sum, bucket_count, low, high, *tracked)
+            in zip(buckets, zip(*[iter(values)] * len(names)))
+        ]
+
+    @staticmethod
+    def set_rollup_since(key: str, since: float) -> None:
+        """
+        Set the score from which the rollup buckets are complete.
+
+        Args:
+            key (str): The key of the sorted set.
+            since (float): The watermark.
+        """
+        try:
+            redis_client.set(_rollup_since_key(key), since)
+        except Exception as e:
+            raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+    @staticmethod
+    def set_rollup_buckets(
+        key: str,
+        resolution: int,
+        buckets: Dict[float, Tuple]
+    ) -> None:
+        """
+        Overwrite rollup buckets of a sorted set in a single round-trip.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            buckets (Dict[float, Tuple]): The values of the
+            `ROLLUP_FIELDS` of each bucket, by bucket start.
+        """
+        if not buckets:
+            return
+
+        hash_key, index_key = _rollup_keys(key, resolution)
+        try:
+            pipeline = redis_client.pipeline()
+            pipeline.hset(hash_key, mapping=_rollup_mapping(buckets))
+            pipeline.zadd(index_key, {int(bucket): int(bucket) for bucket in buckets})
+            pipeline.execute()
+        except Exception as e:
+            raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+    @staticmethod
+    def remove_rollup_buckets(key: str, resolution: int, before: float) -> int:
+        """
+        Remove the rollup buckets of a sorted set starting before a score,
+        along with their index entries.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            before (float): The bucket start before which they are removed.
+
+        Returns:
+            int: The number of buckets removed.
+        """
+        hash_key, index_key = _rollup_keys(key, resolution)
+        try:
+            buckets = redis_client.zrangebyscore(index_key, "-inf", f"({before}")
+            if not buckets:
+                return 0
+
+            pipeline = redis_client.pipeline()
+            pipeline.hdel(hash_key, *[
+                f"{bucket.decode()}:{name}"
+                for bucket in buckets
+                for name in ROLLUP_FIELDS
+            ])
+            pipeline.zrem(index_key, *buckets)
+            pipeline.execute()
+        except Exception as e:
+            raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+        return len(buckets)
+
+    @staticmethod
+    def get_retention(key: str) -> Dict[int, float]:
+        """
+        Retrieve the score from which the data of each resolution of a
+        sorted set is kept, 0 being its raw members.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Dict[int, float]: The horizon of each resolution trimmed so
+            far, empty if nothing was trimmed.
+        """
+        try:
+            retention = _read_client().hgetall(_retention_key(key))
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return {int(resolution): float(since) for resolution, since in retention.items()}
+
+    @staticmethod
+    def set_retention(key: str, resolution: int, since: float) -> None:
+        """
+        Set the score from which the data of a resolution of a sorted set
+        is kept.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds, 0 for the raw
+            members.
+            since (float): The horizon.
+        """
+        try:
+            redis_client.hset(_retention_key(key), resolution, since)
+        except Exception as e:
+            raise RuntimeError(f"Error setting data in Redis cache: {e}")
+
+    def get_z_stats_by_segments(
+        self,
+        key: str,
+        segments: Sequence[Tuple[int, str, str]]
+    ) -> Dict:
+        """
+        Aggregate the members of a sorted set over a list of segments
+        inside Redis.
+
+        The aggregation runs as a Lua script so only the sum, count, min
+        and max travel over the wire. If scripting is unavailable on the
+        server it falls back to aggregating on the client side.
+
+        Args:
+            key (str): The key of the sorted set.
+            segments (Sequence[Tuple[int, str, str]]): The
+            `(resolution, start, end)` segments to aggregate.
+
+        Returns:
+            Dict: The sum, count, min and max of the values found. Min and
+            max are None when nothing was found.
+        """
+        keys = [key]
+        slots = {}
+        args = []
+        for resolution, start, end in segments:
+            if resolution and resolution not in slots:
+                slots[resolution] = len(slots) + 1
+                keys.extend(_rollup_keys(key, resolution))
+            args.extend([slots.get(resolution, 0), start, end])
+
+        try:
+            total, count, low, high = _run_script(
+                GET_Z_STATS_BY_SEGMENTS_SCRIPT,
+                keys=keys,
+                args=args,
+                client=_read_client()
+            )
+        except ResponseError:
+            return super().get_z_stats_by_segments(key=key, segments=segments)
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return {
+            "sum": float(total),
+            "count": int(count),
+            "min": float(low) if low is not None else None,
+            "max": float(high) if high is not None else None,
+        }
+
+
+class AsyncRedisCacheManager(RedisCacheManagerBase):
     """
-    Concrete implementation of RedisCacheManagerBase
-    for managing Redis cache operations.
+    Implementation of RedisCacheManagerBase on redis.asyncio, for the
+    async views.
+
+    Its methods are coroutines, so a single ASGI worker can wait on many
+    queries at once instead of blocking a thread per request. It uses its
+    own connection pool, separate from the one of the sync client.
     """
 
     @staticmethod
-    def set_data(key: str, value: Dict) -> None:
+    async def set_data(key: str, value: Dict) -> None:
         """
         Set a key-value pair in the Redis cache.
 
@@ -66,16 +2524,16 @@ class RedisCacheManager(RedisCacheManagerBase):
             value (Dict): The value to be stored.
         """
         try:
-            redis_client.zadd(key, value)
+            await get_async_redis_client().zadd(key, value)
         except Exception as e:
             raise RuntimeError(f"Error setting data in Redis cache: {e}")
 
     @staticmethod
-    def get_z_range_by_score(
+    async def get_z_range_by_score(
         key: str,
         start: str,
         end: str
-    ) -> List[Tuple[bytes, str]]:
+    ) -> List[Tuple[bytes, float]]:
         """
         Retrieve a range of elements from a sorted set in the Redis cache by score.
 
@@ -85,11 +2543,328 @@ class RedisCacheManager(RedisCacheManagerBase):
             end (str): The maximum score of the range.
 
         Returns:
-            List[Tuple[bytes, str]]: A list of elements within the specified score range, with their scores.
+            List[Tuple[bytes, float]]: A list of elements within the specified score range, with their scores.
         """
+        client = await get_async_read_client()
         try:
-            range_data = redis_client.zrangebyscore(key, start, end, withscores=True)
+            range_data = await client.zrangebyscore(
+                key,
+                start,
+                end,
+                withscores=True
+            )
         except Exception as e:
             raise RuntimeError(f"Error getting data from Redis cache: {e}")
 
         return range_data
+
+    @staticmethod
+    async def get_z_range_by_score_page(
+        key: str,
+        start: str,
+        end: str,
+        offset: int,
+        count: int
+    ) -> Tuple[int, List[Tuple[bytes, float]]]:
+        """
+        Retrieve a page of a score range of a sorted set, along with the
+        total number of elements in the range, in a single round-trip.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            offset (int): The number of elements to skip.
+            count (int): The maximum number of elements to return, 0 to
+            only count the range.
+
+        Returns:
+            Tuple[int, List[Tuple[bytes, float]]]: The number of elements
+            in the range and the elements of the page, with their scores.
+        """
+        client = await get_async_read_client()
+        try:
+            pipeline = client.pipeline(transaction=False)
+            pipeline.zcount(key, start, end)
+            if count:
+                pipeline.zrangebyscore(
+                    key,
+                    start,
+                    end,
+                    start=offset,
+                    num=count,
+                    withscores=True
+                )
+            total, *range_data = await pipeline.execute()
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return total, range_data[0] if range_data else []
+
+    @staticmethod
+    async def get_z_last_range(
+        key: str,
+        count: int,
+        start: str = "-inf",
+        end: str = "+inf"
+    ) -> List[Tuple[bytes, float]]:
+        """
+        Retrieve the elements with the highest scores of a sorted set,
+        optionally within a score range, with ZREVRANGEBYSCORE ... LIMIT
+        in O(log n + count).
+
+        Args:
+            key (str): The key of the sorted set.
+            count (int): The maximum number of elements to return.
+            start (str, optional): The minimum score of the range.
+            end (str, optional): The maximum score of the range.
+
+        Returns:
+            List[Tuple[bytes, float]]: The elements in score order, with
+            their scores.
+        """
+        client = await get_async_read_client()
+        try:
+            range_data = await client.zrevrangebyscore(
+                key,
+                end,
+                start,
+                start=0,
+                num=count,
+                withscores=True
+            )
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return list(reversed(range_data))
+
+    @staticmethod
+    async def get_z_last_score(key: str) -> Optional[float]:
+        """
+        Retrieve the highest score of a sorted set in O(log n).
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The highest score, None if the set is empty.
+        """
+        client = await get_async_read_client()
+        try:
+            range_data = await client.zrange(
+                key,
+                -1,
+                -1,
+                withscores=True
+            )
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return range_data[0][1] if range_data else None
+
+    async def get_rollup_since(self, key: str) -> Optional[float]:
+        """
+        Retrieve the score from which the rollup buckets are complete.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The watermark, or None if the sorted set has
+            no rollups yet.
+        """
+        client = await get_async_read_client()
+        try:
+            rollup_since = await client.get(
+                _rollup_since_key(key)
+            )
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return float(rollup_since) if rollup_since is not None else None
+
+    async def get_retention(self, key: str) -> Dict[int, float]:
+        """
+        Retrieve the score from which the data of each resolution of a
+        sorted set is kept, 0 being its raw members.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Dict[int, float]: The horizon of each resolution trimmed so
+            far, empty if nothing was trimmed.
+        """
+        client = await get_async_read_client()
+        try:
+            retention = await client.hgetall(_retention_key(key))
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return {int(resolution): float(since) for resolution, since in retention.items()}
+
+    async def get_rollup_buckets(
+        self,
+        key: str,
+        resolution: int,
+        start: str,
+        end: str
+    ) -> List[Tuple[float, int, float, float]]:
+        """
+        Retrieve the rollup buckets starting within a score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            start (str): The minimum bucket start.
+            end (str): The maximum bucket start.
+
+        Returns:
+            List[Tuple[float, int, float, float]]: The sum, count, min
+            and max of every bucket.
+        """
+        _, buckets = await self.get_rollup_series(
+            key=key,
+            resolution=resolution,
+            start=start,
+            end=end
+        )
+        return [bucket[1:5] for bucket in buckets]
+
+    @staticmethod
+    async def get_rollup_series(
+        key: str,
+        resolution: int,
+        start: str,
+        end: str,
+        offset: int = 0,
+        count: int = -1
+    ) -> Tuple[int, List[Tuple]]:
+        """
+        Retrieve a page of the rollup buckets starting within a score
+        range, along with their start and the number of buckets in the
+        range.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            start (str): The minimum bucket start.
+            end (str): The maximum bucket start.
+            offset (int, optional): The number of buckets to skip.
+            count (int, optional): The maximum number of buckets to
+            return, -1 for all of them and 0 to only count the range.
+
+        Returns:
+            Tuple[int, List[Tuple]]: The number of buckets in the range
+            and the start, sum, count, min, max, open, close, open_at,
+            close_at and twsum of the buckets of the page. The last five
+            are None for buckets written before they were tracked.
+        """
+        hash_key, index_key = _rollup_keys(key, resolution)
+        client = await get_async_read_client()
+        try:
+            pipeline = client.pipeline(transaction=False)
+            pipeline.zcount(index_key, start, end)
+            if count:
+                pipeline.zrangebyscore(index_key, start, end, start=offset, num=count)
+            total, *buckets = await pipeline.execute()
+            buckets = buckets[0] if buckets else []
+            names = (
+                "sum", "count", "min", "max", "open", "close", "open_at", "close_at", "twsum"
+            )
+            fields = []
+            for bucket in buckets:
+                bucket = bucket.decode()
+                fields.extend(f"{bucket}:{name}" for name in names)
+            values = await client.hmget(hash_key, fields) if fields else []
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return total, [
+            (
+                float(bucket),
+                float(bucket_sum),
+                int(bucket_count),
+                float(low),
+                float(high),
+                *[float(value) if value is not None else None for value in tracked]
+            )
+            for bucket, (bucket_sum, bucket_count, low, high, *tracked)
+            in zip(buckets, zip(*[iter(values)] * len(names)))
+        ]
+
+    async def get_z_stats_by_segments(
+        self,
+        key: str,
+        segments: Sequence[Tuple[int, str, str]]
+    ) -> Dict:
+        """
+        Aggregate the members of a sorted set over a list of segments
+        inside Redis, falling back to aggregating on the client side if
+        scripting is unavailable on the server.
+
+        Args:
+            key (str): The key of the sorted set.
+            segments (Sequence[Tuple[int, str, str]]): The
+            `(resolution, start, end)` segments to aggregate.
+
+        Returns:
+            Dict: The sum, count, min and max of the values found. Min and
+            max are None when nothing was found.
+        """
+        keys = [key]
+        slots = {}
+        args = []
+        for resolution, start, end in segments:
+            if resolution and resolution not in slots:
+                slots[resolution] = len(slots) + 1
+                keys.extend(_rollup_keys(key, resolution))
+            args.extend([slots.get(resolution, 0), start, end])
+
+        client = await get_async_read_client()
+        try:
+            total, count, low, high = await _get_script(
+                client,
+                GET_Z_STATS_BY_SEGMENTS_SCRIPT
+            )(keys=keys, args=args)
+        except ResponseError:
+            return await self._get_z_stats_by_segments_without_scripting(
+                key=key,
+                segments=segments
+            )
+        except Exception as e:
+            raise RuntimeError(f"Error getting data from Redis cache: {e}")
+
+        return {
+            "sum": float(total),
+            "count": int(count),
+            "min": float(low) if low is not None else None,
+            "max": float(high) if high is not None else None,
+        }
+
+    async def _get_z_stats_by_segments_without_scripting(
+        self,
+        key: str,
+        segments: Sequence[Tuple[int, str, str]]
+    ) -> Dict:
+        stats = {"sum": 0.0, "count": 0, "min": None, "max": None}
+        for resolution, start, end in segments:
+            if resolution:
+                buckets = await self.get_rollup_buckets(
+                    key=key,
+                    resolution=resolution,
+                    start=start,
+                    end=end
+                )
+                for bucket in buckets:
+                    _fold_stats(stats, *bucket)
+            else:
+                range_data = await self.get_z_range_by_score(
+                    key=key,
+                    start=start,
+                    end=end
+                )
+                for member, _ in range_data:
+                    value = decode_member(member)
+                    _fold_stats(stats, value, 1, value, value)
+        return stats
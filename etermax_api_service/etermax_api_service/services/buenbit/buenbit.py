@@ -1,10 +1,16 @@
+import logging
 import os
+import threading
+import time
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Dict, Union
+from typing import Dict, List, Optional, Union
 
 import requests
 from requests import RequestException
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
 
 
 class ApiService(ABC):
@@ -29,21 +35,92 @@ class ApiService(ABC):
 class BuenbitApiService(ApiService):
     """
     Service class to interact with the Buenbit API.
+
+    Requests go through a keep-alive session shared by every instance of
+    the process, so the TCP and TLS handshakes are paid once instead of on
+    every fetch. Responses are revalidated with the ETag/Last-Modified
+    validators sent by the API, and the latency of every fetch is recorded
+    in `metrics`, read through `get_metrics`. Failed fetches and fetches
+    slower than `BUENBIT_SLOW_FETCH_SECONDS` are logged as warnings.
     """
 
+    _session = None
+    _session_pid = None
+    _validators = {}
+    _lock = threading.Lock()
+    metrics = {
+        "requests": 0,
+        "not_modified": 0,
+        "errors": 0,
+        "total_latency": 0.0,
+        "last_latency": None,
+    }
+
     def __init__(self):
         """
-        Initializes the BuenbitApiService with the API URL and headers.
+        Initializes the BuenbitApiService with the API URL, headers and
+        timeouts.
         """
         self.url = os.environ.get("BUENBIT_URL", "")
         self.headers = {
             "content-type": "application/json"
         }
+        self.timeout = (
+            float(os.environ.get("BUENBIT_CONNECT_TIMEOUT", 3.05)),
+            float(os.environ.get("BUENBIT_READ_TIMEOUT", 5))
+        )
+        self.slow_fetch = float(os.environ.get("BUENBIT_SLOW_FETCH_SECONDS", 1))
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        """
+        Return the session of the current process, creating it on first
+        use. Forked worker processes get their own session, so pooled
+        connections are never shared across processes.
+
+        Returns:
+            requests.Session: The session of the current process.
+        """
+        pid = os.getpid()
+        with cls._lock:
+            if cls._session is None or cls._session_pid != pid:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=int(os.environ.get("BUENBIT_POOL_MAXSIZE", 4))
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                cls._session = session
+                cls._session_pid = pid
+                cls._validators = {}
+        return cls._session
+
+    @classmethod
+    def get_metrics(cls) -> Dict:
+        """
+        Return the fetch metrics of the current process.
+
+        Returns:
+            Dict: The number of requests, of 304 Not Modified answers and
+            of errors, and the average and last latencies in seconds,
+            None before the first fetch.
+        """
+        with cls._lock:
+            metrics = dict(cls.metrics)
+        requests_count = metrics["requests"]
+        metrics["average_latency"] = (
+            metrics["total_latency"] / requests_count if requests_count else None
+        )
+        return metrics
 
     def get(self) -> Dict:
         """
         Perform a GET request to the Buenbit API.
 
+        When the API answers 304 Not Modified to the validators of the
+        previous response, that response is returned again.
+
         Returns:
             dict: The response from the API in JSON format.
 
@@ -51,16 +128,73 @@ class BuenbitApiService(ApiService):
             requests.exceptions.RequestException: If there's
             a problem with the request.
         """
+        session = self.get_session()
+        headers = dict(self.headers)
+        validators = self._validators.get(self.url)
+        if validators:
+            etag, last_modified, _ = validators
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        start = time.perf_counter()
         try:
-            response = requests.get(
+            response = session.get(
                 url=self.url,
-                headers=self.headers
+                headers=headers,
+                timeout=self.timeout
             )
-            response.raise_for_status()  # Raise an error for non-2xx responses
-            return response.json()
+            if response.status_code == 304 and validators:
+                data = validators[2]
+            else:
+                response.raise_for_status()  # Raise an error for non-2xx responses
+                data = response.json()
+                self.store_validators(response=response, data=data)
         except RequestException as error:
+            self.record_fetch(start=start, error=True)
             raise error  # Reraise the exception for handling at a higher level
 
+        self.record_fetch(start=start, not_modified=response.status_code == 304)
+        return data
+
+    def store_validators(self, response: requests.Response, data: Dict) -> None:
+        """
+        Keep the validators of a response, along with its data, to make
+        the next request conditional.
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._validators[self.url] = (etag, last_modified, data)
+        else:
+            self._validators.pop(self.url, None)
+
+    def record_fetch(
+        self,
+        start: float,
+        not_modified: bool = False,
+        error: bool = False
+    ) -> None:
+        """
+        Record the latency and outcome of a fetch in `metrics`. Fetches
+        run several times per second, so only the failed and slow ones are
+        logged above DEBUG.
+        """
+        latency = time.perf_counter() - start
+        with self._lock:
+            self.metrics["requests"] += 1
+            self.metrics["not_modified"] += int(not_modified)
+            self.metrics["errors"] += int(error)
+            self.metrics["total_latency"] += latency
+            self.metrics["last_latency"] = latency
+        logger.log(
+            logging.WARNING if error or latency >= self.slow_fetch else logging.DEBUG,
+            "Buenbit API fetch took %.1f ms%s",
+            latency * 1000,
+            " (error)" if error else " (not modified)" if not_modified else ""
+        )
+
 
 class BuenbitApiHandle:
     """
@@ -108,3 +242,53 @@ class BuenbitApiHandle:
             raise KeyError(f"Unexpected response structure: {error}")
 
         return ticker_data
+
+    def handle_markets(
+        self,
+        market_identifiers: List[str],
+        timestamp: Optional[float] = None
+    ) -> Dict[str, Dict[str, Union[int, float]]]:
+        """
+        Handle the Buenbit API response for several markets at once.
+
+        The API returns every market in a single response, so all of them
+        are extracted from one request.
+
+        Args:
+            market_identifiers (List[str]): The identifiers for the
+            market data.
+            timestamp (Optional[float], optional): The timestamp of the
+            tickers. Defaults to the current second.
+
+        Returns:
+            dict: A dictionary containing timestamp and price data for
+            each market found in the response.
+
+        Raises:
+            requests.exceptions.RequestException: If there's a
+            problem with the API request.
+
+            KeyError: If the response data does not contain the
+            expected structure, or none of the markets.
+        """
+        data = self.buenbit_service.get()
+        if timestamp is None:
+            timestamp = int(datetime.now().timestamp())
+        try:
+            markets_data = data['object']
+            tickers_data = {
+                market_identifier: {
+                    'timestamp': timestamp,
+                    'price': float(markets_data[market_identifier]['selling_price'])
+                }
+                for market_identifier in market_identifiers
+                if market_identifier in markets_data
+            }
+        except KeyError as error:
+            raise KeyError(f"Unexpected response structure: {error}")
+
+        if not tickers_data:
+            raise KeyError(
+                f"Unexpected response structure: no market of {market_identifiers}"
+            )
+        return tickers_data
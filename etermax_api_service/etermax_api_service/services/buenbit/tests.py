@@ -13,6 +13,8 @@ class TestBuenbitApiService(unittest.TestCase):
     """
 
     def setUp(self):
+        # Each test starts with a new session and no stored validators
+        BuenbitApiService._session = None
         self.response_api_data = {
             "object": {
                 "btcars": {
@@ -27,7 +29,7 @@ class TestBuenbitApiService(unittest.TestCase):
             }
         }
 
-    @patch('requests.get')
+    @patch.object(requests.Session, 'get')
     def test_get_successful_response(self, mock_get):
         """
         Test the get method for a successful API response.
@@ -36,6 +38,8 @@ class TestBuenbitApiService(unittest.TestCase):
         mock_response = MagicMock()
         mock_response.json.return_value = self.response_api_data
         mock_response.raise_for_status.return_value = None
+        mock_response.status_code = status.HTTP_200_OK
+        mock_response.headers = {}
         mock_get.return_value = mock_response
 
         service = BuenbitApiService()
@@ -43,9 +47,13 @@ class TestBuenbitApiService(unittest.TestCase):
 
         # Assert that the mock response was used
         self.assertEqual(result, self.response_api_data)
-        mock_get.assert_called_once_with(url=service.url, headers=service.headers)
+        mock_get.assert_called_once_with(
+            url=service.url,
+            headers=service.headers,
+            timeout=service.timeout
+        )
 
-    @patch('requests.get')
+    @patch.object(requests.Session, 'get')
     def test_get_raises_exception(self, mock_get):
         """
         Test the get method to ensure it raises an exception for an error response.
@@ -57,6 +65,122 @@ class TestBuenbitApiService(unittest.TestCase):
         with self.assertRaises(requests.RequestException):
             service.get()
 
+    @patch.object(requests.Session, 'get')
+    def test_get_reuses_session_and_revalidates(self, mock_get):
+        """
+        Test the get method reuses the process session, sends the
+        validators of the previous response, and returns its data again
+        when the API answers 304 Not Modified.
+        """
+        first_response = MagicMock()
+        first_response.json.return_value = self.response_api_data
+        first_response.status_code = status.HTTP_200_OK
+        first_response.headers = {"ETag": '"v1"'}
+        not_modified_response = MagicMock()
+        not_modified_response.status_code = status.HTTP_304_NOT_MODIFIED
+        mock_get.side_effect = [first_response, not_modified_response]
+        requests_before = BuenbitApiService.metrics["requests"]
+
+        self.assertEqual(BuenbitApiService().get(), self.response_api_data)
+        self.assertEqual(BuenbitApiService().get(), self.response_api_data)
+
+        self.assertIs(BuenbitApiService.get_session(), BuenbitApiService.get_session())
+        self.assertEqual(
+            mock_get.call_args.kwargs["headers"]["If-None-Match"],
+            '"v1"'
+        )
+        self.assertEqual(BuenbitApiService.metrics["requests"], requests_before + 2)
+        self.assertIsNotNone(BuenbitApiService.metrics["last_latency"])
+
+    @patch.object(requests, 'Session')
+    def test_get_session_is_created_once_per_process(self, mock_session_class):
+        """
+        Test the session is shared by every instance and fetch of a
+        process, and that a forked process creates its own.
+        """
+        mock_session_class.return_value.get.return_value = self.mock_response(
+            status.HTTP_200_OK
+        )
+
+        BuenbitApiService().get()
+        BuenbitApiService().get()
+        mock_session_class.assert_called_once()
+        self.assertEqual(mock_session_class.return_value.get.call_count, 2)
+
+        with patch('os.getpid', return_value=BuenbitApiService._session_pid + 1):
+            BuenbitApiService.get_session()
+        self.assertEqual(mock_session_class.call_count, 2)
+
+    @patch.dict('os.environ', {
+        'BUENBIT_CONNECT_TIMEOUT': '1.5',
+        'BUENBIT_READ_TIMEOUT': '2',
+    })
+    @patch.object(requests.Session, 'get')
+    def test_get_timeouts(self, mock_get):
+        """
+        Test the configured timeouts are sent with every request, and that
+        a timeout is raised, counted as an error and logged as a warning.
+        """
+        mock_get.side_effect = requests.Timeout("Read timed out")
+        errors_before = BuenbitApiService.metrics["errors"]
+
+        with self.assertLogs('services.buenbit.buenbit', level='WARNING') as logs:
+            with self.assertRaises(requests.Timeout):
+                BuenbitApiService().get()
+
+        self.assertEqual(mock_get.call_args.kwargs["timeout"], (1.5, 2.0))
+        self.assertEqual(BuenbitApiService.metrics["errors"], errors_before + 1)
+        self.assertIn("(error)", logs.output[0])
+
+    @patch.object(requests.Session, 'get')
+    def test_get_replays_not_modified_responses(self, mock_get):
+        """
+        Test every validator of the previous response is sent, that a 304
+        Not Modified answer replays its data without parsing a body, and
+        that a response without validators stops the revalidation.
+        """
+        first_response = self.mock_response(
+            status.HTTP_200_OK,
+            headers={
+                "ETag": '"v1"',
+                "Last-Modified": "Fri, 31 May 2024 06:01:10 GMT",
+            }
+        )
+        not_modified_response = self.mock_response(status.HTTP_304_NOT_MODIFIED)
+        unvalidated_response = self.mock_response(status.HTTP_200_OK)
+        mock_get.side_effect = [
+            first_response,
+            not_modified_response,
+            unvalidated_response,
+            unvalidated_response,
+        ]
+        not_modified_before = BuenbitApiService.metrics["not_modified"]
+        service = BuenbitApiService()
+
+        self.assertEqual(service.get(), self.response_api_data)
+        self.assertNotIn("If-None-Match", mock_get.call_args.kwargs["headers"])
+        with self.assertNoLogs('services.buenbit.buenbit', level='INFO'):
+            self.assertEqual(service.get(), self.response_api_data)
+        headers = mock_get.call_args.kwargs["headers"]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(headers["If-Modified-Since"], "Fri, 31 May 2024 06:01:10 GMT")
+        not_modified_response.json.assert_not_called()
+        self.assertEqual(
+            BuenbitApiService.get_metrics()["not_modified"],
+            not_modified_before + 1
+        )
+
+        service.get()
+        service.get()
+        self.assertNotIn("If-None-Match", mock_get.call_args.kwargs["headers"])
+
+    def mock_response(self, status_code, headers=None):
+        response = MagicMock()
+        response.json.return_value = self.response_api_data
+        response.status_code = status_code
+        response.headers = headers or {}
+        return response
+
 
 class TestBuenbitApiHandle(unittest.TestCase):
     """
@@ -64,6 +188,8 @@ class TestBuenbitApiHandle(unittest.TestCase):
     """
 
     def setUp(self):
+        # Each test starts with a new session and no stored validators
+        BuenbitApiService._session = None
         self.response_api_data = {
             "object": {
                 "btcars": {
@@ -114,6 +240,30 @@ class TestBuenbitApiHandle(unittest.TestCase):
         with self.assertRaises(KeyError):
             handler.handle('btc_ars')
 
+    @patch.object(BuenbitApiService, 'get')
+    def test_handle_markets_from_a_single_request(self, mock_get):
+        """
+        Test the handle_markets method extracts every requested market
+        found in one API response.
+        """
+        self.response_api_data['object']['ethars'] = {
+            "selling_price": "4436700.0",
+            "market_identifier": "ethars"
+        }
+        mock_get.return_value = self.response_api_data
+
+        handler = BuenbitApiHandle()
+        result = handler.handle_markets(['btcars', 'ethars', 'usdtars'])
+
+        mock_get.assert_called_once()
+        self.assertEqual(set(result), {'btcars', 'ethars'})
+        self.assertEqual(result['btcars']['price'], 84436700.0)
+        self.assertEqual(result['ethars']['price'], 4436700.0)
+        self.assertEqual(result['btcars']['timestamp'], result['ethars']['timestamp'])
+
+        with self.assertRaises(KeyError):
+            handler.handle_markets(['usdtars'])
+
 
 if __name__ == '__main__':
     unittest.main()
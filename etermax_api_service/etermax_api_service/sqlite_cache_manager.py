@@ -0,0 +1,743 @@
+"""
+On-disk storage of the `<timestamp>:<value>` sorted sets in SQLite.
+
+Members live in a `WITHOUT ROWID` table clustered on `(key, score,
+member)`, so a score range is one contiguous read of the primary key and
+no separate index is needed. The rollup buckets are kept in their own
+table and updated in the same transaction as their members, folding each
+new member as the Redis rollup script does.
+
+Only history which doesn't fit in Redis memory is meant to be stored here:
+there is no publish/subscribe, so the in-process hot windows are not fed.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from common import decode_member
+from redis_cache_manager import (
+    RedisCacheManagerBase,
+    _fold_stats,
+    _parse_bound,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS members (
+    key TEXT NOT NULL,
+    score REAL NOT NULL,
+    member TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (key, score, member)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    key TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    count INTEGER NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    open REAL NOT NULL,
+    open_at REAL NOT NULL,
+    close REAL NOT NULL,
+    close_at REAL NOT NULL,
+    twsum REAL NOT NULL,
+    PRIMARY KEY (key, resolution, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS horizons (
+    key TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    since REAL NOT NULL,
+    PRIMARY KEY (key, resolution)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS plain_values (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL
+) WITHOUT ROWID;
+"""
+
+# Resolution under which the rollup watermark of a key is stored in the
+# horizons table, next to the retention horizons
+ROLLUP_SINCE_RESOLUTION = -1
+
+# Folds a new member into a rollup bucket, the last parameter being the
+# integral of the step split by the member
+UPSERT_ROLLUP = """
+INSERT INTO rollups VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, 0)
+ON CONFLICT (key, resolution, bucket) DO UPDATE SET
+    sum = sum + excluded.sum,
+    count = count + 1,
+    min = MIN(min, excluded.min),
+    max = MAX(max, excluded.max),
+    open = CASE WHEN excluded.open_at < open_at THEN excluded.open ELSE open END,
+    open_at = MIN(open_at, excluded.open_at),
+    close = CASE WHEN excluded.close_at >= close_at THEN excluded.close ELSE close END,
+    close_at = MAX(close_at, excluded.close_at),
+    twsum = twsum + ?
+"""
+
+
+def _score_condition(column: str, start, end) -> Tuple[str, List[float]]:
+    """
+    Build the SQL condition of a sorted set score range, e.g. "(10" to
+    "+inf", on a column.
+
+    Returns:
+        Tuple[str, List[float]]: The condition and its parameters.
+    """
+    conditions, params = [], []
+    low, low_exclusive = _parse_bound(start)
+    high, high_exclusive = _parse_bound(end)
+    if not math.isinf(low):
+        conditions.append(f"{column} {'>' if low_exclusive else '>='} ?")
+        params.append(low)
+    if not math.isinf(high):
+        conditions.append(f"{column} {'<' if high_exclusive else '<='} ?")
+        params.append(high)
+    return " AND ".join(conditions) or "1", params
+
+
+class SQLiteCacheManager(RedisCacheManagerBase):
+    """
+    Implementation of RedisCacheManagerBase storing the sorted sets, their
+    rollups and plain values in a SQLite database file.
+
+    Each thread opens its own connection. The database runs in WAL mode,
+    so readers don't block the writer.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the SQLiteCacheManager, creating the tables if needed.
+
+        Args:
+            path (str): The path of the database file.
+        """
+        self.path = path
+        self._local = threading.local()
+        try:
+            self.connection.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Error setting data in SQLite storage: {e}")
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        The connection of the current thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run writes in a transaction, committed if no exception is raised.
+        """
+        connection = self.connection
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            yield connection
+            connection.execute("COMMIT")
+        except Exception as e:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise RuntimeError(f"Error setting data in SQLite storage: {e}")
+
+    def query(self, sql: str, params: Sequence = ()) -> List[Tuple]:
+        """
+        Run a read query and fetch its rows.
+        """
+        try:
+            return self.connection.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Error getting data from SQLite storage: {e}")
+
+    def set_data(self, key: str, value: Dict) -> None:
+        """
+        Add members to a sorted set.
+
+        Args:
+            key (str): The key of the sorted set.
+            value (Dict): The members to be added, with their scores.
+        """
+        self.write_many(values={key: value}, trims={}, messages=(), resolutions=())
+
+    def set_data_with_rollups(
+        self,
+        key: str,
+        value: Dict,
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Add members to a sorted set and fold the new ones into its rollup
+        buckets, in a single transaction.
+
+        Args:
+            key (str): The key of the sorted set.
+            value (Dict): The members to be added, with their scores.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+        """
+        self.write_many(values={key: value}, trims={}, messages=(), resolutions=resolutions)
+
+    def set_many_data_with_rollups(
+        self,
+        values: Dict[str, Dict],
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Add members to several sorted sets and fold the new ones into
+        their rollup buckets, in a single transaction.
+
+        Args:
+            values (Dict[str, Dict]): The members to be added to each
+            sorted set, with their scores, by key.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+        """
+        self.write_many(values=values, trims={}, messages=(), resolutions=resolutions)
+
+    def write_many(
+        self,
+        values: Dict[str, Dict],
+        trims: Dict[str, float],
+        messages: Sequence[Tuple[str, str]],
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Store members of several sorted sets with their rollups and trim
+        sorted sets in a single transaction, then publish messages.
+
+        Args:
+            values (Dict[str, Dict]): The members to be stored in each
+            sorted set, with their scores, by key.
+            trims (Dict[str, float]): The score before which members are
+            removed, by key.
+            messages (Sequence[Tuple[str, str]]): The `(channel, message)`
+            pairs to publish.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+        """
+        with self.transaction() as connection:
+            for key, value in values.items():
+                for member, score in value.items():
+                    if isinstance(member, bytes):
+                        member = member.decode()
+                    self._add_member(
+                        connection,
+                        key,
+                        member,
+                        float(score),
+                        resolutions
+                    )
+            for key, before in trims.items():
+                connection.execute(
+                    "DELETE FROM members WHERE key = ? AND score < ?",
+                    (key, before)
+                )
+        if messages:
+            self.publish_many(messages=messages)
+
+    @staticmethod
+    def _add_member(
+        connection: sqlite3.Connection,
+        key: str,
+        member: str,
+        score: float,
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Add a member and, only when it was not stored yet, fold it into
+        the rollup buckets of every resolution.
+        """
+        value = decode_member(member)
+        inserted = connection.execute(
+            "INSERT OR IGNORE INTO members VALUES (?, ?, ?, ?)",
+            (key, score, member, value)
+        ).rowcount
+        if not inserted or not resolutions:
+            return
+
+        connection.execute(
+            "INSERT OR IGNORE INTO horizons VALUES (?, ?, ?)",
+            (key, ROLLUP_SINCE_RESOLUTION, score)
+        )
+        previous = connection.execute(
+            "SELECT value, score FROM members WHERE key = ? AND (score, member) < (?, ?) "
+            "ORDER BY score DESC, member DESC LIMIT 1",
+            (key, score, member)
+        ).fetchone()
+        following = connection.execute(
+            "SELECT value, score FROM members WHERE key = ? AND (score, member) > (?, ?) "
+            "ORDER BY score, member LIMIT 1",
+            (key, score, member)
+        ).fetchone()
+
+        for resolution in resolutions:
+            bucket = math.floor(score / resolution) * resolution
+            # The new member splits the step between its neighbours in the
+            # bucket
+            after = previous is not None and previous[1] >= bucket
+            before = following is not None and following[1] < bucket + resolution
+            weighted = 0.0
+            if after:
+                weighted += previous[0] * (score - previous[1])
+            if before:
+                weighted += value * (following[1] - score)
+            if after and before:
+                weighted -= previous[0] * (following[1] - previous[1])
+            connection.execute(UPSERT_ROLLUP, (
+                key, resolution, bucket,
+                value, value, value, value, score, value, score,
+                weighted
+            ))
+
+    def get_z_range_by_score(self, key: str, start: str, end: str) -> List[Tuple[bytes, float]]:
+        """
+        Retrieve a score range of a sorted set.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            List[Tuple[bytes, float]]: The elements within the range, with
+            their scores.
+        """
+        condition, params = _score_condition("score", start, end)
+        rows = self.query(
+            f"SELECT member, score FROM members WHERE key = ? AND {condition} "
+            "ORDER BY score, member",
+            (key, *params)
+        )
+        return [(member.encode(), score) for member, score in rows]
+
+    def get_z_range_by_score_page(
+        self,
+        key: str,
+        start: str,
+        end: str,
+        offset: int,
+        count: int
+    ) -> Tuple[int, List[Tuple[bytes, float]]]:
+        """
+        Retrieve a page of a score range of a sorted set, along with the
+        total number of elements in the range.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            offset (int): The number of elements to skip.
+            count (int): The maximum number of elements to return, 0 to
+            only count the range.
+
+        Returns:
+            Tuple[int, List[Tuple[bytes, float]]]: The number of elements
+            in the range and the elements of the page, with their scores.
+        """
+        condition, params = _score_condition("score", start, end)
+        (total,), = self.query(
+            f"SELECT COUNT(*) FROM members WHERE key = ? AND {condition}",
+            (key, *params)
+        )
+        rows = []
+        if count:
+            rows = self.query(
+                f"SELECT member, score FROM members WHERE key = ? AND {condition} "
+                "ORDER BY score, member LIMIT ? OFFSET ?",
+                (key, *params, count, offset)
+            )
+        return total, [(member.encode(), score) for member, score in rows]
+
+    def iter_z_range_by_score(
+        self,
+        key: str,
+        start: str,
+        end: str,
+        batch_size: int
+    ) -> Iterator[List[Tuple[bytes, float]]]:
+        """
+        Iterate over a score range of a sorted set in batches, each one
+        starting after the last member read.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            batch_size (int): The maximum number of elements per batch.
+
+        Yields:
+            List[Tuple[bytes, float]]: Batches of elements in score order,
+            with their scores.
+        """
+        condition, params = _score_condition("score", start, end)
+        last = None
+        while True:
+            after = "AND (score, member) > (?, ?)" if last else ""
+            rows = self.query(
+                f"SELECT member, score FROM members WHERE key = ? AND {condition} {after} "
+                "ORDER BY score, member LIMIT ?",
+                (key, *params, *(last or ()), batch_size)
+            )
+            if rows:
+                yield [(member.encode(), score) for member, score in rows]
+            if len(rows) < batch_size:
+                return
+            last = (rows[-1][1], rows[-1][0])
+
+    def get_z_last_score(self, key: str) -> Optional[float]:
+        """
+        Retrieve the highest score of a sorted set.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The highest score, None if the set is empty.
+        """
+        (score,), = self.query("SELECT MAX(score) FROM members WHERE key = ?", (key,))
+        return score
+
+    def get_z_last_range(
+        self,
+        key: str,
+        count: int,
+        start: str = "-inf",
+        end: str = "+inf"
+    ) -> List[Tuple[bytes, float]]:
+        """
+        Retrieve the elements with the highest scores of a sorted set,
+        optionally within a score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            count (int): The maximum number of elements to return.
+            start (str, optional): The minimum score of the range.
+            end (str, optional): The maximum score of the range.
+
+        Returns:
+            List[Tuple[bytes, float]]: The elements in score order, with
+            their scores.
+        """
+        condition, params = _score_condition("score", start, end)
+        rows = self.query(
+            f"SELECT member, score FROM members WHERE key = ? AND {condition} "
+            "ORDER BY score DESC, member DESC LIMIT ?",
+            (key, *params, count)
+        )
+        return [(member.encode(), score) for member, score in reversed(rows)]
+
+    def remove_z_range_by_score(self, key: str, start: str, end: str) -> int:
+        """
+        Remove the members of a sorted set within a score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            int: The number of members removed.
+        """
+        condition, params = _score_condition("score", start, end)
+        with self.transaction() as connection:
+            return connection.execute(
+                f"DELETE FROM members WHERE key = ? AND {condition}",
+                (key, *params)
+            ).rowcount
+
+    def replace_data(self, key: str, removed: List, value: Dict) -> None:
+        """
+        Atomically remove members from a sorted set and add new ones.
+
+        Args:
+            key (str): The key of the sorted set.
+            removed (List): The members to be removed.
+            value (Dict): The members to be added, with their scores.
+        """
+        with self.transaction() as connection:
+            connection.executemany(
+                "DELETE FROM members WHERE key = ? AND member = ?",
+                [
+                    (key, member.decode() if isinstance(member, bytes) else member)
+                    for member in removed
+                ]
+            )
+            for member, score in value.items():
+                if isinstance(member, bytes):
+                    member = member.decode()
+                self._add_member(connection, key, member, float(score), resolutions=())
+
+    def scan_z_members(
+        self,
+        key: str,
+        batch_size: int
+    ) -> Iterator[List[Tuple[bytes, float]]]:
+        """
+        Iterate over all the members of a sorted set in batches.
+
+        Args:
+            key (str): The key of the sorted set.
+            batch_size (int): The maximum number of members per batch.
+
+        Yields:
+            List[Tuple[bytes, float]]: Batches of members with their scores.
+        """
+        return self.iter_z_range_by_score(
+            key=key,
+            start="-inf",
+            end="+inf",
+            batch_size=batch_size
+        )
+
+    def set_value(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        """
+        Set a plain value, optionally expiring after some seconds.
+
+        Args:
+            key (str): The key under which the value should be stored.
+            value (str): The value to be stored.
+            expire (Optional[int], optional): Seconds until the value
+            expires. Defaults to None, never.
+        """
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO plain_values VALUES (?, ?, ?)",
+                (key, str(value).encode(), time.time() + expire if expire else None)
+            )
+
+    def get_value(self, key: str) -> Optional[bytes]:
+        """
+        Retrieve a plain value.
+
+        Args:
+            key (str): The key of the value.
+
+        Returns:
+            Optional[bytes]: The value, None if missing or expired.
+        """
+        rows = self.query(
+            "SELECT value FROM plain_values WHERE key = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        )
+        return bytes(rows[0][0]) if rows else None
+
+    def get_rollup_since(self, key: str) -> Optional[float]:
+        """
+        Retrieve the score from which the rollup buckets are complete.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The watermark, or None if the sorted set has
+            no rollups yet.
+        """
+        rows = self.query(
+            "SELECT since FROM horizons WHERE key = ? AND resolution = ?",
+            (key, ROLLUP_SINCE_RESOLUTION)
+        )
+        return rows[0][0] if rows else None
+
+    def set_rollup_since(self, key: str, since: float) -> None:
+        """
+        Set the score from which the rollup buckets are complete.
+
+        Args:
+            key (str): The key of the sorted set.
+            since (float): The watermark.
+        """
+        self.set_retention(key=key, resolution=ROLLUP_SINCE_RESOLUTION, since=since)
+
+    def set_rollup_buckets(
+        self,
+        key: str,
+        resolution: int,
+        buckets: Dict[float, Tuple]
+    ) -> None:
+        """
+        Overwrite rollup buckets of a sorted set.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            buckets (Dict[float, Tuple]): The values of the
+            `ROLLUP_FIELDS` of each bucket, by bucket start.
+        """
+        with self.transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (key, resolution, int(bucket), *values)
+                    for bucket, values in buckets.items()
+                ]
+            )
+
+    def remove_rollup_buckets(self, key: str, resolution: int, before: float) -> int:
+        """
+        Remove the rollup buckets of a sorted set starting before a score.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            before (float): The bucket start before which they are removed.
+
+        Returns:
+            int: The number of buckets removed.
+        """
+        with self.transaction() as connection:
+            return connection.execute(
+                "DELETE FROM rollups WHERE key = ? AND resolution = ? AND bucket < ?",
+                (key, resolution, before)
+            ).rowcount
+
+    def get_rollup_series(
+        self,
+        key: str,
+        resolution: int,
+        start: str,
+        end: str,
+        offset: int = 0,
+        count: int = -1
+    ) -> Tuple[int, List[Tuple]]:
+        """
+        Retrieve a page of the rollup buckets starting within a score
+        range, along with their start and the number of buckets in the
+        range.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            start (str): The minimum bucket start.
+            end (str): The maximum bucket start.
+            offset (int, optional): The number of buckets to skip.
+            count (int, optional): The maximum number of buckets to
+            return, -1 for all of them and 0 to only count the range.
+
+        Returns:
+            Tuple[int, List[Tuple]]: The number of buckets in the range
+            and the start, sum, count, min, max, open, close, open_at,
+            close_at and twsum of the buckets of the page.
+        """
+        condition, params = _score_condition("bucket", start, end)
+        (total,), = self.query(
+            f"SELECT COUNT(*) FROM rollups WHERE key = ? AND resolution = ? AND {condition}",
+            (key, resolution, *params)
+        )
+        rows = []
+        if count:
+            rows = self.query(
+                "SELECT bucket, sum, count, min, max, open, close, open_at, close_at, twsum "
+                f"FROM rollups WHERE key = ? AND resolution = ? AND {condition} "
+                "ORDER BY bucket LIMIT ? OFFSET ?",
+                (key, resolution, *params, count, offset)
+            )
+        return total, [(float(bucket), *values) for bucket, *values in rows]
+
+    def get_rollup_buckets(
+        self,
+        key: str,
+        resolution: int,
+        start: str,
+        end: str
+    ) -> List[Tuple[float, int, float, float]]:
+        """
+        Retrieve the rollup buckets starting within a score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            start (str): The minimum bucket start.
+            end (str): The maximum bucket start.
+
+        Returns:
+            List[Tuple[float, int, float, float]]: The sum, count, min
+            and max of every bucket.
+        """
+        condition, params = _score_condition("bucket", start, end)
+        return self.query(
+            "SELECT sum, count, min, max FROM rollups "
+            f"WHERE key = ? AND resolution = ? AND {condition} ORDER BY bucket",
+            (key, resolution, *params)
+        )
+
+    def get_retention(self, key: str) -> Dict[int, float]:
+        """
+        Retrieve the score from which the data of each resolution of a
+        sorted set is kept, 0 being its raw members.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Dict[int, float]: The horizon of each resolution trimmed so
+            far, empty if nothing was trimmed.
+        """
+        return dict(self.query(
+            "SELECT resolution, since FROM horizons WHERE key = ? AND resolution >= 0",
+            (key,)
+        ))
+
+    def set_retention(self, key: str, resolution: int, since: float) -> None:
+        """
+        Set the score from which the data of a resolution of a sorted set
+        is kept.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds, 0 for the raw
+            members.
+            since (float): The horizon.
+        """
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO horizons VALUES (?, ?, ?)",
+                (key, resolution, since)
+            )
+
+    def get_z_stats_by_segments(
+        self,
+        key: str,
+        segments: Sequence[Tuple[int, str, str]]
+    ) -> Dict:
+        """
+        Aggregate the members of a sorted set over a list of segments,
+        each one folded by SQLite.
+
+        Args:
+            key (str): The key of the sorted set.
+            segments (Sequence[Tuple[int, str, str]]): The segments to
+            aggregate.
+
+        Returns:
+            Dict: The sum, count, min and max of the values found. Min and
+            max are None when nothing was found.
+        """
+        stats = {"sum": 0.0, "count": 0, "min": None, "max": None}
+        for resolution, start, end in segments:
+            if resolution:
+                condition, params = _score_condition("bucket", start, end)
+                (segment,) = self.query(
+                    "SELECT SUM(sum), SUM(count), MIN(min), MAX(max) FROM rollups "
+                    f"WHERE key = ? AND resolution = ? AND {condition}",
+                    (key, resolution, *params)
+                )
+            else:
+                condition, params = _score_condition("score", start, end)
+                (segment,) = self.query(
+                    "SELECT SUM(value), COUNT(*), MIN(value), MAX(value) FROM members "
+                    f"WHERE key = ? AND {condition}",
+                    (key, *params)
+                )
+            _fold_stats(stats, *segment)
+        return stats
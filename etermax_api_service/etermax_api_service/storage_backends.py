@@ -0,0 +1,59 @@
+"""
+Registry of the storage backends of the tickers.
+
+A backend is an implementation of RedisCacheManagerBase. The one used by
+the tickers is named by the `TICKER_STORAGE_BACKEND` setting, and built
+with its entry of the `TICKER_STORAGE_OPTIONS` setting as keyword
+arguments.
+"""
+
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from redis_cache_manager import RedisCacheManagerBase
+
+# Dotted path of the class of each backend, imported on first use so the
+# dependencies of unused backends are not required
+STORAGE_BACKENDS: Dict[str, str] = {
+    "redis": "redis_cache_manager.RedisCacheManager",
+    "compact": "compact_cache_manager.CompactRedisCacheManager",
+    "sqlite": "sqlite_cache_manager.SQLiteCacheManager",
+    "tiered": "tiered_cache_manager.TieredCacheManager",
+}
+
+
+def register_storage_backend(name: str, path: str) -> None:
+    """
+    Register a storage backend, or replace the class of a registered one.
+
+    Args:
+        name (str): The name of the backend in the settings.
+        path (str): The dotted path of its RedisCacheManagerBase subclass.
+    """
+    STORAGE_BACKENDS[name] = path
+
+
+def get_storage_backend(name: Optional[str] = None) -> RedisCacheManagerBase:
+    """
+    Build a storage backend.
+
+    Args:
+        name (Optional[str], optional): The name of the backend. Defaults
+        to the `TICKER_STORAGE_BACKEND` setting.
+
+    Returns:
+        RedisCacheManagerBase: The backend, built with its options.
+
+    Raises:
+        ValueError: If no backend is registered under the name.
+    """
+    name = name or settings.TICKER_STORAGE_BACKEND
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(
+            f"Unknown storage backend {name!r}, expected one of {sorted(STORAGE_BACKENDS)}"
+        )
+
+    backend_class = import_string(STORAGE_BACKENDS[name])
+    return backend_class(**settings.TICKER_STORAGE_OPTIONS.get(name, {}))
@@ -0,0 +1,58 @@
+"""
+Aggregation modes of the average price of a ticker series.
+
+The arithmetic mean, min and max are folded from the rollup buckets. The
+time-weighted average is too: each bucket keeps the integral of the price
+over its own samples, and consecutive pieces are joined by the step from
+the close of one to the open of the next. Medians and percentiles need
+every price of the range, so they are computed over the raw tickers.
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+AVERAGE_MODES = ("mean", "twap", "median", "percentile", "min", "max")
+
+
+def time_weighted_average(pieces: Sequence[Sequence[float]]) -> Optional[float]:
+    """
+    Calculate the time-weighted average of a ticker series, each price
+    holding until the next ticker.
+
+    Args:
+        pieces (Sequence[Sequence[float]]): The `(open_at, close_at, open,
+        close, twsum)` of each piece of the series, in time order. A raw
+        ticker is a piece opening and closing at its timestamp.
+
+    Returns:
+        Optional[float]: The average, None if there are no pieces. If
+        every ticker shares the same timestamp, the last price.
+    """
+    if not len(pieces):
+        return None
+
+    open_at, close_at, _, closes, twsums = np.asarray(pieces, dtype=np.float64).T
+    duration = close_at[-1] - open_at[0]
+    if duration <= 0:
+        return float(closes[-1])
+
+    # The close of each piece holds until the open of the next one
+    integral = twsums.sum() + np.dot(closes[:-1], open_at[1:] - close_at[:-1])
+    return float(integral / duration)
+
+
+def percentile(prices: np.ndarray, q: float) -> Optional[float]:
+    """
+    Calculate a percentile of the prices, interpolating linearly.
+
+    Args:
+        prices (np.ndarray): The prices.
+        q (float): The percentile, between 0 and 100.
+
+    Returns:
+        Optional[float]: The percentile, None if there are no prices.
+    """
+    if not prices.size:
+        return None
+    return float(np.percentile(prices, q))
@@ -0,0 +1,178 @@
+"""
+Bulk loading of historical tickers from CSV or Parquet files.
+
+Files are streamed row by row, so their size is bounded by the disk and
+not by memory. The number of rows loaded is checkpointed in the cache after
+every chunk, and loading a ticker twice is a no-op, so an interrupted
+backfill resumes from its last checkpoint.
+"""
+
+import csv
+import itertools
+import os
+import sys
+from datetime import datetime
+from typing import Callable, Iterator, Optional, Tuple
+
+from ticker.ticker import BuenbitTicker
+
+
+def parse_timestamp(value: str) -> float:
+    """
+    Parse a timestamp given in epoch seconds or in ISO 8601 format.
+
+    Args:
+        value (str): The timestamp.
+
+    Returns:
+        float: The timestamp in epoch seconds.
+
+    Raises:
+        ValueError: If the value is not a valid timestamp.
+    """
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def read_csv(
+    path: str,
+    timestamp_column: str = "timestamp",
+    price_column: str = "price"
+) -> Iterator[Tuple[float, float]]:
+    """
+    Read the `(timestamp, price)` rows of a CSV file with a header row.
+
+    Args:
+        path (str): The path of the file, "-" to read the standard input.
+        timestamp_column (str, optional): The column of the timestamps.
+        price_column (str, optional): The column of the prices.
+
+    Yields:
+        Tuple[float, float]: The timestamp and price of each row.
+    """
+    with (open(path, newline="") if path != "-" else sys.stdin) as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        try:
+            timestamp_index = header.index(timestamp_column)
+            price_index = header.index(price_column)
+        except ValueError:
+            raise ValueError(
+                f"Columns '{timestamp_column}' and '{price_column}' are required."
+            )
+
+        for row in reader:
+            yield parse_timestamp(row[timestamp_index]), float(row[price_index])
+
+
+def read_parquet(
+    path: str,
+    timestamp_column: str = "timestamp",
+    price_column: str = "price",
+    batch_size: int = 65536
+) -> Iterator[Tuple[float, float]]:
+    """
+    Read the `(timestamp, price)` rows of a Parquet file, one record batch
+    at a time. Requires pyarrow.
+
+    Args:
+        path (str): The path of the file.
+        timestamp_column (str, optional): The column of the timestamps,
+        either numeric epoch seconds or a timestamp type.
+        price_column (str, optional): The column of the prices.
+        batch_size (int, optional): The number of rows read at a time.
+
+    Yields:
+        Tuple[float, float]: The timestamp and price of each row.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet as parquet
+    except ImportError:
+        raise ValueError("Reading Parquet files requires pyarrow to be installed.")
+
+    file = parquet.ParquetFile(path)
+    batches = file.iter_batches(
+        batch_size=batch_size,
+        columns=[timestamp_column, price_column]
+    )
+    for batch in batches:
+        timestamps = batch.column(timestamp_column)
+        if pyarrow.types.is_timestamp(timestamps.type):
+            # Timestamp types are read as epoch seconds
+            timestamps = [value.timestamp() for value in timestamps.to_pylist()]
+        else:
+            timestamps = timestamps.to_pylist()
+        yield from zip(timestamps, batch.column(price_column).to_pylist())
+
+
+def read_samples(path: str, **columns) -> Iterator[Tuple[float, float]]:
+    """
+    Read the `(timestamp, price)` rows of a CSV or Parquet file, chosen by
+    its extension.
+    """
+    if os.path.splitext(path)[1].lower() in (".parquet", ".pq"):
+        return read_parquet(path, **columns)
+    return read_csv(path, **columns)
+
+
+def checkpoint_key(key: str, path: str) -> str:
+    """
+    Build the key holding the number of rows of a file already loaded
+    into a ticker series.
+    """
+    return f"{key}:backfill:{os.path.basename(path)}"
+
+
+def backfill(
+    ticker: BuenbitTicker,
+    path: str,
+    key: str = "prices",
+    chunk_size: int = 10000,
+    resume: bool = True,
+    on_chunk: Optional[Callable[[int], None]] = None,
+    **columns
+) -> Tuple[int, int]:
+    """
+    Load the tickers of a CSV or Parquet file into a ticker series,
+    resuming from the last checkpoint of the file if any.
+
+    Args:
+        ticker (BuenbitTicker): The ticker to store with.
+        path (str): The path of the file.
+        key (str, optional): Key of the series to load into.
+        chunk_size (int, optional): The number of rows written per
+        round-trip and checkpoint.
+        resume (bool, optional): Whether to skip the rows loaded by a
+        previous run.
+        on_chunk (Optional[Callable[[int], None]], optional): Called with
+        the number of rows loaded so far after each chunk.
+        **columns: The `timestamp_column` and `price_column` of the file.
+
+    Returns:
+        Tuple[int, int]: The number of rows skipped and loaded.
+    """
+    checkpoint = checkpoint_key(key, path)
+    skipped = 0
+    if resume:
+        skipped = int(ticker.get_value(key=checkpoint) or 0)
+    samples = itertools.islice(read_samples(path, **columns), skipped, None)
+
+    done = skipped
+
+    def save_checkpoint(count: int) -> None:
+        nonlocal done
+        done += count
+        ticker.set_value(key=checkpoint, value=str(done))
+        if on_chunk is not None:
+            on_chunk(done)
+
+    loaded = ticker.backfill(
+        key=key,
+        samples=samples,
+        chunk_size=chunk_size,
+        on_chunk=save_checkpoint
+    )
+    return skipped, loaded
@@ -0,0 +1,177 @@
+import contextlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, ContextManager, Dict, Hashable, List, Optional, Tuple
+
+# Seconds of clock skew tolerated between the writers logging rewrites and
+# the cache reading them
+REWRITES_CLOCK_SKEW = 60
+
+
+class ResponseCache:
+    """
+    In-process read-through cache for queries over closed time windows.
+
+    A window is closed once a sample newer than its end has been stored in
+    its series: samples are ingested in time order, so its result can't
+    change anymore. Results of open windows are never cached. Entries are evicted
+    by least recent use once `max_size` is reached, and expire after `ttl`
+    seconds. Writes landing in closed windows, such as late samples and
+    backfills, are logged by the writers: the entries whose window they
+    reach are evicted on the next lookup of their series.
+    """
+
+    def __init__(
+        self,
+        latest_timestamp: Callable[[str], Optional[float]],
+        max_size: int = 1024,
+        ttl: float = 3600,
+        rewrites: Optional[Callable[[str, float], List[Tuple[float, float]]]] = None,
+        read_scope: Callable[[], ContextManager] = contextlib.nullcontext
+    ):
+        """
+        Initialize the ResponseCache.
+
+        Args:
+            latest_timestamp (Callable[[str], Optional[float]]): Returns
+            the timestamp of the latest sample stored in a series, None if
+            there is none.
+            max_size (int, optional): The maximum number of entries.
+            ttl (float, optional): Seconds an entry is kept.
+            rewrites (Optional[Callable[[str, float], List[Tuple[float,
+            float]]]], optional): Returns the time each write landing
+            before the latest sample of a series was logged after a given
+            time, and the lowest timestamp it wrote. Defaults to assuming
+            history is never rewritten.
+            read_scope (Callable[[], ContextManager], optional): Returns
+            the context within which the reads of a lookup are done, so
+            the closed check and the computation see the same data.
+        """
+        self.latest_timestamp = latest_timestamp
+        self.max_size = max_size
+        self.ttl = ttl
+        self.rewrites = rewrites
+        self.read_scope = read_scope
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._latest = {}
+        self._rewrites_checked = {}
+        self._lock = threading.Lock()
+
+    def evict_rewritten(self, series: str) -> None:
+        """
+        Evict the entries of a series whose window reaches the writes
+        logged since its last lookup.
+
+        Args:
+            series (str): The key of the series.
+        """
+        if self.rewrites is None:
+            return
+
+        now = time.time()
+        checked_at, seen = self._rewrites_checked.get(series, (now, set()))
+        logged = set(self.rewrites(series, checked_at - REWRITES_CLOCK_SKEW))
+        rewritten = [lowest for _, lowest in logged - seen]
+        with self._lock:
+            self._rewrites_checked[series] = (now, logged)
+            if not rewritten:
+                return
+            since = min(rewritten)
+            for key, (_, _, entry_series, until_timestamp) in list(self._entries.items()):
+                if entry_series == series and until_timestamp >= since:
+                    del self._entries[key]
+
+    def is_closed(self, until_timestamp: float, series: str) -> bool:
+        """
+        Check whether a window ending at `until_timestamp` is closed.
+
+        The latest timestamp only grows, so it is only read again from the
+        db while windows still look open.
+
+        Args:
+            until_timestamp (float): The end of the window.
+            series (str): The key of the series of the window.
+
+        Returns:
+            bool: True if a sample newer than the end has been stored.
+        """
+        latest = self._latest.get(series)
+        if latest is not None and until_timestamp < latest:
+            return True
+
+        latest = self._latest[series] = self.latest_timestamp(series)
+        return latest is not None and until_timestamp < latest
+
+    def get_or_set(
+        self,
+        key: Hashable,
+        until_timestamp: float,
+        compute: Callable[[], Dict],
+        series: str
+    ) -> Dict:
+        """
+        Return the cached result for `key`, computing and caching it if
+        missing or expired. Open windows are always computed.
+
+        Args:
+            key (Hashable): The normalized (endpoint, series, since, until)
+            key.
+            until_timestamp (float): The end of the window.
+            compute (Callable[[], Dict]): Computes the result.
+            series (str): The key of the series of the window.
+
+        Returns:
+            Dict: The result for the window.
+        """
+        # The rewrites, the closed check and the computation are read
+        # together, a lagging replica could otherwise miss what the others
+        # have seen
+        with self.read_scope():
+            self.evict_rewritten(series)
+            now = time.monotonic()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+
+            # A window closing while it is computed may miss samples written
+            # meanwhile, so only windows already closed before are cached
+            closed = self.is_closed(until_timestamp, series=series)
+            result = compute()
+        if not closed:
+            return result
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl, result, series, until_timestamp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        """
+        Remove every entry and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._latest = {}
+            self._rewrites_checked = {}
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        """
+        Return the hit/miss counters and the number of entries.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
@@ -0,0 +1,69 @@
+"""
+OHLC candles of a ticker series.
+
+Candles are built from pieces: raw samples, or rollup buckets carrying
+their own open/high/low/close/count. Grouping the pieces by candle is a
+single vectorized pass, so a candle costs the same whether it was read
+from thousands of samples or from a few buckets.
+"""
+
+import math
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Supported candle widths in seconds, each a multiple of a rollup resolution
+CANDLE_INTERVALS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "1h": 3600,
+    "4h": 14400,
+    "1d": 86400,
+}
+
+
+def aggregate_candles(pieces: Sequence[Sequence[float]], interval: int) -> List[Dict]:
+    """
+    Group pieces of a ticker series into candles.
+
+    Args:
+        pieces (Sequence[Sequence[float]]): The `(timestamp, open, high,
+        low, close, count)` of each piece, in time order. Unknown opens
+        and closes are NaN.
+        interval (int): The width of the candles in seconds.
+
+    Returns:
+        List[Dict]: The timestamp, open, high, low, close and count of
+        every candle with pieces, in time order. Unknown opens and closes
+        are None.
+    """
+    if not len(pieces):
+        return []
+
+    pieces = np.asarray(pieces, dtype=np.float64)
+    timestamps, opens, highs, lows, closes, counts = pieces.T
+
+    starts = np.floor(timestamps / interval) * interval
+    candle_starts, first = np.unique(starts, return_index=True)
+    last = np.append(first[1:], len(starts)) - 1
+
+    candles = np.column_stack((
+        candle_starts,
+        opens[first],
+        np.maximum.reduceat(highs, first),
+        np.minimum.reduceat(lows, first),
+        closes[last],
+        np.add.reduceat(counts, first),
+    ))
+    return [
+        {
+            "timestamp": int(timestamp),
+            "open": None if math.isnan(candle_open) else candle_open,
+            "high": high,
+            "low": low,
+            "close": None if math.isnan(close) else close,
+            "count": int(count),
+        }
+        for timestamp, candle_open, high, low, close, count in candles.tolist()
+    ]
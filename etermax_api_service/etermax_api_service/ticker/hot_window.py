@@ -0,0 +1,201 @@
+"""
+In-process window of the most recent samples of a ticker series.
+
+Each web worker keeps the latest samples in a ring buffer backed by two
+`array('d')` columns, fed by the samples published on the series channel
+when they are stored. Queries over the recent past are then answered
+without a round-trip to the db.
+"""
+
+import logging
+import threading
+import time
+from array import array
+from typing import Callable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class HotWindow:
+    """
+    Ring buffer of the latest samples of a ticker series.
+
+    The window knows the timestamp after which it holds every stored
+    sample (`complete_after`), and only answers ranges starting after it
+    and ending at its newest sample at the latest.
+    Until it is seeded, or after it loses track of the series, it answers
+    nothing and readers fall back to the db.
+    """
+
+    def __init__(self, capacity: int = 360):
+        """
+        Initialize the HotWindow.
+
+        Args:
+            capacity (int, optional): The number of samples kept.
+            Defaults to 360, an hour of samples taken every 10 seconds.
+        """
+        self.capacity = capacity
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._prices = array("d", bytes(8 * capacity))
+        self._start = 0
+        self._size = 0
+        self._complete_after = None
+        self._lock = threading.Lock()
+        self._subscriber = None
+
+    def _index(self, position: int) -> int:
+        return (self._start + position) % self.capacity
+
+    def seed(self, samples: List[Tuple[float, float]]) -> None:
+        """
+        Replace the content of the window with the latest stored samples.
+
+        Args:
+            samples (List[Tuple[float, float]]): Up to `capacity`
+            (timestamp, price) pairs, in time order, read from the db.
+        """
+        samples = samples[-self.capacity:]
+        with self._lock:
+            self._start = 0
+            self._size = len(samples)
+            for position, (timestamp, price) in enumerate(samples):
+                self._timestamps[position] = timestamp
+                self._prices[position] = price
+
+            # A full read may have left out older samples sharing the
+            # timestamp of the oldest one
+            if len(samples) < self.capacity:
+                self._complete_after = float("-inf")
+            else:
+                self._complete_after = samples[0][0]
+
+    def invalidate(self) -> None:
+        """
+        Stop answering queries until the window is seeded again.
+        """
+        with self._lock:
+            self._complete_after = None
+
+    def append(self, timestamp: float, price: float) -> None:
+        """
+        Add a newly stored sample to the window.
+
+        Args:
+            timestamp (float): The timestamp of the sample.
+            price (float): The price of the sample.
+        """
+        with self._lock:
+            if self._complete_after is None:
+                return
+
+            position = self._size - 1
+            if self._size and timestamp < self._timestamps[self._index(position)]:
+                # Samples older than the newest one can't be inserted, the
+                # window is only complete after them from now on
+                self._complete_after = max(self._complete_after, timestamp)
+                return
+
+            # The same sample may be received again while seeding
+            while position >= 0 and self._timestamps[self._index(position)] == timestamp:
+                if self._prices[self._index(position)] == price:
+                    return
+                position -= 1
+
+            if self._size == self.capacity:
+                evicted = self._timestamps[self._start]
+                self._complete_after = max(self._complete_after, evicted)
+                self._start = self._index(1)
+                self._size -= 1
+
+            index = self._index(self._size)
+            self._timestamps[index] = timestamp
+            self._prices[index] = price
+            self._size += 1
+
+    def get_range(
+        self,
+        since_timestamp: float,
+        until_timestamp: float
+    ) -> Optional[List[Tuple[float, float]]]:
+        """
+        Retrieve the samples of an inclusive time range.
+
+        Args:
+            since_timestamp (float): The start of the time range.
+            until_timestamp (float): The end of the time range.
+
+        Returns:
+            Optional[List[Tuple[float, float]]]: The (timestamp, price)
+            pairs of the range, or None if the window doesn't hold every
+            sample of the range.
+        """
+        since_timestamp = float(since_timestamp)
+        until_timestamp = float(until_timestamp)
+        with self._lock:
+            if self._complete_after is None or since_timestamp <= self._complete_after:
+                return None
+
+            # Samples after the newest one may be stored but not received yet
+            if not self._size or until_timestamp > self._timestamps[self._index(self._size - 1)]:
+                return None
+
+            # Binary search of the first sample at or after since
+            low, high = 0, self._size
+            while low < high:
+                middle = (low + high) // 2
+                if self._timestamps[self._index(middle)] < since_timestamp:
+                    low = middle + 1
+                else:
+                    high = middle
+
+            samples = []
+            for position in range(low, self._size):
+                index = self._index(position)
+                if self._timestamps[index] > until_timestamp:
+                    break
+                samples.append((self._timestamps[index], self._prices[index]))
+            return samples
+
+    def start(
+        self,
+        subscribe: Callable[[Callable[[], None]], Iterator[Tuple[float, float]]],
+        latest_samples: Callable[[int], List[Tuple[float, float]]]
+    ) -> None:
+        """
+        Start feeding the window from a background thread, if not started.
+
+        Args:
+            subscribe (Callable): Subscribes to the samples being stored,
+            calling its argument once subscribed, and yields them.
+            latest_samples (Callable[[int], List[Tuple[float, float]]]):
+            Reads the latest stored samples, in time order.
+        """
+        with self._lock:
+            if self._subscriber is not None:
+                return
+            self._subscriber = threading.Thread(
+                target=self._listen,
+                args=(subscribe, latest_samples),
+                name="hot-window",
+                daemon=True
+            )
+        self._subscriber.start()
+
+    def _listen(self, subscribe, latest_samples) -> None:
+        backoff = 1
+        while True:
+            try:
+                # Seed once subscribed, so no sample is missed in between
+                samples = subscribe(
+                    lambda: self.seed(latest_samples(self.capacity))
+                )
+                for timestamp, price in samples:
+                    self.append(timestamp, price)
+                    backoff = 1
+            except Exception as error:
+                logger.warning("Hot window subscription lost: %s", error)
+
+            self.invalidate()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
@@ -0,0 +1,194 @@
+"""
+Long-running ingestion of the Buenbit tickers.
+
+The worker polls the Buenbit API at sub-second intervals from an asyncio
+loop, drops quotes that didn't change since the previous one of their
+market, and writes the rest in pipelined batches. While it is running it
+keeps a heartbeat key alive, and the periodic Celery task only fetches
+tickers when the heartbeat is missing.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from ticker.ticker import BuenbitTicker
+
+logger = logging.getLogger(__name__)
+
+INGESTION_HEARTBEAT_KEY = "ticker:ingestion:heartbeat"
+
+
+def is_ingestion_worker_alive(ticker: BuenbitTicker) -> bool:
+    """
+    Check whether an ingestion worker has recently stored tickers.
+
+    Args:
+        ticker (BuenbitTicker): The ticker to read the heartbeat with.
+
+    Returns:
+        bool: True if the heartbeat of a worker is alive.
+    """
+    return ticker.get_value(key=INGESTION_HEARTBEAT_KEY) is not None
+
+
+class TickerIngestionWorker:
+    """
+    Asyncio worker polling the Buenbit API and storing the tickers of
+    several markets in batches.
+
+    Fetching and writing run as two tasks connected by a queue, so a slow
+    write never delays the next fetch. Blocking calls run in threads.
+    """
+
+    def __init__(
+        self,
+        market_identifiers: List[str],
+        interval: float = 0.5,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        heartbeat_ttl: int = 30,
+        ticker: Optional[BuenbitTicker] = None
+    ):
+        """
+        Initialize the TickerIngestionWorker.
+
+        Args:
+            market_identifiers (List[str]): The markets to ingest.
+            interval (float, optional): Seconds between fetches.
+            batch_size (int, optional): The maximum number of tickers per
+            write.
+            flush_interval (float, optional): The maximum number of
+            seconds a ticker waits to be written.
+            heartbeat_ttl (int, optional): Seconds the heartbeat stays
+            alive after the last write.
+            ticker (Optional[BuenbitTicker], optional): The ticker to
+            fetch and store with.
+        """
+        self.market_identifiers = market_identifiers
+        self.interval = interval
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.heartbeat_ttl = heartbeat_ttl
+        self.ticker = ticker or BuenbitTicker()
+        self.last_prices = {}
+        self.stats = {"fetches": 0, "errors": 0, "stored": 0, "skipped": 0}
+
+    def deduplicate(self, tickers_data: Dict[str, Dict]) -> List:
+        """
+        Drop the quotes whose price didn't change since the previous
+        quote of their market.
+
+        Args:
+            tickers_data (Dict[str, Dict]): The timestamp and price of
+            each market.
+
+        Returns:
+            List: The `(market_identifier, ticker)` pairs to store.
+        """
+        changed = []
+        for market_identifier, data in tickers_data.items():
+            if self.last_prices.get(market_identifier) == data["price"]:
+                self.stats["skipped"] += 1
+                continue
+            self.last_prices[market_identifier] = data["price"]
+            changed.append((market_identifier, data))
+        return changed
+
+    async def fetch(self, queue: asyncio.Queue, max_fetches: Optional[int]) -> None:
+        """
+        Fetch the tickers every `interval` seconds and queue the changed
+        ones, until `max_fetches` fetches are done if given.
+        """
+        backoff = self.interval
+        while max_fetches is None or self.stats["fetches"] < max_fetches:
+            started = time.monotonic()
+            self.stats["fetches"] += 1
+            try:
+                tickers_data = await asyncio.to_thread(
+                    self.ticker.buenbit_api.handle_markets,
+                    self.market_identifiers,
+                    round(time.time(), 3)
+                )
+            except Exception as error:
+                self.stats["errors"] += 1
+                logger.warning("Ticker fetch failed: %s", error)
+                backoff = min(max(backoff * 2, 1), 30)
+                await asyncio.sleep(backoff)
+                continue
+
+            backoff = self.interval
+            for pair in self.deduplicate(tickers_data):
+                await queue.put(pair)
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    async def write(self, queue: asyncio.Queue) -> None:
+        """
+        Write the queued tickers in batches of up to `batch_size`, at
+        least every `flush_interval` seconds, until None is queued.
+        """
+        pending = []
+        stopped = False
+        while not stopped:
+            deadline = time.monotonic() + self.flush_interval
+            while len(pending) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopped = True
+                    break
+                pending.append(item)
+            pending = await self.flush(pending)
+
+    async def flush(self, pending: List) -> List:
+        """
+        Store the pending tickers and refresh the heartbeat.
+
+        Returns:
+            List: The tickers left pending because the write failed.
+        """
+        try:
+            if pending:
+                tickers_data = {}
+                for market_identifier, data in pending:
+                    tickers_data.setdefault(market_identifier, []).append(data)
+                await asyncio.to_thread(
+                    self.ticker.store_tickers,
+                    tickers_data
+                )
+                self.stats["stored"] += len(pending)
+            await asyncio.to_thread(
+                self.ticker.set_value,
+                INGESTION_HEARTBEAT_KEY,
+                str(time.time()),
+                self.heartbeat_ttl
+            )
+        except RuntimeError as error:
+            logger.warning("Ticker write failed, retrying: %s", error)
+            return pending
+        return []
+
+    async def run(self, max_fetches: Optional[int] = None) -> Dict:
+        """
+        Run the worker until cancelled, or until `max_fetches` fetches
+        are done and written.
+
+        Returns:
+            Dict: The number of fetches, failed fetches, stored and
+            skipped tickers.
+        """
+        queue = asyncio.Queue()
+        writer = asyncio.create_task(self.write(queue))
+        try:
+            await self.fetch(queue, max_fetches=max_fetches)
+        finally:
+            # Let the writer store what is left before stopping
+            await queue.put(None)
+            await writer
+        return self.stats
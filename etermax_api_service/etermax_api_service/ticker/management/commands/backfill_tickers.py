@@ -0,0 +1,82 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ticker.backfill import backfill
+from ticker.ticker import BuenbitTicker
+
+
+class Command(BaseCommand):
+    """
+    Bulk load of historical tickers from a CSV or Parquet file.
+
+    Rows are written in pipelined chunks and checkpointed, so running the
+    command again with the same file resumes an interrupted load.
+    """
+
+    help = "Load historical tickers from a CSV or Parquet file into the ticker store."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="CSV or Parquet file with the tickers, '-' to read a CSV from stdin."
+        )
+        parser.add_argument(
+            "--market",
+            default=settings.TICKER_DEFAULT_MARKET,
+            help="Market of the tickers. Defaults to TICKER_DEFAULT_MARKET."
+        )
+        parser.add_argument(
+            "--timestamp-column",
+            default="timestamp",
+            help="Column with the timestamps, in epoch seconds or ISO 8601."
+        )
+        parser.add_argument(
+            "--price-column",
+            default="price",
+            help="Column with the prices."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Number of tickers written per round-trip."
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Load the file from the start instead of resuming."
+        )
+
+    def handle(self, *args, **options):
+        ticker = BuenbitTicker()
+        started = time.monotonic()
+
+        def report(done):
+            self.stdout.write(
+                f"Loaded {done} rows ({time.monotonic() - started:.1f}s)."
+            )
+
+        try:
+            skipped, loaded = backfill(
+                ticker=ticker,
+                path=options["path"],
+                key=ticker.market_key(options["market"]),
+                chunk_size=options["chunk_size"],
+                resume=not options["restart"],
+                on_chunk=report,
+                timestamp_column=options["timestamp_column"],
+                price_column=options["price_column"]
+            )
+        except (OSError, ValueError, IndexError, RuntimeError) as error:
+            raise CommandError(str(error))
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {loaded} tickers in {elapsed:.1f}s "
+                f"({loaded / max(elapsed, 1e-9):.0f} rows/s), "
+                f"skipped {skipped} rows loaded by a previous run."
+            )
+        )
@@ -0,0 +1,83 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from services.buenbit.buenbit import BuenbitApiService
+from ticker.ingestion import TickerIngestionWorker
+
+
+class Command(BaseCommand):
+    """
+    Long-running ingestion of the Buenbit tickers at sub-second intervals.
+
+    While it runs, the periodic Celery task skips its fetches and only
+    takes over again once the worker heartbeat expires.
+    """
+
+    help = "Poll the Buenbit API continuously and store the tickers in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "markets",
+            nargs="*",
+            default=settings.TICKER_MARKETS,
+            help="Markets to ingest. Defaults to TICKER_MARKETS."
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.5,
+            help="Seconds between fetches."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Maximum number of tickers written per round-trip."
+        )
+        parser.add_argument(
+            "--flush-interval",
+            type=float,
+            default=1.0,
+            help="Maximum number of seconds a ticker waits to be written."
+        )
+        parser.add_argument(
+            "--heartbeat-ttl",
+            type=int,
+            default=30,
+            help="Seconds without writes before the Celery task takes over."
+        )
+        parser.add_argument(
+            "--max-fetches",
+            type=int,
+            default=None,
+            help="Stop after this number of fetches. Runs forever by default."
+        )
+
+    def handle(self, *args, **options):
+        worker = TickerIngestionWorker(
+            market_identifiers=options["markets"],
+            interval=options["interval"],
+            batch_size=options["batch_size"],
+            flush_interval=options["flush_interval"],
+            heartbeat_ttl=options["heartbeat_ttl"]
+        )
+        try:
+            stats = asyncio.run(worker.run(max_fetches=options["max_fetches"]))
+        except KeyboardInterrupt:
+            stats = worker.stats
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fetched {stats['fetches']} times ({stats['errors']} failed), "
+                f"stored {stats['stored']} tickers, "
+                f"skipped {stats['skipped']} unchanged."
+            )
+        )
+        metrics = BuenbitApiService.get_metrics()
+        if metrics["requests"]:
+            self.stdout.write(
+                f"Buenbit API fetches took {metrics['average_latency'] * 1000:.1f} ms "
+                f"on average, {metrics['not_modified']} were not modified."
+            )
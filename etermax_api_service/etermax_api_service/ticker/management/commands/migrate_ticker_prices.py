@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ticker.ticker import TickerManagerDataBase
+
+
+class Command(BaseCommand):
+    """
+    One-shot migration of the ticker sorted sets from the legacy
+    `{price: timestamp}` layout to `{"<timestamp>:<price>": timestamp}`.
+    """
+
+    help = "Rewrite legacy price-as-member ticker entries as timestamp-encoded members."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "keys",
+            nargs="*",
+            default=["prices"],
+            help="Sorted set keys to migrate. Defaults to 'prices'."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of members rewritten per round-trip."
+        )
+
+    def handle(self, *args, **options):
+        ticker = TickerManagerDataBase()
+        for key in options["keys"]:
+            try:
+                migrated = ticker.migrate_members(
+                    key=key,
+                    batch_size=options["batch_size"]
+                )
+            except RuntimeError as error:
+                raise CommandError(str(error))
+
+            self.stdout.write(
+                self.style.SUCCESS(f"Migrated {migrated} members of '{key}'.")
+            )
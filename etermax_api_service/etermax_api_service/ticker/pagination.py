@@ -0,0 +1,99 @@
+from typing import Dict, List, Optional
+
+from rest_framework.pagination import PageNumberPagination
+
+
+class TickerRange:
+    """
+    Lazy sequence over the tickers of a time range.
+
+    It supports the `count()` and slicing protocol used by Django's
+    paginator, reading only the requested page and the size of the range
+    from the cache instead of the whole range.
+    """
+
+    def __init__(self, ticker, since_timestamp, until_timestamp, key="prices"):
+        """
+        Initialize the TickerRange.
+
+        Args:
+            ticker (BuenbitTicker): The ticker to read from.
+            since_timestamp (str): The start of the time range.
+            until_timestamp (str): The end of the time range.
+            key (str, optional): Key to obtain queries from the db.
+        """
+        self.ticker = ticker
+        self.since_timestamp = since_timestamp
+        self.until_timestamp = until_timestamp
+        self.key = key
+        self._count = None
+        self._offset = 0
+        self._limit = 0
+        self._page = []
+
+    def prefetch(self, offset: int, limit: int) -> None:
+        """
+        Announce the page that will be requested, so the page and the
+        size of the range are read in the same round-trip.
+
+        Args:
+            offset (int): The number of tickers to skip.
+            limit (int): The maximum number of tickers of the page.
+        """
+        self._offset = max(offset, 0)
+        self._limit = max(limit, 0)
+
+    def _fetch(self, offset: int, limit: int) -> List[Dict]:
+        self._count, page = self.ticker.get_tickers_page(
+            since_timestamp=self.since_timestamp,
+            until_timestamp=self.until_timestamp,
+            offset=offset,
+            limit=limit,
+            key=self.key
+        )
+        return page
+
+    def count(self) -> int:
+        """
+        Return the number of tickers in the range.
+        """
+        if self._count is None:
+            self._page = self._fetch(offset=self._offset, limit=self._limit)
+        return self._count
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, item: slice) -> List[Dict]:
+        if not isinstance(item, slice) or item.step is not None:
+            raise TypeError("TickerRange only supports contiguous slices.")
+
+        start = item.start or 0
+        stop = self.count() if item.stop is None else item.stop
+        prefetched_stop = self._offset + len(self._page)
+        if self._page and start == self._offset and stop <= prefetched_stop:
+            return self._page[:stop - start]
+        return self._fetch(offset=start, limit=max(stop - start, 0))
+
+
+class TickerPageNumberPagination(PageNumberPagination):
+    """
+    Page number pagination pushing the requested page of a TickerRange
+    down to the cache, so any page costs the same regardless of the size
+    of the range.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None) -> Optional[List]:
+        page_size = self.get_page_size(request)
+        page_number = request.query_params.get(self.page_query_param, 1)
+        if isinstance(queryset, TickerRange) and page_size:
+            try:
+                page_size = int(page_size)
+                queryset.prefetch(
+                    offset=(int(page_number) - 1) * page_size,
+                    limit=page_size
+                )
+            except (TypeError, ValueError):
+                # Let the paginator report the invalid page
+                pass
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,71 @@
+"""
+Fast JSON rendering of the ticker responses.
+
+Pages of thousands of tickers spend most of their time being encoded.
+orjson encodes them several times faster than the standard library, so
+the ticker views render with it, falling back to DRF's JSON renderer when
+orjson is not installed.
+"""
+
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Lazy strings, dates and decimals of error payloads are encoded by DRF
+_default_encoder = JSONEncoder()
+
+
+def dumps(data) -> bytes:
+    """
+    Encode data as compact JSON.
+
+    Args:
+        data: The data to encode. Besides the types orjson supports, any
+        type DRF's encoder supports.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON document.
+    """
+    if orjson is None:
+        return JSONRenderer().render(data)
+    # Errors of list fields are keyed by the index of the item
+    return orjson.dumps(
+        data,
+        default=_default_encoder.default,
+        option=orjson.OPT_NON_STR_KEYS
+    )
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer encoding with orjson.
+
+    Indentation requested through the Accept header is ignored, responses
+    are always compact.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+        return dumps(data)
+
+
+class ORJSONResponse(HttpResponse):
+    """
+    Counterpart of Django's JsonResponse encoding with orjson, for the
+    async views.
+    """
+
+    def __init__(self, data, safe: bool = True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
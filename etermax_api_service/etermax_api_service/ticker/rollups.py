@@ -0,0 +1,243 @@
+"""
+Query planning over the rollup buckets of a ticker series.
+
+Every sample stored through `TickerManagerDataBase` is also folded into
+per-minute, per-hour and per-day sum/count/min/max buckets. A range query is
+answered by combining the widest whole buckets that fit in the range plus
+the raw samples at its edges, so its cost depends on the number of buckets
+rather than on the number of samples.
+
+Once the retention task trims the raw samples of old days, the buckets are
+the only data left of those days: ranges reaching them are read from the
+finest buckets still kept, rounded outwards to whole buckets. When the raw
+samples are archived instead, the ranges before the horizon of trimmed
+buckets are read from the narrower buckets still kept or from raw samples.
+"""
+
+import math
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Bucket widths in seconds, from the widest to the narrowest
+ROLLUP_RESOLUTIONS = (86400, 3600, 60)
+
+# Resolution used in a segment to read the raw samples
+RAW_RESOLUTION = 0
+
+
+def _score(value: float, exclusive: bool = False) -> str:
+    """
+    Format a value as a redis score bound.
+
+    Args:
+        value (float): The score.
+        exclusive (bool, optional): Whether the bound is exclusive.
+
+    Returns:
+        str: The score bound.
+    """
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return f"({value}" if exclusive else str(value)
+
+
+def _split(
+    start: float,
+    end: float,
+    resolutions: Sequence[int]
+) -> List[Tuple[int, float, float]]:
+    """
+    Split the half-open range [start, end) into whole buckets, preferring
+    the widest resolutions, plus the raw samples left at the edges.
+
+    Returns:
+        List[Tuple[int, float, float]]: Half-open `(resolution, start, end)`
+        segments sorted by start.
+    """
+    if start >= end:
+        return []
+
+    for position, resolution in enumerate(resolutions):
+        first_bucket = math.ceil(start / resolution) * resolution
+        last_bucket = math.floor(end / resolution) * resolution
+        if first_bucket < last_bucket:
+            narrower = resolutions[position + 1:]
+            return [
+                *_split(start, first_bucket, narrower),
+                (resolution, first_bucket, last_bucket),
+                *_split(last_bucket, end, narrower),
+            ]
+
+    return [(RAW_RESOLUTION, start, end)]
+
+
+def retention_horizon(days: int, now: Optional[float] = None) -> float:
+    """
+    Return the start of the first day kept by a retention of `days` days.
+
+    Horizons are aligned to the widest buckets, so the ranges trimmed are
+    always made of whole buckets of every resolution.
+    """
+    day = ROLLUP_RESOLUTIONS[0]
+    now = time.time() if now is None else now
+    return math.floor((now - days * day) / day) * day
+
+
+def split_retained(
+    since_timestamp: float,
+    until_timestamp: float,
+    rollup_since: Optional[float],
+    retention: Dict[int, float],
+    resolutions: Sequence[int] = ROLLUP_RESOLUTIONS
+) -> Tuple[Optional[Tuple[int, float, float]], Optional[float]]:
+    """
+    Split the inclusive range [since, until] of a ticker series at the
+    horizon of its raw samples.
+
+    The part before the horizon is read from the finest resolution whose
+    buckets are kept at its start, covering the buckets that contain its
+    edges.
+
+    Args:
+        since_timestamp (float): The start of the time range.
+        until_timestamp (float): The end of the time range.
+        rollup_since (Optional[float]): The rollup watermark of the series,
+        None if it has no rollups.
+        retention (Dict[int, float]): The timestamp from which the data of
+        each resolution is kept, 0 being the raw samples. Resolutions
+        missing are kept forever.
+        resolutions (Sequence[int], optional): The available bucket
+        widths, from the widest to the narrowest.
+
+    Returns:
+        Tuple[Optional[Tuple[int, float, float]], Optional[float]]: The
+        `(resolution, start, end)` half-open range of buckets before the
+        horizon, None if the range doesn't reach before it, and the start
+        of the part read from raw samples, None if there is none.
+    """
+    since_timestamp = float(since_timestamp)
+    until_timestamp = float(until_timestamp)
+    raw_since = retention.get(RAW_RESOLUTION)
+    if raw_since is None or rollup_since is None or since_timestamp >= raw_since:
+        return None, since_timestamp
+
+    # The finest resolution covering the start of the range, or else the
+    # one keeping the oldest buckets
+    best = None
+    for resolution in reversed(resolutions):
+        kept_since = max(retention.get(resolution, float("-inf")), rollup_since)
+        start = math.floor(max(since_timestamp, kept_since) / resolution) * resolution
+        if start < kept_since:
+            start += resolution
+        if start <= since_timestamp:
+            best = (resolution, start)
+            break
+        if best is None or start < best[1]:
+            best = (resolution, start)
+
+    resolution, start = best
+    if until_timestamp >= raw_since:
+        return (resolution, start, raw_since), raw_since
+    end = math.floor(until_timestamp / resolution) * resolution + resolution
+    return (resolution, start, min(end, raw_since)), None
+
+
+def plan_segments(
+    since_timestamp: float,
+    until_timestamp: float,
+    rollup_since: Optional[float],
+    resolutions: Sequence[int] = ROLLUP_RESOLUTIONS,
+    retention: Optional[Dict[int, float]] = None
+) -> List[Tuple[int, str, str]]:
+    """
+    Plan how to read the inclusive range [since, until] of a ticker series.
+
+    Only buckets starting at or after `rollup_since` are used, as earlier
+    buckets may be missing samples stored before rollups existed.
+
+    Args:
+        since_timestamp (float): The start of the time range.
+        until_timestamp (float): The end of the time range.
+        rollup_since (Optional[float]): The rollup watermark of the series,
+        None if it has no rollups.
+        resolutions (Sequence[int], optional): The available bucket
+        widths, from the widest to the narrowest.
+        retention (Optional[Dict[int, float]], optional): The timestamp
+        from which the data of each resolution is kept, see
+        `split_retained`. Defaults to keeping everything.
+
+    Returns:
+        List[Tuple[int, str, str]]: `(resolution, start, end)` segments
+        with redis score bounds. Resolution 0 reads raw samples, any other
+        value reads the buckets of that width starting within the bounds.
+    """
+    retained, since_timestamp = split_retained(
+        since_timestamp=since_timestamp,
+        until_timestamp=until_timestamp,
+        rollup_since=rollup_since,
+        retention=retention or {},
+        resolutions=resolutions
+    )
+    planned = []
+    if retained is not None:
+        resolution, start, end = retained
+        planned = [
+            (width, _score(bucket_start), _score(bucket_end, exclusive=True))
+            for width, bucket_start, bucket_end in _split(
+                start,
+                end,
+                [width for width in resolutions if width >= resolution]
+            )
+        ]
+    if since_timestamp is None:
+        return planned
+
+    until_timestamp = float(until_timestamp)
+    if rollup_since is None or rollup_since > until_timestamp:
+        return planned + [(
+            RAW_RESOLUTION,
+            _score(since_timestamp),
+            _score(until_timestamp)
+        )]
+
+    # Buckets can't go further than now, an open range is read raw above it
+    rollup_start = max(since_timestamp, rollup_since)
+    rollup_end = until_timestamp
+    if not math.isfinite(rollup_end):
+        rollup_end = max(rollup_start, time.time())
+
+    segments = []
+    if since_timestamp < rollup_start:
+        segments.append((RAW_RESOLUTION, since_timestamp, rollup_start))
+
+    # Raw samples may outlive trimmed buckets, when they are archived, so
+    # the range is split at the horizons of the buckets and each part only
+    # uses the resolutions still kept over it
+    horizons = {
+        resolution: since for resolution, since in (retention or {}).items()
+        if resolution != RAW_RESOLUTION
+    }
+    edges = sorted({
+        rollup_start,
+        rollup_end,
+        *[since for since in horizons.values() if rollup_start < since < rollup_end]
+    })
+    for start, end in zip(edges, edges[1:]):
+        segments.extend(_split(start, end, [
+            resolution for resolution in resolutions
+            if horizons.get(resolution, float("-inf")) <= start
+        ]))
+
+    # The range is inclusive, so the last raw edge also reads its end
+    if segments and segments[-1][0] == RAW_RESOLUTION:
+        _, last_start, _ = segments.pop()
+    else:
+        last_start = rollup_end
+    planned.extend(
+        (resolution, _score(start), _score(end, exclusive=True))
+        for resolution, start, end in segments
+    )
+    planned.append(
+        (RAW_RESOLUTION, _score(last_start), _score(until_timestamp))
+    )
+    return planned
@@ -1,5 +1,20 @@
+import time
+
 from rest_framework import serializers
 
+from common import format_timestamp
+from ticker.candles import CANDLE_INTERVALS
+
+
+class TimestampField(serializers.FloatField):
+    """
+    Field for the timestamp of a sample, represented as an int when it is
+    a whole second and as a float otherwise.
+    """
+
+    def to_representation(self, value):
+        return format_timestamp(value)
+
 
 class TickerAveragePriceSerializer(serializers.Serializer):
     """
@@ -16,10 +31,10 @@ class TickerSerializer(serializers.Serializer):
     Serializer for individual ticker data.
 
     Fields:
-        timestamp (int): The timestamp of the ticker.
+        timestamp (int | float): The timestamp of the ticker.
         price (float): The price of the ticker.
     """
-    timestamp = serializers.IntegerField(required=True)
+    timestamp = TimestampField(required=True)
     price = serializers.FloatField(required=True)
 
 
@@ -31,3 +46,76 @@ class TickerPriceSerializer(serializers.Serializer):
         price (float): The price of the tickers.
     """
     price = serializers.FloatField(required=True)
+
+
+class TickerAsOfPriceSerializer(serializers.Serializer):
+    """
+    Serializer for the latest ticker at or before a timestamp.
+
+    Fields:
+        timestamp (int | float): The timestamp of the ticker found, null
+        if none.
+        price (float): The price of the ticker found, null if none.
+    """
+    timestamp = TimestampField(allow_null=True)
+    price = serializers.FloatField(allow_null=True)
+
+
+class TickerPricesRequestSerializer(serializers.Serializer):
+    """
+    Serializer for a batch of timestamps to look up prices for.
+
+    Fields:
+        timestamps (List[float]): The timestamps, between 1 and 1000.
+    """
+    timestamps = serializers.ListField(
+        child=serializers.FloatField(),
+        min_length=1,
+        max_length=1000
+    )
+
+
+class TickerPricesSerializer(serializers.Serializer):
+    """
+    Serializer for the prices of a batch of timestamps.
+
+    Fields:
+        prices (List[float]): The price at each requested timestamp, in
+        the same order, null where there is no ticker.
+    """
+    prices = serializers.ListField(
+        child=serializers.FloatField(allow_null=True)
+    )
+
+
+class TickerCandlesRequestSerializer(serializers.Serializer):
+    """
+    Serializer for the range and width of a request of candles.
+
+    Fields:
+        since (float): The start of the time range. Defaults to 500
+        candles before `until`.
+        until (float): The end of the time range. Defaults to now.
+        interval (str): The width of the candles, one of
+        `CANDLE_INTERVALS`. Defaults to "1m".
+    """
+    MAX_CANDLES = 5000
+
+    since = serializers.FloatField(required=False)
+    until = serializers.FloatField(required=False)
+    interval = serializers.ChoiceField(
+        choices=list(CANDLE_INTERVALS),
+        default="1m"
+    )
+
+    def validate(self, attrs):
+        interval = CANDLE_INTERVALS[attrs["interval"]]
+        attrs.setdefault("until", time.time())
+        attrs.setdefault("since", attrs["until"] - 500 * interval)
+        if attrs["since"] > attrs["until"]:
+            raise serializers.ValidationError("since must not be after until.")
+        if (attrs["until"] - attrs["since"]) / interval >= self.MAX_CANDLES:
+            raise serializers.ValidationError(
+                f"The range must span less than {self.MAX_CANDLES} candles."
+            )
+        return attrs
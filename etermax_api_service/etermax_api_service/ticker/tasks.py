@@ -1,5 +1,8 @@
 from celery import shared_task
+from django.conf import settings
 
+from ticker.ingestion import is_ingestion_worker_alive
+from ticker.rollups import RAW_RESOLUTION, retention_horizon
 from ticker.ticker import BuenbitTicker
 
 
@@ -9,6 +12,67 @@ def fetch_and_set_buenbit_data():
     Celery task to fetch ticker data from Buenbit API and store it in the cache.
 
     This task uses the BuenbitTicker class to fetch the latest ticker data
-    and store it in the Redis cache.
+    of every configured market with a single request and store it in the
+    Redis cache.
+
+    It is a fallback of the `ingest_tickers` worker: fetches are skipped
+    while the worker is alive.
+    """
+    ticker = BuenbitTicker()
+    if is_ingestion_worker_alive(ticker=ticker):
+        return
+    ticker.set_tickers(market_identifiers=settings.TICKER_MARKETS)
+
+
+@shared_task
+def apply_retention_policy():
+    """
+    Celery task to trim the tickers older than the retention configured
+    in `TICKER_RETENTION_DAYS`, for every configured market.
+
+    Raw tickers are only trimmed once their rollups are complete, and
+    the per minute rollups are never kept for less time than the raw
+    tickers. Returns the trimming stats of each market.
     """
-    BuenbitTicker().set_ticker()
+    horizons = {
+        resolution: retention_horizon(days)
+        for resolution, days in settings.TICKER_RETENTION_DAYS.items()
+        if days
+    }
+    raw_since = horizons.pop(RAW_RESOLUTION, None)
+    if raw_since is None:
+        return {}
+
+    ticker = BuenbitTicker()
+    return {
+        market_identifier: ticker.apply_retention(
+            key=ticker.market_key(market_identifier),
+            raw_since=raw_since,
+            rollups_since=horizons
+        )
+        for market_identifier in settings.TICKER_MARKETS
+    }
+
+
+@shared_task
+def archive_tickers():
+    """
+    Celery task to move the raw tickers older than
+    `TICKER_ARCHIVE_AFTER_DAYS` from the hot tier of the storage to its
+    archive, for every configured market.
+
+    Does nothing when archival is disabled. Returns the number of tickers
+    moved of each market.
+    """
+    if not settings.TICKER_ARCHIVE_AFTER_DAYS:
+        return {}
+
+    before = retention_horizon(settings.TICKER_ARCHIVE_AFTER_DAYS)
+    ticker = BuenbitTicker()
+    return {
+        market_identifier: ticker.archive(
+            key=ticker.market_key(market_identifier),
+            before=before
+        )
+        for market_identifier in settings.TICKER_MARKETS
+    }
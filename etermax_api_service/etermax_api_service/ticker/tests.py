@@ -1,25 +1,132 @@
-from unittest.mock import patch, MagicMock
+import contextlib
+import json
+from decimal import Decimal
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import Mock, patch
 
+import fakeredis
+import redis.asyncio.sentinel
+from asgiref.sync import sync_to_async
+from compact_cache_manager import CompactRedisCacheManager
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils.translation import gettext_lazy
+from django_redis.pool import ConnectionFactory
+from redis.exceptions import ResponseError
+from redis_cache_manager import (
+    AsyncRedisCacheManager,
+    LazyRedisClient,
+    ReplicaRouter,
+    _pool_stats,
+    _read_client,
+    connect_async_primary,
+    connect_replica,
+    get_redis_pool_stats,
+    pinned_reads
+)
 from rest_framework import status
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
 from rest_framework.reverse import reverse_lazy
 from rest_framework.test import APITestCase, APIClient
+from sqlite_cache_manager import SQLiteCacheManager
+from storage_backends import get_storage_backend
+from tiered_cache_manager import TieredCacheManager
+
+from ticker.cache import ResponseCache
+from ticker.hot_window import HotWindow
+from ticker.ingestion import INGESTION_HEARTBEAT_KEY
+from ticker.renderers import ORJSONRenderer, ORJSONResponse, dumps
+from ticker.tasks import (
+    apply_retention_policy,
+    archive_tickers,
+    fetch_and_set_buenbit_data,
+)
+from ticker.rollups import plan_segments
+from ticker.serializers import TickerSerializer
+from ticker.ticker import AsyncBuenbitTicker, BuenbitTicker, TickerManagerDataBase
+from ticker.views import AsyncTickerBaseView, TickerBaseView
 
 
 class BaseTest(APITestCase):
 
     def setUp(self):
         self.client = APIClient()
-        patch('django_redis.get_redis_connection', return_value=MagicMock())
+
+        # Replace the redis connections with an in-memory fake server
+        server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeRedis(server=server)
+        redis_patcher = patch('redis_cache_manager.redis_client', self.redis)
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+        async_redis_patcher = patch(
+            'redis_cache_manager.get_async_redis_client',
+            lambda: fakeredis.FakeAsyncRedis(server=server)
+        )
+        async_redis_patcher.start()
+        self.addCleanup(async_redis_patcher.stop)
+        TickerBaseView.response_cache.clear()
 
 
 class TestAveragePrice(BaseTest):
 
-    @patch('redis_cache_manager.redis_client.zrangebyscore')
-    def test_average_price_calculation(self, mock_zrangebyscore):
+    def test_average_price_calculation(self):
         """
         Verify that the 'average-price' view calculates the average
         price correctly.
 
+        Store prices in redis and then send a GET request with 'since'
+        and 'until' query parameters. Verify that the response has a
+        status code of 200 and that the average price computed inside
+        redis matches the expected price.
+        """
+        since_timestamp = "1717135270"
+        until_timestamp = "1817135429"
+        timestamp_prices = [
+            (82000000.0, since_timestamp),
+            (78000000.0, "1717135400"),
+            (85000000.0, until_timestamp),
+            (90000000.0, "1917135429")
+        ]
+        self.redis.zadd(
+            "prices",
+            {price: timestamp for price, timestamp in timestamp_prices}
+        )
+        # Calculate the expected average price based on the stored data,
+        # the last price is outside the requested range
+        sum_prices = [price for price, _ in timestamp_prices[:3]]
+        average = round(sum(sum_prices) / len(sum_prices), 2)
+
+        # Send a GET request to the 'average-price' endpoint with
+        # query parameters
+        url = reverse_lazy("ticker:average-price")
+        response = self.client.get(
+            url,
+            data={"since": since_timestamp, "until": until_timestamp}
+        )
+
+        # Verify that the response has a status code of 200 and the
+        # calculated average price
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["average_price"], average)
+
+    @patch(
+        'redis_cache_manager.redis_client.evalsha',
+        side_effect=ResponseError("scripting disabled")
+    )
+    @patch('redis_cache_manager.redis_client.zrangebyscore')
+    def test_average_price_calculation_without_scripting(
+        self,
+        mock_zrangebyscore,
+        mock_evalsha
+    ):
+        """
+        Verify that the 'average-price' view falls back to computing
+        the average in python when redis scripting is unavailable.
+
         Mock redis 'zrangebyscore' function to simulate data and then
         send a GET request with 'since' and 'until' query parameters.
         Verify that the response has a status code of 200 and that the
@@ -53,29 +160,20 @@ class TestAveragePrice(BaseTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["average_price"], average)
 
-    @patch('redis_cache_manager.redis_client.zrangebyscore')
-    def test_average_price_calculation_with_empty_data_in_db(
-        self,
-        mock_zrangebyscore
-    ):
+    def test_average_price_calculation_with_empty_data_in_db(self):
         """
         Verify that the 'average-price' view calculates the average price
         correctly with empty data in redis db.
 
-        Mock redis 'zrangebyscore' function to return specific data and then send a GET request
-        with 'since' and 'until' query parameters. Verify that the response has a status
-        code of 200 and that the calculated average price in the view is 0.
+        Send a GET request with 'since' and 'until' query parameters against
+        an empty redis db. Verify that the response has a status code of 200
+        and that the calculated average price in the view is 0.
         """
         since_timestamp = "1717135270"
         until_timestamp = "1817135429"
-        timestamp_prices = []
 
         average = 0
 
-        # Mock redis 'zrangebyscore' function to return specific data
-        mock_zrangebyscore.return_value = status.HTTP_200_OK
-        mock_zrangebyscore.return_value = timestamp_prices
-
         # Send a GET request to the 'average-price' endpoint with
         # query parameters
         url = reverse_lazy("ticker:average-price")
@@ -138,16 +236,177 @@ class TestAveragePrice(BaseTest):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+class TestResponseCache(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        TickerManagerDataBase().set(
+            key="prices",
+            value={
+                "1717135270:82000000.0": 1717135270,
+                "1717135280:78000000.0": 1717135280,
+                "1717135290:85000000.0": 1717135290,
+            }
+        )
+
+    def test_closed_window_is_served_from_cache(self):
+        """
+        Verify that the average of a window ending before the latest
+        ticker is computed once and then served from the cache.
+        """
+        url = reverse_lazy("ticker:average-price")
+        data = {"since": "1717135270", "until": "1717135280"}
+
+        with patch.object(
+            BuenbitTicker,
+            'get_average_price',
+            return_value={"average_price": 80000000.0}
+        ) as mock_average:
+            first_response = self.client.get(url, data=data)
+            second_response = self.client.get(url, data=data)
+
+        self.assertEqual(first_response.data, second_response.data)
+        mock_average.assert_called_once()
+        self.assertEqual(
+            TickerBaseView.response_cache.stats(),
+            {"hits": 1, "misses": 1, "size": 1}
+        )
+
+    def test_open_window_is_not_cached(self):
+        """
+        Verify that windows still open to new tickers are recomputed on
+        every request.
+        """
+        url = reverse_lazy("ticker:ticker-price")
+
+        first_response = self.client.get(url, data={"timestamp": "1717135290"})
+        self.redis.zadd("prices", {"1717135290:86000000.0": 1717135290})
+        second_response = self.client.get(url, data={"timestamp": "1717135290"})
+
+        self.assertEqual(first_response.data, {"price": 85000000.0})
+        self.assertEqual(second_response.data, {"price": 86000000.0})
+        self.assertEqual(TickerBaseView.response_cache.stats()["size"], 0)
+
+    def test_window_closing_while_computed_is_not_cached(self):
+        """
+        Verify that a window which only closes while its result is
+        computed is not cached, as the result may miss samples written
+        meanwhile.
+        """
+        latest = {"prices": 100.0}
+        cache = ResponseCache(latest_timestamp=latest.get)
+        stored = [100.0]
+
+        def compute():
+            # Samples land inside the window and after it during the query
+            result = list(stored)
+            stored.append(105.0)
+            latest["prices"] = 120.0
+            return result
+
+        first = cache.get_or_set(key="a", until_timestamp=110, compute=compute, series="prices")
+        second = cache.get_or_set(
+            key="a", until_timestamp=110, compute=lambda: list(stored), series="prices"
+        )
+
+        self.assertEqual(first, [100.0])
+        self.assertEqual(second, [100.0, 105.0])
+        self.assertEqual(cache.stats()["size"], 1)
+
+    def test_backfill_evicts_the_windows_it_reaches(self):
+        """
+        Verify that a backfill and a late ticker landing in closed windows
+        evict the cached results of the windows they reach, and only them.
+        """
+        url = reverse_lazy("ticker:average-price")
+        early = {"since": "1717135270", "until": "1717135270"}
+        late = {"since": "1717135270", "until": "1717135280"}
+        self.assertEqual(self.client.get(url, data=early).data, {"average_price": 82000000.0})
+        self.assertEqual(self.client.get(url, data=late).data, {"average_price": 80000000.0})
+
+        BuenbitTicker().backfill(key="prices", samples=[(1717135275, 86000000.0)])
+
+        self.assertEqual(self.client.get(url, data=early).data, {"average_price": 82000000.0})
+        self.assertEqual(self.client.get(url, data=late).data, {"average_price": 82000000.0})
+        self.assertEqual(
+            TickerBaseView.response_cache.stats(),
+            {"hits": 1, "misses": 3, "size": 2}
+        )
+
+        BuenbitTicker().store_tickers(tickers_data={
+            "btcars": [{"timestamp": 1717135279, "price": 84000000.0}],
+        })
+        self.assertEqual(self.client.get(url, data=late).data, {"average_price": 82500000.0})
+
+    def test_closed_check_and_computation_share_a_read_scope(self):
+        """
+        Verify that the closed check and the computation of a lookup are
+        read within the same read scope.
+        """
+        scope = []
+
+        @contextlib.contextmanager
+        def read_scope():
+            scope.append("entered")
+            yield
+            scope.append("exited")
+
+        cache = ResponseCache(
+            latest_timestamp=lambda series: scope.append("latest") or 100,
+            read_scope=read_scope
+        )
+        cache.get_or_set(
+            key="a",
+            until_timestamp=1,
+            compute=lambda: scope.append("compute"),
+            series="prices"
+        )
+
+        self.assertEqual(scope, ["entered", "latest", "compute", "exited"])
+
+    def test_cache_evicts_least_recently_used_entries(self):
+        """
+        Verify that the cache keeps at most 'max_size' entries, evicting
+        the least recently used ones.
+        """
+        cache = ResponseCache(latest_timestamp=lambda series: 100, max_size=2)
+        cache.get_or_set(key="a", until_timestamp=1, compute=lambda: 1, series="prices")
+        cache.get_or_set(key="b", until_timestamp=1, compute=lambda: 2, series="prices")
+        cache.get_or_set(key="a", until_timestamp=1, compute=lambda: 3, series="prices")
+        cache.get_or_set(key="c", until_timestamp=1, compute=lambda: 4, series="prices")
+
+        self.assertEqual(
+            cache.get_or_set(key="a", until_timestamp=1, compute=lambda: 5, series="prices"),
+            1
+        )
+        self.assertEqual(
+            cache.get_or_set(key="b", until_timestamp=1, compute=lambda: 6, series="prices"),
+            6
+        )
+
+
 class TestTickerList(BaseTest):
 
-    @patch('redis_cache_manager.redis_client.zrangebyscore')
-    def test_ticker_list_view_http_200_filter_correct_data(self, mock_zrangebyscore):
+    def store_prices(self, timestamp_prices):
+        """
+        Store (price, timestamp) pairs in the fake redis db.
+        """
+        TickerManagerDataBase().set(
+            key="prices",
+            value={
+                f"{timestamp}:{price}": timestamp
+                for price, timestamp in timestamp_prices
+            }
+        )
+
+    def test_ticker_list_view_http_200_filter_correct_data(self):
         """
         Verify that the 'ticker-list' view returns the correct data.
 
-        Mock the 'zrangebyscore' function to return specific data and then send a GET request
-        to the 'ticker-list' endpoint with 'since' and 'until' query parameters. Verify that
-        the response has a status code of 200 and that the returned data matches the expected format.
+        Store prices in redis and then send a GET request to the 'ticker-list'
+        endpoint with 'since' and 'until' query parameters. Verify that the
+        response has a status code of 200 and that the returned data matches
+        the expected format, leaving out the prices outside the range.
         """
         since_timestamp = 1717135270
         until_timestamp = 1817135429
@@ -156,6 +415,7 @@ class TestTickerList(BaseTest):
             (78000000.0, 1717135400),
             (85000000.0, until_timestamp)
         ]
+        self.store_prices(timestamp_prices_db + [(90000000.0, 1917135429)])
 
         # Calculate the expected ticker list
         timestamp_prices_dict = [
@@ -163,10 +423,6 @@ class TestTickerList(BaseTest):
             for price, timestamp in timestamp_prices_db
         ]
 
-        # Mock redis 'zrangebyscore' function to return specific data
-        mock_zrangebyscore.return_value = status.HTTP_200_OK
-        mock_zrangebyscore.return_value = timestamp_prices_db
-
         # Send a GET request to the 'ticker-list' endpoint with
         # query parameters
         url = reverse_lazy("ticker:ticker-list")
@@ -179,16 +435,12 @@ class TestTickerList(BaseTest):
         self.assertEqual(response.data["count"], len(timestamp_prices_db))
         self.assertEqual(response.data["results"], timestamp_prices_dict)
 
-    @patch('redis_cache_manager.redis_client.zrangebyscore')
-    def test_ticker_list_view_without_params(
-        self,
-        mock_zrangebyscore
-    ):
+    def test_ticker_list_view_without_params(self):
         """
         Verify that the 'ticker-list' view returns the correct data without query parameters.
 
-        Mock redis 'zrangebyscore' function to return specific data and then send a GET request
-        to the 'ticker-list' endpoint without query parameters. Verify that the response has
+        Store prices in redis and then send a GET request to the 'ticker-list'
+        endpoint without query parameters. Verify that the response has
         a status code of 200 and that the returned data matches the expected format.
         """
         timestamp_prices_db = [
@@ -197,6 +449,7 @@ class TestTickerList(BaseTest):
             (85000000.0, 1817135429),
             (100000000.0, 1917135429),
         ]
+        self.store_prices(timestamp_prices_db)
 
         # Calculate the expected ticker list
         timestamp_prices_dict = [
@@ -204,10 +457,6 @@ class TestTickerList(BaseTest):
             for price, timestamp in timestamp_prices_db
         ]
 
-        # Mock redis 'zrangebyscore' function to return specific data
-        mock_zrangebyscore.return_value = status.HTTP_200_OK
-        mock_zrangebyscore.return_value = timestamp_prices_db
-
         # Send a GET request to the 'ticker-list' endpoint without
         # query parameters
         url = reverse_lazy("ticker:ticker-list")
@@ -218,3 +467,2300 @@ class TestTickerList(BaseTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["count"], len(timestamp_prices_db))
         self.assertEqual(response.data["results"], timestamp_prices_dict)
+
+    @patch('redis_cache_manager.redis_client.zrangebyscore')
+    def test_ticker_list_view_reads_only_the_requested_page(
+        self,
+        mock_zrangebyscore
+    ):
+        """
+        Verify that the 'ticker-list' view reads the requested page and
+        the size of the range from redis, never the whole range.
+        """
+        timestamp_prices_db = [
+            (80000000.0 + index, 1717135270 + index * 10)
+            for index in range(25)
+        ]
+        self.store_prices(timestamp_prices_db)
+
+        url = reverse_lazy("ticker:ticker-list")
+        response = self.client.get(url, data={"page": 3, "page_size": 10})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 25)
+        self.assertIsNone(response.data["next"])
+        self.assertEqual(
+            response.data["results"],
+            [
+                {"timestamp": timestamp, "price": price}
+                for price, timestamp in timestamp_prices_db[20:]
+            ]
+        )
+        mock_zrangebyscore.assert_not_called()
+
+    def test_ticker_list_rows_are_rendered_without_serializer(self):
+        """
+        Verify that the rows of a big page, rendered without going
+        through the serializer, are the rows the serializer would produce.
+        """
+        timestamp_prices_db = [
+            (80000000.0 + index * 0.5, 1717135270 + index)
+            for index in range(1000)
+        ]
+        self.store_prices(timestamp_prices_db)
+
+        url = reverse_lazy("ticker:ticker-list")
+        with patch.object(TickerSerializer, "is_valid") as mock_is_valid:
+            response = self.client.get(url, data={"page_size": 1000})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        results = json.loads(response.content)["results"]
+        serializer = TickerSerializer(data=results, many=True)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(results, serializer.data)
+        mock_is_valid.assert_not_called()
+
+
+class TestAsOfPrice(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.redis.zadd(
+            "prices",
+            {"1717135270:82000000.0": 1717135270, "1717135280:78000000.0": 1717135280}
+        )
+        self.url = reverse_lazy("ticker:ticker-price")
+
+    def test_asof_returns_latest_ticker_at_or_before_timestamp(self):
+        """
+        Verify that an as-of lookup between samples returns the previous
+        one with a single reverse range query.
+        """
+        with patch.object(
+            self.redis,
+            "zrevrangebyscore",
+            wraps=self.redis.zrevrangebyscore
+        ) as mock_zrevrangebyscore:
+            response = self.client.get(
+                self.url,
+                {"timestamp": "1717135279", "lookup": "asof"}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {"timestamp": 1717135270, "price": 82000000.0}
+        )
+        mock_zrevrangebyscore.assert_called_once_with(
+            "prices", 1717135279.0, "-inf", start=0, num=1, withscores=True
+        )
+
+        response = self.client.get(
+            self.url,
+            {"timestamp": "1717135280", "lookup": "asof"}
+        )
+        self.assertEqual(response.data["price"], 78000000.0)
+
+    def test_asof_respects_tolerance(self):
+        """
+        Verify that tickers older than the tolerance are not returned.
+        """
+        response = self.client.get(
+            self.url,
+            {"timestamp": "1717135279", "lookup": "asof", "tolerance": "5"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"timestamp": None, "price": None})
+
+        response = self.client.get(
+            self.url,
+            {"timestamp": "1717135279", "lookup": "nearest"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+    def test_sub_second_tickers_are_listed_and_looked_up_exactly(self):
+        """
+        Verify that tickers ingested with sub-second timestamps are listed
+        with them, and that each listed timestamp looks up its own price.
+        """
+        BuenbitTicker().store_tickers(tickers_data={
+            "btcars": [
+                {"timestamp": 1717135290.25, "price": 80000000.0},
+                {"timestamp": 1717135290.75, "price": 81000000.0},
+            ],
+        })
+
+        response = self.client.get(
+            reverse_lazy("ticker:ticker-list"),
+            {"since": "1717135280", "until": "1717135291"}
+        )
+        results = json.loads(response.content)["results"]
+        self.assertEqual(results, [
+            {"timestamp": 1717135280, "price": 78000000.0},
+            {"timestamp": 1717135290.25, "price": 80000000.0},
+            {"timestamp": 1717135290.75, "price": 81000000.0},
+        ])
+
+        for ticker in results:
+            response = self.client.get(self.url, {"timestamp": str(ticker["timestamp"])})
+            self.assertEqual(response.data, {"price": ticker["price"]})
+        response = self.client.get(self.url, {"timestamp": "1717135290.5", "lookup": "asof"})
+        self.assertEqual(
+            json.loads(response.content),
+            {"timestamp": 1717135290.25, "price": 80000000.0}
+        )
+
+
+class TestTickerPrices(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.redis.zadd(
+            "prices",
+            {"1717135270:82000000.0": 1717135270, "1717135280:78000000.0": 1717135280}
+        )
+        self.url = reverse_lazy("ticker:ticker-prices")
+
+    def test_prices_of_query_timestamps_in_one_round_trip(self):
+        """
+        Verify that the prices of every timestamp are returned in the
+        requested order, reading them in a single pipeline.
+        """
+        with patch.object(
+            self.redis,
+            "pipeline",
+            wraps=self.redis.pipeline
+        ) as mock_pipeline:
+            response = self.client.get(
+                f"{self.url}?timestamps=1717135280,1717135275&timestamps=1717135270"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {"prices": [78000000.0, None, 82000000.0]}
+        )
+        mock_pipeline.assert_called_once()
+
+    def test_prices_of_body_timestamps(self):
+        """
+        Verify that timestamps can be sent in a JSON body, and that
+        invalid batches are rejected.
+        """
+        response = self.client.post(
+            self.url,
+            {"timestamps": [1717135270, "1717135280"]},
+            format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"prices": [82000000.0, 78000000.0]})
+
+        response = self.client.post(self.url, {"timestamps": ["now"]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestTickerExport(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        # Several prices share a timestamp to cross batch boundaries
+        self.timestamp_prices = [
+            (82000000.0, 1717135270),
+            (82000001.0, 1717135270),
+            (82000002.0, 1717135270),
+            (78000000.0, 1717135280),
+            (85000000.0, 1717135290),
+        ]
+        TickerManagerDataBase().set(
+            key="prices",
+            value={
+                f"{timestamp}:{price}": timestamp
+                for price, timestamp in self.timestamp_prices
+            }
+        )
+
+    @patch('ticker.views.TickerExportView.batch_size', 2)
+    def test_export_ndjson_streams_every_ticker_in_batches(self):
+        """
+        Verify that the 'ticker-export' view streams every ticker once and
+        in order, even when tickers sharing a timestamp span several
+        batches.
+        """
+        url = reverse_lazy("ticker:ticker-export")
+        response = self.client.get(url, data={"since": 1717135270})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [
+                {"timestamp": timestamp, "price": price}
+                for price, timestamp in self.timestamp_prices
+            ]
+        )
+
+    def test_export_csv_filters_the_range(self):
+        """
+        Verify that the 'ticker-export' view streams the tickers of the
+        range as CSV with a header line.
+        """
+        url = reverse_lazy("ticker:ticker-export")
+        response = self.client.get(
+            url,
+            data={"since": 1717135271, "until": 1717135280, "output": "csv"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            b"".join(response.streaming_content).decode().splitlines(),
+            ["timestamp,price", "1717135280,78000000.0"]
+        )
+
+    def test_export_bad_request_with_unknown_output(self):
+        """
+        Verify that a bad request is returned for an unknown output format.
+        """
+        url = reverse_lazy("ticker:ticker-export")
+        response = self.client.get(url, data={"output": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestRollups(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        # One sample every 17 minutes during three days
+        self.since_timestamp = 1717200000
+        self.samples = {
+            80000000.0 + index: self.since_timestamp + index * 1020
+            for index in range(255)
+        }
+        ticker = TickerManagerDataBase()
+        for price, timestamp in self.samples.items():
+            ticker.set(key="prices", value={price: timestamp})
+
+    def test_set_maintains_rollup_buckets(self):
+        """
+        Verify that storing a sample updates its minute, hour and day
+        buckets, and that storing it again does not count it twice.
+        """
+        ticker = TickerManagerDataBase()
+        ticker.set(key="prices", value={80000000.0: self.since_timestamp})
+
+        day_bucket = self.since_timestamp // 86400 * 86400
+        day_prices = [
+            price for price, timestamp in self.samples.items()
+            if timestamp // 86400 * 86400 == day_bucket
+        ]
+        bucket = self.redis.hmget(
+            "prices:rollup:86400",
+            [f"{day_bucket}:{name}" for name in ("sum", "count", "min", "max")]
+        )
+
+        self.assertEqual(float(bucket[0]), sum(day_prices))
+        self.assertEqual(int(bucket[1]), len(day_prices))
+        self.assertEqual(float(bucket[2]), min(day_prices))
+        self.assertEqual(float(bucket[3]), max(day_prices))
+        self.assertEqual(self.redis.zcard("prices:rollup:60:buckets"), 255)
+
+    def test_average_price_combines_buckets_and_raw_edges(self):
+        """
+        Verify that the 'average-price' view returns the same average as
+        the raw samples for a range mixing whole buckets and raw edges.
+        """
+        since_timestamp = self.since_timestamp + 3333
+        until_timestamp = self.since_timestamp + 2 * 86400 + 5555
+        prices = [
+            price for price, timestamp in self.samples.items()
+            if since_timestamp <= timestamp <= until_timestamp
+        ]
+
+        url = reverse_lazy("ticker:average-price")
+        response = self.client.get(
+            url,
+            data={"since": since_timestamp, "until": until_timestamp}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["average_price"],
+            round(sum(prices) / len(prices), 2)
+        )
+
+    def test_plan_segments_uses_whole_buckets_after_watermark(self):
+        """
+        Verify that the query plan reads raw samples before the rollup
+        watermark and at the edges, and whole buckets in between.
+        """
+        segments = plan_segments(
+            since_timestamp=100,
+            until_timestamp=90100,
+            rollup_since=3000
+        )
+
+        self.assertEqual(
+            segments,
+            [
+                (0, "100", "(3000"),
+                (60, "3000", "(3600"),
+                (3600, "3600", "(90000"),
+                (60, "90000", "(90060"),
+                (0, "90060", "90100"),
+            ]
+        )
+
+
+class TestCandles(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        # One sample every 17 minutes during three days, prices going up
+        # and down
+        self.since_timestamp = 1717200000
+        self.samples = {
+            f"{self.since_timestamp + index * 1020}:{80000000.0 + (index * 37) % 101}":
+                self.since_timestamp + index * 1020
+            for index in range(255)
+        }
+        self.url = reverse_lazy("ticker:ticker-candles")
+
+    def expected_candles(self, since_timestamp, until_timestamp, interval):
+        start = since_timestamp // interval * interval
+        stop = until_timestamp // interval * interval + interval
+        candles = {}
+        for member, timestamp in sorted(self.samples.items(), key=lambda item: item[1]):
+            if not start <= timestamp < stop:
+                continue
+            price = float(member.split(":")[1])
+            candle = candles.setdefault(timestamp // interval * interval, {
+                "timestamp": timestamp // interval * interval,
+                "open": price, "high": price, "low": price, "count": 0,
+            })
+            candle["high"] = max(candle["high"], price)
+            candle["low"] = min(candle["low"], price)
+            candle["close"] = price
+            candle["count"] += 1
+        return list(candles.values())
+
+    def test_candles_from_rollups(self):
+        """
+        Verify that the candles read from the rollup buckets match the
+        candles of the raw samples, widened to whole candles.
+        """
+        ticker = TickerManagerDataBase()
+        for member, timestamp in self.samples.items():
+            ticker.set(key="prices", value={member: timestamp})
+        since_timestamp = self.since_timestamp + 5000
+        until_timestamp = self.since_timestamp + 2 * 86400 + 7000
+
+        for interval, seconds in (("1h", 3600), ("4h", 14400), ("1d", 86400)):
+            with patch.object(
+                self.redis,
+                "zrangebyscore",
+                wraps=self.redis.zrangebyscore
+            ) as mock_zrangebyscore:
+                response = self.client.get(self.url, {
+                    "since": since_timestamp,
+                    "until": until_timestamp,
+                    "interval": interval,
+                })
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                response.json()["candles"],
+                self.expected_candles(since_timestamp, until_timestamp, seconds)
+            )
+            # Only the bucket index is read, no raw samples
+            self.assertNotIn("prices", [call.args[0] for call in mock_zrangebyscore.call_args_list])
+
+        # Buckets stored before open and close were tracked are read raw
+        bucket = self.since_timestamp + 7200
+        self.redis.hdel("prices:rollup:3600", f"{bucket}:open", f"{bucket}:close")
+        TickerBaseView.response_cache.clear()
+        response = self.client.get(self.url, {
+            "since": since_timestamp,
+            "until": until_timestamp,
+            "interval": "1h",
+        })
+        self.assertEqual(
+            response.json()["candles"],
+            self.expected_candles(since_timestamp, until_timestamp, 3600)
+        )
+
+    def test_candles_from_raw_samples(self):
+        """
+        Verify that series without rollups are aggregated from their raw
+        samples, and that invalid ranges are rejected.
+        """
+        self.redis.zadd("prices", self.samples)
+        until_timestamp = self.since_timestamp + 86400
+
+        response = self.client.get(self.url, {
+            "since": self.since_timestamp,
+            "until": until_timestamp,
+            "interval": "15m",
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()["candles"],
+            self.expected_candles(self.since_timestamp, until_timestamp, 900)
+        )
+
+        response = self.client.get(self.url, {"interval": "2m"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"since": 0, "until": 86400 * 30})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestAverageModes(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        # Unevenly spaced samples: a burst every few seconds between
+        # quiet periods of up to an hour, stored out of time order
+        self.since_timestamp = 1717200000
+        offsets = sorted({(index * index * 53) % 180000 for index in range(300)})
+        self.samples = {
+            f"{self.since_timestamp + offset}:{80000000.0 + (offset * 7) % 1009}":
+                self.since_timestamp + offset
+            for offset in offsets
+        }
+        self.url = reverse_lazy("ticker:average-price")
+
+    def prices_between(self, since_timestamp, until_timestamp):
+        return [
+            (timestamp, float(member.split(":")[1]))
+            for member, timestamp in sorted(self.samples.items(), key=lambda item: item[1])
+            if since_timestamp <= timestamp <= until_timestamp
+        ]
+
+    def expected_twap(self, since_timestamp, until_timestamp):
+        prices = self.prices_between(since_timestamp, until_timestamp)
+        integral = sum(
+            price * (next_timestamp - timestamp)
+            for (timestamp, price), (next_timestamp, _) in zip(prices, prices[1:])
+        )
+        return round(integral / (prices[-1][0] - prices[0][0]), 2)
+
+    def test_twap_from_rollups_matches_raw_samples(self):
+        """
+        Verify that the time-weighted average folded from the rollup
+        buckets matches the step function of the raw samples, even when
+        the samples were stored out of order.
+        """
+        ticker = TickerManagerDataBase()
+        for member, timestamp in reversed(list(self.samples.items())):
+            ticker.set(key="prices", value={member: timestamp})
+        since_timestamp = self.since_timestamp + 5000
+        until_timestamp = self.since_timestamp + 170000
+
+        with patch.object(
+            self.redis,
+            "zrangebyscore",
+            wraps=self.redis.zrangebyscore
+        ) as mock_zrangebyscore:
+            response = self.client.get(self.url, {
+                "since": since_timestamp,
+                "until": until_timestamp,
+                "mode": "twap",
+            })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["average_price"],
+            self.expected_twap(since_timestamp, until_timestamp)
+        )
+        # Whole buckets are not read raw
+        raw_ranges = [
+            call.args[1:3] for call in mock_zrangebyscore.call_args_list
+            if call.args[0] == "prices"
+        ]
+        self.assertTrue(all(float(end) - float(start) < 86400 for start, end in raw_ranges))
+
+        # Buckets stored before the integral was tracked are read raw
+        self.redis.delete("prices:rollup:3600", "prices:rollup:86400")
+        TickerBaseView.response_cache.clear()
+        response = self.client.get(self.url, {
+            "since": since_timestamp,
+            "until": until_timestamp,
+            "mode": "twap",
+        })
+        self.assertEqual(
+            response.data["average_price"],
+            self.expected_twap(since_timestamp, until_timestamp)
+        )
+
+    def test_order_statistics_modes(self):
+        """
+        Verify the median, percentile, min and max modes, and that
+        invalid modes and percentiles are rejected.
+        """
+        ticker = TickerManagerDataBase()
+        ticker.set(key="prices", value=self.samples)
+        since_timestamp = self.since_timestamp + 1000
+        until_timestamp = self.since_timestamp + 90000
+        prices = sorted(price for _, price in self.prices_between(since_timestamp, until_timestamp))
+        middle = len(prices) // 2
+        median = prices[middle] if len(prices) % 2 else (prices[middle - 1] + prices[middle]) / 2
+
+        expected = (
+            ({"mode": "median"}, round(median, 2)),
+            ({"mode": "percentile", "percentile": 100}, prices[-1]),
+            ({"mode": "percentile", "percentile": 0}, prices[0]),
+            ({"mode": "min"}, prices[0]),
+            ({"mode": "max"}, prices[-1]),
+            ({"mode": "mean"}, round(sum(prices) / len(prices), 2)),
+        )
+        for params, average_price in expected:
+            response = self.client.get(self.url, {
+                "since": since_timestamp,
+                "until": until_timestamp,
+                **params,
+            })
+            self.assertEqual(response.status_code, status.HTTP_200_OK, params)
+            self.assertEqual(response.data["average_price"], average_price, params)
+
+        for params in ({"mode": "vwap"}, {"mode": "percentile"}, {"mode": "percentile", "percentile": 101}):
+            response = self.client.get(self.url, {
+                "since": since_timestamp,
+                "until": until_timestamp,
+                **params,
+            })
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class TestRetention(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        # One sample every 17 minutes during three days, stored before
+        # rollups existed
+        self.since_timestamp = 1717200000
+        self.until_timestamp = self.since_timestamp + 3 * 86400
+        self.samples = {
+            f"{self.since_timestamp + index * 1020}:{80000000.0 + index}":
+                self.since_timestamp + index * 1020
+            for index in range(255)
+        }
+        self.redis.zadd("prices", self.samples)
+        self.ticker = BuenbitTicker()
+
+    def test_retention_rebuilds_rollups_before_trimming(self):
+        """
+        Verify that applying the retention rebuilds the missing rollups,
+        trims the raw samples and minute buckets past their horizons and
+        keeps the average of the whole range.
+        """
+        average = self.ticker.get_average_price(
+            since_timestamp=self.since_timestamp,
+            until_timestamp=self.until_timestamp
+        )
+        raw_since = self.since_timestamp + 2 * 86400
+        minute_since = self.since_timestamp + 86400
+
+        stats = self.ticker.apply_retention(
+            key="prices",
+            raw_since=raw_since,
+            rollups_since={60: minute_since}
+        )
+
+        trimmed = [
+            timestamp for timestamp in self.samples.values()
+            if timestamp < raw_since
+        ]
+        self.assertEqual(stats["rebuilt"], 255)
+        self.assertEqual(stats["removed"], len(trimmed))
+        self.assertEqual(
+            stats["removed_buckets"],
+            len([timestamp for timestamp in trimmed if timestamp < minute_since])
+        )
+        self.assertEqual(self.redis.zcard("prices"), 255 - len(trimmed))
+        self.assertEqual(
+            self.ticker.get_average_price(
+                since_timestamp=self.since_timestamp,
+                until_timestamp=self.until_timestamp
+            ),
+            average
+        )
+
+    def test_tickers_of_trimmed_days_are_read_from_rollups(self):
+        """
+        Verify that the tickers of trimmed days are read from the finest
+        rollups kept, both listed and paginated.
+        """
+        tickers = self.ticker.get_tickers_list(
+            since_timestamp=self.since_timestamp + 86400,
+            until_timestamp=self.until_timestamp
+        )
+        self.ticker.apply_retention(
+            key="prices",
+            raw_since=self.since_timestamp + 2 * 86400,
+            rollups_since={60: self.since_timestamp + 86400}
+        )
+
+        # Samples fall on whole minutes, so minute buckets match them
+        self.assertEqual(
+            self.ticker.get_tickers_list(
+                since_timestamp=self.since_timestamp + 86400,
+                until_timestamp=self.until_timestamp
+            ),
+            tickers
+        )
+        total, page = self.ticker.get_tickers_page(
+            since_timestamp=self.since_timestamp + 86400,
+            until_timestamp=self.until_timestamp,
+            offset=80,
+            limit=10
+        )
+        self.assertEqual(total, len(tickers))
+        self.assertEqual(page, tickers[80:90])
+
+        # Minute buckets of the first day are gone, hours are left
+        hours = self.ticker.get_tickers_list(
+            since_timestamp=self.since_timestamp,
+            until_timestamp=self.since_timestamp + 86399
+        )
+        self.assertEqual(len(hours), 24)
+        self.assertEqual(hours[1]["timestamp"], self.since_timestamp + 3600)
+
+    async def test_async_tickers_of_trimmed_days_are_read_from_rollups(self):
+        """
+        Verify that the async ticker reads the tickers of trimmed days
+        from their rollups like the sync one, listed and paginated.
+        """
+        since_timestamp = self.since_timestamp + 86400
+        tickers = self.ticker.get_tickers_list(
+            since_timestamp=since_timestamp,
+            until_timestamp=self.until_timestamp
+        )
+        self.ticker.apply_retention(
+            key="prices",
+            raw_since=self.since_timestamp + 2 * 86400,
+            rollups_since={60: since_timestamp}
+        )
+        async_ticker = AsyncBuenbitTicker()
+
+        self.assertEqual(
+            await async_ticker.get_tickers_list(
+                since_timestamp=since_timestamp,
+                until_timestamp=self.until_timestamp
+            ),
+            tickers
+        )
+        total, page = await async_ticker.get_tickers_page(
+            since_timestamp=since_timestamp,
+            until_timestamp=self.until_timestamp,
+            offset=80,
+            limit=10
+        )
+        self.assertEqual(total, len(tickers))
+        self.assertEqual(page, tickers[80:90])
+
+    @override_settings(
+        TICKER_MARKETS=["btcars"],
+        TICKER_RETENTION_DAYS={0: 30, 60: 0}
+    )
+    def test_retention_task_trims_configured_markets(self):
+        """
+        Verify that the periodic task trims the raw samples older than the
+        configured days of every market.
+        """
+        stats = apply_retention_policy()
+
+        self.assertEqual(stats["btcars"]["removed"], 255)
+        self.assertEqual(self.redis.zcard("prices"), 0)
+        self.assertEqual(self.redis.zcard("prices:rollup:60:buckets"), 255)
+
+    def test_plan_segments_rounds_trimmed_edges_to_buckets(self):
+        """
+        Verify that the part of a range before the raw horizon is planned
+        over whole buckets of the finest resolution kept.
+        """
+        segments = plan_segments(
+            since_timestamp=3700,
+            until_timestamp=86400 + 100,
+            rollup_since=0,
+            retention={0: 86400, 60: 86400}
+        )
+
+        self.assertEqual(
+            segments,
+            [
+                (3600, "3600", "(86400"),
+                (60, "86400", "(86460"),
+                (0, "86460", "86500"),
+            ]
+        )
+
+    def test_raw_only_reads_before_the_raw_horizon_are_rejected(self):
+        """
+        Verify that the modes and lookups needing every raw ticker are
+        rejected when they reach before the raw horizon, while the mean is
+        still answered from the rollups.
+        """
+        raw_since = self.since_timestamp + 2 * 86400
+        self.ticker.apply_retention(key="prices", raw_since=raw_since)
+
+        url = reverse_lazy("ticker:average-price")
+        for mode in ("median", "percentile"):
+            response = self.client.get(url, {
+                "since": self.since_timestamp,
+                "until": self.until_timestamp,
+                "mode": mode,
+                "percentile": 90,
+            })
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(str(raw_since), response.data["error"])
+
+        response = self.client.get(url, {
+            "since": raw_since,
+            "until": self.until_timestamp,
+            "mode": "median",
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url, {
+            "since": self.since_timestamp,
+            "until": self.until_timestamp,
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(
+            reverse_lazy("ticker:ticker-prices"),
+            {"timestamps": f"{raw_since},{self.since_timestamp}"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(
+            reverse_lazy("ticker:ticker-price"),
+            {"timestamp": self.since_timestamp, "lookup": "asof"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(
+            reverse_lazy("ticker:ticker-price"),
+            {"timestamp": self.until_timestamp, "lookup": "asof"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    async def test_async_asof_before_the_raw_horizon_is_rejected(self):
+        """
+        Verify that the async as-of lookup is rejected like the sync one
+        when nothing is kept before its timestamp.
+        """
+        self.ticker.apply_retention(
+            key="prices",
+            raw_since=self.since_timestamp + 2 * 86400
+        )
+
+        with self.assertRaises(ValueError):
+            await AsyncBuenbitTicker().get_price_as_of(
+                timestamp=self.since_timestamp
+            )
+
+
+class TestCompactStorage(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        # Unevenly spaced samples over three days, with repeated prices
+        self.since_timestamp = 1717200000
+        offsets = sorted({(index * index * 53) % 250000 for index in range(400)})
+        self.samples = {
+            f"{self.since_timestamp + offset + offset % 8 / 8}:{80000000.25 + (offset * 7) % 1009}":
+                self.since_timestamp + offset + offset % 8 / 8
+            for offset in offsets
+        }
+        self.ticker = BuenbitTicker()
+        self.compact_ticker = BuenbitTicker(db_manager=CompactRedisCacheManager())
+        members = list(self.samples.items())
+        # Stored out of order, in writes spanning several chunks
+        for ticker, key in ((self.ticker, "prices"), (self.compact_ticker, "compact")):
+            for offset in range(37):
+                ticker.set(key=key, value=dict(members[offset::37]))
+
+    def test_compact_page_reads_only_the_chunks_of_the_page(self):
+        """
+        Verify that a page of the compact storage is counted without
+        decoding the chunks within the range, and only reads the chunks
+        at its edges and those overlapping the page.
+        """
+        manager = self.compact_ticker._TickerManagerDataBase__db_manager
+        since_timestamp = self.since_timestamp + 5000
+        until_timestamp = self.since_timestamp + 2 * 86400 + 7000
+        chunks = manager.get_chunks("compact", since_timestamp, until_timestamp)
+        for offset, limit in ((0, 10), (37, 60), (150, 100), (10**6, 10), (0, 0)):
+            with patch.object(manager, "read_chunks", wraps=manager.read_chunks) as read_chunks:
+                self.assertEqual(
+                    self.compact_ticker.get_tickers_page(
+                        since_timestamp=since_timestamp,
+                        until_timestamp=until_timestamp,
+                        offset=offset,
+                        limit=limit,
+                        key="compact"
+                    ),
+                    self.ticker.get_tickers_page(
+                        since_timestamp=since_timestamp,
+                        until_timestamp=until_timestamp,
+                        offset=offset,
+                        limit=limit
+                    )
+                )
+            read = [chunk for call in read_chunks.call_args_list for chunk in call.args[1]]
+            self.assertEqual(read[:2], [chunks[0], chunks[-1]])
+            self.assertLessEqual(len(read), 2 + limit)
+            self.assertLess(len(read), len(chunks))
+
+    def test_compact_replace_data_rewrites_the_chunks(self):
+        """
+        Verify that replacing members of the compact storage removes the
+        records of the removed members and adds the new ones, dropping
+        the chunks left empty.
+        """
+        manager = self.compact_ticker._TickerManagerDataBase__db_manager
+        members = manager.get_z_range_by_score("compact", "-inf", "+inf")
+        first_chunk_end = members[0][1] // 3600 * 3600 + 3600
+        first_chunk = [member for member, score in members if score < first_chunk_end]
+        replaced = members[len(first_chunk)]
+
+        manager.replace_data(
+            key="compact",
+            removed=[*first_chunk, replaced[0], b"80000000.25"],
+            value={f"{replaced[1]}:1.5": replaced[1], "1717100000.5:2.25": 1717100000.5}
+        )
+
+        self.assertEqual(
+            manager.get_z_range_by_score("compact", "-inf", "+inf"),
+            [
+                (b"1717100000.5:2.25", 1717100000.5),
+                (f"{replaced[1]}:1.5".encode(), replaced[1]),
+                *members[len(first_chunk) + 1:],
+            ]
+        )
+        self.assertNotIn(
+            first_chunk_end - 3600,
+            manager.get_chunks("compact", "-inf", "+inf")
+        )
+
+    def test_compact_storage_answers_like_sorted_sets(self):
+        """
+        Verify that the samples packed in binary chunks use 12 bytes each
+        and answer every read like the sorted set layout, including the
+        rollups built from the chunks.
+        """
+        self.assertFalse(self.redis.exists("compact"))
+        chunks = self.redis.keys("compact:chunk:*")
+        self.assertEqual(
+            sum(self.redis.strlen(chunk) for chunk in chunks),
+            12 * len(self.samples)
+        )
+        for resolution in (60, 3600, 86400):
+            expected = self.redis.hgetall(f"prices:rollup:{resolution}")
+            buckets = self.redis.hgetall(f"compact:rollup:{resolution}")
+            self.assertEqual(buckets.keys(), expected.keys())
+            for field, value in expected.items():
+                self.assertAlmostEqual(float(buckets[field]), float(value), places=2)
+
+        since_timestamp = self.since_timestamp + 5000
+        until_timestamp = self.since_timestamp + 2 * 86400 + 7000
+        for mode in ("mean", "twap", "median", "max"):
+            self.assertEqual(
+                self.compact_ticker.get_average_price(
+                    since_timestamp=since_timestamp,
+                    until_timestamp=until_timestamp,
+                    key="compact",
+                    mode=mode
+                ),
+                self.ticker.get_average_price(
+                    since_timestamp=since_timestamp,
+                    until_timestamp=until_timestamp,
+                    mode=mode
+                )
+            )
+        self.assertEqual(
+            self.compact_ticker.get_tickers_page(
+                since_timestamp=since_timestamp,
+                until_timestamp=f"({until_timestamp}",
+                offset=5,
+                limit=50,
+                key="compact"
+            ),
+            self.ticker.get_tickers_page(
+                since_timestamp=since_timestamp,
+                until_timestamp=f"({until_timestamp}",
+                offset=5,
+                limit=50
+            )
+        )
+        self.assertEqual(
+            list(self.compact_ticker.iter_tickers(
+                since_timestamp="-inf",
+                until_timestamp="+inf",
+                batch_size=30,
+                key="compact"
+            )),
+            list(self.ticker.iter_tickers(since_timestamp="-inf", until_timestamp="+inf"))
+        )
+        self.assertEqual(
+            self.compact_ticker.get_candles(
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp,
+                interval=3600,
+                key="compact"
+            ),
+            self.ticker.get_candles(
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp,
+                interval=3600
+            )
+        )
+        for timestamp in (since_timestamp, until_timestamp, self.since_timestamp + 10**6):
+            self.assertEqual(
+                self.compact_ticker.get_price_as_of(timestamp=timestamp, key="compact"),
+                self.ticker.get_price_as_of(timestamp=timestamp)
+            )
+
+    def test_compact_retention_removes_chunks(self):
+        """
+        Verify that the retention policy trims the chunks of the compact
+        storage, deleting the chunks left empty.
+        """
+        raw_since = self.since_timestamp + 86400
+        chunks = len(self.redis.keys("compact:chunk:*"))
+
+        stats = self.compact_ticker.apply_retention(key="compact", raw_since=raw_since)
+
+        trimmed = [
+            timestamp for timestamp in self.samples.values()
+            if timestamp < raw_since
+        ]
+        trimmed_chunks = {timestamp // 3600 for timestamp in trimmed}
+        self.assertEqual(stats["removed"], len(trimmed))
+        self.assertEqual(len(self.redis.keys("compact:chunk:*")), chunks - len(trimmed_chunks))
+        self.assertEqual(self.redis.zcard("compact:chunks"), chunks - len(trimmed_chunks))
+        self.assertEqual(
+            self.compact_ticker.get_average_price(
+                since_timestamp=self.since_timestamp,
+                until_timestamp=self.since_timestamp + 3 * 86400,
+                key="compact"
+            ),
+            self.ticker.get_average_price(
+                since_timestamp=self.since_timestamp,
+                until_timestamp=self.since_timestamp + 3 * 86400
+            )
+        )
+
+
+class TestSQLiteStorage(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        # Unevenly spaced samples over three days, with repeated prices
+        self.since_timestamp = 1717200000
+        offsets = sorted({(index * index * 53) % 250000 for index in range(400)})
+        self.samples = {
+            f"{self.since_timestamp + offset + offset % 8 / 8}:{80000000.25 + (offset * 7) % 1009}":
+                self.since_timestamp + offset + offset % 8 / 8
+            for offset in offsets
+        }
+        self.ticker = BuenbitTicker()
+        self.sqlite_ticker = BuenbitTicker(db_manager=SQLiteCacheManager(
+            path=os.path.join(self.directory.name, "tickers.sqlite3")
+        ))
+        members = list(self.samples.items())
+        # Stored out of order, so new samples split the steps of the buckets
+        for ticker in (self.ticker, self.sqlite_ticker):
+            for offset in range(37):
+                ticker.set(key="prices", value=dict(members[offset::37]))
+
+    def test_sqlite_storage_answers_like_redis(self):
+        """
+        Verify that the SQLite backend builds the same rollups as the
+        Redis one and answers every read like it.
+        """
+        for resolution in (60, 3600, 86400):
+            total, expected = self.ticker._TickerManagerDataBase__db_manager.get_rollup_series(
+                key="prices", resolution=resolution, start="-inf", end="+inf"
+            )
+            self.assertEqual(
+                self.sqlite_ticker._TickerManagerDataBase__db_manager.get_rollup_series(
+                    key="prices", resolution=resolution, start="-inf", end="+inf", count=0
+                ),
+                (total, [])
+            )
+            _, buckets = self.sqlite_ticker._TickerManagerDataBase__db_manager.get_rollup_series(
+                key="prices", resolution=resolution, start="-inf", end="+inf"
+            )
+            for bucket, expected_bucket in zip(buckets, expected):
+                for value, expected_value in zip(bucket, expected_bucket):
+                    self.assertAlmostEqual(value, expected_value, places=2)
+
+        since_timestamp = self.since_timestamp + 5000
+        until_timestamp = self.since_timestamp + 2 * 86400 + 7000
+        for mode in ("mean", "twap", "median", "max"):
+            self.assertAlmostEqual(
+                self.sqlite_ticker.get_average_price(
+                    since_timestamp=since_timestamp,
+                    until_timestamp=until_timestamp,
+                    mode=mode
+                ),
+                self.ticker.get_average_price(
+                    since_timestamp=since_timestamp,
+                    until_timestamp=until_timestamp,
+                    mode=mode
+                ),
+                places=4
+            )
+        self.assertEqual(
+            self.sqlite_ticker.get_tickers_page(
+                since_timestamp=since_timestamp,
+                until_timestamp=f"({until_timestamp}",
+                offset=5,
+                limit=50
+            ),
+            self.ticker.get_tickers_page(
+                since_timestamp=since_timestamp,
+                until_timestamp=f"({until_timestamp}",
+                offset=5,
+                limit=50
+            )
+        )
+        self.assertEqual(
+            list(self.sqlite_ticker.iter_tickers(
+                since_timestamp="-inf",
+                until_timestamp="+inf",
+                batch_size=30
+            )),
+            list(self.ticker.iter_tickers(since_timestamp="-inf", until_timestamp="+inf"))
+        )
+        self.assertEqual(
+            self.sqlite_ticker.get_candles(
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp,
+                interval=3600
+            ),
+            self.ticker.get_candles(
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp,
+                interval=3600
+            )
+        )
+        for timestamp in (since_timestamp, until_timestamp, self.since_timestamp + 10**6):
+            self.assertEqual(
+                self.sqlite_ticker.get_price_as_of(timestamp=timestamp),
+                self.ticker.get_price_as_of(timestamp=timestamp)
+            )
+
+    def test_sqlite_retention_trims_rows(self):
+        """
+        Verify that the retention policy trims the SQLite backend like the
+        Redis one.
+        """
+        raw_since = self.since_timestamp + 86400
+
+        stats = self.sqlite_ticker.apply_retention(key="prices", raw_since=raw_since)
+
+        self.assertEqual(stats, self.ticker.apply_retention(key="prices", raw_since=raw_since))
+        self.assertAlmostEqual(
+            self.sqlite_ticker.get_average_price(
+                since_timestamp=self.since_timestamp,
+                until_timestamp=self.since_timestamp + 3 * 86400
+            ),
+            self.ticker.get_average_price(
+                since_timestamp=self.since_timestamp,
+                until_timestamp=self.since_timestamp + 3 * 86400
+            ),
+            places=4
+        )
+
+    def test_hot_window_is_not_started_without_pubsub(self):
+        """
+        Verify that no hot window is fed from a backend without
+        publish/subscribe, so its reads always go to the db.
+        """
+        self.assertFalse(self.sqlite_ticker.supports_pubsub)
+        self.assertTrue(self.ticker.supports_pubsub)
+        ticker = BuenbitTicker(
+            db_manager=self.sqlite_ticker._TickerManagerDataBase__db_manager,
+            hot_window_capacity=10
+        )
+
+        self.assertIsNone(ticker.get_hot_window(key="prices"))
+        self.assertEqual(ticker.hot_windows, {})
+
+    def test_storage_backend_is_selected_in_settings(self):
+        """
+        Verify that the tickers use the storage backend named in the
+        settings, built with its options, and that unknown names fail.
+        """
+        path = os.path.join(self.directory.name, "selected.sqlite3")
+        with override_settings(
+            TICKER_STORAGE_BACKEND="sqlite",
+            TICKER_STORAGE_OPTIONS={"sqlite": {"path": path}}
+        ):
+            ticker = BuenbitTicker()
+            self.assertIsInstance(ticker._TickerManagerDataBase__db_manager, SQLiteCacheManager)
+            ticker.set(key="selected", value={"1717135000:70000000.0": 1717135000})
+
+        self.assertTrue(os.path.exists(path))
+        self.assertFalse(self.redis.exists("selected"))
+        self.assertIsInstance(get_storage_backend("compact"), CompactRedisCacheManager)
+        with self.assertRaises(ValueError):
+            get_storage_backend("missing")
+
+
+class TestTieredStorage(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings_patcher = override_settings(
+            TICKER_STORAGE_OPTIONS={
+                "sqlite": {"path": os.path.join(self.directory.name, "archive.sqlite3")},
+            },
+            TICKER_MARKETS=["btcars"]
+        )
+        settings_patcher.enable()
+        self.addCleanup(settings_patcher.disable)
+
+        # Unevenly spaced samples over three days, with repeated prices
+        self.since_timestamp = 1717200000
+        offsets = sorted({(index * index * 53) % 250000 for index in range(400)})
+        self.samples = {
+            f"{self.since_timestamp + offset + offset % 8 / 8}:{80000000.25 + (offset * 7) % 1009}":
+                self.since_timestamp + offset + offset % 8 / 8
+            for offset in offsets
+        }
+        self.ticker = BuenbitTicker()
+        self.tiered_ticker = BuenbitTicker(db_manager=TieredCacheManager())
+        self.ticker.set(key="prices", value=self.samples)
+        self.tiered_ticker.set(key="tiered", value=self.samples)
+
+    def test_tiered_reads_merge_hot_and_archived_tickers(self):
+        """
+        Verify that once the older tickers are archived, reads spanning
+        the archive and the hot tier answer like a single sorted set.
+        """
+        archived_until = self.since_timestamp + 86400 + 3600
+        archived = [score for score in self.samples.values() if score < archived_until]
+
+        moved = self.tiered_ticker.archive(key="tiered", before=archived_until)
+
+        self.assertEqual(moved, len(archived))
+        self.assertEqual(self.redis.zcard("tiered"), len(self.samples) - len(archived))
+        since_timestamp = self.since_timestamp + 5000
+        until_timestamp = self.since_timestamp + 2 * 86400 + 7000
+        for mode in ("mean", "twap", "median", "max"):
+            self.assertAlmostEqual(
+                self.tiered_ticker.get_average_price(
+                    since_timestamp=since_timestamp,
+                    until_timestamp=until_timestamp,
+                    key="tiered",
+                    mode=mode
+                ),
+                self.ticker.get_average_price(
+                    since_timestamp=since_timestamp,
+                    until_timestamp=until_timestamp,
+                    mode=mode
+                ),
+                places=4
+            )
+        self.assertEqual(
+            self.tiered_ticker.get_tickers_list(
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp,
+                key="tiered"
+            ),
+            self.ticker.get_tickers_list(
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp
+            )
+        )
+        # Pages within the archive, across the watermark and past it
+        for offset in (5, len(archived) - 60, len(archived) + 5):
+            self.assertEqual(
+                self.tiered_ticker.get_tickers_page(
+                    since_timestamp="-inf",
+                    until_timestamp="+inf",
+                    offset=offset,
+                    limit=50,
+                    key="tiered"
+                ),
+                self.ticker.get_tickers_page(
+                    since_timestamp="-inf",
+                    until_timestamp="+inf",
+                    offset=offset,
+                    limit=50
+                )
+            )
+        self.assertEqual(
+            list(self.tiered_ticker.iter_tickers(
+                since_timestamp="-inf",
+                until_timestamp="+inf",
+                batch_size=30,
+                key="tiered"
+            )),
+            list(self.ticker.iter_tickers(since_timestamp="-inf", until_timestamp="+inf"))
+        )
+        for timestamp in (since_timestamp, archived_until, self.since_timestamp + 10**6):
+            self.assertEqual(
+                self.tiered_ticker.get_price_as_of(timestamp=timestamp, key="tiered"),
+                self.ticker.get_price_as_of(timestamp=timestamp)
+            )
+
+    def test_archive_task_moves_old_tickers(self):
+        """
+        Verify that the periodic task archives the tickers older than the
+        configured days when the tiered storage is selected, keeping them
+        readable.
+        """
+        expected = self.ticker.get_average_price(
+            since_timestamp=self.since_timestamp,
+            until_timestamp=self.since_timestamp + 3 * 86400
+        )
+        self.assertEqual(archive_tickers(), {})
+
+        with override_settings(TICKER_STORAGE_BACKEND="tiered", TICKER_ARCHIVE_AFTER_DAYS=1):
+            self.assertEqual(archive_tickers(), {"btcars": len(self.samples)})
+
+            self.assertEqual(self.redis.zcard("prices"), 0)
+            self.assertAlmostEqual(
+                BuenbitTicker().get_average_price(
+                    since_timestamp=self.since_timestamp,
+                    until_timestamp=self.since_timestamp + 3 * 86400
+                ),
+                expected,
+                places=4
+            )
+
+    def test_retention_moves_trimmed_tickers_to_the_archive(self):
+        """
+        Verify that with the tiered storage the retention only trims the
+        hot tier: the raw tickers before its horizon stay in the archive
+        and are read from there, before and after the archive task runs.
+        """
+        since_timestamp = self.since_timestamp + 5000
+        until_timestamp = self.since_timestamp + 3 * 86400
+        raw_since = self.since_timestamp + 2 * 86400
+        expected_list = self.ticker.get_tickers_list(
+            since_timestamp=since_timestamp,
+            until_timestamp=until_timestamp
+        )
+        expected = {
+            mode: self.ticker.get_average_price(
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp,
+                mode=mode
+            )
+            for mode in ("mean", "twap", "median", "max")
+        }
+
+        with override_settings(TICKER_STORAGE_BACKEND="tiered", TICKER_ARCHIVE_AFTER_DAYS=1):
+            ticker = BuenbitTicker()
+            stats = ticker.apply_retention(
+                key="prices",
+                raw_since=raw_since,
+                rollups_since={60: self.since_timestamp + 86400}
+            )
+            self.assertEqual(
+                stats["removed"],
+                len([score for score in self.samples.values() if score < raw_since])
+            )
+            self.assertEqual(
+                ticker._TickerManagerDataBase__db_manager.get_retention(key="prices"),
+                {60: self.since_timestamp + 86400}
+            )
+
+            for _ in range(2):
+                self.assertEqual(
+                    ticker.get_tickers_list(
+                        since_timestamp=since_timestamp,
+                        until_timestamp=until_timestamp
+                    ),
+                    expected_list
+                )
+                for mode, price in expected.items():
+                    self.assertAlmostEqual(
+                        ticker.get_average_price(
+                            since_timestamp=since_timestamp,
+                            until_timestamp=until_timestamp,
+                            mode=mode
+                        ),
+                        price,
+                        places=4
+                    )
+                archive_tickers()
+                self.assertEqual(self.redis.zcard("prices"), 0)
+
+
+class TestRedisPool(BaseTest):
+
+    def test_redis_client_is_resolved_on_first_use(self):
+        """
+        Verify that the lazy redis client builds the client once, on the
+        first attribute lookup.
+        """
+        factory = Mock(return_value=self.redis)
+        client = LazyRedisClient(factory)
+        factory.assert_not_called()
+
+        client.set("lazy", 1)
+        self.assertEqual(client.get("lazy"), b"1")
+
+        factory.assert_called_once_with()
+
+    def test_scripts_are_registered_once_per_client(self):
+        """
+        Verify that each Lua script is registered once with a client,
+        however many times it runs.
+        """
+        ticker = BuenbitTicker()
+        with patch.object(self.redis, "register_script", wraps=self.redis.register_script) as register:
+            for timestamp in range(1717135000, 1717135050, 10):
+                ticker.store_tickers(tickers_data={
+                    "btcars": [{"timestamp": timestamp, "price": 70000000.0}],
+                })
+                ticker.get_average_price(since_timestamp=1717135000, until_timestamp=timestamp)
+
+        self.assertEqual(register.call_count, len({call.args[0] for call in register.call_args_list}))
+        self.assertEqual(register.call_count, 3)
+
+    def test_pool_stats_report_connections_in_use(self):
+        """
+        Verify that the pool stats endpoint reports the connections of the
+        sync client pool, checked out ones counting as in use.
+        """
+        self.redis.ping()
+        connection = self.redis.connection_pool.get_connection()
+        self.addCleanup(self.redis.connection_pool.release, connection)
+
+        url = reverse_lazy("ticker:redis-pool-stats")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=User(username="member"))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=User(username="admin", is_staff=True))
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stats = response.json()["sync"]
+        self.assertEqual(stats["in_use"], 1)
+        self.assertEqual(stats["created"], stats["in_use"] + stats["available"])
+        self.assertEqual(stats["utilization"], 1 / stats["max_connections"])
+
+
+    def test_pool_stats_report_replica_pools_and_unknown_internals(self):
+        """
+        Verify that the pool stats report every pool opened by
+        django-redis, without credentials, and that pools without the
+        expected internals are reported without counts.
+        """
+        replica = connect_replica("redis://:secret@replica:6379/0")
+        self.addCleanup(ConnectionFactory._pools.pop, "redis://:secret@replica:6379/0")
+
+        stats = get_redis_pool_stats()
+
+        self.assertEqual(stats["replicas"]["redis://replica:6379/0"], {
+            "max_connections": replica.connection_pool.max_connections,
+            "created": 0,
+            "in_use": 0,
+            "available": 0,
+            "utilization": 0.0,
+        })
+        self.assertEqual(_pool_stats(Mock(spec=["max_connections"], max_connections=10)), {
+            "max_connections": 10,
+            "created": None,
+            "in_use": None,
+            "available": None,
+            "utilization": None,
+        })
+
+class TestReadReplicas(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.replica_server = fakeredis.FakeServer()
+        self.replica = fakeredis.FakeRedis(server=self.replica_server)
+        self.replicas = {"redis://replica:6379/0": self.replica}
+        self.replication = {
+            "role": "slave",
+            "master_link_status": "up",
+            "master_sync_in_progress": 0,
+            "slave_repl_offset": 100,
+        }
+        self.primary_replication = {"role": "master", "master_repl_offset": 100}
+        self.now = 1000.0
+        self.router = ReplicaRouter(
+            discover=lambda: list(self.replicas),
+            connect=self.replicas.get,
+            clock=lambda: self.now
+        )
+        for name, value in (
+            ("redis_cache_manager.replica_router", self.router),
+            ("redis_cache_manager.settings.REDIS_REPLICA_URLS", list(self.replicas)),
+        ):
+            patcher = patch(name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(self.replica, "info", side_effect=lambda section: self.replication)
+        self.info = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(
+            self.redis,
+            "info",
+            side_effect=lambda section: self.primary_replication
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # The replica has not received the latest ticker yet
+        self.replica.zadd("prices", {"1717135000:70000000.0": 1717135000})
+        self.ticker = BuenbitTicker()
+        self.ticker.set(
+            key="prices",
+            value={"1717135000:70000000.0": 1717135000, "1717135010:71000000.0": 1717135010}
+        )
+
+    def test_reads_go_to_a_fresh_replica(self):
+        """
+        Verify that tickers are written to the primary and read from the
+        replica while its lag is tolerated, checking it once per interval.
+        """
+        self.assertEqual(self.replica.zcard("prices"), 1)
+        for _ in range(3):
+            self.assertEqual(
+                self.ticker.get_tickers_list(since_timestamp=1717135000, until_timestamp=1717135010),
+                [{"timestamp": 1717135000.0, "price": 70000000.0}]
+            )
+        self.assertEqual(self.info.call_count, 1)
+
+    def test_reads_fall_back_to_the_primary_when_lagging(self):
+        """
+        Verify that reads go to the primary once the replica lags more
+        than tolerated or loses its link, and back to the replica when
+        it catches up.
+        """
+        expected = [
+            {"timestamp": 1717135000.0, "price": 70000000.0},
+            {"timestamp": 1717135010.0, "price": 71000000.0},
+        ]
+        for replication in (
+            {"slave_repl_offset": 50},
+            {"master_link_status": "down"},
+            {"master_sync_in_progress": 1},
+        ):
+            self.replication.update(replication)
+            self.now += 60
+            self.assertEqual(
+                self.ticker.get_tickers_list(since_timestamp=1717135000, until_timestamp=1717135010),
+                expected
+            )
+            self.replication.update({
+                "master_link_status": "up",
+                "master_sync_in_progress": 0,
+                "slave_repl_offset": 100,
+            })
+
+        # Only the replica has the sample in between, proving it answers
+        self.replica.zadd("prices", {
+            "1717135005:72000000.0": 1717135005,
+            "1717135010:71000000.0": 1717135010,
+        })
+        self.now += 60
+        self.assertEqual(
+            self.ticker.get_average_price(since_timestamp=1717135000, until_timestamp=1717135010),
+            {"average_price": 71000000.0}
+        )
+        self.assertEqual(self.info.call_count, 4)
+
+
+    def test_compact_reads_go_to_a_fresh_replica(self):
+        """
+        Verify that the compact storage lists and reads its chunks from
+        the replica, and writes and trims them on the primary.
+        """
+        compact_ticker = BuenbitTicker(db_manager=CompactRedisCacheManager())
+        compact_ticker.set(key="compact", value={"1717135010:71000000.0": 1717135010})
+        with patch("redis_cache_manager.redis_client", self.replica):
+            compact_ticker.set(key="compact", value={"1717135000:70000000.0": 1717135000})
+
+        for _ in range(2):
+            self.assertEqual(
+                compact_ticker.get_tickers_list(
+                    since_timestamp=1717135000,
+                    until_timestamp=1717135010,
+                    key="compact"
+                ),
+                [{"timestamp": 1717135000.0, "price": 70000000.0}]
+            )
+            self.assertEqual(
+                compact_ticker.get_tickers_page(
+                    since_timestamp=1717135000,
+                    until_timestamp=1717135010,
+                    offset=0,
+                    limit=10,
+                    key="compact"
+                ),
+                (1, [{"timestamp": 1717135000.0, "price": 70000000.0}])
+            )
+
+        manager = compact_ticker._TickerManagerDataBase__db_manager
+        self.assertEqual(manager.remove_z_range_by_score("compact", "-inf", "+inf"), 1)
+        self.assertEqual(self.replica.keys("compact:chunk:*"), [b"compact:chunk:1717131600"])
+
+    async def test_async_reads_go_to_a_fresh_replica(self):
+        """
+        Verify that the async reads go to the fresh replicas, checked off
+        the event loop, and to the primary while they lag.
+        """
+        connect = Mock(side_effect=lambda url: fakeredis.FakeAsyncRedis(server=self.replica_server))
+        manager = AsyncRedisCacheManager()
+        with patch("redis_cache_manager.connect_async", connect):
+            for _ in range(2):
+                self.assertEqual(
+                    await manager.get_z_range_by_score("prices", 1717135000, 1717135010),
+                    [(b"1717135000:70000000.0", 1717135000.0)]
+                )
+
+            self.replication.update({"slave_repl_offset": 50})
+            self.now += 60
+            self.assertEqual(
+                len(await manager.get_z_range_by_score("prices", 1717135000, 1717135010)),
+                2
+            )
+        connect.assert_called_once_with("redis://replica:6379/0")
+        self.assertEqual(self.info.call_count, 2)
+
+    def test_async_primary_is_resolved_through_sentinel(self):
+        """
+        Verify that with Sentinel the async client of the primary resolves
+        the primary of the service rather than connecting to a fixed host.
+        """
+        with override_settings(REDIS_SENTINELS=[("sentinel", 26379)], REDIS_SENTINEL_SERVICE="ticker"):
+            client = connect_async_primary()
+
+        self.assertIsInstance(client.connection_pool, redis.asyncio.sentinel.SentinelConnectionPool)
+        self.assertEqual(client.connection_pool.service_name, "ticker")
+
+    def test_pinned_reads_use_a_single_replica(self):
+        """
+        Verify that the reads of a pinned block are served by a single
+        replica, while reads outside of it are spread over the replicas.
+        """
+        replica = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        self.replicas["redis://replica-2:6379/0"] = replica
+        with patch.object(replica, "info", side_effect=lambda section: self.replication):
+            self.assertEqual(len({id(_read_client()) for _ in range(50)}), 2)
+            for _ in range(10):
+                with pinned_reads():
+                    client = _read_client()
+                    with pinned_reads():
+                        self.assertIs(_read_client(), client)
+                    self.assertEqual({id(_read_client()) for _ in range(20)}, {id(client)})
+
+    def test_staleness_is_bounded_by_the_replication_offset(self):
+        """
+        Verify that a replica stays fresh while it processed what the
+        primary had written the tolerated lag minus the check interval
+        ago, whatever the activity of its link.
+        """
+        with override_settings(REDIS_REPLICA_MAX_LAG=10, REDIS_REPLICA_CHECK_INTERVAL=2):
+            self.assertEqual(self.router.get_fresh_replicas(self.redis), [self.replica])
+
+            # The replica stops at offset 100 while the primary moves on
+            for elapsed in (2, 4, 6, 8):
+                self.now = 1000.0 + elapsed
+                self.primary_replication["master_repl_offset"] = 100 + elapsed
+                self.assertEqual(self.router.get_fresh_replicas(self.redis), [self.replica])
+
+            self.now = 1010.0
+            self.primary_replication["master_repl_offset"] = 110
+            self.assertEqual(self.router.get_fresh_replicas(self.redis), [])
+
+            # Catching up with the offset of 8 seconds ago is enough
+            self.replication["slave_repl_offset"] = 103
+            self.now = 1012.0
+            self.assertEqual(self.router.get_fresh_replicas(self.redis), [])
+            self.replication["slave_repl_offset"] = 106
+            self.now = 1014.0
+            self.assertEqual(self.router.get_fresh_replicas(self.redis), [self.replica])
+
+            # A failover restarts the samples of the primary
+            self.primary_replication["master_repl_offset"] = 20
+            self.replication["slave_repl_offset"] = 20
+            self.now = 1016.0
+            self.assertEqual(self.router.get_fresh_replicas(self.redis), [self.replica])
+
+    def test_reads_are_spread_over_the_fresh_replicas(self):
+        """
+        Verify that each replica is tracked with its own client, and that
+        reads only go to the replicas fresh at the last check.
+        """
+        lagging = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        lagging_replication = {**self.replication, "master_link_status": "down"}
+        self.replicas["redis://lagging:6379/0"] = lagging
+        patcher = patch.object(lagging, "info", side_effect=lambda section: lagging_replication)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        for _ in range(10):
+            self.assertEqual(
+                self.ticker.get_tickers_list(since_timestamp=1717135000, until_timestamp=1717135010),
+                [{"timestamp": 1717135000.0, "price": 70000000.0}]
+            )
+        self.assertEqual(self.router.replicas, self.replicas)
+
+        lagging_replication["master_link_status"] = "up"
+        self.now += 60
+        self.assertCountEqual(self.router.get_fresh_replicas(self.redis), [self.replica, lagging])
+
+        # Replicas no longer listed are forgotten
+        del self.replicas["redis://replica:6379/0"]
+        self.now += 60
+        self.assertEqual(self.router.get_fresh_replicas(self.redis), [lagging])
+        self.assertEqual(list(self.router.replicas), ["redis://lagging:6379/0"])
+
+class TestWriteBuffer(BaseTest):
+
+    def test_buffer_coalesces_writes_in_one_transaction(self):
+        """
+        Verify that the samples, rollups, latest element, trims and
+        notifications of a buffer are sent in a single MULTI round-trip.
+        """
+        self.redis.zadd("prices", {"1717135000:70000000.0": 1717135000})
+        ticker = TickerManagerDataBase()
+
+        with patch.object(
+            self.redis,
+            "pipeline",
+            wraps=self.redis.pipeline
+        ) as mock_pipeline:
+            with ticker.write_buffer() as buffer:
+                buffer.add(
+                    key="prices",
+                    value={
+                        "1717135270:82000000.0": 1717135270,
+                        "1717135280:78000000.0": 1717135280,
+                    }
+                )
+                buffer.trim(key="prices", before=1717135100)
+                buffer.publish(channel="prices:samples", message="1717135280:78000000.0")
+                self.assertEqual(len(buffer), 4)
+
+        mock_pipeline.assert_called_once()
+        self.assertTrue(mock_pipeline.call_args.kwargs.get("transaction", True))
+        self.assertEqual(
+            self.redis.zrange("prices", 0, -1),
+            [b"1717135270:82000000.0", b"1717135280:78000000.0"]
+        )
+        self.assertEqual(self.redis.zcard("prices:rollup:60:buckets"), 1)
+        self.assertEqual(
+            ticker.get_zlatest(key="prices"),
+            (b"1717135280:78000000.0", 1717135280.0)
+        )
+
+    def test_latest_element_is_not_regressed(self):
+        """
+        Verify that writing older samples keeps the latest element, also
+        without scripting, and that an error discards the buffer.
+        """
+        ticker = BuenbitTicker()
+        with ticker.write_buffer() as buffer:
+            buffer.add(key="prices", value={"1717135280:78000000.0": 1717135280})
+        with ticker.write_buffer() as buffer:
+            buffer.add(key="prices", value={"1717135270:82000000.0": 1717135270})
+        self.assertEqual(ticker.get_latest_timestamp(), 1717135280.0)
+
+        with patch.object(
+            self.redis,
+            "register_script",
+            side_effect=ResponseError("unknown command 'EVALSHA'")
+        ):
+            with ticker.write_buffer() as buffer:
+                buffer.add(key="prices", value={"1717135260:81000000.0": 1717135260})
+        self.assertEqual(ticker.get_latest_timestamp(), 1717135280.0)
+
+        with self.assertRaises(ValueError):
+            with ticker.write_buffer() as buffer:
+                buffer.add(key="prices", value={"1717135290:79000000.0": 1717135290})
+                raise ValueError
+        self.assertEqual(self.redis.zcard("prices"), 3)
+
+    def test_only_scripting_errors_fall_back(self):
+        """
+        Verify that errors other than scripting being unavailable are
+        raised instead of sending the writes again without scripting,
+        whether they are replied before or after EXEC.
+        """
+        ticker = BuenbitTicker()
+        manager = ticker._TickerManagerDataBase__db_manager
+
+        with patch.object(
+            self.redis,
+            "register_script",
+            side_effect=ResponseError("OOM command not allowed")
+        ), patch.object(manager, "_write_many_without_scripting") as mock_fallback:
+            with self.assertRaises(RuntimeError):
+                with ticker.write_buffer() as buffer:
+                    buffer.add(key="prices", value={"1717135270:82000000.0": 1717135270})
+        mock_fallback.assert_not_called()
+
+        # The sorted set holding the wrong type makes its script fail
+        # within EXEC, after the notification was published
+        self.redis.set("prices", "not a sorted set")
+        pubsub = self.redis.pubsub()
+        pubsub.subscribe("prices:samples")
+        pubsub.get_message()
+        with patch.object(manager, "_write_many_without_scripting") as mock_fallback:
+            with self.assertRaises(RuntimeError):
+                with ticker.write_buffer() as buffer:
+                    buffer.add(key="prices", value={"1717135270:82000000.0": 1717135270})
+                    buffer.publish(
+                        channel="prices:samples",
+                        message="1717135270:82000000.0"
+                    )
+        mock_fallback.assert_not_called()
+        self.assertIsNotNone(pubsub.get_message())
+        self.assertIsNone(pubsub.get_message())
+
+
+class TestStorageLayout(BaseTest):
+
+    @patch('ticker.ticker.BuenbitApiHandle.handle')
+    def test_set_ticker_keeps_repeated_prices(self, mock_handle):
+        """
+        Verify that storing the same price at different timestamps keeps
+        every sample instead of overwriting the previous timestamp.
+        """
+        mock_handle.side_effect = [
+            {"timestamp": 1717135270, "price": 82000000.0},
+            {"timestamp": 1717135280, "price": 82000000.0},
+        ]
+        ticker = BuenbitTicker()
+        ticker.set_ticker()
+        ticker.set_ticker()
+
+        self.assertEqual(
+            ticker.get_tickers_list(since_timestamp="-inf", until_timestamp="+inf"),
+            [
+                {"timestamp": 1717135270, "price": 82000000.0},
+                {"timestamp": 1717135280, "price": 82000000.0},
+            ]
+        )
+
+    def test_migrate_ticker_prices_command(self):
+        """
+        Verify that the migration command rewrites legacy price-as-member
+        entries as timestamp-encoded members, keeping encoded ones.
+        """
+        self.redis.zadd(
+            "prices",
+            {82000000.0: 1717135270, 78000000.5: 1717135280, "1717135290:85000000.0": 1717135290}
+        )
+
+        call_command(
+            "migrate_ticker_prices",
+            "--batch-size", "2",
+            stdout=StringIO()
+        )
+
+        self.assertEqual(
+            self.redis.zrange("prices", 0, -1, withscores=True),
+            [
+                (b"1717135270:82000000.0", 1717135270.0),
+                (b"1717135280:78000000.5", 1717135280.0),
+                (b"1717135290:85000000.0", 1717135290.0),
+            ]
+        )
+
+
+class TestHotWindow(BaseTest):
+
+    def test_window_evicts_oldest_samples_and_reports_coverage(self):
+        """
+        Verify that the window keeps the latest `capacity` samples and
+        only answers ranges starting after the evicted ones.
+        """
+        window = HotWindow(capacity=3)
+        self.assertIsNone(window.get_range(since_timestamp=0, until_timestamp=50))
+
+        window.seed([(10.0, 1.0), (20.0, 2.0)])
+        window.append(20.0, 2.0)
+        window.append(30.0, 3.0)
+        window.append(40.0, 4.0)
+
+        self.assertIsNone(window.get_range(since_timestamp=10, until_timestamp=50))
+        self.assertEqual(
+            window.get_range(since_timestamp=11, until_timestamp=35),
+            [(20.0, 2.0), (30.0, 3.0)]
+        )
+
+        window.invalidate()
+        self.assertIsNone(window.get_range(since_timestamp=11, until_timestamp=35))
+
+    def test_window_does_not_answer_ranges_ending_after_its_newest_sample(self):
+        """
+        Verify that ranges ending after the newest received sample fall
+        back to the db, which may hold samples not received yet.
+        """
+        window = HotWindow(capacity=3)
+        window.seed([])
+        self.assertIsNone(window.get_range(since_timestamp=11, until_timestamp=35))
+
+        window.append(20.0, 2.0)
+        window.append(30.0, 3.0)
+        self.assertEqual(
+            window.get_range(since_timestamp=11, until_timestamp=30),
+            [(20.0, 2.0), (30.0, 3.0)]
+        )
+        self.assertIsNone(window.get_range(since_timestamp=11, until_timestamp=35))
+        self.assertIsNone(window.get_range(since_timestamp=11, until_timestamp=35))
+
+    def test_get_price_is_served_from_the_hot_window(self):
+        """
+        Verify that recent ranges are answered from memory without
+        reading the sorted set.
+        """
+        ticker = BuenbitTicker(hot_window_capacity=10)
+        window = HotWindow(capacity=10)
+        window.seed([(1717135270.0, 82000000.0), (1717135280.0, 83000000.0)])
+        ticker.hot_windows["prices"] = window
+
+        with patch.object(self.redis, "zrangebyscore") as mock_zrangebyscore:
+            price = ticker.get_price(timestamp=1717135280)
+
+        self.assertEqual(price, {"timestamp": 1717135280, "price": 83000000.0})
+        mock_zrangebyscore.assert_not_called()
+
+    @patch('ticker.ticker.BuenbitApiHandle.handle')
+    def test_set_ticker_publishes_stored_samples(self, mock_handle):
+        """
+        Verify that stored samples are published on the series channel.
+        """
+        mock_handle.return_value = {"timestamp": 1717135270, "price": 82000000.0}
+        pubsub = self.redis.pubsub()
+        pubsub.subscribe(BuenbitTicker.samples_channel("prices"))
+        self.assertEqual(pubsub.get_message(timeout=1)["type"], "subscribe")
+
+        BuenbitTicker().set_ticker()
+
+        message = pubsub.get_message(timeout=1)
+        self.assertEqual(message["data"], b"1717135270:82000000.0")
+        self.assertEqual(
+            BuenbitTicker.decode_sample(message["data"]),
+            (1717135270.0, 82000000.0)
+        )
+        pubsub.close()
+
+
+class TestAsyncViews(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        TickerManagerDataBase().set(
+            key="prices",
+            value={
+                f"{timestamp}:{price}": timestamp
+                for timestamp, price in [
+                    (1717135270, 82000000.0),
+                    (1717135280, 78000000.0),
+                    (1717135290, 85000000.0),
+                ]
+            }
+        )
+
+    async def test_async_average_price_and_price(self):
+        """
+        Verify that the async views answer like their sync counterparts.
+        """
+        response = await self.async_client.get(
+            reverse_lazy('ticker:async-average-price'),
+            {"since": "1717135270", "until": "1717135280"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"average_price": 80000000.0})
+
+        response = await self.async_client.get(
+            reverse_lazy('ticker:async-ticker-price'),
+            {"timestamp": "1717135290"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"price": 85000000.0})
+
+        response = await self.async_client.get(reverse_lazy('ticker:async-average-price'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_average_price_modes_match_the_sync_ones(self):
+        """
+        Verify that the async average price view answers every mode like
+        the sync one, invalid modes and percentiles included.
+        """
+        for params in (
+            {"mode": "mean"},
+            {"mode": "twap"},
+            {"mode": "median"},
+            {"mode": "percentile", "percentile": 25},
+            {"mode": "min"},
+            {"mode": "max"},
+            {"mode": "vwap"},
+            {"mode": "percentile"},
+        ):
+            params = {"since": "1717135270", "until": "1717135290", **params}
+            expected = await sync_to_async(self.client.get)(
+                reverse_lazy('ticker:average-price'),
+                params
+            )
+            response = await self.async_client.get(
+                reverse_lazy('ticker:async-average-price'),
+                params
+            )
+            self.assertEqual(response.status_code, expected.status_code, params)
+            self.assertEqual(response.json(), expected.json(), params)
+
+    async def test_async_price_lookups_match_the_sync_ones(self):
+        """
+        Verify that the async price view answers exact and as-of lookups,
+        with and without tolerance, like the sync one.
+        """
+        for params in (
+            {"timestamp": "1717135285"},
+            {"timestamp": "1717135285", "lookup": "asof"},
+            {"timestamp": "1717135285", "lookup": "asof", "tolerance": "10"},
+            {"timestamp": "1717135285", "lookup": "asof", "tolerance": "2"},
+            {"timestamp": "1717135260", "lookup": "asof"},
+            {"timestamp": "1717135285", "lookup": "nearest"},
+        ):
+            expected = await sync_to_async(self.client.get)(
+                reverse_lazy('ticker:ticker-price'),
+                params
+            )
+            response = await self.async_client.get(
+                reverse_lazy('ticker:async-ticker-price'),
+                params
+            )
+            self.assertEqual(response.status_code, expected.status_code, params)
+            self.assertEqual(response.json(), expected.json(), params)
+
+    async def test_async_ticker_list_is_paginated(self):
+        """
+        Verify that the async list view returns the requested page with
+        the same payload as the sync one.
+        """
+        response = await self.async_client.get(
+            reverse_lazy('ticker:async-ticker-list'),
+            {"page": 2, "page_size": 2}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], 3)
+        self.assertIsNone(response.json()["next"])
+        self.assertIsNotNone(response.json()["previous"])
+        self.assertEqual(
+            response.json()["results"],
+            [{"timestamp": 1717135290, "price": 85000000.0}]
+        )
+
+        response = await self.async_client.get(
+            reverse_lazy('ticker:async-ticker-list'),
+            {"page": 3, "page_size": 2}
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_async_views_read_other_backends_in_a_thread(self):
+        """
+        Verify that with a storage backend without async client, the
+        async views answer from it through the sync ticker.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with override_settings(TICKER_STORAGE_BACKEND="sqlite"):
+            ticker = BuenbitTicker(db_manager=SQLiteCacheManager(
+                path=os.path.join(directory.name, "tickers.sqlite3")
+            ))
+            async_ticker = AsyncBuenbitTicker(ticker=ticker)
+        ticker.set(key="prices", value={"1717135270:60000000.0": 1717135270})
+        self.assertFalse(async_ticker.native)
+
+        with patch.object(AsyncTickerBaseView, "ticker", async_ticker):
+            response = await self.async_client.get(
+                reverse_lazy('ticker:async-average-price'),
+                {"since": "1717135270", "until": "1717135280"}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json(), {"average_price": 60000000.0})
+
+            response = await self.async_client.get(reverse_lazy('ticker:async-ticker-list'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()["count"], 1)
+
+class TestMarkets(BaseTest):
+
+    @patch('ticker.ticker.BuenbitApiHandle.handle_markets')
+    def test_set_tickers_stores_each_market_in_one_pipeline(self, mock_handle):
+        """
+        Verify that the tickers of every market are stored under their own
+        key in a single pipeline.
+        """
+        mock_handle.return_value = {
+            "btcars": {"timestamp": 1717135270, "price": 82000000.0},
+            "ethars": {"timestamp": 1717135270, "price": 4000000.0},
+        }
+
+        with patch.object(
+            self.redis,
+            "pipeline",
+            wraps=self.redis.pipeline
+        ) as mock_pipeline:
+            BuenbitTicker().set_tickers(market_identifiers=["btcars", "ethars"])
+
+        # A single pipeline stores every market and notifies them
+        mock_pipeline.assert_called_once()
+        self.assertEqual(
+            self.redis.zrange("prices", 0, -1),
+            [b"1717135270:82000000.0"]
+        )
+        self.assertEqual(
+            self.redis.zrange("prices:ethars", 0, -1),
+            [b"1717135270:4000000.0"]
+        )
+
+    def test_endpoints_read_the_requested_market(self):
+        """
+        Verify that the 'market' parameter selects the key the endpoints
+        read from, and that unknown markets are rejected.
+        """
+        TickerManagerDataBase().set_many(values={
+            "prices": {"1717135270:82000000.0": 1717135270},
+            "prices:ethars": {"1717135270:4000000.0": 1717135270},
+        })
+
+        response = self.client.get(
+            reverse_lazy("ticker:ticker-price"),
+            {"timestamp": "1717135270", "market": "ethars"}
+        )
+        self.assertEqual(response.data, {"price": 4000000.0})
+
+        response = self.client.get(
+            reverse_lazy("ticker:ticker-list"),
+            {"market": "ethars"}
+        )
+        self.assertEqual(
+            response.data["results"],
+            [{"timestamp": 1717135270, "price": 4000000.0}]
+        )
+
+        response = self.client.get(
+            reverse_lazy("ticker:average-price"),
+            {"since": "1717135270", "until": "1717135270"}
+        )
+        self.assertEqual(response.data, {"average_price": 82000000.0})
+
+        response = self.client.get(
+            reverse_lazy("ticker:ticker-list"),
+            {"market": "dogears"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestBackfill(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        # Two days of samples every 10 minutes, the first one in ISO 8601
+        self.timestamps = [1717200000 + index * 600 for index in range(288)]
+        file = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        with file:
+            file.write("price,timestamp\n")
+            file.write("80000000.0,2024-06-01T00:00:00+00:00\n")
+            for index, timestamp in enumerate(self.timestamps[1:], start=1):
+                file.write(f"{80000000.0 + index},{timestamp}\n")
+        self.path = file.name
+        self.addCleanup(os.remove, self.path)
+
+    def test_backfill_loads_chunks_with_rollups(self):
+        """
+        Verify that the backfill command loads every row in chunks, with
+        progress, and that averages over the history use its rollups.
+        """
+        stdout = StringIO()
+
+        call_command("backfill_tickers", self.path, "--chunk-size", "100", stdout=stdout)
+
+        self.assertEqual(self.redis.zcard("prices"), 288)
+        self.assertIn("Loaded 200 rows", stdout.getvalue())
+        self.assertIn("Loaded 288 tickers", stdout.getvalue())
+        self.assertEqual(float(self.redis.get("prices:rollup:since")), 1717200000)
+        self.assertEqual(
+            BuenbitTicker().get_average_price(
+                since_timestamp=self.timestamps[0],
+                until_timestamp=self.timestamps[-1]
+            ),
+            {"average_price": 80000000.0 + 287 / 2}
+        )
+
+    def test_backfill_resumes_from_checkpoint(self):
+        """
+        Verify that running the command again skips the rows checkpointed
+        by a previous run, unless restarted.
+        """
+        self.redis.set(f"prices:backfill:{os.path.basename(self.path)}", 250)
+        stdout = StringIO()
+
+        call_command("backfill_tickers", self.path, "--market", "ethars", stdout=StringIO())
+        call_command("backfill_tickers", self.path, stdout=stdout)
+
+        self.assertEqual(self.redis.zcard("prices:ethars"), 288)
+        self.assertEqual(self.redis.zcard("prices"), 38)
+        self.assertIn("skipped 250 rows", stdout.getvalue())
+
+        call_command("backfill_tickers", self.path, "--restart", stdout=StringIO())
+        self.assertEqual(self.redis.zcard("prices"), 288)
+        self.assertEqual(int(self.redis.hget("prices:rollup:86400", "1717200000:count")), 144)
+
+
+    def test_interrupted_backfill_keeps_the_rollup_watermark(self):
+        """
+        Verify that the rollup watermark covers the samples loaded by an
+        interrupted backfill, even when its first chunk is not the
+        oldest one, so resuming it moves the watermark to the oldest day.
+        """
+        samples = [
+            (timestamp, 80000000.0 + index)
+            for index, timestamp in enumerate(self.timestamps)
+        ][::-1]
+        ticker = TickerManagerDataBase()
+
+        def interrupt(count):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            ticker.backfill(key="prices", samples=samples, chunk_size=100, on_chunk=interrupt)
+        self.assertEqual(float(self.redis.get("prices:rollup:since")), 1717200000 + 86400)
+
+        ticker.backfill(key="prices", samples=samples[100:], chunk_size=100)
+
+        self.assertEqual(self.redis.zcard("prices"), 288)
+        self.assertEqual(float(self.redis.get("prices:rollup:since")), 1717200000)
+        self.assertEqual(
+            BuenbitTicker().get_average_price(
+                since_timestamp=self.timestamps[0],
+                until_timestamp=self.timestamps[-1]
+            ),
+            {"average_price": 80000000.0 + 287 / 2}
+        )
+
+class TestIngestion(BaseTest):
+
+    @patch('ticker.ticker.BuenbitApiHandle.handle_markets')
+    def test_ingest_tickers_command_skips_unchanged_quotes(self, mock_handle):
+        """
+        Verify that the ingestion worker stores only the quotes that
+        changed, and keeps its heartbeat alive.
+        """
+        mock_handle.side_effect = [
+            {"btcars": {"timestamp": 1717135270.5, "price": 82000000.0}},
+            {"btcars": {"timestamp": 1717135271.0, "price": 82000000.0}},
+            {"btcars": {"timestamp": 1717135271.5, "price": 83000000.0}},
+        ]
+        stdout = StringIO()
+
+        call_command(
+            "ingest_tickers",
+            "btcars",
+            "--interval", "0",
+            "--flush-interval", "0.05",
+            "--max-fetches", "3",
+            stdout=stdout
+        )
+
+        self.assertEqual(
+            self.redis.zrange("prices", 0, -1, withscores=True),
+            [
+                (b"1717135270.5:82000000.0", 1717135270.5),
+                (b"1717135271.5:83000000.0", 1717135271.5),
+            ]
+        )
+        self.assertIsNotNone(self.redis.get(INGESTION_HEARTBEAT_KEY))
+        self.assertIn("stored 2 tickers, skipped 1 unchanged", stdout.getvalue())
+
+    @patch('ticker.ticker.BuenbitTicker.set_tickers')
+    def test_celery_task_is_a_fallback_of_the_worker(self, mock_set_tickers):
+        """
+        Verify that the periodic task only fetches tickers when no
+        ingestion worker is alive.
+        """
+        self.redis.set(INGESTION_HEARTBEAT_KEY, "1717135270", ex=30)
+        fetch_and_set_buenbit_data()
+        mock_set_tickers.assert_not_called()
+
+        self.redis.delete(INGESTION_HEARTBEAT_KEY)
+        fetch_and_set_buenbit_data()
+        mock_set_tickers.assert_called_once()
+
+
+class TestRenderers(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.payloads = [
+            {
+                "count": 2,
+                "next": None,
+                "previous": "http://testserver/api/ticker-list/?page=1",
+                "results": [
+                    {"timestamp": 1717135270, "price": 82000000.0},
+                    {"timestamp": 1717135270.5, "price": 0.1 + 0.2},
+                ],
+            },
+            {"average_price": None, "prices": [78000000.0, None, 1e-07, 1e21, -0.0]},
+            {"timestamp": 2 ** 53 + 1, "price": Decimal("82000000.10")},
+            {"error": ErrorDetail("Invalid timestamp.", code="invalid")},
+            {"error": gettext_lazy("Not found."), "timestamps": {0: ["Not a number."]}},
+            [{"candles": []}, "ñandú"],
+        ]
+
+    @staticmethod
+    def parse(content: bytes):
+        # Floats are tagged, so an integral float never equals an int
+        return json.loads(content, parse_float=lambda value: ("float", float(value)))
+
+    def assertRendersLikeDRF(self, data):
+        expected = self.parse(JSONRenderer().render(data))
+        self.assertEqual(self.parse(dumps(data)), expected)
+        self.assertEqual(self.parse(ORJSONRenderer().render(data)), expected)
+        self.assertEqual(
+            self.parse(ORJSONResponse(data, safe=False).content),
+            expected
+        )
+
+    def test_orjson_renders_like_drf(self):
+        """
+        Verify that dumps, the renderer and the async response encode
+        floats, None, big integers, decimals, lazy strings and non-string
+        keys like DRF's JSON renderer, and render None alike.
+        """
+        for data in self.payloads:
+            with self.subTest(data=data):
+                self.assertRendersLikeDRF(data)
+
+        self.assertEqual(ORJSONRenderer().render(None), JSONRenderer().render(None))
+        self.assertEqual(dumps(82000000.0), b"82000000.0")
+
+    def test_fallback_renders_like_drf_without_orjson(self):
+        """
+        Verify that without orjson installed the same payloads are
+        encoded by DRF's JSON renderer, compactly.
+        """
+        with patch("ticker.renderers.orjson", None):
+            for data in self.payloads:
+                with self.subTest(data=data):
+                    self.assertRendersLikeDRF(data)
+            self.assertNotIn(b" ", dumps({"price": 1.5, "ticker": [1, 2]}))
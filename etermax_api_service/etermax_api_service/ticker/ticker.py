@@ -1,182 +1,2015 @@
+import itertools
+import math
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from redis_cache_manager import RedisCacheManager
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from common import decode_member, encode_member, format_timestamp
+from redis_cache_manager import (
+    AsyncRedisCacheManager,
+    RedisCacheManagerBase,
+    WriteBuffer
+)
 from services.buenbit.buenbit import BuenbitApiHandle
+from storage_backends import get_storage_backend
+from ticker.averages import (
+    AVERAGE_MODES,
+    percentile,
+    time_weighted_average
+)
+from ticker.candles import aggregate_candles
+from ticker.hot_window import HotWindow
+from ticker.rollups import (
+    RAW_RESOLUTION,
+    ROLLUP_RESOLUTIONS,
+    plan_segments,
+    split_retained
+)
+
+
+def check_raw_retained(retention: Dict[int, float], since_timestamp, reading: str) -> None:
+    """
+    Check that the raw tickers of a series are kept from a timestamp on,
+    for the reads that can't be answered from the rollups.
+
+    Args:
+        retention (Dict[int, float]): The retention of the series, see
+        `split_retained`.
+        since_timestamp: The earliest timestamp read.
+        reading (str): What is read, for the error message.
+
+    Raises:
+        ValueError: If raw tickers after `since_timestamp` were trimmed.
+    """
+    raw_since = retention.get(RAW_RESOLUTION)
+    if raw_since is not None and float(since_timestamp) < raw_since:
+        raise ValueError(
+            f"{reading} needs the raw tickers, which are only kept since "
+            f"{format_timestamp(raw_since)}."
+        )
+
+
+class TickerBase(ABC):
+    """
+    Abstract base class for ticker management.
+    """
+
+    @abstractmethod
+    def set(self, key: str, value: Dict):
+        """
+        Set a key-value pair in the cache.
+
+        Args:
+            key (str): The key under which the value should be stored.
+            value (Dict): The value to be stored.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_many(self, values: Dict[str, Dict]):
+        """
+        Set key-value pairs of several keys in the cache.
+
+        Args:
+            values (Dict[str, Dict]): The value to be stored under each key.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_zrange(self, key: str, start: str, end: str):
+        """
+        Retrieve a range of elements from a sorted set in the cache by score.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_zrange_page(
+        self,
+        key: str,
+        start: str,
+        end: str,
+        offset: int,
+        count: int
+    ):
+        """
+        Retrieve a page of a range of elements from a sorted set in the
+        cache by score, along with the size of the range.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            offset (int): The number of elements to skip.
+            count (int): The maximum number of elements to return.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_zrange(self, key: str, start: str, end: str, batch_size: int):
+        """
+        Iterate over a range of elements from a sorted set in the cache
+        by score, in batches.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            batch_size (int): The maximum number of elements per batch.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_zranges(self, key: str, ranges: List[Tuple[str, str]]):
+        """
+        Retrieve several score ranges of a sorted set in the cache.
+
+        Args:
+            key (str): The key of the sorted set.
+            ranges (List[Tuple[str, str]]): The `(start, end)` score
+            ranges to read.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_zlast_score(self, key: str):
+        """
+        Retrieve the highest score of a sorted set in the cache.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_zlatest(self, key: str):
+        """
+        Retrieve the element with the highest score of a sorted set in
+        the cache.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def write_buffer(self):
+        """
+        Return a buffer collecting writes to send them to the cache
+        together.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_zlast_range(
+        self,
+        key: str,
+        count: int,
+        start: str = "-inf",
+        end: str = "+inf"
+    ):
+        """
+        Retrieve the elements with the highest scores of a sorted set in
+        the cache, optionally within a score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            count (int): The maximum number of elements to return.
+            start (str, optional): The minimum score of the range.
+            end (str, optional): The maximum score of the range.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def publish(self, channel: str, message: str):
+        """
+        Publish a message to the subscribers of a channel.
+
+        Args:
+            channel (str): The channel to publish to.
+            message (str): The message to publish.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def publish_many(self, messages: List[Tuple[str, str]]):
+        """
+        Publish several messages, each to its own channel.
+
+        Args:
+            messages (List[Tuple[str, str]]): The `(channel, message)`
+            pairs to publish.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_value(self, key: str, value: str, expire: Optional[int] = None):
+        """
+        Set a plain value in the cache, optionally expiring.
+
+        Args:
+            key (str): The key under which the value should be stored.
+            value (str): The value to be stored.
+            expire (Optional[int], optional): Seconds until it expires.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_value(self, key: str):
+        """
+        Retrieve a plain value from the cache.
+
+        Args:
+            key (str): The key of the value.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def subscribe(self, channel: str, on_subscribed: Callable[[], None]):
+        """
+        Subscribe to a channel and yield its messages as they arrive.
+
+        Args:
+            channel (str): The channel to subscribe to.
+            on_subscribed (Callable[[], None]): Called once the
+            subscription is active.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_zstats(self, key: str, start: str, end: str):
+        """
+        Aggregate the elements of a sorted set in the cache within a
+        score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_ztwap(self, key: str, start: str, end: str):
+        """
+        Calculate the time-weighted average of the elements of a sorted
+        set in the cache within a score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def split_zrange(self, key: str, start: str, end: str):
+        """
+        Split a score range of a sorted set in the cache at the horizon of
+        its raw elements.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_retention(self, key: str):
+        """
+        Retrieve the timestamp from which the data of each resolution of a
+        sorted set in the cache is kept.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_zrollup_since(self, key: str):
+        """
+        Retrieve the score from which the rollup buckets of a sorted set
+        in the cache are complete.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_zrollup_page(
+        self,
+        key: str,
+        resolution: int,
+        start: str,
+        end: str,
+        offset: int,
+        count: int
+    ):
+        """
+        Retrieve a page of the rollup buckets of a sorted set in the cache
+        starting within a score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            start (str): The minimum bucket start.
+            end (str): The maximum bucket start.
+            offset (int): The number of buckets to skip.
+            count (int): The maximum number of buckets to return.
+
+        Raises:
+            NotImplementedError: If the method is not implemented.
+        """
+        raise NotImplementedError
+
+
+class TickerManagerDataBase(TickerBase):
+    """
+    Implementation of TickerBase using Redis for cache management.
+    """
+
+    def __init__(self, db_manager: Optional[RedisCacheManagerBase] = None):
+        """
+        Initialize TickerManagerDataBase.
+
+        Args:
+            db_manager (Optional[RedisCacheManagerBase], optional): The
+            storage backend. Defaults to the `TICKER_STORAGE_BACKEND` one.
+        """
+        self.__db_manager = db_manager or get_storage_backend()
+        self.__written_until = {}
+
+    @staticmethod
+    def rewrites_key(key: str) -> str:
+        """
+        Build the key of the log of the writes landing before the latest
+        element of a sorted set.
+        """
+        return f"{key}:rewrites"
+
+    def set(self, key: str, value: Dict):
+        """
+        Set a key-value pair in the Redis cache, keeping the per-minute,
+        per-hour and per-day rollups of the key updated.
+
+        Args:
+            key (str): The key under which the value should be stored.
+            value (Dict): The value to be stored.
+        """
+        self.__db_manager.set_data_with_rollups(
+            key=key,
+            value=value,
+            resolutions=ROLLUP_RESOLUTIONS
+        )
+
+    def set_many(self, values: Dict[str, Dict]):
+        """
+        Set key-value pairs of several keys in the Redis cache in a single
+        round-trip, keeping the rollups of each key updated.
+
+        Args:
+            values (Dict[str, Dict]): The value to be stored under each key.
+        """
+        self.__db_manager.set_many_data_with_rollups(
+            values=values,
+            resolutions=ROLLUP_RESOLUTIONS
+        )
+
+    def get_zrange(self, key: str, start: str, end: str):
+        """
+        Retrieve a range of elements from a sorted set in the Redis
+        cache by score.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            List[Tuple[str, float]]: A list of elements within the
+            specified score range, with their scores.
+        """
+        return self.__db_manager.get_z_range_by_score(
+            key=key,
+            start=start,
+            end=end
+        )
+
+    def get_zrange_page(
+        self,
+        key: str,
+        start: str,
+        end: str,
+        offset: int,
+        count: int
+    ) -> Tuple[int, List[Tuple[bytes, float]]]:
+        """
+        Retrieve a page of a range of elements from a sorted set in the
+        Redis cache by score, along with the size of the range.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            offset (int): The number of elements to skip.
+            count (int): The maximum number of elements to return.
+
+        Returns:
+            Tuple[int, List[Tuple[bytes, float]]]: The number of elements
+            in the range and the elements of the page, with their scores.
+        """
+        return self.__db_manager.get_z_range_by_score_page(
+            key=key,
+            start=start,
+            end=end,
+            offset=offset,
+            count=count
+        )
+
+    def iter_zrange(
+        self,
+        key: str,
+        start: str,
+        end: str,
+        batch_size: int
+    ) -> Iterator[List[Tuple[bytes, float]]]:
+        """
+        Iterate over a range of elements from a sorted set in the Redis
+        cache by score, in batches.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            batch_size (int): The maximum number of elements per batch.
+
+        Returns:
+            Iterator[List[Tuple[bytes, float]]]: Batches of elements in
+            score order, with their scores.
+        """
+        return self.__db_manager.iter_z_range_by_score(
+            key=key,
+            start=start,
+            end=end,
+            batch_size=batch_size
+        )
+
+    def get_zranges(
+        self,
+        key: str,
+        ranges: List[Tuple[str, str]]
+    ) -> List[List[Tuple[bytes, float]]]:
+        """
+        Retrieve several score ranges of a sorted set in the Redis cache
+        in a single round-trip.
+
+        Args:
+            key (str): The key of the sorted set.
+            ranges (List[Tuple[str, str]]): The `(start, end)` score
+            ranges to read.
+
+        Returns:
+            List[List[Tuple[bytes, float]]]: The elements of each range,
+            with their scores, in the order of `ranges`.
+        """
+        return self.__db_manager.get_z_ranges_by_score(key=key, ranges=ranges)
+
+    def get_zlast_score(self, key: str) -> Optional[float]:
+        """
+        Retrieve the highest score of a sorted set in the Redis cache.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The highest score, None if the set is empty.
+        """
+        return self.__db_manager.get_z_last_score(key=key)
+
+    def get_zlatest(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """
+        Retrieve the element with the highest score of a sorted set in the
+        Redis cache, in O(1) for sets written through the manager.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[Tuple[bytes, float]]: The element and its score, None
+            if the set is empty.
+        """
+        return self.__db_manager.get_z_latest(key=key)
+
+    def write_buffer(self) -> WriteBuffer:
+        """
+        Return a buffer collecting writes to send them to the Redis cache
+        in a single round-trip, keeping the rollups and the latest element
+        of each key updated, and logging the writes rewriting history.
+
+        Returns:
+            WriteBuffer: The buffer, to be used as a context manager.
+        """
+        return self.__db_manager.write_buffer(
+            resolutions=ROLLUP_RESOLUTIONS,
+            on_flush=self.log_rewrites
+        )
+
+    def log_rewrites(self, values: Dict[str, Dict]) -> None:
+        """
+        Log the writes of elements scored before the latest element of
+        their sorted set, such as late samples and backfills, so results
+        cached over the ranges they change can be invalidated.
+
+        Each entry is encoded as `<logged at>:<lowest score written>` and
+        scored by the time it was logged. Entries older than a day are
+        trimmed.
+
+        Args:
+            values (Dict[str, Dict]): The elements written to each sorted
+            set, with their scores.
+        """
+        now = time.time()
+        for key, value in values.items():
+            if not value:
+                continue
+            lowest, highest = min(value.values()), max(value.values())
+            # Read once per process, the sorted set then holds the batch
+            latest = self.__written_until.get(key)
+            if latest is None:
+                latest = self.__db_manager.get_z_last_score(key=key) or highest
+            self.__written_until[key] = max(latest, highest)
+            if lowest >= latest:
+                continue
+
+            rewrites_key = self.rewrites_key(key)
+            self.__db_manager.set_data(
+                key=rewrites_key,
+                value={encode_member(now, lowest): now}
+            )
+            self.__db_manager.remove_z_range_by_score(
+                key=rewrites_key,
+                start="-inf",
+                end=f"({now - 86400}"
+            )
+
+    def get_rewrites(self, key: str, since: float) -> List[Tuple[float, float]]:
+        """
+        Retrieve the writes rewriting the history of a sorted set logged
+        after `since`.
+
+        Args:
+            key (str): The key of the sorted set.
+            since (float): The time after which the writes were logged.
+
+        Returns:
+            List[Tuple[float, float]]: The time each write was logged and
+            the lowest score it wrote.
+        """
+        return [
+            (score, decode_member(member))
+            for member, score in self.__db_manager.get_z_range_by_score(
+                key=self.rewrites_key(key),
+                start=f"({since}",
+                end="+inf"
+            )
+        ]
+
+    def get_zlast_range(
+        self,
+        key: str,
+        count: int,
+        start: str = "-inf",
+        end: str = "+inf"
+    ) -> List[Tuple[bytes, float]]:
+        """
+        Retrieve the elements with the highest scores of a sorted set in
+        the Redis cache, optionally within a score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            count (int): The maximum number of elements to return.
+            start (str, optional): The minimum score of the range.
+            end (str, optional): The maximum score of the range.
+
+        Returns:
+            List[Tuple[bytes, float]]: The elements in score order, with
+            their scores.
+        """
+        return self.__db_manager.get_z_last_range(
+            key=key,
+            count=count,
+            start=start,
+            end=end
+        )
+
+    def publish(self, channel: str, message: str) -> None:
+        """
+        Publish a message to the subscribers of a Redis channel.
+
+        Args:
+            channel (str): The channel to publish to.
+            message (str): The message to publish.
+        """
+        self.__db_manager.publish(channel=channel, message=message)
+
+    def publish_many(self, messages: List[Tuple[str, str]]) -> None:
+        """
+        Publish several messages to Redis channels in a single round-trip.
+
+        Args:
+            messages (List[Tuple[str, str]]): The `(channel, message)`
+            pairs to publish.
+        """
+        self.__db_manager.publish_many(messages=messages)
+
+    def set_value(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        """
+        Set a plain value in the Redis cache, optionally expiring.
+
+        Args:
+            key (str): The key under which the value should be stored.
+            value (str): The value to be stored.
+            expire (Optional[int], optional): Seconds until it expires.
+        """
+        self.__db_manager.set_value(key=key, value=value, expire=expire)
+
+    def get_value(self, key: str) -> Optional[bytes]:
+        """
+        Retrieve a plain value from the Redis cache.
+
+        Args:
+            key (str): The key of the value.
+
+        Returns:
+            Optional[bytes]: The value, None if missing or expired.
+        """
+        return self.__db_manager.get_value(key=key)
+
+    @property
+    def supports_pubsub(self) -> bool:
+        """
+        Whether the storage backend supports publish/subscribe.
+        """
+        return self.__db_manager.supports_pubsub
+
+    def subscribe(
+        self,
+        channel: str,
+        on_subscribed: Callable[[], None]
+    ) -> Iterator[bytes]:
+        """
+        Subscribe to a Redis channel and yield its messages as they arrive.
+
+        Args:
+            channel (str): The channel to subscribe to.
+            on_subscribed (Callable[[], None]): Called once the
+            subscription is active.
+
+        Returns:
+            Iterator[bytes]: The messages published to the channel.
+        """
+        return self.__db_manager.subscribe(
+            channel=channel,
+            on_subscribed=on_subscribed
+        )
+
+    def get_zstats(self, key: str, start: str, end: str) -> Dict:
+        """
+        Aggregate the elements of a sorted set in the Redis cache within
+        a score range, without transferring the elements themselves.
+
+        Whole rollup buckets are used wherever they fit in the range and
+        only the raw elements at its edges are read.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            Dict: The sum, count, min and max of the elements found.
+        """
+        segments = plan_segments(
+            since_timestamp=start,
+            until_timestamp=end,
+            rollup_since=self.__db_manager.get_rollup_since(key=key),
+            retention=self.__db_manager.get_retention(key=key)
+        )
+        return self.__db_manager.get_z_stats_by_segments(
+            key=key,
+            segments=segments
+        )
+
+    def get_ztwap(self, key: str, start: str, end: str) -> Optional[float]:
+        """
+        Calculate the time-weighted average of the elements of a sorted
+        set in the Redis cache within a score range, each value holding
+        until the next element.
+
+        Whole rollup buckets are used wherever they fit in the range, as
+        `get_zstats` does. If a bucket was written before its integral
+        was tracked, the whole range is read raw instead.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            Optional[float]: The average, None if the range is empty.
+        """
+        segments = plan_segments(
+            since_timestamp=start,
+            until_timestamp=end,
+            rollup_since=self.__db_manager.get_rollup_since(key=key),
+            retention=self.__db_manager.get_retention(key=key)
+        )
+        ranges_data = iter(self.__db_manager.get_z_ranges_by_score(
+            key=key,
+            ranges=[
+                (segment_start, segment_end)
+                for resolution, segment_start, segment_end in segments
+                if resolution == RAW_RESOLUTION
+            ]
+        ))
+
+        pieces = []
+        for resolution, segment_start, segment_end in segments:
+            if resolution == RAW_RESOLUTION:
+                pieces.extend(
+                    (score, score, decode_member(member), decode_member(member), 0.0)
+                    for member, score in next(ranges_data)
+                )
+                continue
+
+            _, buckets = self.__db_manager.get_rollup_series(
+                key=key,
+                resolution=resolution,
+                start=segment_start,
+                end=segment_end
+            )
+            for *_, bucket_open, bucket_close, open_at, close_at, twsum in buckets:
+                if twsum is None:
+                    return self._get_raw_twap(key=key, start=start, end=end)
+                pieces.append((open_at, close_at, bucket_open, bucket_close, twsum))
+
+        return time_weighted_average(pieces=pieces)
+
+    def _get_raw_twap(self, key: str, start: str, end: str) -> Optional[float]:
+        pieces = [
+            (score, score, decode_member(member), decode_member(member), 0.0)
+            for range_data in self.__db_manager.iter_z_range_by_score(
+                key=key,
+                start=start,
+                end=end,
+                batch_size=10000
+            )
+            for member, score in range_data
+        ]
+        return time_weighted_average(pieces=pieces)
+
+    def split_zrange(
+        self,
+        key: str,
+        start: str,
+        end: str
+    ) -> Tuple[Optional[Tuple[int, float, float]], Optional[str]]:
+        """
+        Split a score range of a sorted set in the Redis cache at the
+        horizon of its raw elements, see `split_retained`.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            Tuple[Optional[Tuple[int, float, float]], Optional[str]]: The
+            `(resolution, start, end)` range of rollup buckets to read
+            before the horizon, None if the range doesn't reach before it,
+            and the start of the range of raw elements, None if there is
+            none.
+        """
+        retention = self.__db_manager.get_retention(key=key)
+        if RAW_RESOLUTION not in retention:
+            return None, start
+
+        return split_retained(
+            since_timestamp=start,
+            until_timestamp=end,
+            rollup_since=self.__db_manager.get_rollup_since(key=key),
+            retention=retention
+        )
+
+    def get_retention(self, key: str) -> Dict[int, float]:
+        """
+        Retrieve the timestamp from which the data of each resolution of a
+        sorted set in the Redis cache is kept.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Dict[int, float]: The horizon of each resolution, 0 being the
+            raw elements. Resolutions missing are kept forever.
+        """
+        return self.__db_manager.get_retention(key=key)
+
+    def get_zrollup_since(self, key: str) -> Optional[float]:
+        """
+        Retrieve the score from which the rollup buckets of a sorted set
+        in the Redis cache are complete.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The watermark, or None if the sorted set has
+            no rollups.
+        """
+        return self.__db_manager.get_rollup_since(key=key)
+
+    def get_zrollup_page(
+        self,
+        key: str,
+        resolution: int,
+        start: str,
+        end: str,
+        offset: int = 0,
+        count: int = -1
+    ) -> Tuple[int, List[Tuple]]:
+        """
+        Retrieve a page of the rollup buckets of a sorted set in the Redis
+        cache starting within a score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            start (str): The minimum bucket start.
+            end (str): The maximum bucket start.
+            offset (int, optional): The number of buckets to skip.
+            count (int, optional): The maximum number of buckets to
+            return, -1 for all of them and 0 to only count the range.
+
+        Returns:
+            Tuple[int, List[Tuple]]: The number of buckets in the range
+            and the start, sum, count, min, max, open, close, open_at,
+            close_at and twsum of the buckets of the page.
+        """
+        return self.__db_manager.get_rollup_series(
+            key=key,
+            resolution=resolution,
+            start=start,
+            end=end,
+            offset=offset,
+            count=count
+        )
+
+    def backfill(
+        self,
+        key: str,
+        samples: Iterable[Tuple[float, float]],
+        chunk_size: int = 10000,
+        on_chunk: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """
+        Bulk load historical `(timestamp, value)` samples into a sorted
+        set, in chunks of `chunk_size` samples written in a single
+        round-trip each, keeping its rollups updated.
+
+        Loading a sample again is a no-op, so an interrupted backfill can
+        be resumed from any earlier point. If every element of the sorted
+        set has rollups, the rollup watermark is moved back to the day of
+        the oldest sample loaded as each chunk is written, so averages
+        over the loaded history use its buckets, even once interrupted.
+
+        Args:
+            key (str): The key of the sorted set.
+            samples (Iterable[Tuple[float, float]]): The samples to load,
+            in any order.
+            chunk_size (int, optional): The number of samples written per
+            round-trip. Defaults to 10000.
+            on_chunk (Optional[Callable[[int], None]], optional): Called
+            with the number of samples of each chunk once written.
+
+        Returns:
+            int: The number of samples loaded.
+        """
+        # Elements without rollups are those scored before the watermark,
+        # or every element if there is none
+        rollup_since = self.__db_manager.get_rollup_since(key=key)
+        untracked, _ = self.__db_manager.get_z_range_by_score_page(
+            key=key,
+            start="-inf",
+            end="+inf" if rollup_since is None else f"({rollup_since}",
+            offset=0,
+            count=0
+        )
+        complete = not untracked
+
+        day = ROLLUP_RESOLUTIONS[0]
+        loaded = 0
+        samples = iter(samples)
+        while True:
+            chunk = list(itertools.islice(samples, chunk_size))
+            if not chunk:
+                break
+
+            value = {
+                encode_member(timestamp, price): timestamp
+                for timestamp, price in chunk
+            }
+            with self.write_buffer() as buffer:
+                buffer.add(key=key, value=value)
+
+            # Moved before the chunk is reported, so a run resumed from
+            # the checkpoint finds every loaded element with rollups
+            since = math.floor(min(value.values()) / day) * day
+            if complete and (rollup_since is None or since < rollup_since):
+                self.__db_manager.set_rollup_since(key=key, since=since)
+                rollup_since = since
+
+            loaded += len(chunk)
+            if on_chunk is not None:
+                on_chunk(len(chunk))
+        return loaded
+
+    def apply_retention(
+        self,
+        key: str,
+        raw_since: float,
+        rollups_since: Optional[Dict[int, float]] = None,
+        batch_size: int = 1000
+    ) -> Dict:
+        """
+        Trim the raw elements of a sorted set scored before `raw_since`,
+        and the rollup buckets of each resolution of `rollups_since`
+        starting before its horizon.
+
+        The rollups are the downsampled series of the trimmed elements:
+        buckets missing elements stored before rollups existed are
+        rebuilt from the raw elements first, once per sorted set. A write
+        landing in a rebuilt bucket while it is rebuilt may be lost, so
+        the first run is best done while ingestion is stopped.
+
+        Args:
+            key (str): The key of the sorted set.
+            raw_since (float): The day aligned score from which raw
+            elements are kept.
+            rollups_since (Optional[Dict[int, float]], optional): The
+            score from which the buckets of each resolution are kept,
+            not later than `raw_since`. Defaults to keeping every bucket.
+            batch_size (int, optional): The number of elements read per
+            round-trip while rebuilding buckets. Defaults to 1000.
+
+        Returns:
+            Dict: The number of elements folded into rebuilt buckets, of
+            raw elements removed and of buckets removed.
+        """
+        stats = {"rebuilt": 0, "removed": 0, "removed_buckets": 0}
+        _, first = self.__db_manager.get_z_range_by_score_page(
+            key=key,
+            start="-inf",
+            end=f"({raw_since}",
+            offset=0,
+            count=1
+        )
+        rollup_since = self.__db_manager.get_rollup_since(key=key)
+        day = ROLLUP_RESOLUTIONS[0]
+        rebuild_since = math.floor(first[0][1] / day) * day if first else None
+        if rebuild_since is not None and (rollup_since is None or rollup_since > rebuild_since):
+            if rollup_since is None:
+                rollup_since = self.get_zlatest(key=key)[1] + 1
+            rebuild_until = math.ceil(rollup_since / day) * day
+
+            buckets = {resolution: {} for resolution in ROLLUP_RESOLUTIONS}
+            batches = self.__db_manager.iter_z_range_by_score(
+                key=key,
+                start=rebuild_since,
+                end=f"({rebuild_until}",
+                batch_size=batch_size
+            )
+            for range_data in batches:
+                for member, score in range_data:
+                    value = decode_member(member)
+                    # Elements are read in score order, so the last one read
+                    # of a bucket is its close
+                    for resolution, resolution_buckets in buckets.items():
+                        bucket = score // resolution * resolution
+                        if bucket not in resolution_buckets:
+                            resolution_buckets[bucket] = (
+                                0.0, 0, value, value, value, score, value, score, 0.0
+                            )
+                        (
+                            total, count, low, high, *opened, close, close_at, twsum
+                        ) = resolution_buckets[bucket]
+                        resolution_buckets[bucket] = (
+                            total + value,
+                            count + 1,
+                            min(low, value),
+                            max(high, value),
+                            *opened,
+                            value,
+                            score,
+                            twsum + close * (score - close_at)
+                        )
+                    stats["rebuilt"] += 1
+
+            for resolution, resolution_buckets in buckets.items():
+                self.__db_manager.set_rollup_buckets(
+                    key=key,
+                    resolution=resolution,
+                    buckets=resolution_buckets
+                )
+            self.__db_manager.set_rollup_since(key=key, since=rebuild_since)
+
+        # Readers switch to the rollups before the raw elements go away
+        self.__db_manager.set_retention(key=key, resolution=RAW_RESOLUTION, since=raw_since)
+        stats["removed"] = self.__db_manager.remove_z_range_by_score(
+            key=key,
+            start="-inf",
+            end=f"({raw_since}"
+        )
+        for resolution, since in (rollups_since or {}).items():
+            since = min(since, raw_since)
+            self.__db_manager.set_retention(key=key, resolution=resolution, since=since)
+            stats["removed_buckets"] += self.__db_manager.remove_rollup_buckets(
+                key=key,
+                resolution=resolution,
+                before=since
+            )
+        return stats
+
+    def archive(self, key: str, before: float, batch_size: int = 1000) -> int:
+        """
+        Move the raw elements of a sorted set scored before `before` to
+        the archive of the storage, from where they are still read.
+
+        Args:
+            key (str): The key of the sorted set.
+            before (float): The score before which elements are archived.
+            batch_size (int, optional): The number of elements copied per
+            round-trip. Defaults to 1000.
+
+        Returns:
+            int: The number of elements moved.
+        """
+        return self.__db_manager.archive_z_range(
+            key=key,
+            before=before,
+            batch_size=batch_size
+        )
+
+    def migrate_members(self, key: str, batch_size: int = 1000) -> int:
+        """
+        Rewrite the members of a sorted set stored with the legacy
+        `{price: timestamp}` layout as `{"<timestamp>:<price>": timestamp}`.
+
+        In the legacy layout a repeated price overwrites the timestamp of
+        its previous occurrence. Members already encoded are left as they
+        are, so the migration can be safely run more than once.
+
+        Args:
+            key (str): The key of the sorted set.
+            batch_size (int, optional): The number of members rewritten
+            per round-trip. Defaults to 1000.
+
+        Returns:
+            int: The number of migrated members.
+        """
+        migrated = 0
+        for members in self.__db_manager.scan_z_members(
+            key=key,
+            batch_size=batch_size
+        ):
+            legacy_members = [
+                (member, score) for member, score in members
+                if b":" not in member
+            ]
+            if not legacy_members:
+                continue
+
+            self.__db_manager.replace_data(
+                key=key,
+                removed=[member for member, _ in legacy_members],
+                value={
+                    encode_member(score, decode_member(member)): score
+                    for member, score in legacy_members
+                }
+            )
+            migrated += len(legacy_members)
+
+        return migrated
+
+
+class BuenbitTicker(TickerManagerDataBase):
+    """
+    Ticker manager for handling Buenbit API data and caching it.
+    """
+
+    def __init__(
+        self,
+        hot_window_capacity: int = 0,
+        db_manager: Optional[RedisCacheManagerBase] = None
+    ):
+        """
+        Initialize BuenbitTicker with a BuenbitApiHandle instance.
+
+        Args:
+            hot_window_capacity (int, optional): The number of latest
+            tickers of each key kept in memory to answer queries over the
+            recent past. Defaults to 0, disabled.
+            db_manager (Optional[RedisCacheManagerBase], optional): The
+            storage backend. Defaults to the `TICKER_STORAGE_BACKEND` one.
+        """
+        super().__init__(db_manager=db_manager)
+        self.buenbit_api = BuenbitApiHandle()
+        self.hot_window_capacity = hot_window_capacity
+        self.hot_windows = {}
+
+    @staticmethod
+    def market_key(market_identifier: str) -> str:
+        """
+        Key where the tickers of a market are stored. The tickers of the
+        default market are kept under `prices`, where they were stored
+        before more markets were ingested.
+        """
+        if market_identifier == settings.TICKER_DEFAULT_MARKET:
+            return "prices"
+        return f"prices:{market_identifier}"
+
+    @staticmethod
+    def samples_channel(key: str) -> str:
+        """
+        Name of the channel where the tickers stored under `key` are
+        published.
+        """
+        return f"{key}:samples"
+
+    @staticmethod
+    def decode_sample(member) -> Tuple[float, float]:
+        """
+        Decode a `<timestamp>:<price>` member into a (timestamp, price) pair.
+        """
+        if isinstance(member, bytes):
+            member = member.decode()
+        timestamp, _ = member.split(":", 1)
+        return float(timestamp), decode_member(member)
+
+    @staticmethod
+    def decode_rollup(bucket: Tuple) -> Dict:
+        """
+        Decode a rollup bucket into a ticker at the start of the bucket,
+        priced at the average of the bucket.
+        """
+        bucket_start, bucket_sum, bucket_count = bucket[:3]
+        return {
+            "timestamp": int(bucket_start),
+            "price": round(bucket_sum / bucket_count, 2)
+        }
+
+    def get_hot_window(self, key: str) -> Optional[HotWindow]:
+        """
+        Retrieve the in-memory window of the latest tickers of a key,
+        starting to feed it from the db on first use.
+
+        Args:
+            key (str): Key to obtain queries from the db
+
+        Returns:
+            Optional[HotWindow]: The window, None if disabled or if the
+            storage backend can't feed it.
+        """
+        if not self.hot_window_capacity or not self.supports_pubsub:
+            return None
+
+        hot_window = self.hot_windows.get(key)
+        if hot_window is None:
+            hot_window = self.hot_windows.setdefault(
+                key,
+                HotWindow(capacity=self.hot_window_capacity)
+            )
+            hot_window.start(
+                subscribe=lambda on_subscribed: (
+                    self.decode_sample(member)
+                    for member in self.subscribe(
+                        channel=self.samples_channel(key),
+                        on_subscribed=on_subscribed
+                    )
+                ),
+                latest_samples=lambda count: [
+                    self.decode_sample(member)
+                    for member, _ in self.get_zlast_range(key=key, count=count)
+                ]
+            )
+        return hot_window
+
+    def set_ticker(
+        self,
+        market_identifier: str = "btcars",
+        key: str = "prices"
+    ) -> None:
+        """
+        Fetch ticker data from Buenbit API and store it in the cache.
+
+        Args:
+            market_identifier (str, optional): The market identifier
+            for the API request. Defaults to "btcars".
+            key (str, Optional): Key to obtain queries from the db
+        """
+        # Retrieves ticker data from Buenbit API
+        data = self.buenbit_api.handle(market_identifier)
+
+        # Creates a dictionary with the timestamp and price as key, so
+        # repeated prices don't collide, and the timestamp as value
+        value = {
+            encode_member(data["timestamp"], data["price"]): data["timestamp"]
+        }
+
+        # Stores the data in the cache and notifies the hot windows in a
+        # single round-trip
+        with self.write_buffer() as buffer:
+            buffer.add(key=key, value=value)
+            for member in value:
+                buffer.publish(channel=self.samples_channel(key), message=member)
+
+    def set_tickers(self, market_identifiers: List[str]) -> None:
+        """
+        Fetch the ticker data of several markets with a single Buenbit API
+        request and store each market under its own key, in a single
+        round-trip to the cache.
+
+        Args:
+            market_identifiers (List[str]): The market identifiers to
+            store. Markets missing from the response are skipped.
+        """
+        # Every market comes in the same response
+        tickers_data = self.buenbit_api.handle_markets(market_identifiers)
+
+        self.store_tickers(tickers_data={
+            market_identifier: [data]
+            for market_identifier, data in tickers_data.items()
+        })
+
+    def store_tickers(self, tickers_data: Dict[str, List[Dict]]) -> None:
+        """
+        Store batches of tickers of several markets, each under its own
+        key, in a single round-trip to the cache, and notify the hot
+        windows.
+
+        Args:
+            tickers_data (Dict[str, List[Dict]]): The dictionaries with
+            the timestamp and price of each ticker, by market identifier.
+        """
+        # The timestamp and price as key, so repeated prices don't
+        # collide, and the timestamp as value
+        with self.write_buffer() as buffer:
+            for market_identifier, tickers in tickers_data.items():
+                key = self.market_key(market_identifier)
+                value = {
+                    encode_member(data["timestamp"], data["price"]): data["timestamp"]
+                    for data in tickers
+                }
+                buffer.add(key=key, value=value)
+                for member in value:
+                    buffer.publish(channel=self.samples_channel(key), message=member)
+
+    def get_latest_timestamp(self, key: str = "prices") -> Optional[float]:
+        """
+        Retrieve the timestamp of the latest stored ticker.
+
+        Args:
+            key (str, Optional): Key to obtain queries from the db
+
+        Returns:
+            Optional[float]: The latest timestamp, None if there are no
+            tickers stored.
+        """
+        latest = self.get_zlatest(key=key)
+        return latest[1] if latest else None
+
+    def get_average_price(
+        self,
+        since_timestamp: str,
+        until_timestamp: str,
+        key: str = "prices",
+        mode: str = "mean",
+        q: Optional[float] = None
+    ) -> Dict:
+        """
+        Calculate the average price of tickers within a specified
+        timestamp range.
+
+        Args:
+            since_timestamp: The start of the time range.
+            until_timestamp: The end of the time range.
+            key (str, Optional): Key to obtain queries from the db
+            mode (str, optional): The aggregation, one of `AVERAGE_MODES`:
+            the arithmetic mean (default), the time-weighted average, the
+            median, the `q` percentile, the minimum or the maximum.
+            q (Optional[float], optional): The percentile, between 0 and
+            100, for the "percentile" mode.
+
+        Returns:
+            Dict: A dictionary containing the average price.
+
+        Raises:
+            ValueError: If the mode or the percentile are not valid.
+        """
+        if mode not in AVERAGE_MODES:
+            raise ValueError(f"Mode must be one of: {', '.join(AVERAGE_MODES)}.")
+        if mode == "percentile" and (q is None or not 0 <= q <= 100):
+            raise ValueError("Percentile must be between 0 and 100.")
+
+        if mode in ("mean", "min", "max"):
+            # sum and count the prices inside redis
+            stats = self.get_zstats(
+                key=key,
+                start=since_timestamp,
+                end=until_timestamp
+            )
+            average = stats[mode] if mode != "mean" else None
+            if mode == "mean" and stats["count"]:
+                average = stats["sum"] / stats["count"]
+        elif mode == "twap":
+            average = self.get_ztwap(
+                key=key,
+                start=since_timestamp,
+                end=until_timestamp
+            )
+        else:
+            # Every price of the range is needed, read in batches
+            check_raw_retained(
+                retention=self.get_retention(key=key),
+                since_timestamp=since_timestamp,
+                reading=f"The {mode} mode"
+            )
+            prices = np.fromiter(
+                (
+                    decode_member(member)
+                    for range_data in self.iter_zrange(
+                        key=key,
+                        start=since_timestamp,
+                        end=until_timestamp,
+                        batch_size=10000
+                    )
+                    for member, _ in range_data
+                ),
+                dtype=np.float64
+            )
+            average = percentile(prices=prices, q=50 if mode == "median" else q)
+
+        # obtain average price
+        average_price = {"average_price": round(average, 2) if average is not None else 0}
+
+        return average_price
+
+    def get_candles(
+        self,
+        since_timestamp: float,
+        until_timestamp: float,
+        interval: int,
+        key: str = "prices"
+    ) -> List[Dict]:
+        """
+        Calculate the OHLC candles of the tickers of a time range.
+
+        The range is widened to whole candles. Candles are built from the
+        widest rollup buckets dividing the interval where they are
+        complete, and from the raw tickers elsewhere, including buckets
+        written before their open and close were tracked.
+
+        Args:
+            since_timestamp (float): The start of the time range.
+            until_timestamp (float): The end of the time range.
+            interval (int): The width of the candles in seconds, a
+            multiple of a rollup resolution.
+            key (str, Optional): Key to obtain queries from the db
+
+        Returns:
+            List[Dict]: The timestamp, open, high, low, close and count of
+            every candle with tickers, in time order.
+        """
+        resolution = next(
+            resolution for resolution in ROLLUP_RESOLUTIONS
+            if interval % resolution == 0
+        )
+        start = math.floor(float(since_timestamp) / interval) * interval
+        stop = math.floor(float(until_timestamp) / interval) * interval + interval
+
+        rollup_since = self.get_zrollup_since(key=key)
+        buckets_start = stop
+        if rollup_since is not None:
+            buckets_start = math.ceil(rollup_since / resolution) * resolution
+            buckets_start = min(max(buckets_start, start), stop)
+
+        _, buckets = self.get_zrollup_page(
+            key=key,
+            resolution=resolution,
+            start=buckets_start,
+            end=f"({stop}"
+        )
+
+        # Buckets without open or close are replaced by their tickers
+        raw_ranges = [(start, buckets_start)]
+        untracked = [bucket[0] for bucket in buckets if bucket[5] is None or bucket[6] is None]
+        if untracked:
+            raw_ranges.append((min(untracked), max(untracked) + resolution))
+            buckets = [
+                bucket for bucket in buckets
+                if not raw_ranges[1][0] <= bucket[0] < raw_ranges[1][1]
+            ]
+
+        pieces = []
+        ranges_data = self.get_zranges(
+            key=key,
+            ranges=[(low, f"({high}") for low, high in raw_ranges if low < high]
+        )
+        for range_data in ranges_data:
+            for member, timestamp in range_data:
+                price = decode_member(member)
+                pieces.append((timestamp, price, price, price, price, 1))
+        pieces.extend(
+            (bucket_start, bucket_open, high, low, bucket_close, count)
+            for bucket_start, _, count, low, high, bucket_open, bucket_close, *_ in buckets
+        )
+        pieces.sort(key=lambda piece: piece[0])
+        return aggregate_candles(pieces=pieces, interval=interval)
+
+    def get_price(self, timestamp: str, key: str = "prices") -> Dict:
+        """
+        Retrieves the price of a ticker for a specific timestamp.
+
+        Parameters:
+        timestamp (str): The timestamp for which the price is to be retrieved.
+        key (str, Optional): Key to obtain queries from the db
+
+        Returns:
+        Dict: A dictionary with the key 'price' and the corresponding price value.
+              If no price is found for the given timestamp, returns {'price': None}.
+        """
+        # Initialize the dictionary with price set to None
+        price = {"price": None}
 
+        # Fetch the list of tickers within the specified timestamp range
+        range_data = self.get_tickers_list(
+            since_timestamp=timestamp,
+            until_timestamp=timestamp,
+            key=key
+        )
 
-class TickerBase(ABC):
-    """
-    Abstract base class for ticker management.
-    """
+        # If data is found in the range, pop the last value
+        if range_data:
+            price = range_data.pop()
+        return price
 
-    @abstractmethod
-    def set(self, key: str, value: Dict):
+    def get_price_as_of(
+        self,
+        timestamp: float,
+        tolerance: Optional[float] = None,
+        key: str = "prices"
+    ) -> Dict:
         """
-        Set a key-value pair in the cache.
+        Retrieve the latest ticker at or before a timestamp.
 
         Args:
-            key (str): The key under which the value should be stored.
-            value (Dict): The value to be stored.
+            timestamp (float): The timestamp for which the price is to be
+            retrieved.
+            tolerance (Optional[float], optional): The maximum number of
+            seconds the ticker may be older than the timestamp. Defaults
+            to None, no limit.
+            key (str, Optional): Key to obtain queries from the db
+
+        Returns:
+            Dict: A dictionary with the timestamp and price of the ticker
+            found, both None if there is none.
 
         Raises:
-            NotImplementedError: If the method is not implemented.
+            ValueError: If no ticker is found and the range reaches before
+            the horizon of the raw tickers.
         """
-        raise NotImplementedError
+        start = "-inf" if tolerance is None else timestamp - tolerance
+        range_data = self.get_zlast_range(
+            key=key,
+            count=1,
+            start=start,
+            end=timestamp
+        )
+        if not range_data:
+            check_raw_retained(
+                retention=self.get_retention(key=key),
+                since_timestamp=start,
+                reading="An as-of lookup"
+            )
+            return {"timestamp": None, "price": None}
 
-    @abstractmethod
-    def get_zrange(self, key: str, start: str, end: str):
+        member, sample_timestamp = range_data[0]
+        return {"timestamp": format_timestamp(sample_timestamp), "price": decode_member(member)}
+
+    def get_prices(
+        self,
+        timestamps: List[float],
+        key: str = "prices"
+    ) -> List[Optional[float]]:
         """
-        Retrieve a range of elements from a sorted set in the cache by score.
+        Retrieve the price of a ticker for each of several timestamps, in
+        a single round-trip to the db.
 
         Args:
-            key (str): The key of the sorted set.
-            start (str): The minimum score of the range.
-            end (str): The maximum score of the range.
+            timestamps (List[float]): The timestamps to look up.
+            key (str, Optional): Key to obtain queries from the db
+
+        Returns:
+            List[Optional[float]]: The price at each timestamp, in the same
+            order, None where there is no ticker at that timestamp.
 
         Raises:
-            NotImplementedError: If the method is not implemented.
+            ValueError: If a timestamp is before the horizon of the raw
+            tickers.
         """
-        raise NotImplementedError
+        check_raw_retained(
+            retention=self.get_retention(key=key),
+            since_timestamp=min(timestamps),
+            reading="A price lookup"
+        )
+        ranges_data = self.get_zranges(
+            key=key,
+            ranges=[(timestamp, timestamp) for timestamp in timestamps]
+        )
+        return [
+            decode_member(range_data[-1][0]) if range_data else None
+            for range_data in ranges_data
+        ]
 
+    def get_tickers_list(
+        self,
+        since_timestamp: str,
+        until_timestamp: str,
+        key: str = "prices"
+    ) -> List[Dict]:
+        """
+        Retrieve a list of tickers within a specified time range.
 
-class TickerManagerDataBase(TickerBase):
-    """
-    Implementation of TickerBase using Redis for cache management.
-    """
+        Days whose tickers were trimmed by the retention policy are
+        returned as one ticker per rollup bucket, priced at its average.
 
-    def __init__(self):
-        """
-        Initialize TickerManagerDataBase with a RedisCacheManager
-        instance.
+        Args:
+            since_timestamp (str): The start of the time range.
+            until_timestamp (str): The end of the time range.
+            key (str, Optional): Key to obtain queries from the db
+
+        Returns:
+            List[Dict]: A list of dictionaries, each containing a
+            timestamp and a price.
         """
-        self.__db_manager = RedisCacheManager()
+        # recent ranges are served from memory when possible
+        hot_window = self.get_hot_window(key=key)
+        if hot_window is not None:
+            samples = hot_window.get_range(
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp
+            )
+            if samples is not None:
+                return [
+                    {"timestamp": format_timestamp(timestamp), "price": price}
+                    for timestamp, price in samples
+                ]
 
-    def set(self, key: str, value: Dict):
+        # trimmed days are read from their rollups
+        retained, since_timestamp = self.split_zrange(
+            key=key,
+            start=since_timestamp,
+            end=until_timestamp
+        )
+        tickers = []
+        if retained is not None:
+            resolution, start, end = retained
+            _, buckets = self.get_zrollup_page(
+                key=key,
+                resolution=resolution,
+                start=start,
+                end=f"({end}"
+            )
+            tickers = [self.decode_rollup(bucket) for bucket in buckets]
+        if since_timestamp is None:
+            return tickers
+
+        # get filtered data from redis
+        range_data = self.get_zrange(
+            key=key,
+            start=since_timestamp,
+            end=until_timestamp
+        )
+
+        # Processing to structure the query as a list of
+        # dictionaries for the timestamp and price fields
+        range_data = [
+            {"timestamp": format_timestamp(timestamp), "price": decode_member(member)}
+            for member, timestamp in range_data
+        ]
+        return tickers + range_data
+
+    def get_tickers_page(
+        self,
+        since_timestamp: str,
+        until_timestamp: str,
+        offset: int,
+        limit: int,
+        key: str = "prices"
+    ) -> Tuple[int, List[Dict]]:
         """
-        Set a key-value pair in the Redis cache.
+        Retrieve a page of the tickers within a specified time range,
+        along with the number of tickers in the range.
 
         Args:
-            key (str): The key under which the value should be stored.
-            value (Dict): The value to be stored.
+            since_timestamp (str): The start of the time range.
+            until_timestamp (str): The end of the time range.
+            offset (int): The number of tickers to skip.
+            limit (int): The maximum number of tickers to return.
+            key (str, Optional): Key to obtain queries from the db
+
+        Returns:
+            Tuple[int, List[Dict]]: The number of tickers in the range and
+            the page as a list of dictionaries, each containing a
+            timestamp and a price.
         """
-        self.__db_manager.set_data(key=key, value=value)
+        # trimmed days are read from their rollups, ahead of the tickers
+        retained, since_timestamp = self.split_zrange(
+            key=key,
+            start=since_timestamp,
+            end=until_timestamp
+        )
+        retained_total, tickers = 0, []
+        if retained is not None:
+            resolution, start, end = retained
+            retained_total, buckets = self.get_zrollup_page(
+                key=key,
+                resolution=resolution,
+                start=start,
+                end=f"({end}",
+                offset=offset,
+                count=limit
+            )
+            tickers = [self.decode_rollup(bucket) for bucket in buckets]
+        if since_timestamp is None:
+            return retained_total, tickers
 
-    def get_zrange(self, key: str, start: str, end: str):
+        # get the page and the size of the range from redis
+        total, range_data = self.get_zrange_page(
+            key=key,
+            start=since_timestamp,
+            end=until_timestamp,
+            offset=max(offset - retained_total, 0),
+            count=limit - len(tickers)
+        )
+
+        range_data = [
+            {"timestamp": format_timestamp(timestamp), "price": decode_member(member)}
+            for member, timestamp in range_data
+        ]
+        return retained_total + total, tickers + range_data
+
+    def iter_tickers(
+        self,
+        since_timestamp: str,
+        until_timestamp: str,
+        batch_size: int = 1000,
+        key: str = "prices"
+    ) -> Iterator[Dict]:
         """
-        Retrieve a range of elements from a sorted set in the Redis
-        cache by score.
+        Iterate over the tickers within a specified time range, reading
+        them from the db in batches so memory stays constant regardless
+        of the size of the range.
 
         Args:
-            key (str): The key of the sorted set.
-            start (str): The minimum score of the range.
-            end (str): The maximum score of the range.
+            since_timestamp (str): The start of the time range.
+            until_timestamp (str): The end of the time range.
+            batch_size (int, optional): The number of tickers read per
+            round-trip. Defaults to 1000.
+            key (str, Optional): Key to obtain queries from the db
 
-        Returns:
-            List[Tuple[str, float]]: A list of elements within the
-            specified score range, with their scores.
+        Yields:
+            Dict: A dictionary containing a timestamp and a price.
         """
-        return self.__db_manager.get_z_range_by_score(
+        retained, since_timestamp = self.split_zrange(
             key=key,
-            start=start,
-            end=end
+            start=since_timestamp,
+            end=until_timestamp
         )
+        if retained is not None:
+            resolution, start, end = retained
+            offset = 0
+            while True:
+                _, buckets = self.get_zrollup_page(
+                    key=key,
+                    resolution=resolution,
+                    start=start,
+                    end=f"({end}",
+                    offset=offset,
+                    count=batch_size
+                )
+                for bucket in buckets:
+                    yield self.decode_rollup(bucket)
+                if len(buckets) < batch_size:
+                    break
+                offset += batch_size
+        if since_timestamp is None:
+            return
 
+        batches = self.iter_zrange(
+            key=key,
+            start=since_timestamp,
+            end=until_timestamp,
+            batch_size=batch_size
+        )
+        for range_data in batches:
+            for member, timestamp in range_data:
+                yield {"timestamp": format_timestamp(timestamp), "price": decode_member(member)}
 
-class BuenbitTicker(TickerManagerDataBase):
+
+class AsyncBuenbitTicker:
     """
-    Ticker manager for handling Buenbit API data and caching it.
+    Async counterpart of the read operations of BuenbitTicker.
+
+    With the `redis` storage backend the cache is queried through
+    AsyncRedisCacheManager. The other backends have no async client, so
+    their reads run on the sync ticker in a worker thread instead.
     """
 
-    def __init__(self):
+    def __init__(self, ticker: Optional[BuenbitTicker] = None):
         """
-        Initialize BuenbitTicker with a BuenbitApiHandle instance.
+        Initialize AsyncBuenbitTicker with an AsyncRedisCacheManager.
+
+        Args:
+            ticker (Optional[BuenbitTicker], optional): The sync ticker
+            of the `TICKER_STORAGE_BACKEND` storage backend. Defaults to
+            a new one.
         """
-        super().__init__()
-        self.buenbit_api = BuenbitApiHandle()
+        self.ticker = ticker or BuenbitTicker()
+        self.native = settings.TICKER_STORAGE_BACKEND == "redis"
+        self.__db_manager = AsyncRedisCacheManager()
 
-    def set_ticker(
-        self,
-        market_identifier: str = "btcars",
-        key: str = "prices"
-    ) -> None:
+    async def run_sync(self, method: str, **kwargs):
         """
-        Fetch ticker data from Buenbit API and store it in the cache.
+        Run a read of the sync ticker in a worker thread.
+
+        Args:
+            method (str): The name of the BuenbitTicker method.
+            **kwargs: Its arguments.
+
+        Returns:
+            The result of the method.
+        """
+        read = getattr(self.ticker, method)
+        return await sync_to_async(read, thread_sensitive=False)(**kwargs)
+
+    async def get_latest_timestamp(self, key: str = "prices") -> Optional[float]:
+        """
+        Retrieve the timestamp of the latest stored ticker.
 
         Args:
-            market_identifier (str, optional): The market identifier
-            for the API request. Defaults to "btcars".
             key (str, Optional): Key to obtain queries from the db
+
+        Returns:
+            Optional[float]: The latest timestamp, None if there are no
+            tickers stored.
         """
-        # Retrieves ticker data from Buenbit API
-        data = self.buenbit_api.handle(market_identifier)
+        if not self.native:
+            return await self.run_sync("get_latest_timestamp", key=key)
+        return await self.__db_manager.get_z_last_score(key=key)
+
+    async def split_zrange(
+        self,
+        key: str,
+        start: str,
+        end: str
+    ) -> Tuple[Optional[Tuple[int, float, float]], Optional[str]]:
+        """
+        Split a score range of a sorted set in the Redis cache at the
+        horizon of its raw elements, see `split_retained`.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
 
-        # Creates a dictionary with price as key and timestamp as value
-        value = {data["price"]: data["timestamp"]}
+        Returns:
+            Tuple[Optional[Tuple[int, float, float]], Optional[str]]: The
+            `(resolution, start, end)` range of rollup buckets to read
+            before the horizon, None if the range doesn't reach before it,
+            and the start of the range of raw elements, None if there is
+            none.
+        """
+        retention = await self.__db_manager.get_retention(key=key)
+        if RAW_RESOLUTION not in retention:
+            return None, start
 
-        # Stores the data in the cache
-        self.set(key=key, value=value)
+        return split_retained(
+            since_timestamp=start,
+            until_timestamp=end,
+            rollup_since=await self.__db_manager.get_rollup_since(key=key),
+            retention=retention
+        )
 
-    def get_average_price(
+    async def get_average_price(
         self,
         since_timestamp: str,
         until_timestamp: str,
-        key: str = "prices"
+        key: str = "prices",
+        mode: str = "mean",
+        q: Optional[float] = None
     ) -> Dict:
         """
         Calculate the average price of tickers within a specified
         timestamp range.
 
+        The mean, minimum and maximum are aggregated inside Redis, the
+        modes reading every ticker of the range run on the sync ticker
+        in a worker thread.
+
         Args:
             since_timestamp: The start of the time range.
             until_timestamp: The end of the time range.
             key (str, Optional): Key to obtain queries from the db
+            mode (str, optional): The aggregation, one of `AVERAGE_MODES`,
+            see `BuenbitTicker.get_average_price`. Defaults to the mean.
+            q (Optional[float], optional): The percentile, between 0 and
+            100, for the "percentile" mode.
 
         Returns:
             Dict: A dictionary containing the average price.
+
+        Raises:
+            ValueError: If the mode or the percentile are not valid.
         """
-        # get filtered data from redis
-        range_data = self.get_zrange(
+        if not self.native or mode not in ("mean", "min", "max"):
+            return await self.run_sync(
+                "get_average_price",
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp,
+                key=key,
+                mode=mode,
+                q=q
+            )
+
+        segments = plan_segments(
+            since_timestamp=since_timestamp,
+            until_timestamp=until_timestamp,
+            rollup_since=await self.__db_manager.get_rollup_since(key=key),
+            retention=await self.__db_manager.get_retention(key=key)
+        )
+        stats = await self.__db_manager.get_z_stats_by_segments(
             key=key,
-            start=since_timestamp,
-            end=until_timestamp
+            segments=segments
         )
 
-        # obtain average price
-        average = 0
-        if range_data:
-            values = [float(price) for price, _ in range_data]
-            average = round(sum(values) / len(values), 2)
-        average_price = {"average_price": average}
-
-        return average_price
+        average = stats[mode] if mode != "mean" else None
+        if mode == "mean" and stats["count"]:
+            average = stats["sum"] / stats["count"]
+        return {"average_price": round(average, 2) if average is not None else 0}
 
-    def get_price(self, timestamp: str) -> Dict:
+    async def get_price(self, timestamp: str, key: str = "prices") -> Dict:
         """
         Retrieves the price of a ticker for a specific timestamp.
 
-        Parameters:
-        timestamp (str): The timestamp for which the price is to be retrieved.
+        Args:
+            timestamp (str): The timestamp for which the price is to be
+            retrieved.
+            key (str, Optional): Key to obtain queries from the db
 
         Returns:
-        Dict: A dictionary with the key 'price' and the corresponding price value.
-              If no price is found for the given timestamp, returns {'price': None}.
+            Dict: A dictionary with the timestamp and price of the ticker,
+            or {'price': None} if no price is found.
         """
-        # Initialize the dictionary with price set to None
-        price = {"price": None}
-
-        # Fetch the list of tickers within the specified timestamp range
-        range_data = self.get_tickers_list(
+        if not self.native:
+            return await self.run_sync("get_price", timestamp=timestamp, key=key)
+        range_data = await self.get_tickers_list(
             since_timestamp=timestamp,
-            until_timestamp=timestamp
+            until_timestamp=timestamp,
+            key=key
         )
-
-        # If data is found in the range, pop the last value
         if range_data:
-            price = range_data.pop()
-        return price
+            return range_data.pop()
+        return {"price": None}
 
-    def get_tickers_list(
+    async def get_price_as_of(
+        self,
+        timestamp: float,
+        tolerance: Optional[float] = None,
+        key: str = "prices"
+    ) -> Dict:
+        """
+        Retrieve the latest ticker at or before a timestamp.
+
+        Args:
+            timestamp (float): The timestamp for which the price is to be
+            retrieved.
+            tolerance (Optional[float], optional): The maximum number of
+            seconds the ticker may be older than the timestamp. Defaults
+            to None, no limit.
+            key (str, Optional): Key to obtain queries from the db
+
+        Returns:
+            Dict: A dictionary with the timestamp and price of the ticker
+            found, both None if there is none.
+        """
+        if not self.native:
+            return await self.run_sync(
+                "get_price_as_of",
+                timestamp=timestamp,
+                tolerance=tolerance,
+                key=key
+            )
+
+        start = "-inf" if tolerance is None else timestamp - tolerance
+        range_data = await self.__db_manager.get_z_last_range(
+            key=key,
+            count=1,
+            start=start,
+            end=timestamp
+        )
+        if not range_data:
+            check_raw_retained(
+                retention=await self.__db_manager.get_retention(key=key),
+                since_timestamp=start,
+                reading="An as-of lookup"
+            )
+            return {"timestamp": None, "price": None}
+
+        member, sample_timestamp = range_data[0]
+        return {"timestamp": format_timestamp(sample_timestamp), "price": decode_member(member)}
+
+    async def get_tickers_list(
         self,
         since_timestamp: str,
         until_timestamp: str,
@@ -185,6 +2018,9 @@ class BuenbitTicker(TickerManagerDataBase):
         """
         Retrieve a list of tickers within a specified time range.
 
+        Days whose tickers were trimmed by the retention policy are
+        returned as one ticker per rollup bucket, priced at its average.
+
         Args:
             since_timestamp (str): The start of the time range.
             until_timestamp (str): The end of the time range.
@@ -194,17 +2030,106 @@ class BuenbitTicker(TickerManagerDataBase):
             List[Dict]: A list of dictionaries, each containing a
             timestamp and a price.
         """
-        # get filtered data from redis
-        range_data = self.get_zrange(
+        if not self.native:
+            return await self.run_sync(
+                "get_tickers_list",
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp,
+                key=key
+            )
+
+        # trimmed days are read from their rollups
+        retained, since_timestamp = await self.split_zrange(
             key=key,
             start=since_timestamp,
             end=until_timestamp
         )
+        tickers = []
+        if retained is not None:
+            resolution, start, end = retained
+            _, buckets = await self.__db_manager.get_rollup_series(
+                key=key,
+                resolution=resolution,
+                start=start,
+                end=f"({end}"
+            )
+            tickers = [BuenbitTicker.decode_rollup(bucket) for bucket in buckets]
+        if since_timestamp is None:
+            return tickers
 
-        # Processing to structure the query as a list of
-        # dictionaries for the timestamp and price fields
-        range_data = [
-            {"timestamp": int(timestamp), "price": float(price)}
-            for price, timestamp in range_data
+        range_data = await self.__db_manager.get_z_range_by_score(
+            key=key,
+            start=since_timestamp,
+            end=until_timestamp
+        )
+        return tickers + [
+            {"timestamp": format_timestamp(timestamp), "price": decode_member(member)}
+            for member, timestamp in range_data
+        ]
+
+    async def get_tickers_page(
+        self,
+        since_timestamp: str,
+        until_timestamp: str,
+        offset: int,
+        limit: int,
+        key: str = "prices"
+    ) -> Tuple[int, List[Dict]]:
+        """
+        Retrieve a page of the tickers within a specified time range,
+        along with the number of tickers in the range.
+
+        Args:
+            since_timestamp (str): The start of the time range.
+            until_timestamp (str): The end of the time range.
+            offset (int): The number of tickers to skip.
+            limit (int): The maximum number of tickers to return.
+            key (str, Optional): Key to obtain queries from the db
+
+        Returns:
+            Tuple[int, List[Dict]]: The number of tickers in the range and
+            the page as a list of dictionaries, each containing a
+            timestamp and a price.
+        """
+        if not self.native:
+            return await self.run_sync(
+                "get_tickers_page",
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp,
+                offset=offset,
+                limit=limit,
+                key=key
+            )
+
+        # trimmed days are read from their rollups, ahead of the tickers
+        retained, since_timestamp = await self.split_zrange(
+            key=key,
+            start=since_timestamp,
+            end=until_timestamp
+        )
+        retained_total, tickers = 0, []
+        if retained is not None:
+            resolution, start, end = retained
+            retained_total, buckets = await self.__db_manager.get_rollup_series(
+                key=key,
+                resolution=resolution,
+                start=start,
+                end=f"({end}",
+                offset=offset,
+                count=limit
+            )
+            tickers = [BuenbitTicker.decode_rollup(bucket) for bucket in buckets]
+        if since_timestamp is None:
+            return retained_total, tickers
+
+        total, range_data = await self.__db_manager.get_z_range_by_score_page(
+            key=key,
+            start=since_timestamp,
+            end=until_timestamp,
+            offset=max(offset - retained_total, 0),
+            count=limit - len(tickers)
+        )
+        return retained_total + total, tickers + [
+            {"timestamp": format_timestamp(timestamp), "price": decode_member(member)}
+            for member, timestamp in range_data
         ]
-        return range_data
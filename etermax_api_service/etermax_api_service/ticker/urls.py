@@ -7,14 +7,28 @@ This module sets up the URL routes for the ticker-related views.
 from django.urls import path
 
 from ticker.views import (
+    AsyncTickerAveragePriceView,
+    AsyncTickerListView,
+    AsyncTickerPriceView,
+    RedisPoolStatsView,
     TickerAveragePriceView,
+    TickerCandlesView,
+    TickerExportView,
     TickerListView,
-    TickerPriceView
+    TickerPriceView,
+    TickerPricesView
 )
 
 # Define URL patterns for the ticker app
 urlpatterns = [
     path('ticker-average-price/', TickerAveragePriceView.as_view(), name="average-price"),
     path('ticker-list/', TickerListView.as_view(), name='ticker-list'),
-    path('ticker-price/', TickerPriceView.as_view(), name='ticker-price')
+    path('ticker-price/', TickerPriceView.as_view(), name='ticker-price'),
+    path('ticker-prices/', TickerPricesView.as_view(), name='ticker-prices'),
+    path('ticker-candles/', TickerCandlesView.as_view(), name='ticker-candles'),
+    path('ticker-export/', TickerExportView.as_view(), name='ticker-export'),
+    path('redis-pool-stats/', RedisPoolStatsView.as_view(), name='redis-pool-stats'),
+    path('async/ticker-average-price/', AsyncTickerAveragePriceView.as_view(), name='async-average-price'),
+    path('async/ticker-list/', AsyncTickerListView.as_view(), name='async-ticker-list'),
+    path('async/ticker-price/', AsyncTickerPriceView.as_view(), name='async-ticker-price')
 ]
@@ -1,20 +1,65 @@
+import csv
+import itertools
+import math
+from typing import Dict, Iterator
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.views import View
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.views import APIView
 
 from common import convert_to_float
+from redis_cache_manager import get_redis_pool_stats, pinned_reads
+from ticker.cache import ResponseCache
+from ticker.pagination import TickerPageNumberPagination, TickerRange
+from ticker.candles import CANDLE_INTERVALS
+from ticker.renderers import ORJSONRenderer, ORJSONResponse, dumps
 from ticker.serializers import (
-    TickerSerializer,
+    TickerAsOfPriceSerializer,
+    TickerCandlesRequestSerializer,
     TickerAveragePriceSerializer,
-    TickerPriceSerializer
+    TickerPriceSerializer,
+    TickerPricesRequestSerializer,
+    TickerPricesSerializer
 )
-from ticker.ticker import BuenbitTicker
+from ticker.ticker import AsyncBuenbitTicker, BuenbitTicker
+
+
+def get_market_key(request) -> str:
+    """
+    Return the key of the tickers of the market requested in the `market`
+    query parameter, the default market if missing.
+
+    Raises:
+        Exception: If the market is not one of the ingested markets.
+    """
+    market = request.GET.get('market') or settings.TICKER_DEFAULT_MARKET
+    if market not in settings.TICKER_MARKETS:
+        raise Exception(
+            f"Market must be one of: {', '.join(settings.TICKER_MARKETS)}."
+        )
+    return BuenbitTicker.market_key(market)
 
 
 class TickerBaseView(APIView):
-    ticker = BuenbitTicker()
+    renderer_classes = (ORJSONRenderer, BrowsableAPIRenderer)
+    ticker = BuenbitTicker(
+        hot_window_capacity=settings.TICKER_HOT_WINDOW_CAPACITY
+    )
+    response_cache = ResponseCache(
+        latest_timestamp=ticker.get_latest_timestamp,
+        max_size=settings.TICKER_RESPONSE_CACHE['MAX_SIZE'],
+        ttl=settings.TICKER_RESPONSE_CACHE['TTL'],
+        rewrites=ticker.get_rewrites,
+        read_scope=pinned_reads
+    )
 
     def get(self, request):
         raise NotImplementedError
@@ -34,6 +79,13 @@ class TickerAveragePriceView(TickerBaseView):
         Query Parameters:
             since (str): The start of the time range.
             until (str): The end of the time range.
+            market (str, optional): The market of the tickers.
+            Defaults to "btcars".
+            mode (str, optional): The aggregation: mean, twap
+            (time-weighted), median, percentile, min or max. Defaults
+            to "mean".
+            percentile (str, optional): The percentile, between 0 and
+            100, required by the percentile mode.
 
         Returns:
             Response: A response containing the average price
@@ -41,6 +93,8 @@ class TickerAveragePriceView(TickerBaseView):
         """
         since_timestamp = request.GET.get('since')
         until_timestamp = request.GET.get('until')
+        mode = request.GET.get('mode') or "mean"
+        q = request.GET.get('percentile')
 
         try:
             self.check_timestamps_presence(timestamp=since_timestamp)
@@ -48,10 +102,21 @@ class TickerAveragePriceView(TickerBaseView):
 
             since_timestamp = convert_to_float(value=since_timestamp)
             until_timestamp = convert_to_float(value=until_timestamp)
-
-            average_price = self.ticker.get_average_price(
-                since_timestamp=since_timestamp,
-                until_timestamp=until_timestamp
+            q = convert_to_float(value=q) if q else None
+            key = get_market_key(request)
+
+            # Averages of closed windows are served from the cache
+            average_price = self.response_cache.get_or_set(
+                key=("average-price", key, since_timestamp, until_timestamp, mode, q),
+                until_timestamp=until_timestamp,
+                compute=lambda: self.ticker.get_average_price(
+                    since_timestamp=since_timestamp,
+                    until_timestamp=until_timestamp,
+                    key=key,
+                    mode=mode,
+                    q=q
+                ),
+                series=key
             )
             serializer = TickerAveragePriceSerializer(data=average_price)
             serializer.is_valid()
@@ -97,6 +162,9 @@ class TickerListView(TickerBaseView):
             page_size (int, optional): The number of items
             per page. Defaults to 10.
 
+            market (str, optional): The market of the tickers.
+            Defaults to "btcars".
+
         Returns:
             Response: A paginated response containing the list
             of tickers or an error message.
@@ -111,20 +179,30 @@ class TickerListView(TickerBaseView):
             until_timestamp = float("+inf")
 
         try:
-            ticker_list = self.ticker.get_tickers_list(
+            key = get_market_key(request)
+        except Exception as error:
+            return Response(
+                data={"error": str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            # Lazy range, only the requested page is read from redis
+            ticker_list = TickerRange(
+                ticker=self.ticker,
                 since_timestamp=since_timestamp,
-                until_timestamp=until_timestamp
+                until_timestamp=until_timestamp,
+                key=key
             )
 
             # Pagination
-            paginator = PageNumberPagination()
+            paginator = TickerPageNumberPagination()
             paginator.page_size = page_size
             result_page = paginator.paginate_queryset(ticker_list, request)
 
-            # Serialize the paginated data
-            serializer = TickerSerializer(data=result_page, many=True)
-            serializer.is_valid()
-            return paginator.get_paginated_response(serializer.data)
+            # The ticker already shapes the rows as TickerSerializer does,
+            # validating them again would dominate the cost of big pages
+            return paginator.get_paginated_response(result_page)
 
         except ValidationError as error:
             return Response(
@@ -149,20 +227,65 @@ class TickerPriceView(TickerBaseView):
             timestamp (str): The timestamp for which the
             ticker price is requested.
 
+            lookup (str, optional): "exact" to match the timestamp
+            exactly, or "asof" for the latest ticker at or before
+            it. Defaults to "exact".
+
+            tolerance (str, optional): In "asof" lookups, the maximum
+            number of seconds the ticker may be older than the
+            timestamp.
+
+            market (str, optional): The market of the tickers.
+            Defaults to "btcars".
+
         Returns:
         Response: A Response object containing the serialized ticker
         price data or an error message.
         """
         # Retrieve the timestamp from query parameters
         timestamp = request.GET.get('timestamp')
+        lookup = request.GET.get('lookup', 'exact')
+        tolerance = request.GET.get('tolerance')
 
         try:
             # Check if timestamp is provided
             if not timestamp:
                 raise Exception("Please provide timestamp field.")
-
-            # Get the ticker price for the given timestamp
-            ticker_price = self.ticker.get_price(timestamp=timestamp)
+            if lookup not in ("exact", "asof"):
+                raise Exception("Lookup must be one of: exact, asof.")
+
+            timestamp = convert_to_float(value=timestamp)
+            key = get_market_key(request)
+
+            if lookup == "asof":
+                if tolerance is not None:
+                    tolerance = convert_to_float(value=tolerance)
+
+                # A single reverse range query finds the latest ticker
+                ticker_price = self.response_cache.get_or_set(
+                    key=("price-asof", key, timestamp, tolerance),
+                    until_timestamp=timestamp,
+                    compute=lambda: self.ticker.get_price_as_of(
+                        timestamp=timestamp,
+                        tolerance=tolerance,
+                        key=key
+                    ),
+                    series=key
+                )
+                serializer = TickerAsOfPriceSerializer(ticker_price)
+                return Response(serializer.data, status=status.HTTP_200_OK)
+
+            # Get the ticker price for the given timestamp, prices of
+            # timestamps older than the latest ticker are cached
+            ticker_price = self.response_cache.get_or_set(
+                key=("price", key, timestamp, timestamp),
+                until_timestamp=timestamp,
+                compute=lambda: self.ticker.get_price(
+                    timestamp=timestamp,
+                    key=key
+                ),
+                series=key
+            )
 
             # Serialize the ticker price data
             serializer = TickerPriceSerializer(data=ticker_price)
@@ -183,3 +306,536 @@ class TickerPriceView(TickerBaseView):
             return Response(
                 data={"error": str(error)},
                 status=status.HTTP_400_BAD_REQUEST)
+
+
+class TickerPricesView(TickerBaseView):
+    """
+    View to retrieve the prices of a ticker for a batch of timestamps in a
+    single request.
+    """
+
+    def get(self, request):
+        """
+        Handles GET requests to retrieve the prices of several timestamps.
+
+        Query Parameters:
+            timestamps (str): The timestamps, comma separated or repeated.
+            market (str, optional): The market of the tickers.
+            Defaults to "btcars".
+
+        Returns:
+        Response: A Response object containing the price at each
+        timestamp, in the same order, or an error message.
+        """
+        timestamps = [
+            timestamp
+            for value in request.GET.getlist('timestamps')
+            for timestamp in value.split(',')
+            if timestamp
+        ]
+        return self.get_prices(timestamps=timestamps)
+
+    def post(self, request):
+        """
+        Handles POST requests to retrieve the prices of several timestamps.
+
+        Query Parameters:
+            market (str, optional): The market of the tickers.
+            Defaults to "btcars".
+
+        Body:
+            timestamps (List[float]): The timestamps, or the list of
+            timestamps itself.
+
+        Returns:
+        Response: A Response object containing the price at each
+        timestamp, in the same order, or an error message.
+        """
+        timestamps = request.data
+        if isinstance(timestamps, dict):
+            timestamps = timestamps.get('timestamps')
+        return self.get_prices(timestamps=timestamps)
+
+    def get_prices(self, timestamps) -> Response:
+        request_serializer = TickerPricesRequestSerializer(
+            data={"timestamps": timestamps}
+        )
+        if not request_serializer.is_valid():
+            return Response(
+                data={"error": request_serializer.errors["timestamps"]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            key = get_market_key(self.request)
+        except Exception as error:
+            return Response(
+                data={"error": str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            # Every timestamp is resolved in one round-trip to redis
+            prices = self.ticker.get_prices(
+                timestamps=request_serializer.validated_data["timestamps"],
+                key=key
+            )
+        except ValueError as error:
+            return Response(
+                data={"error": str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except RuntimeError as error:
+            return Response(
+                data=str(error),
+                status=status.HTTP_408_REQUEST_TIMEOUT)
+
+        serializer = TickerPricesSerializer({"prices": prices})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class TickerCandlesView(TickerBaseView):
+    """
+    API view to get the OHLC candles of the tickers of a time range.
+    """
+
+    def get(self, request):
+        """
+        Handle GET requests to retrieve candles.
+
+        Query Parameters:
+            since (str, optional): The start of the time range. Defaults
+            to 500 candles before `until`.
+            until (str, optional): The end of the time range. Defaults
+            to now.
+            interval (str, optional): The width of the candles: 1m, 5m,
+            15m, 1h, 4h or 1d. Defaults to 1m.
+            market (str, optional): The market of the tickers.
+            Defaults to "btcars".
+
+        Returns:
+            Response: A response containing the candles of every
+            interval with tickers, or an error message.
+        """
+        request_serializer = TickerCandlesRequestSerializer(data=request.GET)
+        if not request_serializer.is_valid():
+            return Response(
+                data={"error": request_serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            key = get_market_key(request)
+        except Exception as error:
+            return Response(
+                data={"error": str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        since_timestamp = request_serializer.validated_data["since"]
+        until_timestamp = request_serializer.validated_data["until"]
+        interval = CANDLE_INTERVALS[request_serializer.validated_data["interval"]]
+        try:
+            # Candles of closed windows are served from the cache, the
+            # last candle is closed once a ticker after its end is stored
+            candles = self.response_cache.get_or_set(
+                key=("candles", key, since_timestamp, until_timestamp, interval),
+                until_timestamp=math.floor(until_timestamp / interval) * interval + interval,
+                compute=lambda: self.ticker.get_candles(
+                    since_timestamp=since_timestamp,
+                    until_timestamp=until_timestamp,
+                    interval=interval,
+                    key=key
+                ),
+                series=key
+            )
+        except RuntimeError as error:
+            return Response(
+                data=str(error),
+                status=status.HTTP_408_REQUEST_TIMEOUT)
+
+        # The ticker already shapes the candles, see `get_candles`
+        return Response({"candles": candles}, status=status.HTTP_200_OK)
+
+
+class EchoBuffer:
+    """
+    File-like object returning what is written to it, so csv.writer
+    can be used to build rows for a streaming response.
+    """
+
+    def write(self, value):
+        return value
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    Content negotiation picking the first renderer regardless of the
+    Accept header, for views building their own streaming responses.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class TickerExportView(TickerBaseView):
+    """
+    View to stream every ticker within a timestamp range as NDJSON or CSV.
+
+    Tickers are read from the cache in batches while the response is
+    being sent, so memory stays constant regardless of the size of the
+    range.
+    """
+
+    batch_size = 5000
+    content_negotiation_class = IgnoreClientContentNegotiation
+    content_types = {
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv",
+    }
+
+    def get(self, request):
+        """
+        Handles GET requests to export the tickers of a range.
+
+        Query Parameters:
+            since (str, optional): The start of the timestamp
+            range. Defaults to "-inf".
+
+            until (str, optional): The end of the timestamp
+            range. Defaults to "+inf".
+
+            output (str, optional): The output format, "ndjson"
+            or "csv". Defaults to "ndjson".
+
+            market (str, optional): The market of the tickers.
+            Defaults to "btcars".
+
+        Returns:
+            StreamingHttpResponse: The tickers of the range, one per line,
+            or a Response with an error message.
+        """
+        since_timestamp = request.GET.get('since') or "-inf"
+        until_timestamp = request.GET.get('until') or "+inf"
+        output = request.GET.get('output', 'ndjson')
+
+        try:
+            if output not in self.content_types:
+                raise Exception("Output must be one of: ndjson, csv.")
+
+            since_timestamp = convert_to_float(value=since_timestamp)
+            until_timestamp = convert_to_float(value=until_timestamp)
+
+            tickers = self.ticker.iter_tickers(
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp,
+                batch_size=self.batch_size,
+                key=get_market_key(request)
+            )
+            # Read the first batch before answering, so connection
+            # errors are still reported with an error status
+            first_tickers = list(itertools.islice(tickers, 1))
+
+        except RuntimeError as error:
+            return Response(
+                data=str(error),
+                status=status.HTTP_408_REQUEST_TIMEOUT)
+        except Exception as error:
+            return Response(
+                data={"error": str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        lines = getattr(self, f"render_{output}")(
+            itertools.chain(first_tickers, tickers)
+        )
+        response = StreamingHttpResponse(
+            self.join_lines(lines),
+            content_type=self.content_types[output]
+        )
+        response["Content-Disposition"] = f'attachment; filename="tickers.{output}"'
+        return response
+
+    @staticmethod
+    def render_ndjson(tickers: Iterator[Dict]) -> Iterator[str]:
+        """
+        Render each ticker as a JSON document on its own line.
+        """
+        for ticker in tickers:
+            yield dumps(ticker).decode() + "\n"
+
+    @staticmethod
+    def render_csv(tickers: Iterator[Dict]) -> Iterator[str]:
+        """
+        Render the tickers as CSV lines, preceded by a header line.
+        """
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(["timestamp", "price"])
+        for ticker in tickers:
+            yield writer.writerow([ticker["timestamp"], ticker["price"]])
+
+    def join_lines(self, lines: Iterator[str]) -> Iterator[str]:
+        """
+        Group lines into chunks of `batch_size` lines, so the response is
+        not written to the client one small line at a time.
+        """
+        while True:
+            chunk = "".join(itertools.islice(lines, self.batch_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+class RedisPoolStatsView(APIView):
+    """
+    View to monitor the redis connection pools of the answering worker.
+    The stats name the hosts of the pools, so only staff users may read
+    them.
+    """
+
+    renderer_classes = (ORJSONRenderer, BrowsableAPIRenderer)
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        """
+        Handles GET requests to retrieve the utilization of the redis
+        connection pools of this process.
+
+        Returns:
+        Response: A Response object containing the maximum, created, in
+        use and available connections of the sync pool, of the pool of
+        each read replica and of the pool of each event loop.
+        """
+        return Response(get_redis_pool_stats(), status=status.HTTP_200_OK)
+
+
+class AsyncTickerBaseView(View):
+    """
+    Base of the async ticker views.
+
+    DRF views can't be awaited, so these are plain Django views reading
+    the cache through redis.asyncio, or the configured storage backend
+    in a worker thread, and answering with the same payloads as their
+    sync counterparts.
+    """
+
+    ticker = AsyncBuenbitTicker(ticker=TickerBaseView.ticker)
+
+
+class AsyncTickerAveragePriceView(AsyncTickerBaseView):
+    """
+    Async API view to get the average price of tickers within
+    a specified timestamp range.
+    """
+
+    async def get(self, request):
+        """
+        Handle GET requests to retrieve the average price
+        of tickers.
+
+        Query Parameters:
+            since (str): The start of the time range.
+            until (str): The end of the time range.
+            market (str, optional): The market of the tickers.
+            Defaults to "btcars".
+            mode (str, optional): The aggregation: mean, twap
+            (time-weighted), median, percentile, min or max. Defaults
+            to "mean".
+            percentile (str, optional): The percentile, between 0 and
+            100, required by the percentile mode.
+
+        Returns:
+            ORJSONResponse: A response containing the average price
+            or an error message.
+        """
+        since_timestamp = request.GET.get('since')
+        until_timestamp = request.GET.get('until')
+        mode = request.GET.get('mode') or "mean"
+        q = request.GET.get('percentile')
+
+        try:
+            TickerAveragePriceView.check_timestamps_presence(timestamp=since_timestamp)
+            TickerAveragePriceView.check_timestamps_presence(timestamp=until_timestamp)
+
+            average_price = await self.ticker.get_average_price(
+                since_timestamp=convert_to_float(value=since_timestamp),
+                until_timestamp=convert_to_float(value=until_timestamp),
+                key=get_market_key(request),
+                mode=mode,
+                q=convert_to_float(value=q) if q else None
+            )
+            serializer = TickerAveragePriceSerializer(data=average_price)
+            serializer.is_valid()
+
+            return ORJSONResponse(serializer.data, status=status.HTTP_200_OK)
+
+        except Exception as error:
+            return ORJSONResponse(
+                data={"error": str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+
+class AsyncTickerListView(AsyncTickerBaseView):
+    """
+    Async API view to get a list of tickers within a specified
+    timestamp range with pagination.
+    """
+
+    async def get(self, request):
+        """
+        Handle GET requests to retrieve a list of tickers.
+
+        Query Parameters:
+            since (str, optional): The start of the timestamp
+            range. Defaults to "-inf".
+
+            until (str, optional): The end of the timestamp
+            range. Defaults to "+inf".
+
+            page (int, optional): The page number to retrieve.
+            Defaults to 1.
+
+            page_size (int, optional): The number of items
+            per page. Defaults to 10.
+
+            market (str, optional): The market of the tickers.
+            Defaults to "btcars".
+
+        Returns:
+            ORJSONResponse: A paginated response containing the list
+            of tickers or an error message.
+        """
+        since_timestamp = request.GET.get('since') or float("-inf")
+        until_timestamp = request.GET.get('until') or float("+inf")
+
+        try:
+            key = get_market_key(request)
+        except Exception as error:
+            return ORJSONResponse(
+                data={"error": str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            page_size = int(request.GET.get('page_size', 10))
+            page_number = int(request.GET.get('page', 1))
+            if page_size < 1 or page_number < 1:
+                raise ValueError
+        except ValueError:
+            return ORJSONResponse(
+                data={"detail": "Invalid page."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            # The page and the size of the range in one round-trip
+            total, result_page = await self.ticker.get_tickers_page(
+                since_timestamp=since_timestamp,
+                until_timestamp=until_timestamp,
+                offset=(page_number - 1) * page_size,
+                limit=page_size,
+                key=key
+            )
+        except RuntimeError as error:
+            return ORJSONResponse(
+                data=str(error),
+                status=status.HTTP_408_REQUEST_TIMEOUT,
+                safe=False
+            )
+
+        num_pages = max(-(-total // page_size), 1)
+        if page_number > num_pages:
+            return ORJSONResponse(
+                data={"detail": "Invalid page."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return ORJSONResponse({
+            "count": total,
+            "next": self.get_page_link(request, page_number + 1, num_pages),
+            "previous": self.get_page_link(request, page_number - 1, num_pages),
+            "results": result_page,
+        })
+
+    @staticmethod
+    def get_page_link(request, page_number: int, num_pages: int):
+        """
+        Build the link to a page the way DRF's PageNumberPagination does,
+        None if the page doesn't exist.
+        """
+        if not 1 <= page_number <= num_pages:
+            return None
+        url = request.build_absolute_uri()
+        if page_number == 1:
+            return remove_query_param(url, 'page')
+        return replace_query_param(url, 'page', page_number)
+
+
+class AsyncTickerPriceView(AsyncTickerBaseView):
+    """
+    Async view to retrieve the price of a ticker for a specific timestamp.
+    """
+
+    async def get(self, request):
+        """
+        Handles GET requests to retrieve the price for a given timestamp.
+
+        Query Parameters:
+            timestamp (str): The timestamp for which the
+            ticker price is requested.
+
+            lookup (str, optional): "exact" to match the timestamp
+            exactly, or "asof" for the latest ticker at or before
+            it. Defaults to "exact".
+
+            tolerance (str, optional): In "asof" lookups, the maximum
+            number of seconds the ticker may be older than the
+            timestamp.
+
+            market (str, optional): The market of the tickers.
+            Defaults to "btcars".
+
+        Returns:
+            ORJSONResponse: The serialized ticker price data or an error
+            message.
+        """
+        timestamp = request.GET.get('timestamp')
+        lookup = request.GET.get('lookup', 'exact')
+        tolerance = request.GET.get('tolerance')
+
+        try:
+            if not timestamp:
+                raise Exception("Please provide timestamp field.")
+            if lookup not in ("exact", "asof"):
+                raise Exception("Lookup must be one of: exact, asof.")
+
+            timestamp = convert_to_float(value=timestamp)
+            key = get_market_key(request)
+
+            if lookup == "asof":
+                ticker_price = await self.ticker.get_price_as_of(
+                    timestamp=timestamp,
+                    tolerance=convert_to_float(value=tolerance) if tolerance is not None else None,
+                    key=key
+                )
+                serializer = TickerAsOfPriceSerializer(ticker_price)
+                return ORJSONResponse(serializer.data, status=status.HTTP_200_OK)
+
+            ticker_price = await self.ticker.get_price(
+                timestamp=timestamp,
+                key=key
+            )
+            serializer = TickerPriceSerializer(data=ticker_price)
+            serializer.is_valid()
+
+            return ORJSONResponse(serializer.data, status=status.HTTP_200_OK)
+
+        except Exception as error:
+            return ORJSONResponse(
+                data={"error": str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
@@ -0,0 +1,768 @@
+"""
+Storage of the ticker series split in two tiers: a hot tier holding the
+recent members, their rollups and everything else, and a cold archive
+holding the members moved out of the hot tier by `archive_z_range`.
+
+Each sorted set has an archive watermark, stored in the cold tier: the
+members scored before it are read from the archive, the rest from the hot
+tier. Reads spanning both tiers query them concurrently and merge the two
+sorted streams.
+
+The retention only trims the hot tier: the raw members it removes are moved
+to the archive, so raw reads before its horizon are served from there.
+"""
+
+import heapq
+import itertools
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from redis_cache_manager import (
+    RedisCacheManagerBase,
+    _fold_stats,
+    _parse_bound,
+)
+from storage_backends import get_storage_backend
+
+ScoreRange = Tuple[str, str]
+
+
+def _archive_key(key: str) -> str:
+    """
+    Build the key of the archive watermark of a sorted set.
+    """
+    return f"{key}:archived"
+
+
+def _is_empty(start, end) -> bool:
+    """
+    Whether a score range can't hold any member.
+    """
+    low, low_exclusive = _parse_bound(start)
+    high, high_exclusive = _parse_bound(end)
+    return low > high or (low == high and (low_exclusive or high_exclusive))
+
+
+def _split_range(
+    start,
+    end,
+    boundary: Optional[float]
+) -> Tuple[Optional[ScoreRange], Optional[ScoreRange]]:
+    """
+    Split a score range at the archive watermark.
+
+    Returns:
+        Tuple[Optional[ScoreRange], Optional[ScoreRange]]: The part of
+        the range scored before the watermark and the part from it on,
+        None when empty.
+    """
+    if boundary is None:
+        return None, (start, end)
+
+    cold, hot = (start, end), (start, end)
+    high, _ = _parse_bound(end)
+    if high >= boundary:
+        cold = (start, f"({boundary}")
+    low, _ = _parse_bound(start)
+    if low < boundary:
+        hot = (boundary, end)
+    return (
+        None if _is_empty(*cold) else cold,
+        None if _is_empty(*hot) else hot,
+    )
+
+
+def _score_order(element: Tuple[bytes, float]) -> Tuple[float, bytes]:
+    """
+    Sort key of sorted set elements, ties being ordered by member.
+    """
+    return element[1], element[0]
+
+
+class TieredCacheManager(RedisCacheManagerBase):
+    """
+    Implementation of RedisCacheManagerBase reading the members of sorted
+    sets from a hot tier and a cold archive, both storage backends.
+
+    Writes always go to the hot tier. A member written to the hot tier
+    before the watermark of its set is not read until the next archival
+    moves it to the archive.
+    """
+
+    def __init__(self, hot: str = "redis", cold: str = "sqlite", max_workers: int = 4):
+        """
+        Initialize the TieredCacheManager.
+
+        Args:
+            hot (str, optional): The storage backend of the hot tier.
+            Defaults to `redis`.
+            cold (str, optional): The storage backend of the archive.
+            Defaults to `sqlite`.
+            max_workers (int, optional): The number of threads reading
+            the tiers concurrently. Defaults to 4.
+        """
+        self.hot = get_storage_backend(hot)
+        self.cold = get_storage_backend(cold)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="tiered-read"
+        )
+
+    def get_archived_until(self, key: str) -> Optional[float]:
+        """
+        Retrieve the archive watermark of a sorted set.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The score before which members are read from
+            the archive, None if nothing was archived.
+        """
+        archived_until = self.cold.get_value(key=_archive_key(key))
+        return float(archived_until) if archived_until is not None else None
+
+    def _read_tiers(
+        self,
+        key: str,
+        start,
+        end,
+        read: Callable[[RedisCacheManagerBase, str, str], object]
+    ) -> Tuple[Optional[object], Optional[object]]:
+        """
+        Run a read over the part of a score range held by each tier,
+        concurrently when the range spans both.
+
+        Returns:
+            Tuple[Optional[object], Optional[object]]: The result of the
+            archive and of the hot tier, None for a tier holding no part
+            of the range.
+        """
+        cold_range, hot_range = _split_range(start, end, self.get_archived_until(key=key))
+        if cold_range and hot_range:
+            cold_future = self.executor.submit(read, self.cold, *cold_range)
+            hot_result = read(self.hot, *hot_range)
+            return cold_future.result(), hot_result
+        return (
+            read(self.cold, *cold_range) if cold_range else None,
+            read(self.hot, *hot_range) if hot_range else None,
+        )
+
+    def set_data(self, key: str, value: Dict) -> None:
+        """
+        Add members to a sorted set of the hot tier.
+
+        Args:
+            key (str): The key of the sorted set.
+            value (Dict): The members to be added, with their scores.
+        """
+        self.hot.set_data(key=key, value=value)
+
+    def set_data_with_rollups(
+        self,
+        key: str,
+        value: Dict,
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Add members to a sorted set of the hot tier and fold the new ones
+        into its rollup buckets.
+
+        Args:
+            key (str): The key of the sorted set.
+            value (Dict): The members to be added, with their scores.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+        """
+        self.hot.set_data_with_rollups(key=key, value=value, resolutions=resolutions)
+
+    def set_many_data_with_rollups(
+        self,
+        values: Dict[str, Dict],
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Add members to several sorted sets of the hot tier and fold the
+        new ones into their rollup buckets.
+
+        Args:
+            values (Dict[str, Dict]): The members to be added to each
+            sorted set, with their scores, by key.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+        """
+        self.hot.set_many_data_with_rollups(values=values, resolutions=resolutions)
+
+    def write_many(
+        self,
+        values: Dict[str, Dict],
+        trims: Dict[str, float],
+        messages: Sequence[Tuple[str, str]],
+        resolutions: Sequence[int]
+    ) -> None:
+        """
+        Store members of several sorted sets with their rollups, trim
+        sorted sets and publish messages through the hot tier.
+
+        Trims only remove members from the hot tier, the archive keeps
+        them once `archive_z_range` moved them.
+
+        Args:
+            values (Dict[str, Dict]): The members to be stored in each
+            sorted set, with their scores, by key.
+            trims (Dict[str, float]): The score before which members are
+            removed, by key.
+            messages (Sequence[Tuple[str, str]]): The `(channel, message)`
+            pairs to publish.
+            resolutions (Sequence[int]): The bucket widths in seconds.
+        """
+        self.hot.write_many(
+            values=values,
+            trims=trims,
+            messages=messages,
+            resolutions=resolutions
+        )
+
+    def get_z_range_by_score(self, key: str, start: str, end: str) -> List[Tuple[bytes, float]]:
+        """
+        Retrieve a score range of a sorted set from both tiers.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+
+        Returns:
+            List[Tuple[bytes, float]]: The elements within the range, with
+            their scores.
+        """
+        cold_data, hot_data = self._read_tiers(
+            key,
+            start,
+            end,
+            lambda tier, start, end: tier.get_z_range_by_score(key=key, start=start, end=end)
+        )
+        return list(heapq.merge(cold_data or [], hot_data or [], key=_score_order))
+
+    def get_z_range_by_score_page(
+        self,
+        key: str,
+        start: str,
+        end: str,
+        offset: int,
+        count: int
+    ) -> Tuple[int, List[Tuple[bytes, float]]]:
+        """
+        Retrieve a page of a score range of a sorted set, along with the
+        total number of elements in the range.
+
+        The archive page and the hot tier count are read concurrently.
+        The hot tier is only paged when the page goes past the archive.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            offset (int): The number of elements to skip.
+            count (int): The maximum number of elements to return.
+
+        Returns:
+            Tuple[int, List[Tuple[bytes, float]]]: The number of elements
+            in the range and the elements of the page, with their scores.
+        """
+        cold_range, hot_range = _split_range(start, end, self.get_archived_until(key=key))
+        if not cold_range:
+            return self.hot.get_z_range_by_score_page(
+                key=key, start=hot_range[0], end=hot_range[1], offset=offset, count=count
+            )
+        if not hot_range:
+            return self.cold.get_z_range_by_score_page(
+                key=key, start=cold_range[0], end=cold_range[1], offset=offset, count=count
+            )
+
+        hot_future = self.executor.submit(
+            self.hot.get_z_range_by_score_page,
+            key=key, start=hot_range[0], end=hot_range[1], offset=0, count=0
+        )
+        cold_total, cold_data = self.cold.get_z_range_by_score_page(
+            key=key, start=cold_range[0], end=cold_range[1], offset=offset, count=count
+        )
+        hot_total, _ = hot_future.result()
+
+        hot_data = []
+        if count and len(cold_data) < count and hot_total:
+            _, hot_data = self.hot.get_z_range_by_score_page(
+                key=key,
+                start=hot_range[0],
+                end=hot_range[1],
+                offset=max(offset - cold_total, 0),
+                count=count - len(cold_data)
+            )
+        return cold_total + hot_total, cold_data + hot_data
+
+    def iter_z_range_by_score(
+        self,
+        key: str,
+        start: str,
+        end: str,
+        batch_size: int
+    ) -> Iterator[List[Tuple[bytes, float]]]:
+        """
+        Iterate over a score range of a sorted set in batches, reading the
+        archive first and then the hot tier.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The minimum score of the range.
+            end (str): The maximum score of the range.
+            batch_size (int): The maximum number of elements per batch.
+
+        Yields:
+            List[Tuple[bytes, float]]: Batches of elements in score order,
+            with their scores.
+        """
+        cold_range, hot_range = _split_range(start, end, self.get_archived_until(key=key))
+        tiers = [(self.cold, cold_range), (self.hot, hot_range)]
+        return itertools.chain.from_iterable(
+            tier.iter_z_range_by_score(
+                key=key,
+                start=score_range[0],
+                end=score_range[1],
+                batch_size=batch_size
+            )
+            for tier, score_range in tiers
+            if score_range
+        )
+
+    def get_z_last_score(self, key: str) -> Optional[float]:
+        """
+        Retrieve the highest score of a sorted set, from the archive only
+        when the hot tier is empty.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The highest score, None if the set is empty.
+        """
+        last_score = self.hot.get_z_last_score(key=key)
+        if last_score is None:
+            last_score = self.cold.get_z_last_score(key=key)
+        return last_score
+
+    def get_z_latest(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """
+        Retrieve the member with the highest score of a sorted set, from
+        the archive only when the hot tier is empty.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[Tuple[bytes, float]]: The member and its score, None
+            if the set is empty.
+        """
+        return self.hot.get_z_latest(key=key) or self.cold.get_z_latest(key=key)
+
+    def get_z_last_range(
+        self,
+        key: str,
+        count: int,
+        start: str = "-inf",
+        end: str = "+inf"
+    ) -> List[Tuple[bytes, float]]:
+        """
+        Retrieve the elements with the highest scores of a sorted set,
+        optionally within a score range, completing them from the archive
+        when the hot tier holds less than `count` of them.
+
+        Args:
+            key (str): The key of the sorted set.
+            count (int): The maximum number of elements to return.
+            start (str, optional): The minimum score of the range.
+            end (str, optional): The maximum score of the range.
+
+        Returns:
+            List[Tuple[bytes, float]]: The elements in score order, with
+            their scores.
+        """
+        cold_range, hot_range = _split_range(start, end, self.get_archived_until(key=key))
+        range_data = []
+        if hot_range:
+            range_data = self.hot.get_z_last_range(
+                key=key, count=count, start=hot_range[0], end=hot_range[1]
+            )
+        if cold_range and len(range_data) < count:
+            range_data = self.cold.get_z_last_range(
+                key=key,
+                count=count - len(range_data),
+                start=cold_range[0],
+                end=cold_range[1]
+            ) + range_data
+        return range_data
+
+    def get_z_stats_by_segments(
+        self,
+        key: str,
+        segments: Sequence[Tuple[int, str, str]]
+    ) -> Dict:
+        """
+        Aggregate the members of a sorted set over a list of segments.
+
+        Raw segments are split between the tiers, the rollups being kept
+        in the hot tier, and each tier folds its segments concurrently.
+
+        Args:
+            key (str): The key of the sorted set.
+            segments (Sequence[Tuple[int, str, str]]): The segments to
+            aggregate.
+
+        Returns:
+            Dict: The sum, count, min and max of the values found. Min and
+            max are None when nothing was found.
+        """
+        archived_until = self.get_archived_until(key=key)
+        cold_segments, hot_segments = [], []
+        for resolution, start, end in segments:
+            if resolution:
+                hot_segments.append((resolution, start, end))
+                continue
+            cold_range, hot_range = _split_range(start, end, archived_until)
+            if cold_range:
+                cold_segments.append((resolution, *cold_range))
+            if hot_range:
+                hot_segments.append((resolution, *hot_range))
+
+        cold_future = None
+        if cold_segments:
+            cold_future = self.executor.submit(
+                self.cold.get_z_stats_by_segments, key=key, segments=cold_segments
+            )
+        stats = {"sum": 0.0, "count": 0, "min": None, "max": None}
+        if hot_segments:
+            stats = self.hot.get_z_stats_by_segments(key=key, segments=hot_segments)
+        if cold_future:
+            cold_stats = cold_future.result()
+            _fold_stats(
+                stats,
+                cold_stats["sum"],
+                cold_stats["count"],
+                cold_stats["min"],
+                cold_stats["max"]
+            )
+        return stats
+
+    def scan_z_members(
+        self,
+        key: str,
+        batch_size: int
+    ) -> Iterator[List[Tuple[bytes, float]]]:
+        """
+        Iterate over all the members of a sorted set in batches, those of
+        the archive first.
+
+        Args:
+            key (str): The key of the sorted set.
+            batch_size (int): The maximum number of members per batch.
+
+        Yields:
+            List[Tuple[bytes, float]]: Batches of members with their scores.
+        """
+        return itertools.chain(
+            self.cold.scan_z_members(key=key, batch_size=batch_size),
+            self.hot.scan_z_members(key=key, batch_size=batch_size)
+        )
+
+    def replace_data(self, key: str, removed: List, value: Dict) -> None:
+        """
+        Remove members from a sorted set of both tiers and add new ones to
+        the tier of their score.
+
+        Args:
+            key (str): The key of the sorted set.
+            removed (List): The members to be removed.
+            value (Dict): The members to be added, with their scores.
+        """
+        archived_until = self.get_archived_until(key=key)
+        archived = {
+            member: score for member, score in value.items()
+            if archived_until is not None and score < archived_until
+        }
+        self.cold.replace_data(key=key, removed=removed, value=archived)
+        self.hot.replace_data(
+            key=key,
+            removed=removed,
+            value={
+                member: score for member, score in value.items()
+                if member not in archived
+            }
+        )
+
+    def remove_z_range_by_score(self, key: str, start: str, end: str) -> int:
+        """
+        Remove the members of a sorted set scored from the start of the
+        series to `end` from the hot tier.
+
+        The archive keeps the whole history of the series: the members are
+        moved to it rather than dropped, so trimming the hot tier, as the
+        retention task does, never loses raw data.
+
+        Args:
+            key (str): The key of the sorted set.
+            start (str): The start of the score range, only `-inf` is
+            supported.
+            end (str): The end of the score range.
+
+        Returns:
+            int: The number of members removed from the hot tier.
+        """
+        low, _ = _parse_bound(start)
+        if low != float("-inf"):
+            raise ValueError("Only ranges starting at -inf can be removed from the tiered storage.")
+        high, exclusive = _parse_bound(end)
+        before = high if exclusive else math.nextafter(high, math.inf)
+        return self.archive_z_range(key=key, before=before)
+
+    def archive_z_range(self, key: str, before: float, batch_size: int = 1000) -> int:
+        """
+        Move the members of a sorted set scored before `before` from the
+        hot tier to the archive.
+
+        The members are copied before the watermark moves and removed
+        from the hot tier after it, so readers find them in one tier or
+        the other at any time. Members written to the hot tier before an
+        earlier watermark are moved as well.
+
+        Args:
+            key (str): The key of the sorted set.
+            before (float): The score before which members are archived.
+            batch_size (int, optional): The number of members copied per
+            round-trip. Defaults to 1000.
+
+        Returns:
+            int: The number of members moved.
+        """
+        for range_data in self.hot.iter_z_range_by_score(
+            key=key,
+            start="-inf",
+            end=f"({before}",
+            batch_size=batch_size
+        ):
+            self.cold.set_data(key=key, value=dict(range_data))
+
+        archived_until = self.get_archived_until(key=key)
+        if archived_until is None or archived_until < before:
+            self.cold.set_value(key=_archive_key(key), value=before)
+        return self.hot.remove_z_range_by_score(key=key, start="-inf", end=f"({before}")
+
+    def publish(self, channel: str, message: str) -> None:
+        """
+        Publish a message to the subscribers of a channel of the hot tier.
+
+        Args:
+            channel (str): The channel to publish to.
+            message (str): The message to publish.
+        """
+        self.hot.publish(channel=channel, message=message)
+
+    def publish_many(self, messages: Sequence[Tuple[str, str]]) -> None:
+        """
+        Publish several messages through the hot tier, each to its own
+        channel.
+
+        Args:
+            messages (Sequence[Tuple[str, str]]): The `(channel, message)`
+            pairs to publish, in order.
+        """
+        self.hot.publish_many(messages=messages)
+
+    @property
+    def supports_pubsub(self) -> bool:
+        """
+        Whether `subscribe` yields the messages published through
+        `publish`, as the hot tier does.
+        """
+        return self.hot.supports_pubsub
+
+    def subscribe(self, channel: str, on_subscribed: Callable[[], None]) -> Iterator[bytes]:
+        """
+        Subscribe to a channel of the hot tier and yield its messages as
+        they arrive.
+
+        Args:
+            channel (str): The channel to subscribe to.
+            on_subscribed (Callable[[], None]): Called once the
+            subscription is active, before yielding any message.
+
+        Yields:
+            bytes: The messages published to the channel.
+        """
+        return self.hot.subscribe(channel=channel, on_subscribed=on_subscribed)
+
+    def set_value(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        """
+        Set a plain value in the hot tier, optionally expiring after some
+        seconds.
+
+        Args:
+            key (str): The key under which the value should be stored.
+            value (str): The value to be stored.
+            expire (Optional[int], optional): Seconds until the value
+            expires. Defaults to None, never.
+        """
+        self.hot.set_value(key=key, value=value, expire=expire)
+
+    def get_value(self, key: str) -> Optional[bytes]:
+        """
+        Retrieve a plain value from the hot tier.
+
+        Args:
+            key (str): The key of the value.
+
+        Returns:
+            Optional[bytes]: The value, None if missing or expired.
+        """
+        return self.hot.get_value(key=key)
+
+    def get_rollup_since(self, key: str) -> Optional[float]:
+        """
+        Retrieve the score from which the rollup buckets, all kept in the
+        hot tier, are complete.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Optional[float]: The watermark, or None if the sorted set has
+            no rollups yet.
+        """
+        return self.hot.get_rollup_since(key=key)
+
+    def set_rollup_since(self, key: str, since: float) -> None:
+        """
+        Set the score from which the rollup buckets are complete.
+
+        Args:
+            key (str): The key of the sorted set.
+            since (float): The watermark.
+        """
+        self.hot.set_rollup_since(key=key, since=since)
+
+    def set_rollup_buckets(self, key: str, resolution: int, buckets: Dict[float, Tuple]) -> None:
+        """
+        Overwrite rollup buckets of a sorted set in the hot tier.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            buckets (Dict[float, Tuple]): The values of the
+            `ROLLUP_FIELDS` of each bucket, by bucket start.
+        """
+        self.hot.set_rollup_buckets(key=key, resolution=resolution, buckets=buckets)
+
+    def remove_rollup_buckets(self, key: str, resolution: int, before: float) -> int:
+        """
+        Remove the rollup buckets of a sorted set starting before a score.
+        They are not archived, the coarser buckets kept cover their range.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            before (float): The bucket start before which they are removed.
+
+        Returns:
+            int: The number of buckets removed.
+        """
+        return self.hot.remove_rollup_buckets(key=key, resolution=resolution, before=before)
+
+    def get_rollup_series(
+        self,
+        key: str,
+        resolution: int,
+        start: str,
+        end: str,
+        offset: int = 0,
+        count: int = -1
+    ) -> Tuple[int, List[Tuple]]:
+        """
+        Retrieve a page of the rollup buckets starting within a score
+        range, along with their start and the number of buckets in the
+        range.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            start (str): The minimum bucket start.
+            end (str): The maximum bucket start.
+            offset (int, optional): The number of buckets to skip.
+            count (int, optional): The maximum number of buckets to
+            return, -1 for all of them and 0 to only count the range.
+
+        Returns:
+            Tuple[int, List[Tuple]]: The number of buckets in the range
+            and the start and `ROLLUP_FIELDS` of the buckets of the page.
+        """
+        return self.hot.get_rollup_series(
+            key=key,
+            resolution=resolution,
+            start=start,
+            end=end,
+            offset=offset,
+            count=count
+        )
+
+    def get_rollup_buckets(
+        self,
+        key: str,
+        resolution: int,
+        start: str,
+        end: str
+    ) -> List[Tuple[float, int, float, float]]:
+        """
+        Retrieve the rollup buckets starting within a score range.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The bucket width in seconds.
+            start (str): The minimum bucket start.
+            end (str): The maximum bucket start.
+
+        Returns:
+            List[Tuple[float, int, float, float]]: The sum, count, min
+            and max of every bucket.
+        """
+        return self.hot.get_rollup_buckets(key=key, resolution=resolution, start=start, end=end)
+
+    def get_retention(self, key: str) -> Dict[int, float]:
+        """
+        Retrieve the score from which the data of each resolution of a
+        sorted set is kept in the hot tier.
+
+        The raw members trimmed from the hot tier are kept in the archive,
+        so the raw members (resolution 0) are never reported as trimmed.
+
+        Args:
+            key (str): The key of the sorted set.
+
+        Returns:
+            Dict[int, float]: The score from which the data is kept by
+            resolution, missing resolutions being kept forever.
+        """
+        return {
+            resolution: since
+            for resolution, since in self.hot.get_retention(key=key).items()
+            if resolution != 0
+        }
+
+    def set_retention(self, key: str, resolution: int, since: float) -> None:
+        """
+        Set the score from which the data of a resolution of a sorted set
+        is kept in the hot tier. The horizon of the raw members (resolution
+        0) isn't recorded, as the archive keeps them.
+
+        Args:
+            key (str): The key of the sorted set.
+            resolution (int): The resolution, 0 being the raw members.
+            since (float): The score from which the data is kept.
+        """
+        if resolution != 0:
+            self.hot.set_retention(key=key, resolution=resolution, since=since)